@@ -0,0 +1,28 @@
+# Подмодули грузятся по первому обращению к имени (PEP 562): `from batch.pool import ...`
+# не тянет за собой http.server из service и прочие режимы, которые в этом запуске не нужны.
+from importlib import import_module
+
+_EXPORTS = {
+    "BatchTask": ".pool", "BatchItemResult": ".pool", "BatchReport": ".pool",
+    "run_batch": ".pool", "write_report": ".pool",
+    "JsonlStats": ".jsonl", "run_jsonl": ".jsonl",
+    "BuildManifest": ".manifest", "code_fingerprint": ".manifest", "backend_version": ".manifest",
+    "output_options": ".manifest",
+    "CheckpointJournal": ".checkpoint",
+    "SupervisedPool": ".supervisor",
+    "select_shard": ".shard", "merge_shards": ".shard",
+    "FolderWatcher": ".watch",
+    "CalcService": ".service",
+    "canonical_key": ".dedup", "plan_dedup": ".dedup",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
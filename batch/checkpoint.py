@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, TextIO, Tuple
+
+from logger_config import get_logger
+from batch.manifest import file_sha256
+from batch.pool import BatchItemResult, BatchTask
+
+log = get_logger("BatchCheckpoint")
+
+CHECKPOINT_NAME = "_batch_checkpoint.jsonl"
+
+_ITEM_FIELDS = {f.name for f in fields(BatchItemResult)}
+
+
+class CheckpointJournal:
+    """
+    Журнал завершённых элементов батча (JSONL, append-only).
+    Каждая строка — BatchItemResult, sha256 входа и версия, которой он посчитан (version: code_hash,
+    backend, options — как в манифесте); fsync раз в every элементов и/или раз в seconds секунд.
+    Оборванная последняя строка (падение посреди записи) при чтении игнорируется.
+    """
+
+    def __init__(self, path: Path, *, every: int = 1, seconds: float = 0.0,
+                 version: Optional[Mapping[str, str]] = None) -> None:
+        self.path = path
+        self.version = dict(version or {})
+        self.every = max(1, int(every))
+        self.seconds = float(seconds)
+        self._f: Optional[TextIO] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # -------------------- чтение --------------------
+
+    @staticmethod
+    def _read(path: Path) -> Iterator[Tuple[BatchItemResult, Dict[str, Any]]]:
+        """(результат, вся запись журнала — с sha256 входа и версией) — по строкам журнала."""
+        try:
+            f = path.open("r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for lineno, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                    item = BatchItemResult(**{k: v for k, v in rec.items() if k in _ITEM_FIELDS})
+                except Exception as e:
+                    log.warning("Чекпоинт %s: строка %d пропущена (%s)", path, lineno, e)
+                    continue
+                yield item, rec
+
+    @staticmethod
+    def load(path: Path) -> Dict[str, BatchItemResult]:
+        """rel → последний записанный результат."""
+        return {item.rel: item for item, _ in CheckpointJournal._read(path)}
+
+    @staticmethod
+    def resume(path: Path, tasks: Sequence[BatchTask], version: Optional[Mapping[str, str]] = None,
+               ) -> Tuple[List[BatchItemResult], List[BatchTask], Dict[str, str]]:
+        """
+        (восстановленные из журнала, оставшиеся к расчёту, rel → sha256 входа восстановленных).
+        Восстанавливаем только записи, посчитанные по текущему содержимому входа и той же версией
+        (код, бэкенд физсвойств, опции выхода): иначе файл уходит в пересчёт.
+        """
+        version = dict(version or {})
+        done = {item.rel: (item, rec) for item, rec in CheckpointJournal._read(path)}
+        restored: List[BatchItemResult] = []
+        remaining: List[BatchTask] = []
+        digests: Dict[str, str] = {}
+        for task in tasks:
+            item, rec = done.get(task.rel, (None, {}))
+            digest = rec.get("input_sha256")
+            stale = [k for k, v in version.items() if rec.get(k) != v]
+            if item is not None and digest and not stale and digest == file_sha256(task.src):
+                restored.append(item)
+                digests[task.rel] = digest
+            else:
+                if item is not None and stale:
+                    log.info("Чекпоинт: %s посчитан другой версией (%s) — пересчитываем", task.rel, ", ".join(stale))
+                elif item is not None:
+                    log.info("Чекпоинт: %s изменился после записи — пересчитываем", task.rel)
+                remaining.append(task)
+        return restored, remaining, digests
+
+    # -------------------- запись --------------------
+
+    def open(self, *, resume: bool) -> "CheckpointJournal":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._drop_torn_tail()
+        self._f = self.path.open("a" if resume else "w", encoding="utf-8")
+        return self
+
+    def _drop_torn_tail(self) -> None:
+        """Если файл оборван посреди строки — отрезаем хвост, чтобы дописывать с новой строки."""
+        data = self.path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            cut = data.rfind(b"\n") + 1
+            with self.path.open("r+b") as f:
+                f.truncate(cut)
+
+    def append(self, item: BatchItemResult, input_sha256: Optional[str] = None) -> None:
+        """input_sha256 — хеш входа, по которому посчитан item: --resume сверит его с текущим."""
+        assert self._f is not None, "CheckpointJournal.open() не вызван"
+        rec = {**asdict(item), "input_sha256": input_sha256, **self.version}
+        self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+        if self._unsynced >= self.every or (self.seconds > 0 and time.monotonic() - self._last_sync >= self.seconds):
+            self.sync()
+
+    def sync(self) -> None:
+        if self._f is None or not self._unsynced:
+            return
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if self._f is None:
+            return
+        self.sync()
+        self._f.close()
+        self._f = None
+
+    def __enter__(self) -> "CheckpointJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+__all__ = ["CheckpointJournal", "CHECKPOINT_NAME"]
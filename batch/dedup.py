@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from logger_config import get_logger
+from batch.pool import BatchItemResult, BatchTask
+
+log = get_logger("BatchDedup")
+
+KeyFn = Callable[[Path], Optional[str]]
+
+
+# -------------------- канонический ключ --------------------
+
+# Узлы, которые InputController.parse переводит в SI: в ключе они представлены values_si,
+# исходные {"real", "unit"} отбрасываются, поэтому 2 МПа и 2000 кПа дают один ключ.
+# T сюда не входит: run_calculation читает T.real напрямую как °C (термокоррекция).
+_SI_PHYS = ("p_abs", "p_atm", "p_st", "dp", "T_st")
+_SI_LEN = {"d20": ("d20",), "D20": ("D20", "D")}
+# Разделы входа, которые читает run_calculation; прочее (ctrlRequest, идентификаторы) в ключ не идёт.
+_READ_SECTIONS = ("physPackage", "lenPackage", "errorPackage", "compositionErrorPackage")
+
+
+def _num(v: Any) -> float:
+    """12 значащих цифр: 0.9·100 и 90 после перевода единиц/нормировки — одно число."""
+    return float(f"{float(v):.12g}")
+
+
+def canonical_key(data: Mapping[str, Any], values_si: Mapping[str, float]) -> str:
+    """
+    Ключ запроса: нормализованный тип ССУ + SI-значения из InputController.parse + состав
+    physPackage, нормированный к 100 % (normalize_composition_percent_map, как перед физикой)
+    + остальные поля разделов, которые читает run_calculation, в каноническом JSON.
+    Узлы, уже учтённые в values_si, из исходного входа выбрасываются. Состав
+    compositionErrorPackage остаётся как есть: CompositionCalculator и u_i считают по исходным долям.
+    """
+    from phys_prop.calc_phys_prop import normalize_composition_percent_map
+
+    raw = json.loads(json.dumps({k: data.get(k) for k in _READ_SECTIONS if k in data}, default=str))
+    pkg = raw.get("physPackage") if isinstance(raw.get("physPackage"), dict) else {}
+    phys = pkg.get("physProperties") if isinstance(pkg.get("physProperties"), dict) else {}
+    for k in _SI_PHYS:
+        if k in values_si:
+            phys.pop(k, None)
+            pkg.pop(k, None)
+    lens = (raw.get("lenPackage") or {}).get("lenProperties") if isinstance(raw.get("lenPackage"), dict) else None
+    if isinstance(lens, dict):
+        for k, nodes in _SI_LEN.items():
+            if k in values_si:
+                for node in nodes:
+                    lens.pop(node, None)
+    comp = phys.pop("composition", None)
+    if isinstance(comp, dict):
+        comp = sorted((k, _num(v)) for k, v in normalize_composition_percent_map(comp).items())
+    canon = {
+        "type": str(data.get("type") or "").strip().lower(),  # run_calculation делает strip().lower()
+        "values_si": {k: _num(v) for k, v in sorted(values_si.items())},
+        "composition": comp,
+        "payload": raw,
+    }
+    blob = json.dumps(canon, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# -------------------- план --------------------
+
+@dataclass
+class DedupPlan:
+    unique: List[BatchTask] = field(default_factory=list)
+    followers: Dict[str, List[BatchTask]] = field(default_factory=dict)  # rel представителя → дубликаты
+
+    @property
+    def hits(self) -> int:
+        return sum(len(v) for v in self.followers.values())
+
+    def fan_out(self, item: BatchItemResult) -> List[BatchItemResult]:
+        """Результат представителя → результаты дубликатов (копия выхода или та же ошибка)."""
+        out: List[BatchItemResult] = []
+        for task in self.followers.get(item.rel, ()):
+            dup = replace(item, rel=task.rel, src=str(task.src), dst=str(task.dst), seconds=0.0, dedup_of=item.rel)
+            if item.ok:
+                try:
+                    task.dst.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(item.dst, task.dst)
+                    log.info("Дубликат %s: результат скопирован из %s", task.rel, item.rel)
+                except OSError as e:
+                    dup = replace(dup, status="failed", error=f"копирование результата дубликата: {e}",
+                                  error_type=type(e).__name__, traceback=None)
+            out.append(dup)
+        return out
+
+
+def plan_dedup(tasks: List[BatchTask], key_fn: KeyFn) -> DedupPlan:
+    """Первый (в порядке tasks) вход с данным ключом считается, остальные получают его результат.
+    Вход без ключа (не читается/не парсится) идёт в расчёт как есть — ошибка всплывёт там."""
+    plan = DedupPlan()
+    owner: Dict[str, BatchTask] = {}
+    for task in tasks:
+        try:
+            key = key_fn(task.src)
+        except Exception as e:
+            log.debug("Ключ дедупликации для %s не построен: %s", task.rel, e)
+            key = None
+        if key is None or key not in owner:
+            if key is not None:
+                owner[key] = task
+            plan.unique.append(task)
+        else:
+            plan.followers.setdefault(owner[key].rel, []).append(task)
+    if plan.hits:
+        log.info("Дедупликация: уникальных запросов %d, совпадений %d", len(plan.unique), plan.hits)
+    return plan
+
+
+__all__ = ["canonical_key", "DedupPlan", "plan_dedup"]
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, TextIO, Tuple
+
+from logger_config import get_logger
+from batch.pool import HEAVY_MODULES, _preload
+from perf.metrics import REGISTRY, with_worker_delta
+
+log = get_logger("BatchJsonl")
+
+CalcFn = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+STDIO = "-"
+
+
+@dataclass
+class JsonlStats:
+    total: int = 0
+    ok: int = 0
+    failed: int = 0
+    wall_seconds: float = 0.0
+
+
+# -------------------- потоки --------------------
+
+@contextmanager
+def open_jsonl(path: str, mode: str) -> Iterator[TextIO]:
+    """'-' → stdin/stdout (не закрываем), иначе — обычный файл в utf-8."""
+    if path == STDIO:
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, encoding="utf-8", newline="\n") as f:
+        yield f
+
+
+def iter_lines(stream: TextIO) -> Iterator[Tuple[int, str]]:
+    """(номер строки с 1, строка) — пустые строки пропускаем, файл целиком не читаем."""
+    for lineno, line in enumerate(stream, start=1):
+        line = line.strip()
+        if line:
+            yield lineno, line
+
+
+# -------------------- одна строка --------------------
+
+def calc_line(calc_fn: CalcFn, json_default: Optional[Callable[[Any], Any]],
+              lineno: int, line: str) -> Tuple[str, bool]:
+    """
+    Строка запроса → строка ответа. Запрос — либо сам payload, либо {"request_id", "request": payload}.
+    request_id берём из request_id/id, иначе 'line-<N>'.
+    """
+    request_id = f"line-{lineno}"
+    try:
+        obj = json.loads(line)
+        if not isinstance(obj, dict):
+            raise ValueError("строка JSONL должна быть JSON-объектом")
+        request_id = str(obj.get("request_id") or obj.get("id") or request_id)
+        payload = obj["request"] if isinstance(obj.get("request"), dict) else obj
+        out = {"request_id": request_id, "status": "ok", **calc_fn(payload)}
+        ok = True
+    except Exception as e:
+        log.error("Ошибка при обработке %s: %s", request_id, e)
+        out = {"request_id": request_id, "status": "failed", "error": str(e), "error_type": type(e).__name__}
+        ok = False
+    return json.dumps(out, ensure_ascii=False, default=json_default), ok
+
+
+def crash_line(lineno: int, line: str, error: BaseException) -> Tuple[str, bool]:
+    """Строка ответа на запрос, ответ на который не вернулся из пула (воркер умер, ошибка pickle)."""
+    request_id = f"line-{lineno}"
+    try:
+        obj = json.loads(line)
+        if isinstance(obj, dict):
+            request_id = str(obj.get("request_id") or obj.get("id") or request_id)
+    except ValueError:
+        pass
+    if isinstance(error, BrokenProcessPool):
+        out = {"request_id": request_id, "status": "failed",
+               "error": f"воркер завершился аварийно: {error}", "error_type": "WorkerCrashed"}
+    else:
+        out = {"request_id": request_id, "status": "failed", "error": str(error), "error_type": type(error).__name__}
+    return json.dumps(out, ensure_ascii=False), False
+
+
+# -------------------- потоковый прогон --------------------
+
+def run_jsonl(
+    src: TextIO,
+    dst: TextIO,
+    calc_fn: CalcFn,
+    *,
+    workers: int = 1,
+    window: int = 0,
+    json_default: Optional[Callable[[Any], Any]] = None,
+    preload: Sequence[str] = HEAVY_MODULES,
+) -> JsonlStats:
+    """
+    Читает запросы построчно и пишет по одной строке результата на запрос, в порядке входа.
+    В пуле одновременно «в полёте» не больше window строк (по умолчанию workers*4),
+    поэтому память ограничена независимо от размера входа.
+    """
+    stats = JsonlStats()
+    t0 = time.perf_counter()
+
+    def _emit(out_line: str, ok: bool) -> None:
+        dst.write(out_line + "\n")
+        dst.flush()
+        stats.total += 1
+        if ok:
+            stats.ok += 1
+        else:
+            stats.failed += 1
+
+    if workers <= 1:
+        for lineno, line in iter_lines(src):
+            _emit(*calc_line(calc_fn, json_default, lineno, line))
+    else:
+        window = window or workers * 4
+        pending: deque = deque()  # (lineno, line, future) в порядке входа
+
+        def _pool() -> ProcessPoolExecutor:
+            return ProcessPoolExecutor(max_workers=workers, initializer=_preload, initargs=(tuple(preload),))
+
+        ex = _pool()
+
+        def _submit(lineno: int, line: str) -> Future:
+            try:
+                return ex.submit(with_worker_delta, calc_line, calc_fn, json_default, lineno, line)
+            except BrokenProcessPool as e:
+                # пул сломался раньше, чем до этой строки дошла очередь выдачи, — она уйдёт
+                # на повтор вместе с остальными строками «в полёте»
+                fut: Future = Future()
+                fut.set_exception(e)
+                return fut
+
+        def _restart() -> None:
+            nonlocal ex
+            ex.shutdown(wait=False, cancel_futures=True)
+            ex = _pool()
+
+        def _emit_pooled() -> None:
+            lineno, line, fut = pending.popleft()
+            try:
+                res, delta = fut.result()
+            except BrokenProcessPool:
+                # Воркер умер (segfault, OOM killer) — сломан весь пул, а не только эта строка.
+                # Строку повторяем одну в новом пуле: упадёт снова — виновата она; строки «в полёте»,
+                # не успевшие досчитаться, отправляем заново.
+                log.error("Пул воркеров сломан на строке %d — пул пересоздаётся", lineno)
+                _restart()
+                try:
+                    res, delta = _submit(lineno, line).result()
+                except BrokenProcessPool as e:
+                    log.error("Строка %d роняет воркер: %s", lineno, e)
+                    _restart()
+                    res, delta = crash_line(lineno, line, e), None
+                for i, (n, text, f) in enumerate(pending):
+                    if not (f.done() and not f.cancelled() and f.exception() is None):
+                        pending[i] = (n, text, _submit(n, text))
+            except Exception as e:
+                # ошибка передачи результата между процессами (pickle) — пул цел
+                log.error("Ошибка при обработке строки %d: %s", lineno, e)
+                res, delta = crash_line(lineno, line, e), None
+            REGISTRY.merge(delta)
+            _emit(*res)
+
+        try:
+            for lineno, line in iter_lines(src):
+                pending.append((lineno, line, _submit(lineno, line)))
+                if len(pending) >= window:
+                    _emit_pooled()
+            while pending:
+                _emit_pooled()
+        finally:
+            ex.shutdown(wait=True, cancel_futures=True)
+
+    stats.wall_seconds = time.perf_counter() - t0
+    return stats
+
+
+__all__ = ["JsonlStats", "open_jsonl", "iter_lines", "calc_line", "crash_line", "run_jsonl", "STDIO"]
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logger_config import get_logger
+from batch.pool import BatchTask
+
+log = get_logger("BatchManifest")
+
+MANIFEST_NAME = "_batch_manifest.json"
+MANIFEST_VERSION = 1
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Всё, от чего зависит результат расчёта: код пакетов + табличные данные (ГСССД и т.п.)
+CALC_PACKAGES = (
+    "controllers",
+    "calc_flow",
+    "converters",
+    "errors",
+    "flow_straightness",
+    "orifices_classes",
+    "perf",  # perf.timings пишет блок _timings в выходы
+    "phys_prop",
+    "prilojenie_B_part_3",
+)
+CALC_FILES = ("main.py",)
+CALC_SUFFIXES = (".py", ".txt")
+
+
+# -------------------- хеши --------------------
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _iter_code_files(root: Path) -> Iterable[Path]:
+    for name in CALC_FILES:
+        p = root / name
+        if p.is_file():
+            yield p
+    for pkg in CALC_PACKAGES:
+        for p in (root / pkg).rglob("*"):
+            if not p.is_file() or p.suffix not in CALC_SUFFIXES:
+                continue
+            parts = p.relative_to(root).parts  # не абсолютный путь: checkout может лежать в .../tests/...
+            if "__pycache__" in parts or p.name.startswith("test_") or "tests" in parts:
+                continue
+            yield p
+
+
+def code_fingerprint(root: Path = ROOT) -> str:
+    """Хеш модулей расчёта: при любой правке кода все выходы считаются устаревшими."""
+    h = hashlib.sha256()
+    for p in sorted(_iter_code_files(root), key=lambda x: x.relative_to(root).as_posix()):
+        h.update(p.relative_to(root).as_posix().encode("utf-8"))
+        h.update(b"\0")
+        h.update(file_sha256(p).encode("ascii"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def backend_version() -> str:
+    """
+    Версия настроенного бэкенда физсвойств (phys_prop.backends); для PyFizika — без импорта пакета.
+    Пока ответы могут браться из кэша физсвойств, в версию входит и его квантование, а с
+    суррогатными таблицами — их набор.
+    """
+    from phys_prop.backends import DEFAULT_BACKEND, configured_name, get_backend
+    from phys_prop.cache import ENV_DB, PHYS_CACHE, quantization_tag
+    from phys_prop.surrogate import tables_version
+
+    name = configured_name()
+    version = pyfizika_version() if name == DEFAULT_BACKEND else f"{name}:{get_backend(name).version()}"
+    if PHYS_CACHE.enabled or os.environ.get(ENV_DB):
+        version += f"+{quantization_tag()}"
+    tables = tables_version()
+    if tables:
+        version += f"+{tables}"
+    return version
+
+
+def output_options() -> str:
+    """Флаги запуска, меняющие содержимое выходов: --timings добавляет в результат блок _timings."""
+    from perf.timings import env_enabled
+
+    return "timings" if env_enabled() else ""
+
+
+def pyfizika_version() -> str:
+    """Версия PyFizika (или 'missing'), не импортируя сам бэкенд."""
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            return version("PyFizika")
+        except PackageNotFoundError:
+            pass
+    except Exception:
+        pass
+    try:
+        from importlib.util import find_spec
+        spec = find_spec("PyFizika")
+    except Exception:
+        spec = None
+    if spec is None or not spec.origin:
+        return "missing"
+    # пакет без метаданных — версия по содержимому модуля
+    return "sha256:" + file_sha256(Path(spec.origin))[:16]
+
+
+# -------------------- манифест --------------------
+
+class BuildManifest:
+    """
+    Манифест рядом с выходами: {code_hash, backend, options, entries{rel: {input_sha256, output}}}.
+    Выход считается актуальным, если совпали хеш входа, хеш кода, версия бэкенда, флаги запуска,
+    меняющие выход (output_options), и файл выхода на месте.
+    """
+
+    def __init__(self, path: Path, code_hash: str, backend: str,
+                 entries: Optional[Dict[str, Dict[str, str]]] = None, *, options: str = "") -> None:
+        self.path = path
+        self.code_hash = code_hash
+        self.backend = backend
+        self.options = options
+        self.entries: Dict[str, Dict[str, str]] = entries or {}
+
+    @classmethod
+    def load(cls, outdir: Path, code_hash: str, backend: str, *, options: str = "") -> "BuildManifest":
+        path = outdir / MANIFEST_NAME
+        entries: Dict[str, Dict[str, str]] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if (data.get("version") == MANIFEST_VERSION
+                    and data.get("code_hash") == code_hash
+                    and data.get("backend") == backend
+                    and data.get("options", "") == options):
+                entries = dict(data.get("entries") or {})
+            else:
+                log.info("Манифест %s устарел (код/бэкенд/флаги запуска изменились) — пересчитываем всё", path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning("Манифест %s не прочитан: %s — пересчитываем всё", path, e)
+        return cls(path, code_hash, backend, entries, options=options)
+
+    def is_fresh(self, task: BatchTask, input_sha256: str) -> bool:
+        entry = self.entries.get(task.rel)
+        return bool(entry) and entry.get("input_sha256") == input_sha256 and task.dst.is_file()
+
+    def partition(self, tasks: Iterable[BatchTask]) -> Tuple[List[BatchTask], List[BatchTask], Dict[str, str]]:
+        """(к пересчёту, актуальные, rel → sha256 входа)."""
+        todo: List[BatchTask] = []
+        fresh: List[BatchTask] = []
+        digests: Dict[str, str] = {}
+        for task in tasks:
+            digest = file_sha256(task.src)
+            digests[task.rel] = digest
+            (fresh if self.is_fresh(task, digest) else todo).append(task)
+        return todo, fresh, digests
+
+    def record(self, rel: str, input_sha256: str, output: str) -> None:
+        self.entries[rel] = {"input_sha256": input_sha256, "output": output}
+
+    def forget(self, rel: str) -> None:
+        self.entries.pop(rel, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "code_hash": self.code_hash,
+            "backend": self.backend,
+            "options": self.options,
+            "entries": dict(sorted(self.entries.items())),
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+__all__ = [
+    "BuildManifest",
+    "MANIFEST_NAME",
+    "code_fingerprint",
+    "backend_version",
+    "output_options",
+    "pyfizika_version",
+    "file_sha256",
+]
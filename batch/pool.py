@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import traceback
+from dataclasses import dataclass
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from logger_config import get_logger
+from perf import metrics
+
+log = get_logger("BatchPool")
+
+_ITEMS = metrics.counter("new_ssu_batch_items_total", "Обработанные файлы пакетного запуска по статусу")
+_ITEM_SECONDS = metrics.histogram("new_ssu_batch_item_seconds", "Время обработки одного файла (чтение, расчёт, запись), с")
+
+# Тяжёлые модули, которые воркер импортирует один раз при старте (PyFizika, таблицы ГСССД и т.п.)
+HEAVY_MODULES: Sequence[str] = (
+    "controllers.input_controller",
+    "controllers.calculation_adapter",
+)
+
+# служебные файлы батча в outdir (не являются входами/выходами расчёта)
+SERVICE_PREFIX = "_batch_"
+REPORT_NAME = "_batch_report.json"
+FAILURES_NAME = "_batch_failures.json"
+
+ProcessFn = Callable[[Path, Path], None]
+
+
+# -------------------- контейнеры --------------------
+
+@dataclass(frozen=True)
+class BatchTask:
+    src: Path
+    dst: Path
+    rel: str  # относительный путь входа (posix) — ключ для сортировки и манифестов
+
+
+@dataclass
+class BatchItemResult:
+    rel: str
+    src: str
+    dst: str
+    status: str  # "ok" | "failed" | "timeout"
+    seconds: float
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    traceback: Optional[str] = None
+    pid: Optional[int] = None
+    dedup_of: Optional[str] = None  # rel входа, чей результат скопирован (дубликат запроса)
+    metrics: Optional[Dict[str, Any]] = None  # приращение метрик воркера; сливается в родителе и обнуляется
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+@dataclass
+class BatchReport:
+    items: List[BatchItemResult]
+    wall_seconds: float
+    workers: int
+    skipped: int = 0  # актуальные выходы, не пересчитывались
+    resumed: int = 0  # завершены в прерванном запуске (из журнала чекпоинта)
+    dedup_hits: int = 0  # дубликаты, получившие результат без расчёта
+
+    @property
+    def ok_count(self) -> int:
+        return sum(1 for it in self.items if it.ok)
+
+    @property
+    def failed(self) -> List[BatchItemResult]:
+        return sorted((it for it in self.items if not it.ok), key=lambda it: it.rel)
+
+    def to_dict(self) -> Dict[str, Any]:
+        items = sorted(self.items, key=lambda it: it.rel)
+        return {
+            "workers": self.workers,
+            "total": len(self.items),
+            "ok": self.ok_count,
+            "failed": sum(1 for it in self.items if it.status == "failed"),
+            "timeout": sum(1 for it in self.items if it.status == "timeout"),
+            "skipped": self.skipped,
+            "resumed": self.resumed,
+            "dedup_hits": self.dedup_hits,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": sum(it.seconds for it in items),
+            "items": [
+                {"rel": it.rel, "status": it.status, "seconds": it.seconds, "pid": it.pid, "dedup_of": it.dedup_of}
+                for it in items
+            ],
+        }
+
+    def failures_manifest(self) -> Dict[str, Any]:
+        """Детерминированный манифест ошибок: отсортирован по rel, без времён и pid."""
+        return {
+            "failed": [
+                {
+                    "rel": it.rel,
+                    "src": it.src,
+                    "status": it.status,
+                    "error_type": it.error_type,
+                    "error": it.error,
+                    "traceback": it.traceback,
+                }
+                for it in self.failed
+            ]
+        }
+
+
+# -------------------- исполнение одного элемента --------------------
+
+def _preload(modules: Sequence[str]) -> None:
+    """initializer воркера: прогреваем импорты один раз на процесс."""
+    for name in modules:
+        try:
+            import_module(name)
+        except Exception as e:
+            # не роняем воркер — ошибка всплывёт на конкретном файле с нормальным traceback
+            log.warning("Предзагрузка %s не удалась: %s", name, e)
+
+
+def _execute(process_fn: ProcessFn, task: BatchTask) -> BatchItemResult:
+    t0 = time.perf_counter()
+    try:
+        process_fn(task.src, task.dst)
+    except Exception as e:
+        return BatchItemResult(
+            rel=task.rel, src=str(task.src), dst=str(task.dst), status="failed",
+            seconds=time.perf_counter() - t0,
+            error=str(e), error_type=type(e).__name__,
+            traceback=traceback.format_exc(), pid=os.getpid(),
+            metrics=metrics.worker_delta(),
+        )
+    return BatchItemResult(
+        rel=task.rel, src=str(task.src), dst=str(task.dst), status="ok",
+        seconds=time.perf_counter() - t0, pid=os.getpid(),
+        metrics=metrics.worker_delta(),
+    )
+
+
+def _merge_metrics(item: BatchItemResult) -> None:
+    """Метрики воркера → реестр этого процесса; в журнал и отчёт приращение не попадает."""
+    if item.metrics:
+        metrics.REGISTRY.merge(item.metrics)
+        item.metrics = None
+    _ITEMS.inc(status=item.status)
+    _ITEM_SECONDS.observe(item.seconds)
+
+
+def _log_item(item: BatchItemResult) -> None:
+    if item.ok:
+        log.info("Обработан %s за %.3f с", item.rel, item.seconds)
+    else:
+        # тот же текст, что и у logger.exception в последовательном режиме, + traceback из воркера
+        # (у timeout/аварии воркера traceback нет)
+        log.error("Ошибка при обработке %s: %s\n%s", item.src, item.error, (item.traceback or "").rstrip())
+
+
+# -------------------- пакетный запуск --------------------
+
+def run_batch(
+    tasks: Iterable[BatchTask],
+    process_fn: ProcessFn,
+    *,
+    workers: int = 1,
+    preload: Sequence[str] = HEAVY_MODULES,
+    on_result: Optional[Callable[[BatchItemResult], None]] = None,
+    timeout_s: Optional[float] = None,
+    max_tasks_per_worker: int = 0,
+) -> BatchReport:
+    """
+    Прогоняет задачи через process_fn(src, dst).
+    workers <= 1 — в текущем процессе; иначе — SupervisedPool, результаты пишутся воркерами
+    сразу по готовности. process_fn должна быть функцией уровня модуля (pickle). Упавший воркер
+    (segfault, OOM killer) проваливает только свой элемент и заменяется новым. С timeout_s зависшие
+    воркеры убиваются, элемент получает статус "timeout"; с max_tasks_per_worker воркеры
+    перезапускаются после N задач.
+    """
+    tasks = list(tasks)
+    items: List[BatchItemResult] = []
+    t0 = time.perf_counter()
+
+    def _accept(item: BatchItemResult) -> None:
+        _merge_metrics(item)
+        items.append(item)
+        _log_item(item)
+        if on_result is not None:
+            on_result(item)
+
+    if workers > 1 or timeout_s or max_tasks_per_worker:
+        from batch.supervisor import SupervisedPool, OK, TIMEOUT
+
+        pool = SupervisedPool(workers, timeout_s=timeout_s, max_tasks=max_tasks_per_worker, preload=preload)
+        by_rel = {task.rel: task for task in tasks}
+        for rel, status, value, seconds in pool.run((t.rel, _execute, (process_fn, t)) for t in tasks):
+            if status == OK:
+                _accept(value)
+                continue
+            task = by_rel[rel]
+            if status == TIMEOUT:
+                error, error_type = f"превышен лимит времени {timeout_s:g} с", "Timeout"
+            else:
+                error, error_type = f"воркер завершился аварийно (exitcode={value})", "WorkerCrashed"
+            _accept(BatchItemResult(
+                rel=rel, src=str(task.src), dst=str(task.dst), status=status if status == TIMEOUT else "failed",
+                seconds=seconds, error=error, error_type=error_type,
+            ))
+    else:
+        for task in tasks:
+            _accept(_execute(process_fn, task))
+
+    return BatchReport(items=items, wall_seconds=time.perf_counter() - t0, workers=max(1, workers))
+
+
+def write_report(report: BatchReport, outdir: Path) -> None:
+    """Пишет в outdir сводку по времени и манифест ошибок."""
+    outdir.mkdir(parents=True, exist_ok=True)
+    with (outdir / REPORT_NAME).open("w", encoding="utf-8") as f:
+        json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+    with (outdir / FAILURES_NAME).open("w", encoding="utf-8") as f:
+        json.dump(report.failures_manifest(), f, ensure_ascii=False, indent=2)
+
+
+__all__ = [
+    "BatchTask",
+    "BatchItemResult",
+    "BatchReport",
+    "run_batch",
+    "write_report",
+    "HEAVY_MODULES",
+    "SERVICE_PREFIX",
+]
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import os
+import socketserver
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from logger_config import get_logger
+from batch.pool import HEAVY_MODULES, _preload
+from perf.metrics import REGISTRY, with_worker_delta
+
+log = get_logger("CalcService")
+
+CalcFn = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class CalcService:
+    """
+    Тёплый расчётный сервис: воркеры поднимаются один раз, импорты и кэши живут между запросами.
+    workers <= 1 — расчёт в процессе сервера, строго по одному (run_calculation не потокобезопасен:
+    подменяет for_package.RHO_FN_OVERRIDE). Упавший воркер (segfault, OOM killer) ломает весь пул:
+    пул пересоздаётся, запрос повторяется в новом один раз и, если роняет и его, уходит с BrokenProcessPool.
+    """
+
+    def __init__(self, calc_fn: CalcFn, *, workers: int = 1, preload: Sequence[str] = HEAVY_MODULES) -> None:
+        self.calc_fn = calc_fn
+        self.workers = max(1, int(workers))
+        self.preload = tuple(preload)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.served = 0
+        self.failed = 0
+        self.restarts = 0
+
+    def start(self) -> "CalcService":
+        if self.workers > 1:
+            self._pool = self._new_pool()
+        else:
+            _preload(self.preload)
+        return self
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_preload, initargs=(self.preload,))
+
+    def _restart(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Новый пул вместо сломанного; запросы, упавшие вместе с ним, пересоздают его один раз."""
+        with self._lock:
+            if self._pool is broken:
+                log.error("Пул воркеров сервиса сломан — пересоздаём")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+                self.restarts += 1
+            return self._pool
+
+    def _run_pooled(self, payload: Dict[str, Any]) -> Any:
+        pool = self._pool
+        try:
+            return pool.submit(with_worker_delta, self.calc_fn, payload).result()
+        except BrokenProcessPool:
+            # сломан весь пул, а не только этот запрос: повторяем его один в новом пуле —
+            # упадёт снова, значит, воркер роняет он
+            pool = self._restart(pool)
+        try:
+            return pool.submit(with_worker_delta, self.calc_fn, payload).result()
+        except BrokenProcessPool:
+            self._restart(pool)
+            raise
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def calculate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            if self._pool is not None:
+                # упавший расчёт оставляет приращение в воркере — оно приедет со следующим ответом
+                out, delta = self._run_pooled(payload)
+                REGISTRY.merge(delta)
+            else:
+                with self._lock:
+                    out = self.calc_fn(payload)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.served += 1
+        return out
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "workers": self.workers,
+            "uptime_s": time.time() - self.started,
+            "served": self.served,
+            "failed": self.failed,
+            "restarts": self.restarts,
+        }
+
+
+# -------------------- HTTP --------------------
+
+def _make_handler(service: CalcService, json_default: Optional[Callable[[Any], Any]]):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive: клиент не платит за соединение на каждый расчёт
+
+        def _send(self, code: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body, ensure_ascii=False, default=json_default).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/health":
+                self._send(200, service.health())
+            else:
+                self._send(404, {"error": f"неизвестный путь {self.path}"})
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") not in ("", "/calculate"):
+                self._send(404, {"error": f"неизвестный путь {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length).decode("utf-8"))
+                if not isinstance(payload, dict):
+                    raise ValueError("ожидается JSON-объект")
+            except Exception as e:
+                self._send(400, {"error": f"некорректный запрос: {e}", "error_type": type(e).__name__})
+                return
+            try:
+                out = service.calculate(payload)
+            except BrokenProcessPool as e:
+                log.error("Запрос роняет воркер: %s", e)
+                self._send(500, {"error": f"воркер упал на этом запросе: {e}", "error_type": type(e).__name__})
+                return
+            except Exception as e:
+                log.error("Ошибка расчёта: %s", e)
+                self._send(422, {"error": str(e), "error_type": type(e).__name__})
+                return
+            self._send(200, out)
+
+        def address_string(self) -> str:
+            # у AF_UNIX client_address — пустая строка
+            return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            log.debug("%s - %s", self.address_string(), fmt % args)
+
+    return Handler
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def make_server(service: CalcService, *, host: str = "127.0.0.1", port: int = 8765,
+                unix_socket: Optional[str] = None,
+                json_default: Optional[Callable[[Any], Any]] = None) -> socketserver.BaseServer:
+    handler = _make_handler(service, json_default)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        return _UnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(calc_fn: CalcFn, *, workers: int = 1, host: str = "127.0.0.1", port: int = 8765,
+          unix_socket: Optional[str] = None, json_default: Optional[Callable[[Any], Any]] = None) -> None:
+    service = CalcService(calc_fn, workers=workers).start()
+    server = make_server(service, host=host, port=port, unix_socket=unix_socket, json_default=json_default)
+    where = unix_socket or f"http://{host}:{server.server_address[1]}"
+    log.info("Сервис расчёта слушает %s (workers=%d): POST /calculate, GET /health", where, service.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Остановка сервиса по Ctrl+C")
+    finally:
+        server.server_close()
+        service.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+
+
+__all__ = ["CalcService", "make_server", "serve"]
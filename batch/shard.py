@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from logger_config import get_logger
+from batch.pool import FAILURES_NAME, REPORT_NAME, SERVICE_PREFIX, BatchTask
+from batch.manifest import MANIFEST_NAME, file_sha256
+
+log = get_logger("BatchShard")
+
+
+# -------------------- разбиение --------------------
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'i/N' (i от 1 до N) → (i, N)."""
+    try:
+        i_s, n_s = spec.split("/", 1)
+        index, count = int(i_s), int(n_s)
+    except Exception:
+        raise ValueError(f"Некорректный --shard '{spec}': ожидается i/N, например 2/4")
+    if count < 1 or not (1 <= index <= count):
+        raise ValueError(f"Некорректный --shard '{spec}': нужно 1 <= i <= N")
+    return index, count
+
+
+def shard_of(rel: str, count: int) -> int:
+    """Номер шарда (с 1) по стабильному хешу относительного пути — не зависит от порядка ФС и от соседей."""
+    digest = hashlib.sha1(rel.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(tasks: Iterable[BatchTask], index: int, count: int) -> List[BatchTask]:
+    return [t for t in tasks if shard_of(t.rel, count) == index]
+
+
+# -------------------- слияние --------------------
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def _iter_outputs(shard_dir: Path) -> Iterable[Tuple[str, Path]]:
+    for p in sorted(shard_dir.rglob("*")):
+        rel = p.relative_to(shard_dir)
+        # служебные файлы и каталоги (_batch_profile/ и т.п.) и недописанные .tmp убитых воркеров в выходы не идут
+        if p.is_file() and p.suffix != ".tmp" and not any(part.startswith(SERVICE_PREFIX) for part in rel.parts):
+            yield rel.as_posix(), p
+
+
+def merge_shards(shard_dirs: Sequence[Path], outdir: Path) -> Dict[str, Any]:
+    """
+    Сливает каталоги шардов в один outdir: выходы, манифест, сводку и манифест ошибок.
+    Один и тот же rel в двух шардах допустим только с одинаковым содержимым.
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    owners: Dict[str, Path] = {}
+    items: Dict[str, Dict[str, Any]] = {}
+    failed: Dict[str, Dict[str, Any]] = {}
+    entries: Dict[str, Dict[str, str]] = {}
+    manifest_key = None
+    manifest_ok = True
+    totals = {"workers": 0, "skipped": 0, "resumed": 0, "dedup_hits": 0, "cpu_seconds": 0.0, "wall_seconds": 0.0}
+
+    for shard_dir in shard_dirs:
+        # выходы
+        for rel, src in _iter_outputs(shard_dir):
+            prev = owners.get(rel)
+            if prev is not None:
+                if file_sha256(prev) != file_sha256(src):
+                    raise ValueError(f"Конфликт при слиянии: {rel} различается в {prev} и {src}")
+                continue
+            owners[rel] = src
+            dst = outdir / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, dst)
+
+        # сводка и ошибки
+        report = _read_json(shard_dir / REPORT_NAME)
+        for key in ("workers", "skipped", "resumed", "dedup_hits", "cpu_seconds"):
+            totals[key] += report.get(key) or 0
+        totals["wall_seconds"] = max(totals["wall_seconds"], report.get("wall_seconds") or 0.0)
+        for it in report.get("items") or []:
+            items[it["rel"]] = dict(it, shard=shard_dir.name)
+        for it in _read_json(shard_dir / FAILURES_NAME).get("failed") or []:
+            failed[it["rel"]] = it
+
+        # манифест: сливаем, только если все шарды считались одним кодом, бэкендом и с одними флагами
+        manifest = _read_json(shard_dir / MANIFEST_NAME)
+        if manifest:
+            key = (manifest.get("version"), manifest.get("code_hash"), manifest.get("backend"),
+                   manifest.get("options", ""))
+            if manifest_key is None:
+                manifest_key = key
+            elif key != manifest_key:
+                log.warning("Манифест %s посчитан другим кодом/бэкендом/флагами — общий манифест не пишем", shard_dir)
+                manifest_ok = False
+            for rel, entry in (manifest.get("entries") or {}).items():
+                entries[rel] = dict(entry, output=str(outdir / rel))
+
+    # ok-результат в одном шарде перекрывает ошибку того же rel в другом
+    for rel, it in items.items():
+        if it.get("status") == "ok":
+            failed.pop(rel, None)
+
+    ordered = [items[rel] for rel in sorted(items)]
+    summary = {
+        "shards": [str(d) for d in shard_dirs],
+        "workers": totals["workers"],
+        "total": len(ordered),
+        "ok": sum(1 for it in ordered if it.get("status") == "ok"),
+        "failed": sum(1 for it in ordered if it.get("status") == "failed"),
+        "timeout": sum(1 for it in ordered if it.get("status") == "timeout"),
+        "skipped": totals["skipped"],
+        "resumed": totals["resumed"],
+        "dedup_hits": totals["dedup_hits"],
+        "wall_seconds": totals["wall_seconds"],
+        "cpu_seconds": totals["cpu_seconds"],
+        "items": ordered,
+    }
+    with (outdir / REPORT_NAME).open("w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    with (outdir / FAILURES_NAME).open("w", encoding="utf-8") as f:
+        json.dump({"failed": [failed[rel] for rel in sorted(failed)]}, f, ensure_ascii=False, indent=2)
+    if manifest_key is not None and manifest_ok:
+        version, code_hash, backend, options = manifest_key
+        with (outdir / MANIFEST_NAME).open("w", encoding="utf-8") as f:
+            json.dump({"version": version, "code_hash": code_hash, "backend": backend, "options": options,
+                       "entries": dict(sorted(entries.items()))}, f, ensure_ascii=False, indent=2)
+
+    log.info("Слияние %d шардов → %s: файлов %d, ошибок %d", len(shard_dirs), outdir, len(owners), len(failed))
+    return summary
+
+
+__all__ = ["parse_shard", "shard_of", "select_shard", "merge_shards"]
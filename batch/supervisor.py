@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Deque, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from logger_config import get_logger
+from batch.pool import _preload
+
+log = get_logger("BatchSupervisor")
+
+# статусы исхода одного вызова
+OK = "ok"
+TIMEOUT = "timeout"
+CRASHED = "crashed"
+
+Call = Tuple[Hashable, Callable[..., Any], tuple]  # (ключ, функция уровня модуля, аргументы)
+Outcome = Tuple[Hashable, str, Any, float]       # (ключ, статус, значение | exitcode, секунды)
+
+
+def _worker_main(conn: Connection, preload: Sequence[str]) -> None:
+    """Цикл воркера: получить (fn, args) → отправить результат; None — штатная остановка."""
+    _preload(preload)
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if msg is None:
+            break
+        fn, args = msg
+        conn.send(fn(*args))
+    conn.close()
+
+
+@dataclass
+class _Slot:
+    proc: Any
+    conn: Connection
+    call: Optional[Call] = None
+    started: float = 0.0
+    done: int = 0
+
+
+class SupervisedPool:
+    """
+    Пул процессов под надзором: у каждого вызова свой бюджет времени (timeout_s).
+    Зависший воркер убивается (SIGKILL) и заменяется новым; после max_tasks вызовов
+    воркер штатно перезапускается (защита от утечек памяти в бэкенде).
+    fn должна сама ловить свои исключения — исключение внутри воркера считается его падением.
+    """
+
+    def __init__(self, workers: int = 1, *, timeout_s: Optional[float] = None,
+                 max_tasks: int = 0, preload: Sequence[str] = ()) -> None:
+        self.workers = max(1, int(workers))
+        self.timeout_s = timeout_s if timeout_s and timeout_s > 0 else None
+        self.max_tasks = max(0, int(max_tasks))
+        self.preload = tuple(preload)
+        self._ctx = mp.get_context()
+        self.spawned = 0
+        self.killed = 0
+
+    # -------------------- воркеры --------------------
+
+    def _spawn(self) -> _Slot:
+        parent, child = self._ctx.Pipe(duplex=True)
+        proc = self._ctx.Process(target=_worker_main, args=(child, self.preload), daemon=True)
+        proc.start()
+        child.close()
+        self.spawned += 1
+        return _Slot(proc=proc, conn=parent)
+
+    @staticmethod
+    def _stop(slot: _Slot, *, kill: bool = False) -> None:
+        if not kill:
+            try:
+                slot.conn.send(None)
+            except (OSError, BrokenPipeError):
+                kill = True
+        if not kill:
+            slot.proc.join(5.0)
+        if slot.proc.is_alive():
+            slot.proc.kill()
+            slot.proc.join()
+        slot.conn.close()
+
+    # -------------------- прогон --------------------
+
+    def run(self, calls: Iterable[Call]) -> Iterator[Outcome]:
+        """Исходы выдаются по мере готовности (порядок не гарантирован)."""
+        pending: Deque[Call] = deque(calls)
+        # None — место под воркер, который поднимется, только если есть работа
+        slots: List[Optional[_Slot]] = [None] * min(self.workers, len(pending))
+        try:
+            while True:
+                for i, slot in enumerate(slots):
+                    if not pending:
+                        break
+                    if slot is not None and slot.call is not None:
+                        continue
+                    if slot is not None and self.max_tasks and slot.done >= self.max_tasks:
+                        log.debug("Плановый перезапуск воркера pid=%s после %d задач", slot.proc.pid, slot.done)
+                        self._stop(slot)
+                        slot = None
+                    if slot is None:
+                        slot = slots[i] = self._spawn()
+                    slot.call = pending.popleft()
+                    slot.started = time.monotonic()
+                    slot.conn.send((slot.call[1], slot.call[2]))
+
+                busy = [s for s in slots if s is not None and s.call is not None]
+                if not busy:
+                    break
+
+                wait_s = None
+                if self.timeout_s is not None:
+                    wait_s = max(0.0, min(s.started + self.timeout_s for s in busy) - time.monotonic())
+                ready = set(wait([s.conn for s in busy], wait_s))
+
+                now = time.monotonic()
+                for i, slot in enumerate(slots):
+                    if slot is None or slot.call is None:
+                        continue
+                    key = slot.call[0]
+                    if slot.conn in ready:
+                        try:
+                            value = slot.conn.recv()
+                        except (EOFError, OSError):
+                            slot.proc.join(1.0)
+                            log.error("Воркер pid=%s упал (exitcode=%s) на %s", slot.proc.pid, slot.proc.exitcode, key)
+                            self._stop(slot, kill=True)
+                            slots[i] = None
+                            yield key, CRASHED, slot.proc.exitcode, now - slot.started
+                            continue
+                        slot.call = None
+                        slot.done += 1
+                        yield key, OK, value, now - slot.started
+                    elif self.timeout_s is not None and now - slot.started >= self.timeout_s:
+                        log.error("Превышен лимит %.3g с на %s — воркер pid=%s остановлен", self.timeout_s, key, slot.proc.pid)
+                        self._stop(slot, kill=True)
+                        self.killed += 1
+                        slots[i] = None
+                        yield key, TIMEOUT, None, now - slot.started
+        finally:
+            for slot in slots:
+                if slot is not None:
+                    self._stop(slot, kill=slot.call is not None)
+
+
+__all__ = ["SupervisedPool", "OK", "TIMEOUT", "CRASHED"]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from batch.checkpoint import CheckpointJournal
+from batch.pool import BatchItemResult
+
+
+def _item(rel: str, status: str = "ok") -> BatchItemResult:
+    return BatchItemResult(rel=rel, src=f"in/{rel}", dst=f"out/{rel}", status=status, seconds=0.1,
+                           error=None if status == "ok" else "boom")
+
+
+def test_resume_skips_torn_tail_and_appends(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with CheckpointJournal(path, every=2).open(resume=False) as j:
+        j.append(_item("a.json"))
+        j.append(_item("b.json", "failed"))
+    # имитируем падение посреди записи
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"rel": "c.json", "sta')
+
+    done = CheckpointJournal.load(path)
+    assert sorted(done) == ["a.json", "b.json"]
+    assert done["b.json"].error == "boom" and not done["b.json"].ok
+
+    with CheckpointJournal(path).open(resume=True) as j:
+        j.append(_item("c.json"))
+    assert sorted(CheckpointJournal.load(path)) == ["a.json", "b.json", "c.json"]
+
+
+def test_fresh_run_truncates(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with CheckpointJournal(path).open(resume=False) as j:
+        j.append(_item("a.json"))
+    with CheckpointJournal(path).open(resume=False) as j:
+        j.append(_item("b.json"))
+    assert list(CheckpointJournal.load(path)) == ["b.json"]
+
+
+def test_resume_recomputes_inputs_edited_after_journal(tmp_path, monkeypatch):
+    import argparse
+    import json
+
+    import main
+    from batch.manifest import MANIFEST_NAME, file_sha256
+
+    def _process(src, dst):
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
+
+    monkeypatch.setattr(main, "_process_one", _process)
+    inp, out = tmp_path / "in", tmp_path / "out"
+    inp.mkdir()
+    (inp / "a.json").write_text('{"v": 1}', encoding="utf-8")
+    (inp / "b.json").write_text('{"v": 2}', encoding="utf-8")
+    args = argparse.Namespace(input=inp, outdir=out, glob="*.json", workers=1, shard=None, resume=False,
+                              checkpoint_every=1, checkpoint_seconds=0.0, force=False, no_dedup=True,
+                              timeout_s=None, max_tasks_per_worker=0, profile=False, memprofile=False,
+                              trace=False, profile_top=5)
+    main._run_directory(args)
+
+    (inp / "a.json").write_text('{"v": 10}', encoding="utf-8")
+    args.resume = True
+    main._run_directory(args)
+
+    assert (out / "a.json").read_text(encoding="utf-8") == '{"v": 10}'
+    entries = json.loads((out / MANIFEST_NAME).read_text(encoding="utf-8"))["entries"]
+    assert entries["a.json"]["input_sha256"] == file_sha256(inp / "a.json")
+    restored, remaining, _ = CheckpointJournal.resume(out / "_batch_checkpoint.jsonl",
+                                                      main._collect_tasks(inp, out, "*.json"))
+    assert sorted(it.rel for it in restored) == ["a.json", "b.json"] and remaining == []
+
+
+def test_resume_recomputes_entries_written_by_another_version(tmp_path, monkeypatch):
+    import argparse
+
+    import main
+    from phys_prop.backends import ENV_BACKEND
+
+    calls = []
+
+    def _process(src, dst):
+        calls.append(src.name)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
+
+    monkeypatch.setattr(main, "_process_one", _process)
+    monkeypatch.setenv(ENV_BACKEND, "pyfizika")
+    inp, out = tmp_path / "in", tmp_path / "out"
+    inp.mkdir()
+    (inp / "a.json").write_text('{"v": 1}', encoding="utf-8")
+    args = argparse.Namespace(input=inp, outdir=out, glob="*.json", workers=1, shard=None, resume=False,
+                              checkpoint_every=1, checkpoint_seconds=0.0, force=False, no_dedup=True,
+                              timeout_s=None, max_tasks_per_worker=0, profile=False, memprofile=False,
+                              trace=False, profile_top=5)
+    main._run_directory(args)
+    args.resume = True
+    main._run_directory(args)
+    assert calls == ["a.json"]  # та же версия — из журнала
+
+    monkeypatch.setenv(ENV_BACKEND, "virial")  # другой бэкенд → другая backend_version()
+    main._run_directory(args)
+    assert calls == ["a.json", "a.json"]
+    main._run_directory(args)
+    assert calls == ["a.json", "a.json"]  # пересчитанная запись записана уже новой версией
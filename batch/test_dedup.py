@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import copy
+import json
+from pathlib import Path
+
+from batch.dedup import canonical_key, plan_dedup
+from batch.pool import BatchTask, run_batch
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _payload(**phys):
+    props = {"T": {"real": 20, "unit": "C"}, "composition": {"Methane": 90, "Ethane": 10}}
+    props.update(phys)
+    return {"type": "sharp", "physPackage": {"physProperties": props}}
+
+
+def test_key_ignores_key_order_but_not_values():
+    a = _payload()
+    b = _payload(composition={"Ethane": 10, "Methane": 90})
+    b = {"physPackage": b["physPackage"], "type": "SHARP "}
+    c = _payload(composition={"Methane": 85, "Ethane": 15})
+    si = {"T": 20.0, "p_abs": 2e6}
+
+    assert canonical_key(a, si) == canonical_key(b, dict(reversed(list(si.items()))))
+    assert canonical_key(a, si) != canonical_key(c, si)
+    assert canonical_key(a, si) != canonical_key(a, {"T": 20.0, "p_abs": 2.1e6})
+
+
+def test_unit_different_equivalent_inputs_share_key():
+    from controllers.input_controller import InputController
+
+    def key(d):
+        return canonical_key(d, InputController().parse(d).values_si)
+
+    a = json.loads((ROOT / "inputdata" / "phys_test_30319_3.json").read_text(encoding="utf-8"))
+    b = copy.deepcopy(a)
+    b["ctrlRequest"] = {"steps": ["calculate_flow"]}
+    phys, lens = b["physPackage"]["physProperties"], b["lenPackage"]["lenProperties"]
+    phys["p_abs"] = {"real": 2000, "unit": "kPa"}
+    phys["dp"] = {"real": 8000, "unit": "Pa"}
+    lens["d20"] = {"real": 0.07, "unit": "m"}
+    phys["composition"] = {k: v / 100 for k, v in reversed(list(phys["composition"].items()))}
+    assert key(a) == key(b)
+
+    b["physPackage"]["physProperties"]["T"] = {"real": 291.15, "unit": "K"}  # T.real читается как °C
+    assert key(a) != key(b)
+    b["physPackage"]["physProperties"]["T"] = dict(a["physPackage"]["physProperties"]["T"])
+    b["lenPackage"]["lenProperties"]["Ra"] = {"real": 3.0, "unit": "um"}
+    assert key(a) != key(b)
+
+
+def _compute(src: Path, dst: Path) -> None:
+    data = json.loads(src.read_text(encoding="utf-8"))
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(json.dumps({"result": data["x"] * 10}), encoding="utf-8")
+
+
+def test_plan_computes_once_and_fans_out(tmp_path):
+    tasks = []
+    for name, x in (("a", 1), ("b", 2), ("a_copy", 1), ("a_copy2", 1)):
+        src = tmp_path / "in" / f"{name}.json"
+        src.parent.mkdir(exist_ok=True)
+        src.write_text(json.dumps({"x": x}), encoding="utf-8")
+        tasks.append(BatchTask(src=src, dst=tmp_path / "out" / f"{name}.json", rel=f"{name}.json"))
+
+    plan = plan_dedup(tasks, lambda p: p.read_text(encoding="utf-8"))
+    assert [t.rel for t in plan.unique] == ["a.json", "b.json"] and plan.hits == 2
+
+    fanned = []
+    report = run_batch(plan.unique, _compute, preload=(), on_result=lambda it: fanned.extend(plan.fan_out(it)))
+    assert len(report.items) == 2
+    assert sorted(d.rel for d in fanned) == ["a_copy.json", "a_copy2.json"]
+    assert all(d.dedup_of == "a.json" and d.ok for d in fanned)
+    assert json.loads((tmp_path / "out" / "a_copy2.json").read_text(encoding="utf-8")) == {"result": 10}
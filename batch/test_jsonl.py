@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import io
+import os
+import json
+
+from batch.jsonl import run_jsonl
+
+
+def _double(data):
+    if "x" not in data:
+        raise KeyError("x")
+    return {"result": {"y": data["x"] * 2}}
+
+
+def test_one_line_per_request_in_input_order():
+    src = io.StringIO(
+        '{"request_id": "a", "x": 1}\n'
+        "\n"
+        '{"request_id": "b", "request": {"x": 5}}\n'
+        "not a json\n"
+        '{"z": 1}\n'
+    )
+    for workers in (1, 2):
+        src.seek(0)
+        dst = io.StringIO()
+        stats = run_jsonl(src, dst, _double, workers=workers, window=1, preload=())
+        rows = [json.loads(x) for x in dst.getvalue().splitlines()]
+
+        assert [r["request_id"] for r in rows] == ["a", "b", "line-4", "line-5"]
+        assert rows[0]["result"] == {"y": 2} and rows[1]["result"] == {"y": 10}
+        assert [r["status"] for r in rows] == ["ok", "ok", "failed", "failed"]
+        assert (stats.total, stats.ok, stats.failed) == (4, 2, 2)
+
+
+def _crashy(data):
+    if data.get("crash"):
+        os._exit(13)  # как segfault/OOM killer: воркер исчезает без ответа
+    return _double(data)
+
+
+def test_crashed_worker_fails_only_its_line_and_pool_recovers():
+    src = io.StringIO('{"x": 1}\n{"request_id": "boom", "crash": 1}\n{"x": 2}\n{"x": 3}\n')
+    dst = io.StringIO()
+    stats = run_jsonl(src, dst, _crashy, workers=2, window=3, preload=())
+    rows = [json.loads(x) for x in dst.getvalue().splitlines()]
+
+    assert [r["request_id"] for r in rows] == ["line-1", "boom", "line-3", "line-4"]
+    assert [r["status"] for r in rows] == ["ok", "failed", "ok", "ok"]
+    assert rows[1]["error_type"] == "WorkerCrashed" and rows[3]["result"] == {"y": 6}
+    assert (stats.total, stats.ok, stats.failed) == (4, 3, 1)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from batch.manifest import BuildManifest, code_fingerprint
+from batch.pool import BatchTask
+
+
+def _task(tmp_path: Path, name: str, body: str) -> BatchTask:
+    src = tmp_path / "in" / name
+    src.parent.mkdir(exist_ok=True)
+    src.write_text(body, encoding="utf-8")
+    return BatchTask(src=src, dst=tmp_path / "out" / name, rel=name)
+
+
+def test_only_changed_inputs_are_rebuilt(tmp_path):
+    out = tmp_path / "out"
+    a, b = _task(tmp_path, "a.json", "{}"), _task(tmp_path, "b.json", "{}")
+
+    m = BuildManifest.load(out, "code-1", "backend-1")
+    todo, fresh, digests = m.partition([a, b])
+    assert todo == [a, b] and fresh == []
+    for t in todo:
+        t.dst.parent.mkdir(exist_ok=True)
+        t.dst.write_text("{}", encoding="utf-8")
+        m.record(t.rel, digests[t.rel], str(t.dst))
+    m.save()
+
+    b.src.write_text('{"x": 1}', encoding="utf-8")
+    todo, fresh, _ = BuildManifest.load(out, "code-1", "backend-1").partition([a, b])
+    assert todo == [b] and fresh == [a]
+
+    a.dst.unlink()
+    todo, _, _ = BuildManifest.load(out, "code-1", "backend-1").partition([a])
+    assert todo == [a]
+
+
+def test_code_or_backend_change_invalidates_everything(tmp_path):
+    out = tmp_path / "out"
+    a = _task(tmp_path, "a.json", "{}")
+    a.dst.parent.mkdir()
+    a.dst.write_text("{}", encoding="utf-8")
+    m = BuildManifest.load(out, "code-1", "backend-1")
+    m.record(a.rel, m.partition([a])[2][a.rel], str(a.dst))
+    m.save()
+
+    assert BuildManifest.load(out, "code-1", "backend-1").partition([a])[1] == [a]
+    assert BuildManifest.load(out, "code-2", "backend-1").partition([a])[0] == [a]
+    assert BuildManifest.load(out, "code-1", "backend-2").partition([a])[0] == [a]
+
+
+def test_code_fingerprint_is_stable():
+    assert code_fingerprint() == code_fingerprint()
+
+
+def test_code_fingerprint_ignores_parent_dirs_named_tests(tmp_path):
+    root = tmp_path / "tests" / "checkout"
+    (root / "perf").mkdir(parents=True)
+    (root / "perf" / "timings.py").write_text("A = 1\n", encoding="utf-8")
+    (root / "perf" / "tests").mkdir()
+    (root / "perf" / "tests" / "helper.py").write_text("", encoding="utf-8")
+    before = code_fingerprint(root)
+    (root / "perf" / "tests" / "helper.py").write_text("B = 2\n", encoding="utf-8")
+    assert code_fingerprint(root) == before
+    (root / "perf" / "timings.py").write_text("A = 2\n", encoding="utf-8")
+    assert code_fingerprint(root) != before
+
+
+def test_output_options_are_part_of_the_key(tmp_path, monkeypatch):
+    from batch.manifest import output_options
+    from perf.timings import ENV_FLAG
+
+    out = tmp_path / "out"
+    a = _task(tmp_path, "a.json", "{}")
+    a.dst.parent.mkdir()
+    a.dst.write_text("{}", encoding="utf-8")
+    monkeypatch.delenv(ENV_FLAG, raising=False)
+    m = BuildManifest.load(out, "code-1", "backend-1", options=output_options())
+    m.record(a.rel, m.partition([a])[2][a.rel], str(a.dst))
+    m.save()
+
+    monkeypatch.setenv(ENV_FLAG, "1")  # --timings: в выходах нужен блок _timings — пересчёт
+    assert BuildManifest.load(out, "code-1", "backend-1", options=output_options()).partition([a])[0] == [a]
+    monkeypatch.delenv(ENV_FLAG)
+    assert BuildManifest.load(out, "code-1", "backend-1", options=output_options()).partition([a])[1] == [a]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from batch.pool import BatchTask, run_batch, write_report, FAILURES_NAME, REPORT_NAME
+
+
+def _copy_or_fail(src: Path, dst: Path) -> None:
+    data = json.loads(src.read_text(encoding="utf-8"))
+    if data.get("fail"):
+        raise ValueError(f"плохой вход {src.name}")
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(json.dumps({"result": data}), encoding="utf-8")
+
+
+def _make_tasks(tmp_path: Path, n: int = 6):
+    base_in, base_out = tmp_path / "in", tmp_path / "out"
+    base_in.mkdir()
+    tasks = []
+    for i in range(n):
+        src = base_in / f"case_{i}.json"
+        src.write_text(json.dumps({"i": i, "fail": i % 3 == 2}), encoding="utf-8")
+        tasks.append(BatchTask(src=src, dst=base_out / src.name, rel=src.name))
+    return tasks, base_out
+
+
+def test_serial_and_pool_give_same_manifest(tmp_path):
+    tasks, out = _make_tasks(tmp_path)
+    serial = run_batch(tasks, _copy_or_fail, workers=1, preload=())
+    pooled = run_batch(tasks, _copy_or_fail, workers=3, preload=())
+
+    assert serial.ok_count == pooled.ok_count == 4
+    assert serial.failures_manifest() == pooled.failures_manifest()
+    assert [f["rel"] for f in pooled.failures_manifest()["failed"]] == ["case_2.json", "case_5.json"]
+    assert (out / "case_0.json").exists()
+
+
+def test_write_report(tmp_path):
+    tasks, out = _make_tasks(tmp_path, n=3)
+    report = run_batch(tasks, _copy_or_fail, workers=2, preload=())
+    write_report(report, out)
+
+    summary = json.loads((out / REPORT_NAME).read_text(encoding="utf-8"))
+    failures = json.loads((out / FAILURES_NAME).read_text(encoding="utf-8"))
+    assert summary["total"] == 3 and summary["failed"] == 1
+    assert all(it["seconds"] >= 0 for it in summary["items"])
+    assert failures["failed"][0]["error_type"] == "ValueError"
+    assert "плохой вход" in failures["failed"][0]["traceback"]
+
+
+def _copy_or_crash(src: Path, dst: Path) -> None:
+    if "case_1" in src.name:
+        os._exit(13)  # как segfault/OOM killer: воркер исчезает без ответа
+    _copy_or_fail(src, dst)
+
+
+def test_crashed_worker_fails_only_its_task(tmp_path):
+    tasks, out = _make_tasks(tmp_path)
+    report = run_batch(tasks, _copy_or_crash, workers=2, preload=())
+
+    assert report.ok_count == 3
+    failed = {f["rel"]: f["error_type"] for f in report.failures_manifest()["failed"]}
+    assert failed == {"case_1.json": "WorkerCrashed", "case_2.json": "ValueError", "case_5.json": "ValueError"}
+    assert sorted(p.name for p in out.iterdir()) == ["case_0.json", "case_3.json", "case_4.json"]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import threading
+
+from batch.service import CalcService, make_server
+
+
+def _square(data):
+    if "x" not in data:
+        raise KeyError("x")
+    return {"result": {"y": data["x"] ** 2}}
+
+
+def _request(conn, method, path, body=None):
+    conn.request(method, path, body=None if body is None else body.encode("utf-8"),
+                 headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read().decode("utf-8"))
+
+
+def test_http_calculate_and_health():
+    service = CalcService(_square, preload=()).start()
+    server = make_server(service, port=0)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        assert _request(conn, "POST", "/calculate", '{"x": 3}') == (200, {"result": {"y": 9}})
+        assert _request(conn, "POST", "/calculate", "{oops")[0] == 400
+        status, body = _request(conn, "POST", "/calculate", "{}")
+        assert status == 422 and body["error_type"] == "KeyError"
+        status, health = _request(conn, "GET", "/health")
+        assert status == 200 and health["served"] == 1 and health["failed"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def _crashy(data):
+    if data.get("crash"):
+        os._exit(13)  # как segfault/OOM killer: воркер исчезает без ответа
+    return _square(data)
+
+
+def test_crashed_worker_gets_500_and_next_request_succeeds():
+    service = CalcService(_crashy, workers=2, preload=()).start()
+    server = make_server(service, port=0)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=30)
+        status, body = _request(conn, "POST", "/calculate", '{"crash": 1}')
+        assert status == 500 and body["error_type"] == "BrokenProcessPool"
+        assert _request(conn, "POST", "/calculate", '{"x": 3}') == (200, {"result": {"y": 9}})
+        status, health = _request(conn, "GET", "/health")
+        assert health["served"] == 1 and health["failed"] == 1 and health["restarts"] == 2  # запрос и его повтор
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from batch.pool import BatchTask, REPORT_NAME, FAILURES_NAME, run_batch, write_report
+from batch.shard import merge_shards, parse_shard, select_shard
+
+
+def _tasks(base_out: Path, n: int = 40):
+    return [BatchTask(src=Path(f"in/d{i % 3}/case_{i}.json"), dst=base_out / f"d{i % 3}/case_{i}.json",
+                      rel=f"d{i % 3}/case_{i}.json") for i in range(n)]
+
+
+def test_shards_are_disjoint_complete_and_order_independent():
+    tasks = _tasks(Path("out"))
+    shards = [select_shard(tasks, i, 4) for i in range(1, 5)]
+    rels = [t.rel for s in shards for t in s]
+
+    assert sorted(rels) == sorted(t.rel for t in tasks)
+    assert all(len(s) > 0 for s in shards)
+    assert select_shard(list(reversed(tasks)), 2, 4) == list(reversed(shards[1]))
+
+
+@pytest.mark.parametrize("spec", ["0/4", "5/4", "x", "1/0"])
+def test_parse_shard_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_shard(spec)
+
+
+def _write_out(src: Path, dst: Path) -> None:
+    if "case_3" in str(dst):
+        raise RuntimeError("сбой")
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(json.dumps({"rel": str(src)}), encoding="utf-8")
+
+
+def test_merge_shards(tmp_path):
+    dirs = []
+    for i in (1, 2):
+        out = tmp_path / f"shard{i}"
+        report = run_batch(select_shard(_tasks(out, 10), i, 2), _write_out, preload=())
+        write_report(report, out)
+        dirs.append(out)
+
+    merged = tmp_path / "merged"
+    summary = merge_shards(dirs, merged)
+
+    assert summary["total"] == 10 and summary["failed"] == 1
+    assert len([p for p in merged.rglob("case_*.json")]) == 9
+    failures = json.loads((merged / FAILURES_NAME).read_text(encoding="utf-8"))
+    assert [f["rel"] for f in failures["failed"]] == ["d0/case_3.json"]
+    assert json.loads((merged / REPORT_NAME).read_text(encoding="utf-8"))["ok"] == 9
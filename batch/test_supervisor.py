@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from batch.pool import BatchTask, run_batch
+from batch.supervisor import CRASHED, OK, TIMEOUT, SupervisedPool
+
+
+def _sleep_and_pid(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def _die(code: int) -> None:
+    os._exit(code)
+
+
+def test_hung_call_is_killed_and_worker_replaced():
+    pool = SupervisedPool(2, timeout_s=0.5)
+    calls = [("slow", _sleep_and_pid, (30.0,)), ("a", _sleep_and_pid, (0.0,)), ("b", _sleep_and_pid, (0.0,)),
+             ("dead", _die, (3,))]
+    t0 = time.monotonic()
+    outcomes = {key: (status, value) for key, status, value, _ in pool.run(calls)}
+
+    assert time.monotonic() - t0 < 10
+    assert outcomes["slow"][0] == TIMEOUT
+    assert outcomes["a"][0] == outcomes["b"][0] == OK
+    assert outcomes["dead"] == (CRASHED, 3)
+    assert pool.killed == 1
+
+
+def test_workers_are_recycled_after_max_tasks():
+    pool = SupervisedPool(1, max_tasks=2)
+    pids = [value for _, _, value, _ in pool.run((i, _sleep_and_pid, (0.0,)) for i in range(5))]
+    assert len(set(pids)) == 3 and pool.spawned == 3
+
+
+def _touch_or_hang(src: Path, dst: Path) -> None:
+    if "hang" in src.name:
+        time.sleep(30)
+    dst.write_text("{}", encoding="utf-8")
+
+
+def test_run_batch_records_timeout_status(tmp_path):
+    tasks = [BatchTask(src=tmp_path / n, dst=tmp_path / f"{n}.out", rel=n) for n in ("ok.json", "hang.json")]
+    report = run_batch(tasks, _touch_or_hang, workers=2, preload=(), timeout_s=0.5)
+
+    assert report.ok_count == 1
+    [failed] = report.failed
+    assert failed.rel == "hang.json" and failed.status == "timeout"
+    assert report.to_dict()["timeout"] == 1
+
+
+class _Hangs:
+    def to_dict(self):
+        time.sleep(30)
+
+
+def _dump_then_hang(src: Path, dst: Path) -> None:
+    from main import _dump_json
+
+    # первые килобайты уже ушли на диск, когда воркер зависает посреди сериализации
+    _dump_json(dst, {"big": "x" * 100_000, "slow": _Hangs()} if "hang" in src.name else {"ok": True})
+
+
+def test_timeout_never_leaves_torn_output(tmp_path):
+    tasks = [BatchTask(src=tmp_path / n, dst=tmp_path / "out" / n, rel=n) for n in ("ok.json", "hang.json")]
+    report = run_batch(tasks, _dump_then_hang, workers=2, preload=(), timeout_s=1.0)
+
+    assert [it.rel for it in report.failed] == ["hang.json"]
+    assert sorted(p.name for p in (tmp_path / "out").iterdir() if p.suffix == ".json") == ["ok.json"]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+from batch.manifest import BuildManifest
+from batch.watch import FolderWatcher
+
+
+def _copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(json.dumps({"result": json.loads(src.read_text(encoding="utf-8"))}), encoding="utf-8")
+
+
+def test_new_and_changed_files_are_processed_once_settled(tmp_path):
+    base_in, base_out = tmp_path / "in", tmp_path / "out"
+    (base_in / "sub").mkdir(parents=True)
+    (base_in / "a.json").write_text('{"v": 1}', encoding="utf-8")
+
+    w = FolderWatcher(base_in, base_out, _copy, poll_s=0.01, debounce_s=0.05, preload=(),
+                      manifest=BuildManifest.load(base_out, "code", "backend"))
+    assert w.scan() == []  # только что увидели — ждём debounce
+    time.sleep(0.06)
+    ready = w.scan()
+    assert [t.rel for t, _ in ready] == ["a.json"]
+
+    deadline = time.monotonic() + 0.5
+    (base_in / "sub" / "b.json").write_text('{"v": 2}', encoding="utf-8")
+    w.run(stop=lambda: time.monotonic() > deadline)
+
+    assert w.stats.ok == 2 and len(w.stats.latencies) == 2
+    assert json.loads((base_out / "sub" / "b.json").read_text(encoding="utf-8")) == {"result": {"v": 2}}
+
+    # изменённый файл пересчитывается, неизменный — нет
+    (base_in / "a.json").write_text('{"v": 3}', encoding="utf-8")
+    deadline = time.monotonic() + 0.5
+    w.run(stop=lambda: time.monotonic() > deadline)
+    assert w.stats.ok == 3
+    assert json.loads((base_out / "a.json").read_text(encoding="utf-8")) == {"result": {"v": 3}}
+
+    # после перезапуска актуальные по манифесту файлы не пересчитываются
+    w2 = FolderWatcher(base_in, base_out, _copy, poll_s=0.01, debounce_s=0.0, preload=(),
+                       manifest=BuildManifest.load(base_out, "code", "backend"))
+    deadline = time.monotonic() + 0.2
+    w2.run(stop=lambda: time.monotonic() > deadline)
+    assert w2.stats.ok == 0
+
+
+def _copy_or_crash(src: Path, dst: Path) -> None:
+    if "crash" in src.name:
+        os._exit(13)
+    _copy(src, dst)
+
+
+def test_crashed_worker_fails_the_file_and_watch_goes_on(tmp_path):
+    base_in, base_out = tmp_path / "in", tmp_path / "out"
+    base_in.mkdir()
+    (base_in / "crash.json").write_text('{"v": 0}', encoding="utf-8")
+
+    w = FolderWatcher(base_in, base_out, _copy_or_crash, workers=2, poll_s=0.01, debounce_s=0.0, preload=())
+    deadline = time.monotonic() + 1.0
+
+    def _stop() -> bool:
+        # после падения воркера подкладываем новый файл — его должен посчитать пересозданный пул
+        if w.stats.failed and not (base_in / "b.json").exists():
+            (base_in / "b.json").write_text('{"v": 2}', encoding="utf-8")
+        return time.monotonic() > deadline
+
+    w.run(stop=_stop)
+
+    assert w.stats.failed == 1 and w.stats.ok == 1
+    assert json.loads((base_out / "b.json").read_text(encoding="utf-8")) == {"result": {"v": 2}}
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import statistics
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from logger_config import get_logger
+from batch.pool import (HEAVY_MODULES, SERVICE_PREFIX, BatchItemResult, BatchTask, ProcessFn, _execute, _log_item,
+                        _merge_metrics, _preload)
+from batch.manifest import BuildManifest, file_sha256
+
+log = get_logger("BatchWatch")
+
+# inotify — опционально: только будит цикл раньше, источник истины всё равно опрос каталога
+try:
+    from inotify_simple import INotify, flags as _in_flags
+except Exception:
+    INotify = None
+
+Signature = Tuple[int, int]  # (size, mtime_ns)
+
+
+@dataclass
+class _Seen:
+    sig: Signature
+    since: float  # monotonic-время, с которого сигнатура не менялась
+    done_sig: Optional[Signature] = None
+
+
+@dataclass
+class WatchStats:
+    ok: int = 0
+    failed: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, float]:
+        lat = sorted(self.latencies)
+        if not lat:
+            return {"ok": self.ok, "failed": self.failed}
+        return {
+            "ok": self.ok,
+            "failed": self.failed,
+            "latency_p50_s": statistics.median(lat),
+            "latency_p95_s": lat[min(len(lat) - 1, int(round(0.95 * (len(lat) - 1))))],
+            "latency_max_s": lat[-1],
+        }
+
+
+class FolderWatcher:
+    """
+    Режим --watch: опрашивает каталог входов, ждёт, пока файл «устаканится» (размер и mtime
+    не меняются debounce_s секунд), и отправляет новые/изменённые файлы в тёплый пул воркеров.
+    Задержка на файл = от mtime входа до записи выхода.
+    """
+
+    def __init__(
+        self,
+        base_in: Path,
+        base_out: Path,
+        process_fn: ProcessFn,
+        *,
+        pattern: str = "*.json",
+        workers: int = 1,
+        poll_s: float = 1.0,
+        debounce_s: float = 2.0,
+        manifest: Optional[BuildManifest] = None,
+        preload: Sequence[str] = HEAVY_MODULES,
+    ) -> None:
+        self.base_in = base_in
+        self.base_out = base_out
+        self.process_fn = process_fn
+        self.pattern = pattern
+        self.workers = max(1, int(workers))
+        self.poll_s = float(poll_s)
+        self.debounce_s = float(debounce_s)
+        self.manifest = manifest
+        self.preload = tuple(preload)
+        self.stats = WatchStats()
+        self._seen: Dict[str, _Seen] = {}
+        self._inflight: Dict[str, Tuple[Future, BatchTask, Signature]] = {}
+        self._ex: Optional[ProcessPoolExecutor] = None
+        self._dirty = False  # манифест изменён и ещё не сохранён
+        self._digests: Dict[str, str] = {}
+        self._inotify = None
+        self._watched_dirs: Set[Path] = set()
+
+    # -------------------- обнаружение --------------------
+
+    def _watch_dir(self, d: Path) -> None:
+        if self._inotify is None or d in self._watched_dirs:
+            return
+        try:
+            mask = _in_flags.CLOSE_WRITE | _in_flags.MOVED_TO | _in_flags.CREATE
+            self._inotify.add_watch(str(d), mask)
+            self._watched_dirs.add(d)
+        except OSError as e:
+            log.debug("inotify: каталог %s не добавлен: %s", d, e)
+
+    def scan(self) -> List[Tuple[BatchTask, Signature]]:
+        """Файлы, готовые к расчёту: устоявшиеся и ещё не посчитанные в этой версии."""
+        now = time.monotonic()
+        ready: List[Tuple[BatchTask, Signature]] = []
+        present: Set[str] = set()
+        self._watch_dir(self.base_in)
+        for src in sorted(self.base_in.rglob(self.pattern)):
+            if not src.is_file() or src.name.startswith(SERVICE_PREFIX):
+                continue
+            self._watch_dir(src.parent)
+            try:
+                st = src.stat()
+            except FileNotFoundError:
+                continue
+            rel_path = src.relative_to(self.base_in)
+            rel = rel_path.as_posix()
+            present.add(rel)
+            sig = (st.st_size, st.st_mtime_ns)
+
+            seen = self._seen.get(rel)
+            if seen is None or seen.sig != sig:
+                done_sig = seen.done_sig if seen else None
+                self._seen[rel] = seen = _Seen(sig=sig, since=now, done_sig=done_sig)
+            if seen.done_sig == sig or rel in self._inflight or sig[0] == 0:
+                continue
+            if now - seen.since < self.debounce_s:
+                continue
+
+            task = BatchTask(src=src, dst=self.base_out / rel_path, rel=rel)
+            if self.manifest is not None:
+                digest = file_sha256(src)
+                self._digests[rel] = digest
+                if self.manifest.is_fresh(task, digest):
+                    seen.done_sig = sig
+                    continue
+            ready.append((task, sig))
+
+        for rel in set(self._seen) - present:
+            del self._seen[rel]
+        return ready
+
+    # -------------------- завершение --------------------
+
+    def _finish(self, item: BatchItemResult, sig: Signature) -> None:
+        _merge_metrics(item)
+        _log_item(item)
+        seen = self._seen.get(item.rel)
+        if seen is not None:
+            seen.done_sig = sig
+        latency = max(0.0, time.time() - sig[1] / 1e9)
+        if item.ok:
+            self.stats.ok += 1
+            self.stats.latencies.append(latency)
+            log.info("Задержка %s: %.3f с от появления файла (расчёт %.3f с)", item.rel, latency, item.seconds)
+            if self.manifest is not None and item.rel in self._digests:
+                self.manifest.record(item.rel, self._digests[item.rel], item.dst)
+                self._dirty = True
+        else:
+            self.stats.failed += 1
+            if self.manifest is not None:
+                self.manifest.forget(item.rel)
+                self._dirty = True
+
+    def _new_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 1:
+            return None
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_preload, initargs=(self.preload,))
+
+    def _submit(self, task: BatchTask) -> Future:
+        try:
+            return self._ex.submit(_execute, self.process_fn, task)
+        except BrokenProcessPool:
+            # пул сломался после последнего _reap — файлы «в полёте» разберёт _reap, этот — в новый пул
+            log.error("Пул воркеров сломан — пересоздаём")
+            self._ex.shutdown(wait=False, cancel_futures=True)
+            self._ex = self._new_pool()
+            return self._ex.submit(_execute, self.process_fn, task)
+
+    def _reap(self) -> None:
+        broken = False
+        for rel, (fut, task, sig) in list(self._inflight.items()):
+            if not fut.done():
+                continue
+            del self._inflight[rel]
+            try:
+                item = fut.result()
+            except Exception as e:
+                # воркер упал целиком (BrokenProcessPool, ошибка pickle) — файл в ошибки, демон работает дальше
+                broken = broken or isinstance(e, BrokenProcessPool)
+                item = BatchItemResult(
+                    rel=task.rel, src=str(task.src), dst=str(task.dst), status="failed",
+                    seconds=0.0, error=str(e), error_type=type(e).__name__,
+                    traceback="".join(traceback.format_exception(e)),
+                )
+            self._finish(item, sig)
+        if broken and self._ex is not None:
+            log.error("Пул воркеров сломан — пересоздаём")
+            self._ex.shutdown(wait=False, cancel_futures=True)
+            self._ex = self._new_pool()
+
+    def _save_manifest(self) -> None:
+        if self.manifest is not None and self._dirty:
+            self.manifest.save()
+            self._dirty = False
+
+    # -------------------- цикл --------------------
+
+    def _sleep(self) -> None:
+        timeout = min(self.poll_s, self.debounce_s) if self._seen else self.poll_s
+        if self._inotify is not None:
+            self._inotify.read(timeout=int(timeout * 1000))
+        else:
+            time.sleep(timeout)
+
+    def run(self, stop: Optional[Callable[[], bool]] = None) -> WatchStats:
+        """Работает до Ctrl+C (или пока stop() не вернёт True)."""
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+            except OSError as e:
+                log.info("inotify недоступен (%s) — только опрос", e)
+        log.info("Наблюдение за %s (glob=%s, workers=%d, poll=%.3g с, debounce=%.3g с, inotify=%s)",
+                 self.base_in, self.pattern, self.workers, self.poll_s, self.debounce_s, self._inotify is not None)
+
+        self._ex = self._new_pool()
+        try:
+            while not (stop and stop()):
+                for task, sig in self.scan():
+                    if self._ex is None:
+                        self._finish(_execute(self.process_fn, task), sig)
+                    else:
+                        self._inflight[task.rel] = (self._submit(task), task, sig)
+                self._reap()
+                self._save_manifest()
+                self._sleep()
+        except KeyboardInterrupt:
+            log.info("Остановка наблюдения по Ctrl+C")
+        finally:
+            if self._ex is not None:
+                ex, self._ex = self._ex, None  # пул при разборе остатков уже не пересоздаём
+                ex.shutdown(wait=True)
+                self._reap()
+            self._save_manifest()
+            if self._inotify is not None:
+                self._inotify.close()
+        log.info("Наблюдение завершено: %s", self.stats.summary())
+        return self.stats
+
+
+__all__ = ["FolderWatcher", "WatchStats"]
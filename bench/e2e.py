@@ -0,0 +1,253 @@
+"""Сквозной бенчмарк: эталонные входы → InputController + run_calculation, многократно.
+
+    python -m bench.e2e                                  # прогон и сравнение с bench/baseline_e2e.json
+    python -m bench.e2e --save-baseline                  # записать текущие времена как baseline
+    python -m bench.e2e --repeat 50 --threshold 0.2 --physics pyfizika --baseline /tmp/baseline_pyfizika.json
+
+bench/baseline_e2e.json — эталон в репозитории (physics=virial, снят на машине из его полей python/machine).
+Выход 1 — регресс: среднее геометрическое отношений медиан по всем кейсам выросло больше чем на
+--threshold или медиана отдельного кейса — больше чем на --case-threshold. Отдельный кейс на шумной
+машине гуляет на ±30 % без изменений кода, сумма по кейсам — на ±15 %, отсюда два порога.
+Выход 2 — сравнивать не с чем (нет файла или он снят с другим physics); на другой машине эталон
+стоит переснять (--save-baseline) с кода до изменения.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from phys_prop.backends import ENV_BACKEND, available
+
+ROOT = Path(__file__).resolve().parent.parent
+CASE_GLOBS = ("inputdata/*.json", "timeless/*_input.json")
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline_e2e.json"
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 0.25       # +25% к среднему геометрическому по кейсам — регресс
+DEFAULT_CASE_THRESHOLD = 0.5   # +50% к медиане одного кейса — регресс
+MIN_DELTA_S = 5e-4        # абсолютный порог, чтобы не ловить шум на субмиллисекундных кейсах
+
+
+# -------------------- кейсы --------------------
+
+@dataclass(frozen=True)
+class Case:
+    name: str   # путь относительно корня репозитория
+    data: Dict[str, Any]
+
+    @property
+    def ssu_type(self) -> str:
+        t = self.data.get("type")
+        if t is None:
+            t = ((self.data.get("flowdata") or {}).get("constrictor_params") or {}).get("type")
+        return str(t or "unknown").strip().lower()
+
+
+def discover_cases(root: Path = ROOT, globs: Sequence[str] = CASE_GLOBS) -> List[Case]:
+    from converters.legacy_flowdata import from_legacy_flowdata, is_legacy_flowdata
+    from main import _load_json
+
+    cases = []
+    for pattern in globs:
+        for path in sorted(root.glob(pattern)):
+            data = _load_json(path)
+            if is_legacy_flowdata(data):  # timeless/*_input.json — старый формат flowdata
+                data = from_legacy_flowdata(data)
+            cases.append(Case(name=path.relative_to(root).as_posix(), data=data))
+    return cases
+
+
+def calculate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Тот же путь, что у main._calculate, без логирования remarks."""
+    from controllers.input_controller import InputController
+    from controllers.calculation_adapter import run_calculation
+
+    ic = InputController()
+    parsed = ic.parse(data)
+    prepared = ic.prepare_params(data)
+    return run_calculation(prepared, parsed.values_si, data)
+
+
+# -------------------- статистика --------------------
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    return {
+        "n": len(samples),
+        "median_s": statistics.median(samples),
+        "p95_s": percentile(samples, 0.95),
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+    }
+
+
+@dataclass
+class CaseResult:
+    name: str
+    ssu_type: str
+    status: str                     # "ok" | "error"
+    samples: List[float] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"type": self.ssu_type, "status": self.status, **summarize(self.samples)}
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+def run_case(case: Case, *, repeat: int, warmup: int = 1) -> CaseResult:
+    """Время каждого прогона, включая ошибочные: путь с исключением — тоже латентность калькулятора."""
+    res = CaseResult(name=case.name, ssu_type=case.ssu_type, status="ok")
+    for i in range(warmup + repeat):
+        data = copy.deepcopy(case.data)  # run_calculation/PhysMinimalRunner мутируют вход
+        t0 = time.perf_counter()
+        try:
+            calculate(data)
+        except Exception as e:
+            res.status, res.error = "error", f"{type(e).__name__}: {e}"
+        dt = time.perf_counter() - t0
+        if i >= warmup:
+            res.samples.append(dt)
+    return res
+
+
+def run_suite(cases: Sequence[Case], *, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    results = [run_case(c, repeat=repeat, warmup=warmup) for c in cases]
+    # по типу ССУ сводим только успешные кейсы: ранний выход по ошибке валидации иначе тянет медиану вниз
+    by_type: Dict[str, List[float]] = {}
+    for r in results:
+        if r.status == "ok":
+            by_type.setdefault(r.ssu_type, []).extend(r.samples)
+    return {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "cases": {r.name: r.to_dict() for r in results},
+        "types": {t: summarize(s) for t, s in sorted(by_type.items())},
+    }
+
+
+# -------------------- baseline --------------------
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], *, threshold: float = DEFAULT_THRESHOLD,
+            min_delta_s: float = MIN_DELTA_S) -> List[Tuple[str, float, float]]:
+    """Кейсы, у которых медиана выросла больше чем на threshold (и больше min_delta_s): (name, было, стало)."""
+    regressions = []
+    for name, cur in current["cases"].items():
+        base = (baseline.get("cases") or {}).get(name)
+        if not base or base.get("status") != cur["status"]:
+            continue
+        before, after = float(base["median_s"]), float(cur["median_s"])
+        if after > before * (1.0 + threshold) and after - before > min_delta_s:
+            regressions.append((name, before, after))
+    return regressions
+
+
+def suite_ratio(current: Dict[str, Any], baseline: Dict[str, Any]) -> Optional[float]:
+    """Среднее геометрическое стало/было по медианам кейсов, успешных и в baseline, и сейчас."""
+    logs = []
+    for name, cur in current["cases"].items():
+        base = (baseline.get("cases") or {}).get(name)
+        if base and base.get("status") == cur["status"] == "ok" and base["median_s"] > 0 and cur["median_s"] > 0:
+            logs.append(math.log(float(cur["median_s"]) / float(base["median_s"])))
+    return math.exp(statistics.fmean(logs)) if logs else None
+
+
+def _print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    base_cases = (baseline or {}).get("cases") or {}
+    print(f"{'кейс':<44} {'тип':<15} {'медиана, мс':>11} {'p95, мс':>9} {'baseline':>9}  статус")
+    for name, c in report["cases"].items():
+        b = base_cases.get(name)
+        delta = f"{(c['median_s'] / b['median_s'] - 1) * 100:+.0f}%" if b and b.get("median_s") else "—"
+        print(f"{name:<44} {c['type']:<15} {c['median_s'] * 1e3:>11.3f} {c['p95_s'] * 1e3:>9.3f} {delta:>9}  {c['status']}")
+    print()
+    print(f"{'тип ССУ':<44} {'':<15} {'медиана, мс':>11} {'p95, мс':>9}")
+    for t, s in report["types"].items():
+        print(f"{t:<44} {'':<15} {s['median_s'] * 1e3:>11.3f} {s['p95_s'] * 1e3:>9.3f}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Сквозной бенчмарк new_ssu по эталонным входам")
+    ap.add_argument("--repeat", type=int, default=20, help="прогонов на кейс (после прогрева)")
+    ap.add_argument("--warmup", type=int, default=1, help="прогревочных прогонов на кейс, в статистику не идут")
+    ap.add_argument("--physics", choices=available(), default="virial",
+                    help="бэкенд физсвойств (phys_prop.backends): virial — офлайн-замена PyFizika (по умолчанию), "
+                         "pyfizika — настоящая")
+    ap.add_argument("--case", action="append", default=None, metavar="GLOB",
+                    help="свои маски кейсов относительно корня (можно несколько); по умолчанию inputdata и timeless")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="файл baseline (JSON)")
+    ap.add_argument("--save-baseline", action="store_true", help="записать результат как новый baseline")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="допустимый рост среднего геометрического медиан по всем кейсам (0.25 = +25%%)")
+    ap.add_argument("--case-threshold", type=float, default=DEFAULT_CASE_THRESHOLD,
+                    help="допустимый рост медианы одного кейса (0.5 = +50%%)")
+    ap.add_argument("--output", type=Path, default=None, help="сохранить полный отчёт в JSON")
+    ap.add_argument("--verbose", action="store_true", help="не глушить логи расчёта (искажает время)")
+    args = ap.parse_args(argv)
+
+    os.environ[ENV_BACKEND] = args.physics
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    cases = discover_cases(ROOT, args.case or CASE_GLOBS)
+    report = run_suite(cases, repeat=args.repeat, warmup=args.warmup)
+    report["physics"] = args.physics
+
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("physics") != report["physics"]:
+            print(f"baseline {args.baseline} снят с physics={baseline.get('physics')}, а прогон — с {args.physics}")
+            baseline = None
+    _print_report(report, baseline)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nbaseline записан: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"\nСравнивать не с чем: нет baseline {args.baseline} для physics={args.physics} "
+              f"(--save-baseline, чтобы создать)")
+        return 2
+    if (baseline.get("python"), baseline.get("machine")) != (report["python"], report["machine"]):
+        print(f"\nbaseline снят на python {baseline.get('python')}/{baseline.get('machine')}, прогон — на "
+              f"{report['python']}/{report['machine']}: сравнение грубое")
+
+    ratio = suite_ratio(report, baseline)
+    slow_suite = ratio is not None and ratio > 1.0 + args.threshold
+    if ratio is not None:
+        print(f"\nВсе кейсы: ×{ratio:.3f} к baseline (порог ×{1 + args.threshold:.2f})")
+    regressions = compare(report, baseline, threshold=args.case_threshold)
+    if regressions:
+        print(f"\nРЕГРЕСС кейсов (> +{args.case_threshold * 100:.0f}% к медиане):")
+        for name, before, after in regressions:
+            print(f"  {name}: {before * 1e3:.3f} → {after * 1e3:.3f} мс")
+    if slow_suite:
+        print(f"\nРЕГРЕСС: все кейсы вместе медленнее baseline на {(ratio - 1) * 100:.0f}%")
+    if slow_suite or regressions:
+        return 1
+    print("\nРегрессов нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+    raise SystemExit(main())
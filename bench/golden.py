@@ -0,0 +1,499 @@
+"""Регрессия по эталонам: пересчёт пар «вход → ожидаемый выход», сравнение чисел с допусками и времени.
+
+    python -m bench.golden                                   # все пары, сравнение с эталонами и baseline времени
+    python -m bench.golden --workers 4 --case "inputdata/sharp_*.json"
+    python -m bench.golden --save-baseline                   # записать времена как baseline
+    python -m bench.golden --bless --case inputdata/cone_01.json   # перезаписать эталон текущим результатом
+    python -m bench.golden --physics virial --record-known   # записать текущие расхождения как известные
+
+Пары: inputdata/X.json → outputdata/X.json, timeless/*_input.json → *_out.json (старый формат flowdata,
+вход и выход приводятся через converters.legacy_flowdata). Сравниваются числовые поля эталона (допуски
+по маскам пути — golden_tolerances.json); поля, которых нет в эталоне, не проверяются. Эталоны сняты
+с настоящей PyFizika, поэтому по умолчанию physics=pyfizika (--physics — любой бэкенд phys_prop.backends).
+Известные расхождения текущего дерева — golden_known.json, раздел на physics: по каждому кейсу либо
+текст ошибки, либо поля дрейфа со значением, которое выдаёт дерево, и допуском. Такой кейс (xfail) не
+валит прогон, пока падает ровно так; новое поле, уход от записанного значения или другая ошибка — валит.
+Время каждого кейса — медиана repeat прогонов в воркере; baseline сравнивается, только если снят
+с тем же physics и тем же --workers. Выход 1 при новом дрейфе, новой ошибке расчёта или регрессе времени.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import fnmatch
+import importlib.util
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bench.e2e import DEFAULT_THRESHOLD, ROOT, calculate, compare, summarize
+from converters.legacy_flowdata import from_legacy_flowdata, is_legacy_flowdata, to_legacy_result
+from phys_prop.backends import ENV_BACKEND, available
+
+GOLDEN_GLOBS = ("inputdata/*.json", "timeless/*_input.json")
+TOLERANCES_PATH = Path(__file__).resolve().parent / "golden_tolerances.json"
+KNOWN_PATH = Path(__file__).resolve().parent / "golden_known.json"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline_golden.json"
+BASELINE_VERSION = 1
+SHOW_DRIFT = 10  # полей дрейфа на кейс при печати (в JSON-отчёте — все)
+
+
+# -------------------- пары вход/эталон --------------------
+
+@dataclass(frozen=True)
+class Golden:
+    name: str           # вход относительно корня (posix)
+    src: Path
+    expected: Path
+    expected_name: str  # эталон относительно корня (posix)
+
+
+def golden_path(src: Path, root: Path = ROOT) -> Path:
+    rel = src.relative_to(root)
+    if rel.parts[0] == "inputdata":
+        return root / "outputdata" / Path(*rel.parts[1:])
+    return src.with_name(src.name.replace("_input.json", "_out.json"))
+
+
+def discover_goldens(root: Path = ROOT, globs: Sequence[str] = GOLDEN_GLOBS) -> Tuple[List[Golden], List[str]]:
+    """(пары с эталоном, входы без эталона)."""
+    pairs, orphans = [], []
+    for pattern in globs:
+        for src in sorted(root.glob(pattern)):
+            name = src.relative_to(root).as_posix()
+            expected = golden_path(src, root)
+            if expected.exists():
+                pairs.append(Golden(name=name, src=src, expected=expected,
+                                    expected_name=expected.relative_to(root).as_posix()))
+            else:
+                orphans.append(name)
+    return pairs, orphans
+
+
+# -------------------- допуски и сравнение --------------------
+
+@dataclass(frozen=True)
+class Tolerance:
+    rel: float = 1e-9
+    abs: float = 1e-12
+    ignore: bool = False
+
+
+Rules = List[Tuple[str, Tolerance]]
+
+
+def load_tolerances(path: Path = TOLERANCES_PATH) -> Rules:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [
+        (r["pattern"], Tolerance(rel=float(r.get("rel", 0.0)), abs=float(r.get("abs", 0.0)),
+                                 ignore=bool(r.get("ignore", False))))
+        for r in data["fields"]
+    ]
+
+
+def tolerance_for(field: str, rules: Rules) -> Tolerance:
+    """Первая подходящая маска; без совпадений — Tolerance() по умолчанию."""
+    for pattern, tol in rules:
+        if fnmatch.fnmatchcase(field, pattern):
+            return tol
+    return Tolerance()
+
+
+def flatten(obj: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Листья JSON как (путь, значение): ключи через точку, индексы списков — [i]."""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from flatten(v, f"{prefix}.{k}" if prefix else str(k))
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            yield from flatten(v, f"{prefix}[{i}]")
+    else:
+        yield prefix, obj
+
+
+def _is_number(x: Any) -> bool:
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+@dataclass(frozen=True)
+class Drift:
+    field: str
+    expected: Any
+    actual: Any
+    reason: str  # "value" | "missing" | "type"
+
+    @property
+    def rel(self) -> Optional[float]:
+        if self.reason != "value" or not self.expected:
+            return None
+        return abs(self.actual - self.expected) / abs(self.expected)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"field": self.field, "expected": self.expected, "actual": self.actual,
+                "reason": self.reason, "rel": self.rel}
+
+
+def diff_numbers(expected: Any, actual: Any, rules: Rules) -> Tuple[int, List[Drift]]:
+    """(сколько числовых полей эталона сравнено, расхождения сверх допуска)."""
+    got = dict(flatten(actual))
+    compared, drifts = 0, []
+    for field, exp in flatten(expected):
+        if not _is_number(exp):
+            continue
+        tol = tolerance_for(field, rules)
+        if tol.ignore:
+            continue
+        compared += 1
+        if field not in got:
+            drifts.append(Drift(field, exp, None, "missing"))
+        elif not _is_number(got[field]):
+            drifts.append(Drift(field, exp, got[field], "type"))
+        elif math.isnan(exp) and math.isnan(got[field]):
+            continue
+        elif not math.isclose(exp, got[field], rel_tol=tol.rel, abs_tol=tol.abs):
+            drifts.append(Drift(field, exp, got[field], "value"))
+    return compared, drifts
+
+
+# -------------------- известные расхождения --------------------
+
+@dataclass(frozen=True)
+class KnownDrift:
+    actual: Any       # что выдаёт текущее дерево (None — поля нет)
+    rel: float = 0.0
+    abs: float = 0.0
+
+    def covers(self, actual: Any) -> bool:
+        if _is_number(self.actual) and _is_number(actual):
+            return math.isclose(actual, self.actual, rel_tol=self.rel, abs_tol=self.abs)
+        return actual == self.actual
+
+
+@dataclass(frozen=True)
+class KnownFailure:
+    case: str
+    reason: str
+    error: Optional[str] = None                                  # известная ошибка расчёта
+    fields: Dict[str, KnownDrift] = field(default_factory=dict)  # известный дрейф по полям
+
+    def deviations(self, case: Dict[str, Any]) -> List[str]:
+        """Чем кейс отличается от записанного; пусто — падает ровно так, как записано."""
+        if self.error is not None:
+            if case["status"] != "ok" and case["error"] == self.error:
+                return []
+            got = case["error"] if case["status"] != "ok" else "расчёт без ошибки"
+            return [f"записана ошибка {self.error!r}, получено: {got}"]
+        if case["status"] != "ok":
+            return [f"записан дрейф, получена ошибка: {case['error']}"]
+        out = []
+        for d in case["drift"]:
+            known = self.fields.get(d["field"])
+            if known is None:
+                out.append(f"{d['field']}: новый дрейф {d['expected']!r} → {d['actual']!r}")
+            elif not known.covers(d["actual"]):
+                out.append(f"{d['field']}: записано {known.actual!r}, получено {d['actual']!r}")
+        return out
+
+
+def known_key(physics: str) -> str:
+    """Раздел golden_known.json: без установленной PyFizika физика пропускается — это другой прогон."""
+    if physics == "pyfizika":
+        try:
+            missing = importlib.util.find_spec("PyFizika") is None
+        except ValueError:  # sys.modules["PyFizika"] = None
+            missing = True
+        if missing:
+            return "pyfizika (не установлена)"
+    return physics
+
+
+def load_known_failures(path: Path = KNOWN_PATH, key: str = "pyfizika") -> Dict[str, KnownFailure]:
+    if not Path(path).exists():
+        return {}
+    section = json.loads(Path(path).read_text(encoding="utf-8")).get(key) or {}
+    return {
+        case: KnownFailure(case=case, reason=r.get("reason", ""), error=r.get("error"),
+                           fields={f: KnownDrift(actual=k.get("actual"), rel=float(k.get("rel", 0.0)),
+                                                 abs=float(k.get("abs", 0.0)))
+                                   for f, k in (r.get("fields") or {}).items()})
+        for case, r in section.items()
+    }
+
+
+def mark_known_failures(report: Dict[str, Any], known: Dict[str, KnownFailure]) -> List[str]:
+    """
+    Проставляет case["xfail"] = причина кейсам, которые падают ровно так, как записано: та же ошибка
+    или дрейф только в записанных полях и в пределах их допуска от записанного значения. Иначе —
+    case["known_changed"] со списком отличий, и кейс валит прогон. Возвращает записанные кейсы,
+    которые уже совпадают с эталоном.
+    """
+    xpassed = []
+    for name, case in report["cases"].items():
+        k = known.get(name)
+        if k is None:
+            continue
+        if case["status"] == "ok" and case["match"]:
+            xpassed.append(name)
+            continue
+        deviations = k.deviations(case)
+        if deviations:
+            case["known_changed"] = deviations
+        else:
+            case["xfail"] = k.reason
+    return xpassed
+
+
+def record_known(report: Dict[str, Any], rules: Rules, known: Dict[str, KnownFailure]) -> Dict[str, Any]:
+    """
+    Раздел golden_known.json по отчёту: записи прежних кейсов, не вошедших в прогон, сохраняются;
+    кейсы прогона — как посчитаны сейчас (совпавшие удаляются), причины переносятся из прежних записей.
+    """
+    section: Dict[str, Any] = {
+        name: _known_to_json(k) for name, k in known.items() if name not in report["cases"]
+    }
+    for name, case in report["cases"].items():
+        if case["status"] == "ok" and case["match"]:
+            continue
+        record: Dict[str, Any] = {"reason": known[name].reason if name in known else ""}
+        if case["status"] != "ok":
+            record["error"] = case["error"]
+        else:
+            record["fields"] = {}
+            for d in case["drift"]:
+                tol = tolerance_for(d["field"], rules)
+                record["fields"][d["field"]] = {"actual": d["actual"], "rel": tol.rel, "abs": tol.abs}
+        section[name] = record
+    return dict(sorted(section.items()))
+
+
+def _known_to_json(k: KnownFailure) -> Dict[str, Any]:
+    if k.error is not None:
+        return {"reason": k.reason, "error": k.error}
+    return {"reason": k.reason,
+            "fields": {f: {"actual": d.actual, "rel": d.rel, "abs": d.abs} for f, d in k.fields.items()}}
+
+
+def _dumps_known(obj: Any, level: int = 0) -> str:
+    """JSON, в котором словари из одних скаляров — одной строкой: одна строка на поле дрейфа."""
+    if isinstance(obj, dict) and any(isinstance(v, (dict, list)) for v in obj.values()):
+        pad = "  " * (level + 1)
+        body = ",\n".join(f"{pad}{json.dumps(k, ensure_ascii=False)}: {_dumps_known(v, level + 1)}"
+                          for k, v in obj.items())
+        return "{\n" + body + "\n" + "  " * level + "}"
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def save_known(path: Path, key: str, section: Dict[str, Any]) -> None:
+    data = json.loads(Path(path).read_text(encoding="utf-8")) if Path(path).exists() else {}
+    data[key] = section
+    Path(path).write_text(_dumps_known(data) + "\n", encoding="utf-8")
+
+
+def _as_golden(calc: Dict[str, Any], golden: Any) -> Dict[str, Any]:
+    """
+    Результат в форме эталона: outputdata хранит {"result": ...}, как main._calculate;
+    timeless/*_out.json — выход старого расчёта (converters.legacy_flowdata).
+    """
+    if isinstance(golden, dict) and "flow_results" in golden:
+        return to_legacy_result(calc)
+    return {"result": calc} if isinstance(golden, dict) and "result" in golden else calc
+
+
+# -------------------- пересчёт --------------------
+
+class Recompute:
+    """process_fn(src, dst) для run_batch: repeat прогонов, в dst — результат и времена. Пиклится."""
+
+    def __init__(self, physics: str, repeat: int, warmup: int = 1) -> None:
+        self.physics = physics
+        self.repeat = repeat
+        self.warmup = warmup
+
+    def __call__(self, src: Path, dst: Path) -> None:
+        from main import _dump_json, _load_json
+
+        os.environ[ENV_BACKEND] = self.physics  # воркер мог стартовать с другим окружением
+        data = _load_json(src)
+        if is_legacy_flowdata(data):
+            data = from_legacy_flowdata(data)
+        samples, calc = [], None
+        for i in range(self.warmup + self.repeat):
+            case = copy.deepcopy(data)  # run_calculation мутирует вход
+            t0 = time.perf_counter()
+            calc = calculate(case)
+            if i >= self.warmup:
+                samples.append(time.perf_counter() - t0)
+        _dump_json(dst, {"result": calc, "samples": samples})
+
+
+def run_goldens(goldens: Sequence[Golden], *, physics: str, repeat: int, warmup: int = 1, workers: int = 1,
+                rules: Optional[Rules] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(отчёт, пересчитанные результаты по имени кейса — для --bless)."""
+    from batch.pool import BatchTask, run_batch
+
+    rules = load_tolerances() if rules is None else rules
+    results: Dict[str, Any] = {}
+    cases: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="golden_") as tmp:
+        tasks = [BatchTask(src=g.src, dst=Path(tmp) / f"{i:04d}.json", rel=g.name) for i, g in enumerate(goldens)]
+        batch = run_batch(tasks, Recompute(physics, repeat, warmup), workers=workers)
+        items = {it.rel: it for it in batch.items}
+        for g, task in zip(goldens, tasks):
+            item = items[g.name]
+            case: Dict[str, Any] = {"golden": g.expected_name}
+            if not item.ok:
+                case.update(status="error", match=False, error=f"{item.error_type}: {item.error}",
+                            **summarize([item.seconds]))
+                cases[g.name] = case
+                continue
+            out = json.loads(task.dst.read_text(encoding="utf-8"))
+            expected = json.loads(g.expected.read_text(encoding="utf-8"))
+            results[g.name] = out["result"]
+            compared, drifts = diff_numbers(expected, _as_golden(out["result"], expected), rules)
+            case.update(status="ok", match=not drifts, compared=compared, drift_count=len(drifts),
+                        drift=[d.to_dict() for d in drifts], **summarize(out["samples"]))
+            cases[g.name] = case
+    report = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "physics": physics,
+        "repeat": repeat,
+        "workers": workers,
+        "cases": cases,
+    }
+    return report, results
+
+
+def bless(goldens: Sequence[Golden], results: Dict[str, Any]) -> List[str]:
+    """Перезаписывает эталоны пересчитанными результатами (в форме эталона); возвращает записанные пути."""
+    from main import _dump_json
+
+    written = []
+    for g in goldens:
+        if g.name in results:
+            expected = json.loads(g.expected.read_text(encoding="utf-8"))
+            _dump_json(g.expected, _as_golden(results[g.name], expected))
+            written.append(g.expected_name)
+    return written
+
+
+# -------------------- отчёт --------------------
+
+def _print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    base_cases = (baseline or {}).get("cases") or {}
+    print(f"{'кейс':<44} {'полей':>6} {'дрейф':>6} {'медиана, мс':>11} {'baseline':>9}  статус")
+    for name, c in report["cases"].items():
+        b = base_cases.get(name)
+        delta = f"{(c['median_s'] / b['median_s'] - 1) * 100:+.0f}%" if b and b.get("median_s") else "—"
+        status = c["status"] if c["status"] != "ok" else ("ok" if c["match"] else "ДРЕЙФ")
+        if c.get("xfail"):
+            status = f"xfail ({status})"
+        print(f"{name:<44} {c.get('compared', 0):>6} {c.get('drift_count', 0):>6} "
+              f"{c['median_s'] * 1e3:>11.3f} {delta:>9}  {status}")
+    for name, c in report["cases"].items():
+        if c.get("xfail"):
+            continue  # причина и поля — в golden_known.json
+        if c.get("known_changed"):
+            print(f"\n{name}: расходится не так, как записано в golden_known.json:")
+            for line in c["known_changed"][:SHOW_DRIFT]:
+                print(f"  {line}")
+        elif c["status"] != "ok":
+            print(f"\n{name}: {c['error']}")
+        elif c["drift"]:
+            print(f"\n{name} → {c['golden']} ({c['drift_count']} полей):")
+            for d in c["drift"][:SHOW_DRIFT]:
+                rel = f" (rel {d['rel']:.2e})" if d["rel"] is not None else ""
+                print(f"  {d['field']}: {d['expected']!r} → {d['actual']!r} [{d['reason']}]{rel}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Регрессия new_ssu по эталонным выходам: точность и время")
+    ap.add_argument("--case", action="append", default=None, metavar="GLOB",
+                    help="маски входов относительно корня (можно несколько); по умолчанию inputdata и timeless")
+    ap.add_argument("--workers", type=int, default=1, help="параллельных процессов пересчёта")
+    ap.add_argument("--repeat", type=int, default=5, help="прогонов на кейс для времени (после прогрева)")
+    ap.add_argument("--warmup", type=int, default=1, help="прогревочных прогонов на кейс")
+    ap.add_argument("--physics", choices=available(), default="pyfizika",
+                    help="бэкенд физсвойств (phys_prop.backends): pyfizika — как при снятии эталонов (по умолчанию)")
+    ap.add_argument("--tolerances", type=Path, default=TOLERANCES_PATH, help="допуски по полям (JSON)")
+    ap.add_argument("--known", type=Path, default=KNOWN_PATH,
+                    help="известные расхождения текущего дерева по полям (JSON)")
+    ap.add_argument("--record-known", action="store_true",
+                    help="записать расхождения этого прогона как известные (раздел текущего physics)")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline времени (JSON)")
+    ap.add_argument("--save-baseline", action="store_true", help="записать времена как новый baseline")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="допустимый относительный рост медианы кейса (0.25 = +25%%)")
+    ap.add_argument("--bless", action="store_true",
+                    help="перезаписать эталоны текущими результатами (только успешно посчитанные кейсы)")
+    ap.add_argument("--output", type=Path, default=None, help="сохранить полный отчёт в JSON")
+    ap.add_argument("--verbose", action="store_true", help="не глушить логи расчёта (искажает время)")
+    args = ap.parse_args(argv)
+
+    os.environ[ENV_BACKEND] = args.physics
+    if not args.verbose:
+        logging.disable(logging.ERROR)  # ошибки кейсов — в отчёте, traceback воркера не нужен
+
+    goldens, orphans = discover_goldens(ROOT, args.case or GOLDEN_GLOBS)
+    if orphans:
+        print(f"без эталона, пропущены: {', '.join(orphans)}")
+    rules = load_tolerances(args.tolerances)
+    report, results = run_goldens(goldens, physics=args.physics, repeat=args.repeat, warmup=args.warmup,
+                                  workers=args.workers, rules=rules)
+    key = known_key(args.physics)
+    known = load_known_failures(args.known, key)
+    if args.record_known:
+        save_known(args.known, key, record_known(report, rules, known))
+        print(f"известные расхождения [{key}] записаны: {args.known}")
+        known = load_known_failures(args.known, key)
+    xpassed = mark_known_failures(report, known)
+
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if (baseline.get("physics"), baseline.get("workers")) != (report["physics"], report["workers"]):
+            print(f"baseline {args.baseline} снят с physics={baseline.get('physics')}, "
+                  f"workers={baseline.get('workers')} — время не сравниваем")
+            baseline = None
+    _print_report(report, baseline)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nbaseline записан: {args.baseline}")
+    if args.bless:
+        written = bless(goldens, results)
+        print(f"\nЭталоны перезаписаны ({len(written)}): {', '.join(written)}")
+        return 0
+
+    failed = [name for name, c in report["cases"].items() if not c["match"] and not c.get("xfail")]
+    known = sum(1 for c in report["cases"].values() if c.get("xfail"))
+    if xpassed:
+        print(f"\nСовпали с эталоном, хотя записаны в {args.known.name} — перезаписать --record-known: "
+              f"{', '.join(xpassed)}")
+    regressions = compare(report, baseline, threshold=args.threshold) if baseline else []
+    if regressions:
+        print(f"\nРЕГРЕСС ВРЕМЕНИ (> +{args.threshold * 100:.0f}% к медиане):")
+        for name, before, after in regressions:
+            print(f"  {name}: {before * 1e3:.3f} → {after * 1e3:.3f} мс")
+    if failed:
+        print(f"\nРасхождение с эталонами: {len(failed)} из {len(report['cases'])} (известных, xfail: {known})")
+    if failed or regressions:
+        return 1
+    print(f"\nНовых расхождений нет: совпали {len(report['cases']) - known} кейсов, известных (xfail) — {known}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+    raise SystemExit(main())
@@ -0,0 +1,402 @@
+"""Микробенчмарки горячих ядер расчёта с историей по коммитам (в духе airspeed velocity).
+
+    python -m bench.kernels                          # прогон, запись в историю, отчёт по трендам
+    python -m bench.kernels --filter 'orifice.sharp.*' --filter 'gsssd.*' --no-save
+    python -m bench.kernels --report-only --last 20  # только отчёт по сохранённой истории
+    python -m bench.kernels --list
+
+Каждое ядро — setup, который готовит данные (в замер не входит) и возвращает вызов без аргументов.
+Вызов прогоняется timeit-ом: число вызовов в сэмпле подбирается под --sample-time, сэмплов --repeat.
+История — bench/kernel_history.json: прогон на коммит и окружение (машина + Python); повторный прогон
+того же коммита (в том числе с --filter) обновляет замеренные им ядра. Регресс — медиана ядра выросла больше чем на threshold относительно
+предыдущего коммита в том же окружении и межквартильные интервалы не пересекаются (выход 1).
+
+Ядра ГСССД МР 147-2008 импортируются из своего каталога: tables.py читает *.txt из текущего каталога.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import inspect
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+HISTORY_PATH = Path(__file__).resolve().parent / "kernel_history.json"
+HISTORY_VERSION = 1
+GSSSD_DIR = ROOT / "prilojenie_B_part_3" / "gsssd_mr_147_2008"
+DEFAULT_SAMPLE_TIME = 0.01  # с на сэмпл, как sample_time в asv
+DEFAULT_REPEAT = 10
+DEFAULT_THRESHOLD = 0.1     # +10% к медиане ядра — регресс
+SPARK = "▁▂▃▄▅▆▇█"
+
+
+# -------------------- реестр ядер --------------------
+
+@dataclass(frozen=True)
+class Kernel:
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+
+
+KERNELS: Dict[str, Kernel] = {}
+
+
+def kernel(name: str) -> Callable[[Callable[[], Callable[[], Any]]], Callable[[], Callable[[], Any]]]:
+    def register(setup: Callable[[], Callable[[], Any]]) -> Callable[[], Callable[[], Any]]:
+        KERNELS[name] = Kernel(name, setup)
+        return setup
+    return register
+
+
+def select(patterns: Optional[Sequence[str]] = None) -> List[Kernel]:
+    if not patterns:
+        return list(KERNELS.values())
+    return [k for k in KERNELS.values() if any(fnmatch.fnmatchcase(k.name, p) for p in patterns)]
+
+
+# --- ССУ: C, ε, E для каждого из 11 классов ---
+
+ORIFICE_TYPES = ("sharp", "conical", "wear", "double", "segment", "eccentric", "quarter", "quarter_nozzle",
+                 "cylindrical", "wedge", "cone")
+
+
+@lru_cache(maxsize=None)
+def _orifice_point(ssu_type: str) -> Tuple[Any, Dict[str, Any]]:
+    """Та же точка, что дал бы генератор нагрузки: геометрия проходит _validate, Re — check_Re."""
+    from bench.workload import sample_point
+
+    return sample_point(random.Random(f"kernels:{ssu_type}"), ssu_type)
+
+
+def _orifice_setup(ssu_type: str, method: str) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        orifice, pt = _orifice_point(ssu_type)
+        fn = getattr(orifice, method)
+        given = {"dp": pt["dp_kpa"] * 1e3, "p": pt["p_mpa"] * 1e6, "k": pt["props"]["k"]}
+        kwargs = {name: value for name, value in given.items() if name in inspect.signature(fn).parameters}
+        return lambda: fn(**kwargs)
+    return setup
+
+
+for _t in ORIFICE_TYPES:
+    for _m in ("calculate_C", "calculate_epsilon", "calculate_E"):
+        kernel(f"orifice.{_t}.{_m}")(_orifice_setup(_t, _m))
+
+
+# --- ГСССД МР 147-2008 (водяной пар) ---
+
+GSSSD_POINT = (1.0, 573.15)  # p, МПа; T, К — перегретый пар
+
+
+@contextmanager
+def _gsssd_imports() -> Iterator[None]:
+    cwd = os.getcwd()
+    sys.path.insert(0, str(GSSSD_DIR))
+    os.chdir(GSSSD_DIR)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(str(GSSSD_DIR))
+
+
+def _gsssd_state() -> Tuple[float, float]:
+    """(w, τ) в точке GSSSD_POINT — аргументы функций A0..A5."""
+    with _gsssd_imports():
+        from GSSSD_147_2008 import get_Pi_Tau, get_W, get_W0
+    p, T = GSSSD_POINT
+    tau, pi = get_Pi_Tau(p, T)
+    return get_W(get_W0(tau, pi), pi, tau), tau
+
+
+def _gsssd_a_setup(index: int) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        with _gsssd_imports():
+            import calc_A
+        fn = getattr(calc_A, f"get_A{index}")
+        w, tau = _gsssd_state()
+        return lambda: fn(w, tau)
+    return setup
+
+
+for _i in range(6):
+    kernel(f"gsssd.get_A{_i}")(_gsssd_a_setup(_i))
+
+
+@kernel("gsssd.calc_single_phase")
+def _calc_single_phase() -> Callable[[], Any]:
+    with _gsssd_imports():
+        from GSSSD_147_2008 import calc_single_phase
+    p, T = GSSSD_POINT
+    return lambda: calc_single_phase(p, T)
+
+
+# --- погрешность состава (метод 10) ---
+
+@kernel("errors.run_method10")
+def _run_method10() -> Callable[[], Any]:
+    from errors.errors_handler.for_package import run_method10
+
+    composition = {
+        "CarbonDioxide": 2.5, "Ethane": 6, "Helium": 0.015, "Hydrogen": 0.005, "Methane": 87.535,
+        "Nitrogen": 1, "Oxygen": 0.05, "Propane": 2, "iButane": 0.5, "iPentane": 0.045, "nButane": 0.3,
+        "nPentane": 0.05,
+    }
+    abs_err = {"intrError": {"errorTypeId": "AbsErr", "value": {"real": 0.05, "unit": "percent"}}}
+    upp_err = {"intrError": {"errorTypeId": "UppErr", "range": {"range": {"min": 0.001, "max": 0.02}}}}
+    error_composition = {n: abs_err if n in ("CarbonDioxide", "Ethane", "Methane", "nButane") else upp_err
+                         for n in composition}
+    return lambda: run_method10(composition, error_composition, mode="methane_by_diff")
+
+
+# --- единицы ---
+
+@kernel("units.convert_pressure")
+def _convert_pressure() -> Callable[[], Any]:
+    from converters.units_validator import convert_pressure
+    return lambda: convert_pressure(5.2, "MPa")
+
+
+@kernel("units.convert_length")
+def _convert_length() -> Callable[[], Any]:
+    from converters.units_validator import convert_length
+    return lambda: convert_length(257.3, "mm")
+
+
+# --- таблицы прямых участков ---
+
+@kernel("rules_tables.get_length_after_ssu")
+def _length_after_ssu() -> Callable[[], Any]:
+    from flow_straightness.rules_tables import get_length_after_ssu
+    return lambda: get_length_after_ssu(0.537)
+
+
+@kernel("rules_tables.get_relative_roughness")
+def _relative_roughness() -> Callable[[], Any]:
+    from flow_straightness.rules_tables import get_relative_roughness
+    return lambda: get_relative_roughness(0.537)
+
+
+@kernel("rules_tables.get_generic_ms_length")
+def _generic_ms_length() -> Callable[[], Any]:
+    from flow_straightness.rules_tables import get_generic_ms_length
+    return lambda: get_generic_ms_length(0.537, "convergent_reducer")
+
+
+@kernel("rules_tables.get_cone_length")
+def _cone_length() -> Callable[[], Any]:
+    from flow_straightness.rules_tables import get_cone_length
+    return lambda: get_cone_length(0.75, "convergent_reducer")
+
+
+@kernel("rules_tables.get_unknown_ms_length")
+def _unknown_ms_length() -> Callable[[], Any]:
+    from flow_straightness.rules_tables import get_unknown_ms_length
+    return lambda: get_unknown_ms_length(0.537)
+
+
+# -------------------- замер --------------------
+
+def time_kernel(fn: Callable[[], Any], *, sample_time: float = DEFAULT_SAMPLE_TIME,
+                repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """Время одного вызова по repeat сэмплам; вызовов в сэмпле столько, чтобы он шёл ~sample_time."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        t = timer.timeit(number)
+        if t >= sample_time / 10 or number >= 10 ** 7:
+            break
+        number *= 10
+    number = max(1, round(number * sample_time / t)) if t > 0 else number
+    samples = [timer.timeit(number) / number for _ in range(repeat)]
+    q25, _, q75 = statistics.quantiles(samples, n=4) if len(samples) > 1 else (samples[0],) * 3
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "q25_s": q25, "q75_s": q75,
+            "number": number, "repeat": repeat}
+
+
+def run_kernels(kernels: Sequence[Kernel], *, sample_time: float = DEFAULT_SAMPLE_TIME,
+                repeat: int = DEFAULT_REPEAT) -> Dict[str, Dict[str, Any]]:
+    """Ядра, у которых не прошёл setup или первый вызов, попадают в результат со status=error."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for k in kernels:
+        try:
+            fn = k.setup()
+            fn()
+        except Exception as e:
+            results[k.name] = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+            continue
+        results[k.name] = {"status": "ok", **time_kernel(fn, sample_time=sample_time, repeat=repeat)}
+    return results
+
+
+# -------------------- история --------------------
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def git_revision() -> Dict[str, Any]:
+    """Текущий коммит, его дата и признак незакоммиченных правок в отслеживаемых файлах."""
+    commit = _git("rev-parse", "HEAD")
+    if commit is None:
+        return {"commit": "unknown", "date": None, "dirty": True}
+    return {"commit": commit, "date": _git("show", "-s", "--format=%cI", commit),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def environment() -> str:
+    return f"{platform.machine()}-{platform.python_implementation().lower()}{platform.python_version()}"
+
+
+def load_history(path: Path) -> Dict[str, Any]:
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {"version": HISTORY_VERSION, "runs": []}
+
+
+def record(history: Dict[str, Any], run: Dict[str, Any]) -> None:
+    """Добавляет прогон; для того же коммита и окружения обновляет замеренные ядра, остальные сохраняет."""
+    key = (run["commit"], run["env"])
+    runs = [r for r in history["runs"] if (r["commit"], r["env"]) != key]
+    for old in history["runs"]:
+        if (old["commit"], old["env"]) == key:
+            run = {**run, "results": {**old["results"], **run["results"]}}
+    runs.append(run)
+    runs.sort(key=lambda r: (r.get("date") or "", r["recorded"]))
+    history["runs"] = runs
+
+
+def env_runs(history: Dict[str, Any], env: str) -> List[Dict[str, Any]]:
+    return [r for r in history["runs"] if r["env"] == env]
+
+
+def regressions(previous: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]], *,
+                threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float, float]]:
+    """Ядра, у которых медиана выросла больше чем на threshold и сэмплы уже не пересекаются: (name, было, стало)."""
+    out = []
+    for name, cur in current.items():
+        prev = previous.get(name)
+        if not prev or prev.get("status") != "ok" or cur.get("status") != "ok":
+            continue
+        if cur["median_s"] > prev["median_s"] * (1.0 + threshold) and cur["q25_s"] > prev["q75_s"]:
+            out.append((name, prev["median_s"], cur["median_s"]))
+    return out
+
+
+def sparkline(values: Sequence[Optional[float]]) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return ""
+    lo, hi = min(present), max(present)
+    span = hi - lo or 1.0
+    return "".join(" " if v is None else SPARK[min(len(SPARK) - 1, int((v - lo) / span * len(SPARK)))]
+                   for v in values)
+
+
+def _fmt_time(seconds: float) -> str:
+    for unit, scale in (("с", 1.0), ("мс", 1e-3), ("мкс", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} нс"
+
+
+def _change(before: Optional[float], after: float) -> str:
+    return f"{(after / before - 1) * 100:+.0f}%" if before else "—"
+
+
+def print_report(runs: Sequence[Dict[str, Any]], *, last: int) -> None:
+    """Последний прогон: время ядер, изменение к предыдущему коммиту и к лучшему в истории, тренд."""
+    if not runs:
+        print("история пуста")
+        return
+    window = list(runs)[-last:]
+    latest, previous = window[-1], (window[-2] if len(window) > 1 else None)
+    print(f"{latest['commit'][:10]}{'+' if latest.get('dirty') else ''}  {latest['env']}  "
+          f"прогонов в истории: {len(runs)}, в тренде: {len(window)}")
+    print(f"{'ядро':<42} {'медиана':>10} {'к пред.':>8} {'к лучш.':>8}  тренд")
+    for name, cur in latest["results"].items():
+        if cur.get("status") != "ok":
+            print(f"{name:<42} {'—':>10} {'':>8} {'':>8}  {cur.get('error', '')}")
+            continue
+        series = [(r["results"].get(name) or {}).get("median_s") for r in window]
+        best = min(v for v in series if v is not None)
+        prev = ((previous or {}).get("results", {}).get(name) or {}).get("median_s")
+        print(f"{name:<42} {_fmt_time(cur['median_s']):>10} {_change(prev, cur['median_s']):>8} "
+              f"{_change(best, cur['median_s']):>8}  {sparkline(series)}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Микробенчмарки ядер new_ssu с историей по коммитам")
+    ap.add_argument("--filter", action="append", default=None, metavar="GLOB",
+                    help="маски имён ядер (можно несколько), например 'orifice.*.calculate_C'")
+    ap.add_argument("--list", action="store_true", help="показать ядра и выйти")
+    ap.add_argument("--sample-time", type=float, default=DEFAULT_SAMPLE_TIME, help="длительность сэмпла, с")
+    ap.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="сэмплов на ядро")
+    ap.add_argument("--history", type=Path, default=HISTORY_PATH, help="файл истории (JSON)")
+    ap.add_argument("--no-save", action="store_true", help="не записывать прогон в историю")
+    ap.add_argument("--report-only", action="store_true", help="без замеров: отчёт по сохранённой истории")
+    ap.add_argument("--last", type=int, default=10, help="сколько последних коммитов показывать в тренде")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="допустимый относительный рост медианы ядра (0.1 = +10%%)")
+    ap.add_argument("--verbose", action="store_true", help="не глушить логи ядер (искажает время)")
+    args = ap.parse_args(argv)
+
+    kernels = select(args.filter)
+    if args.list:
+        for k in kernels:
+            print(k.name)
+        return 0
+    history = load_history(args.history)
+    env = environment()
+    if not args.report_only:
+        if not args.verbose:
+            logging.disable(logging.ERROR)  # подбор точек ССУ логирует отбракованные геометрии как ERROR
+        t0 = time.perf_counter()
+        results = run_kernels(kernels, sample_time=args.sample_time, repeat=args.repeat)
+        run = {**git_revision(), "env": env, "recorded": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+               "wall_s": round(time.perf_counter() - t0, 3), "results": results}
+        record(history, run)
+        if not args.no_save:
+            args.history.write_text(json.dumps(history, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    runs = env_runs(history, env)
+    if args.filter and runs:
+        runs = [{**r, "results": {n: v for n, v in r["results"].items() if n in {k.name for k in kernels}}}
+                for r in runs]
+    print_report(runs, last=args.last)
+    if len(runs) < 2:
+        print(f"\nпредыдущих прогонов в окружении {env} нет — сравнивать не с чем")
+        return 0
+
+    found = regressions(runs[-2]["results"], runs[-1]["results"], threshold=args.threshold)
+    if found:
+        print(f"\nРЕГРЕСС (> +{args.threshold * 100:.0f}% к {runs[-2]['commit'][:10]}):")
+        for name, before, after in found:
+            print(f"  {name}: {_fmt_time(before)} → {_fmt_time(after)}")
+        return 1
+    print(f"\nРегрессов нет (порог +{args.threshold * 100:.0f}% к {runs[-2]['commit'][:10]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+    raise SystemExit(main())
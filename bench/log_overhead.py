@@ -0,0 +1,137 @@
+"""Цена логирования на один расчёт: один и тот же кейс в отдельном процессе под разными профилями.
+
+    python -m bench.log_overhead
+    python -m bench.log_overhead --repeat 500 --case inputdata/cone_01.json
+    python -m bench.log_overhead --baseline b341e9a    # «до»: вызовы логов снова f-строки
+
+Профиль off — logging.disable (нижняя граница), остальные — переменные окружения logger_config.
+stderr процесса уходит в /dev/null: измеряется форматирование и запись, а не терминал.
+Физика — офлайн-бэкенд virial (NEW_SSU_PHYS_BACKEND), чтобы время PyFizika не размывало разницу.
+
+--baseline REV — коммит, который перевёл вызовы логов на ленивый %-формат. Бенчмарк выгружает HEAD
+во временный каталог (git archive), откатывает в нём изменения REV во всём, кроме logger_config,
+main.py, bench/ и тестов (остаются только f-строки в местах вызова), и гоняет там те же профили.
+Так «до» и «после» отличаются только местами вызова: профили, бэкенд и расчёт одни и те же.
+
+Что показали прогоны (sharp_01, virial, --repeat 300 --rounds 5, ВМ с 1 CPU):
+- профиль default (DEBUG, цвет, синхронно) в 1.5–2 раза дороже off: off ≈ 2.3–4.1 мс,
+  default ≈ 3.8–6.2 мс — DEBUG-записи форматируются и пишутся на каждом расчёте;
+- «до» и «после» перевода мест вызова различаются меньше, чем один и тот же профиль в соседних
+  запусках (±0.5–1 мс), так что выигрыш самого перевода здесь не виден. Ощутимо снижает цену
+  логирования только выбор профиля: для потока расчётов — info или production.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from bench.e2e import ROOT, summarize
+from phys_prop.backends import ENV_BACKEND
+
+PROFILES: Dict[str, Dict[str, str]] = {
+    "off": {},
+    "default": {},                                          # DEBUG, цветной, синхронный — как было
+    "info": {"NEW_SSU_LOG_LEVEL": "INFO"},                  # тот же вывод, без DEBUG
+    "production": {"NEW_SSU_LOG_PROFILE": "production"},    # INFO, JSON lines, QueueListener
+}
+DEFAULT_CASE = "inputdata/sharp_01.json"
+PHYSICS = "virial"
+# при откате коммита-перевода на f-строки не трогаем всё, кроме мест вызова
+KEEP_ON_BASELINE = ("logger_config.py", "main.py", "bench", "test_logger_config.py")
+
+
+def _child(profile: str, case: str, repeat: int, warmup: int) -> None:
+    from main import _load_json
+    from bench.e2e import calculate
+
+    if profile == "off":
+        logging.disable(logging.CRITICAL)
+    data = _load_json(ROOT / case)
+    samples = []
+    for i in range(warmup + repeat):
+        case_data = copy.deepcopy(data)
+        t0 = time.perf_counter()
+        calculate(case_data)
+        if i >= warmup:
+            samples.append(time.perf_counter() - t0)
+    print(json.dumps(summarize(samples)))
+
+
+def baseline_tree(rev: str, dest: Path) -> None:
+    """HEAD в dest с откатом изменений rev в местах вызова логов (кроме KEEP_ON_BASELINE)."""
+    archive = subprocess.run(["git", "archive", "HEAD"], cwd=ROOT, stdout=subprocess.PIPE, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", str(dest)], input=archive, check=True)
+    exclude = [f":!{p}" for p in KEEP_ON_BASELINE]
+    patch = subprocess.run(["git", "show", "--format=", rev, "--", ".", *exclude],
+                           cwd=ROOT, stdout=subprocess.PIPE, check=True).stdout
+    if not patch.strip():
+        raise SystemExit(f"{rev}: нет изменений в местах вызова логов")
+    subprocess.run(["git", "apply", "-R"], cwd=dest, input=patch, check=True)
+
+
+def run_profile(profile: str, *, case: str, repeat: int, warmup: int, root: Path = ROOT) -> Dict[str, float]:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("NEW_SSU_LOG_")}
+    env.update(PROFILES[profile])
+    env[ENV_BACKEND] = PHYSICS
+    proc = subprocess.run(
+        [sys.executable, "-m", "bench.log_overhead", "--child", profile, "--case", case,
+         "--repeat", str(repeat), "--warmup", str(warmup)],
+        cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Накладные расходы логирования на расчёт new_ssu")
+    ap.add_argument("--case", type=str, default=DEFAULT_CASE, help="вход относительно корня репозитория")
+    ap.add_argument("--repeat", type=int, default=200, help="расчётов на профиль (после прогрева)")
+    ap.add_argument("--warmup", type=int, default=5, help="прогревочных расчётов на профиль")
+    ap.add_argument("--rounds", type=int, default=3, help="повторов всего обхода; берётся лучшая медиана")
+    ap.add_argument("--profile", action="append", choices=list(PROFILES), default=None,
+                    help="профили (можно несколько); по умолчанию все")
+    ap.add_argument("--baseline", type=str, default=None, metavar="REV",
+                    help="коммит перевода логов на %%-формат: дополнительно прогнать HEAD с откатом мест вызова")
+    ap.add_argument("--child", choices=list(PROFILES), default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        _child(args.child, args.case, args.repeat, args.warmup)
+        return 0
+
+    profiles = args.profile or list(PROFILES)
+    runs: Dict[str, Dict[str, Dict[str, float]]] = {"после": {}}
+    with tempfile.TemporaryDirectory(prefix="new_ssu_log_baseline_") as tmp:
+        roots = {"после": ROOT}
+        if args.baseline:
+            baseline_tree(args.baseline, Path(tmp))
+            roots["до"], runs["до"] = Path(tmp), {}
+        # деревья чередуются внутри профиля, а весь обход повторяется --rounds раз: дрейф нагрузки машины
+        # делится между «до» и «после»; в таблицу идёт раунд с наименьшей медианой
+        for _ in range(args.rounds):
+            for p in profiles:
+                for tree, root in roots.items():
+                    s = run_profile(p, case=args.case, repeat=args.repeat, warmup=args.warmup, root=root)
+                    if p not in runs[tree] or s["median_s"] < runs[tree][p]["median_s"]:
+                        runs[tree][p] = s
+    print(f"{args.case}, {args.repeat} расчётов на профиль")
+    print(f"{'дерево':<7} {'профиль':<12} {'медиана, мс':>11} {'p95, мс':>9} {'логи, мс':>9} {'логи, %':>8}")
+    for tree, results in runs.items():
+        floor = results.get("off", {}).get("median_s")
+        for name, s in results.items():
+            over = f"{(s['median_s'] - floor) * 1e3:>9.3f} {(s['median_s'] / floor - 1) * 100:>7.0f}%" if floor else ""
+            print(f"{tree:<7} {name:<12} {s['median_s'] * 1e3:>11.3f} {s['p95_s'] * 1e3:>9.3f} {over}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+import json
+import subprocess
+import sys
+
+from bench.e2e import BASELINE_PATH, ROOT, compare, percentile, suite_ratio
+
+
+def _report(**medians):
+    return {"cases": {name: {"status": "ok", "median_s": m} for name, m in medians.items()}}
+
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 0.5) == 51.0
+    assert percentile(samples, 0.95) == 95.0
+    assert percentile([3.0], 0.95) == 3.0
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = _report(a=0.010, b=0.010, c=0.010)
+    current = _report(a=0.0124, b=0.0130, c=0.005, d=1.0)  # d нет в baseline
+    assert compare(current, baseline, threshold=0.25) == [("b", 0.010, 0.0130)]
+
+
+def test_compare_ignores_submillisecond_noise_and_status_change():
+    baseline = {"cases": {"a": {"status": "ok", "median_s": 1e-5}, "b": {"status": "error", "median_s": 0.01}}}
+    current = {"cases": {"a": {"status": "ok", "median_s": 5e-5}, "b": {"status": "ok", "median_s": 0.05}}}
+    assert compare(current, baseline) == []
+
+
+def test_suite_ratio_is_geometric_mean_over_ok_cases():
+    baseline = _report(a=0.010, b=0.010, c=0.010)
+    current = _report(a=0.020, b=0.005, d=1.0)
+    current["cases"]["c"] = {"status": "error", "median_s": 1.0}
+    assert suite_ratio(current, baseline) == 1.0
+
+
+def test_committed_baseline_covers_the_reference_inputs():
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    assert baseline["physics"] == "virial"
+    assert "inputdata/sharp_01.json" in baseline["cases"]
+    assert all(c["median_s"] > 0 for c in baseline["cases"].values())
+
+
+def _run_sharp(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "bench.e2e", "--repeat", "2", "--warmup", "0",
+         "--case", "inputdata/sharp_01.json", *args],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+
+
+def test_slower_than_baseline_exits_1_and_missing_baseline_exits_2(tmp_path):
+    fast = tmp_path / "fast.json"
+    fast.write_text(json.dumps({"physics": "virial", "python": "", "machine": "", "cases": {
+        "inputdata/sharp_01.json": {"status": "ok", "median_s": 1e-6}}}), encoding="utf-8")
+    proc = _run_sharp("--baseline", str(fast))
+    assert proc.returncode == 1, proc.stdout
+    assert "РЕГРЕСС" in proc.stdout
+
+    assert _run_sharp("--baseline", str(tmp_path / "missing.json")).returncode == 2
+
+
+def test_offline_suite_runs_end_to_end(tmp_path):
+    out = tmp_path / "report.json"
+    proc = subprocess.run(
+        [sys.executable, "-m", "bench.e2e", "--repeat", "2", "--warmup", "0",
+         "--case", "inputdata/sharp_01.json", "--baseline", str(tmp_path / "baseline.json"),
+         "--output", str(out), "--save-baseline"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    report = json.loads(out.read_text(encoding="utf-8"))
+    case = report["cases"]["inputdata/sharp_01.json"]
+    assert case["status"] == "ok" and case["n"] == 2
+    assert set(report["types"]) == {"sharp"}
+    assert (tmp_path / "baseline.json").exists()
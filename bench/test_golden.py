@@ -0,0 +1,112 @@
+import json
+import shutil
+import sys
+
+import pytest
+
+from bench.e2e import ROOT
+from phys_prop.backends import ENV_BACKEND
+from bench.golden import (KnownDrift, KnownFailure, Tolerance, bless, diff_numbers, discover_goldens,
+                          load_known_failures, load_tolerances, mark_known_failures, record_known, run_goldens,
+                          save_known, tolerance_for)
+
+RULES = [("meta.*", Tolerance(ignore=True)), ("*errors.*", Tolerance(rel=1e-3)), ("*", Tolerance(rel=1e-9))]
+
+
+def test_diff_numbers_applies_first_matching_tolerance():
+    expected = {"meta": {"ts": 1}, "flow": {"Re": 1000.0, "G": [1.0, 2.0]}, "errors": {"u": 1.0}, "ok": True, "s": "x"}
+    actual = {"meta": {"ts": 2}, "flow": {"Re": 1000.0 + 1e-4, "G": [1.0]}, "errors": {"u": 1.0005}, "ok": False}
+    assert tolerance_for("result.errors.u", RULES).rel == 1e-3
+    compared, drifts = diff_numbers(expected, actual, RULES)
+    assert compared == 4  # meta проигнорирован, bool и строки не сравниваются
+    assert [(d.field, d.reason) for d in drifts] == [("flow.Re", "value"), ("flow.G[1]", "missing")]
+    assert drifts[0].rel == pytest.approx(1e-7)
+
+
+def test_blessed_golden_matches_then_catches_drift(tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_BACKEND, "virial")  # run_goldens ставит бэкенд в окружение — вернём после теста
+    (tmp_path / "inputdata").mkdir()
+    (tmp_path / "outputdata").mkdir()
+    shutil.copy(ROOT / "inputdata" / "sharp_01.json", tmp_path / "inputdata")
+    shutil.copy(ROOT / "outputdata" / "sharp_01.json", tmp_path / "outputdata")
+    (tmp_path / "inputdata" / "new.json").write_text("{}")
+    goldens, orphans = discover_goldens(tmp_path)
+    assert [g.expected_name for g in goldens] == ["outputdata/sharp_01.json"] and orphans == ["inputdata/new.json"]
+
+    _, results = run_goldens(goldens, physics="virial", repeat=1, warmup=0, rules=RULES)
+    assert bless(goldens, results) == ["outputdata/sharp_01.json"]
+    report, _ = run_goldens(goldens, physics="virial", repeat=2, warmup=0, rules=RULES)
+    case = report["cases"]["inputdata/sharp_01.json"]
+    assert case["match"] and case["compared"] > 20 and case["n"] == 2
+
+    golden = goldens[0].expected
+    data = json.loads(golden.read_text(encoding="utf-8"))
+    data["result"]["flow"]["mass_flow"] *= 1.01
+    golden.write_text(json.dumps(data), encoding="utf-8")
+    report, _ = run_goldens(goldens, physics="virial", repeat=1, warmup=0, rules=RULES)
+    case = report["cases"]["inputdata/sharp_01.json"]
+    assert not case["match"]
+    assert [d["field"] for d in case["drift"]] == ["result.flow.mass_flow"]
+
+
+def test_legacy_timeless_pair_is_converted_and_compared(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "PyFizika", None)  # как при снятии эталона: ρ/k/μ берутся из входа
+    monkeypatch.setenv(ENV_BACKEND, "pyfizika")
+    (tmp_path / "timeless").mkdir()
+    for name in ("check_algoritm_3_3_input.json", "check_algoritm_3_3_out.json"):
+        shutil.copy(ROOT / "timeless" / name, tmp_path / "timeless")
+    goldens, _ = discover_goldens(tmp_path)
+    report, _ = run_goldens(goldens, physics="pyfizika", repeat=1, warmup=0, rules=load_tolerances())
+    case = report["cases"]["timeless/check_algoritm_3_3_input.json"]
+    assert case["status"] == "ok" and case["match"] and case["compared"] == 8
+
+
+def _drift(field, expected, actual):
+    return {"field": field, "expected": expected, "actual": actual}
+
+
+def test_known_failure_covers_only_the_recorded_fields_and_values():
+    known = {
+        "a.json": KnownFailure("a.json", "A", fields={"x": KnownDrift(2.0, rel=1e-3), "y": KnownDrift(None)}),
+        "b.json": KnownFailure("b.json", "B", fields={"x": KnownDrift(2.0, rel=1e-3)}),
+        "c.json": KnownFailure("c.json", "C", fields={"x": KnownDrift(2.0, rel=1e-3)}),
+        "d.json": KnownFailure("d.json", "D", error="ValueError: Re вне диапазона"),
+        "e.json": KnownFailure("e.json", "E", error="ValueError: Re вне диапазона"),
+        "f.json": KnownFailure("f.json", "F", fields={"x": KnownDrift(2.0)}),
+    }
+    report = {"cases": {
+        "a.json": {"status": "ok", "match": False, "drift": [_drift("x", 1.0, 2.001), _drift("y", 1.0, None)]},
+        "b.json": {"status": "ok", "match": False, "drift": [_drift("x", 1.0, 2.1)]},   # ушло от записанного
+        "c.json": {"status": "ok", "match": False, "drift": [_drift("x", 1.0, 2.0), _drift("z", 1.0, 3.0)]},
+        "d.json": {"status": "error", "match": False, "error": "ValueError: Re вне диапазона"},
+        "e.json": {"status": "error", "match": False, "error": "TypeError: нет k"},
+        "f.json": {"status": "ok", "match": True, "drift": []},
+        "g.json": {"status": "ok", "match": False, "drift": [_drift("x", 1.0, 2.0)]},   # не записан
+    }}
+    assert mark_known_failures(report, known) == ["f.json"]
+    cases = report["cases"]
+    assert {name: c.get("xfail") for name, c in cases.items()} == {
+        "a.json": "A", "b.json": None, "c.json": None, "d.json": "D", "e.json": None, "f.json": None, "g.json": None}
+    assert cases["b.json"]["known_changed"] == ["x: записано 2.0, получено 2.1"]
+    assert cases["c.json"]["known_changed"] == ["z: новый дрейф 1.0 → 3.0"]
+    assert "TypeError: нет k" in cases["e.json"]["known_changed"][0]
+
+
+def test_recorded_known_failures_round_trip(tmp_path):
+    report = {"cases": {
+        "a.json": {"status": "ok", "match": False, "drift": [_drift("result.x", 1.0, 2.0)]},
+        "b.json": {"status": "error", "match": False, "error": "ValueError: bad"},
+        "c.json": {"status": "ok", "match": True, "drift": []},
+    }}
+    previous = {"a.json": KnownFailure("a.json", "причина A"), "c.json": KnownFailure("c.json", "исправлено"),
+                "other.json": KnownFailure("other.json", "не в прогоне", error="E")}
+    path = tmp_path / "known.json"
+    save_known(path, "virial", record_known(report, RULES, previous))
+    known = load_known_failures(path, "virial")
+    assert sorted(known) == ["a.json", "b.json", "other.json"]
+    assert known["a.json"].reason == "причина A"
+    assert known["a.json"].fields == {"result.x": KnownDrift(2.0, rel=1e-9, abs=1e-12)}
+    assert known["b.json"].error == "ValueError: bad"
+    assert load_known_failures(path, "pyfizika") == {}
+    assert mark_known_failures(report, known) == []  # совпавший c.json из записей убран
+    assert report["cases"]["a.json"]["xfail"] == "причина A" and report["cases"]["b.json"]["xfail"] == ""
@@ -0,0 +1,38 @@
+import json
+
+from bench import kernels
+from bench.kernels import ORIFICE_TYPES, environment, record, regressions, run_kernels, select
+
+
+def test_every_kernel_sets_up_and_runs():
+    results = run_kernels(select(), sample_time=1e-4, repeat=2)
+    assert {name: r["error"] for name, r in results.items() if r["status"] != "ok"} == {}
+    assert len(select(["orifice.*"])) == 3 * len(ORIFICE_TYPES) == 33
+    for name in ("gsssd.get_A0", "gsssd.get_A5", "gsssd.calc_single_phase", "errors.run_method10",
+                 "units.convert_pressure", "units.convert_length", "rules_tables.get_relative_roughness"):
+        assert results[name]["median_s"] > 0
+
+
+def _run(commit, date, **medians):
+    return {"commit": commit, "date": date, "dirty": False, "env": environment(), "recorded": date,
+            "results": {name: {"status": "ok", "median_s": m, "q25_s": m * 0.95, "q75_s": m * 1.05}
+                        for name, m in medians.items()}}
+
+
+def test_history_by_commit_and_regressions(tmp_path, capsys):
+    history = {"version": 1, "runs": []}
+    record(history, _run("b" * 40, "2026-01-02", fast=1e-6, slow=1e-3))
+    record(history, _run("a" * 40, "2026-01-01", fast=1e-6, slow=1e-3))
+    record(history, _run("b" * 40, "2026-01-02", slow=2e-3))  # --filter на том же коммите
+    assert [r["commit"][0] for r in history["runs"]] == ["a", "b"]
+    assert history["runs"][1]["results"]["fast"]["median_s"] == 1e-6
+
+    assert regressions(history["runs"][0]["results"], history["runs"][1]["results"]) == [("slow", 1e-3, 2e-3)]
+    noisy = _run("c" * 40, "2026-01-03", slow=1.2e-3)["results"]
+    noisy["slow"]["q25_s"] = 1e-3  # сэмплы пересекаются с прошлым коммитом — это шум, не регресс
+    assert regressions(history["runs"][0]["results"], noisy) == []
+
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps(history), encoding="utf-8")
+    assert kernels.main(["--history", str(path), "--report-only"]) == 1
+    assert "slow: 1 мс → 2 мс" in capsys.readouterr().out
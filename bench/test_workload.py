@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from bench.workload import DP_P_MAX, GEOMETRY, generate
+from orifices_classes.main import create_orifice
+
+
+@pytest.fixture
+def virial_physics(monkeypatch):
+    from phys_prop.backends import ENV_BACKEND
+
+    monkeypatch.setenv(ENV_BACKEND, "virial")
+
+
+def _dump(stream):
+    return [(name, json.dumps(data, sort_keys=True)) for name, data in stream]
+
+
+def test_seed_reproducible_and_independent_of_type_set():
+    a = _dump(generate(["sharp", "cone"], 5, seed=42))
+    assert a == _dump(generate(["sharp", "cone"], 5, seed=42))
+    assert a[5:] == _dump(generate(["cone"], 5, seed=42))
+    assert a != _dump(generate(["sharp", "cone"], 5, seed=43))
+
+
+def test_requests_pass_geometry_and_dp_limits():
+    for _name, data in generate(list(GEOMETRY), 3, seed=1):
+        phys = data["physPackage"]["physProperties"]
+        lens = data["lenPackage"]["lenProperties"]
+        p, dp = phys["p_abs"]["real"] * 1e6, phys["dp"]["real"] * 1e3
+        assert 0 < dp / p <= DP_P_MAX
+        create_orifice(data["type"], D=lens["D20"]["real"] / 1000, d=lens["d20"]["real"] / 1000,
+                       Re=0.0, p=p, dp=dp, k=1.3, Ra=lens["Ra"]["real"] * 1e-6, alpha=lens.get("alpha"))
+        if data["physPackage"]["requestList"]:
+            assert sum(phys["composition"].values()) == pytest.approx(100.0, abs=0.01)
+
+
+def test_requests_calculate_end_to_end(virial_physics):
+    from bench.e2e import calculate
+
+    for name, data in generate(list(GEOMETRY), 2, seed=7):
+        res = calculate(data)
+        assert res["flow"]["mass_flow"] > 0, name
@@ -0,0 +1,323 @@
+"""Генератор синтетической нагрузки: N случайных, но корректных запросов на каждый тип ССУ.
+
+    python -m bench.workload --n 1000 --out synthetic/            # synthetic/<type>/<type>_000001.json
+    python -m bench.workload --n 100000 --jsonl synthetic.jsonl   # для main.py --input-jsonl
+    python -m bench.workload --n 10 --type sharp --type cone --seed 7 --jsonl -
+
+Геометрия проходит _validate своего класса, режим — его check_Re и ограничение Δp/p ≤ 0.25.
+Re оценивается по формулам CalcFlow с теми же коэффициентами ССУ, что получит адаптер, а плотность
+и вязкость — офлайн-бэкендом virial (phys_prop.backends); запас MARGIN покрывает его расхождение с PyFizika.
+Составы — типовой природный газ. Для каждого типа свой поток случайных чисел (seed + тип), поэтому
+набор типов не влияет на запросы конкретного типа, а один seed всегда даёт одни и те же запросы.
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import logging
+import math
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from phys_prop.backends import get_backend
+
+DP_P_MAX = 0.25      # Δp/p — граница всех классов ССУ
+DP_P_SAMPLE = 0.2    # сэмплируем с запасом от неё
+MARGIN = 1.3         # Re×MARGIN и Re/MARGIN тоже должны проходить check_Re
+MAX_ATTEMPTS = 200
+THERMAL_SCALE = 1e-3  # D и d после термокоррекции на T_RANGE_C меняются меньше
+C_ITERATIONS = 3     # C части классов зависит от Re — несколько итераций Re → C → Re
+PHYSICS = "virial"   # бэкенд оценки ρ, k, μ при подборе режима
+
+# (D, м), (отношение): для большинства d/D, для segment и wedge — H/D, для cone — d/D конуса.
+# Окончательно решает _validate класса: диапазоны здесь лишь сужают выборку.
+GEOMETRY: Dict[str, Tuple[Tuple[float, float], Tuple[float, float]]] = {
+    "sharp": ((0.014, 0.05), (0.22, 0.8)),
+    "conical": ((0.025, 0.5), (0.1, 0.5)),
+    "wear": ((0.03, 1.0), (0.22, 0.8)),
+    "double": ((0.04, 0.1), (0.32, 0.7)),
+    "segment": ((0.05, 1.0), (0.158, 0.492)),
+    "eccentric": ((0.5, 1.0), (0.245, 0.6)),
+    "quarter": ((0.025, 0.5), (0.245, 0.6)),
+    "quarter_nozzle": ((0.025, 0.1), (0.22, 0.7)),
+    "cylindrical": ((0.025, 0.1), (0.1, 0.7)),
+    "wedge": ((0.05, 0.6), (0.2, 0.6)),
+    "cone": ((0.05, 0.5), (0.66, 0.893)),
+}
+ALPHA = {"sharp": 35, "conical": 12.0, "cone": 12.0, "cylindrical": 45, "quarter": 45, "quarter_nozzle": 45,
+         "wedge": 45}
+
+T_RANGE_C = (-10.0, 50.0)
+P_RANGE_MPA = (0.15, 10.0)
+DP_RANGE_KPA = (0.05, 250.0)
+RA_RANGE_UM = (1.0, 10.0)
+STEELS = ("35l", "20", "12x18n10t", "12x18n9tl", "15k", "09g2s")
+MS_BEFORE = ("stop_valve", "convergent_reducer", "cock", "tee")
+MS_AFTER = ("unknown_valve",)
+
+# мольные %, метан — остаток до 100
+COMPOSITION_RANGES = {
+    "Ethane": (0.5, 6.0), "Propane": (0.1, 3.0), "iButane": (0.0, 0.3), "nButane": (0.0, 0.4),
+    "iPentane": (0.0, 0.2), "nPentane": (0.0, 0.2), "Nitrogen": (0.2, 3.0), "CarbonDioxide": (0.05, 2.5),
+}
+GOST_REQUESTS = [{"documentId": "GOST_30319_3_2015", "physValueId": pid} for pid in ("rho", "rho_st", "k", "mu")]
+
+
+def _node(value: float, unit: Optional[str] = None) -> Dict[str, Any]:
+    return {"real": value, "unit": unit} if unit else {"real": value}
+
+
+def _err(kind: str, value: float, unit: str) -> Dict[str, Any]:
+    return {"errorTypeId": kind, "value": {"real": value, "unit": unit}}
+
+
+def _log_uniform(rng: random.Random, lo: float, hi: float) -> float:
+    return math.exp(rng.uniform(math.log(lo), math.log(hi)))
+
+
+def sample_composition(rng: random.Random) -> Dict[str, float]:
+    comp = {name: round(rng.uniform(lo, hi), 3) for name, (lo, hi) in COMPOSITION_RANGES.items()}
+    comp["Methane"] = round(100.0 - sum(comp.values()), 3)
+    return dict(sorted(comp.items()))
+
+
+def _sample_geometry(rng: random.Random, ssu_type: str) -> Tuple[float, float]:
+    (d_lo, d_hi), (r_lo, r_hi) = GEOMETRY[ssu_type]
+    D_mm = round(_log_uniform(rng, d_lo, d_hi) * 1000, 1)
+    d_mm = round(D_mm * rng.uniform(r_lo, r_hi), 1)
+    return D_mm, d_mm
+
+
+def _orifice(ssu_type: str, D: float, d: float, p: float, dp: float, k: float, Ra: float):
+    """ССУ при 20 °C; None, если геометрия не проходит _validate — в том числе после термокоррекции."""
+    from orifices_classes.main import create_orifice
+
+    try:
+        for scale in (1 - THERMAL_SCALE, 1 + THERMAL_SCALE):
+            create_orifice(ssu_type, D=D * scale, d=d * scale, Re=0.0, p=p, dp=dp, k=k, Ra=Ra,
+                           alpha=ALPHA.get(ssu_type))
+        return create_orifice(ssu_type, D=D, d=d, Re=0.0, p=p, dp=dp, k=k, Ra=Ra, alpha=ALPHA.get(ssu_type))
+    except ValueError:
+        return None
+
+
+def _re_ok(orifice, re: float) -> bool:
+    for value in (re, re * MARGIN, re / MARGIN):
+        orifice.Re = value
+        if not orifice.check_Re():
+            return False
+    return True
+
+
+def _coeffs(orifice, *, D: float, d: float, p: float, dp: float, k: float, Ra: float,
+            alpha: Optional[float]) -> SimpleNamespace:
+    """β, E, C, ε в порядке добора calculation_adapter: run_all → β = d/D → методы самой ССУ.
+
+    Адаптер не импортируем: он тянет PyFizika, а генератору она не нужна.
+    """
+    try:
+        r = orifice.run_all(dp=dp, p=p, k=k, Ra=Ra, alpha=alpha)
+    except Exception:
+        r = {}
+    eps = r.get("Epsilon")
+    if eps is None:
+        params = inspect.signature(orifice.calculate_epsilon).parameters
+        eps = orifice.calculate_epsilon(**{name: value for name, value in (("dp", dp), ("k", k), ("p", p))
+                                           if name in params})
+    return SimpleNamespace(beta=r.get("beta", d / D), E=r.get("E_speed", orifice.calculate_E()),
+                           C=r.get("C", orifice.calculate_C()), epsilon=eps)
+
+
+def estimate_re(orifice, *, D: float, d: float, p: float, dp: float, k: float, Ra: float, rho: float, mu: float,
+                alpha: Optional[float] = None) -> float:
+    """Re по формулам CalcFlow (п. 5.2.2, 5.2.5) с коэффициентами, которые получит адаптер. mu — Па·с."""
+    A = math.pi * D ** 2 / 4
+    re = 1e5
+    for _ in range(C_ITERATIONS):
+        orifice.Re = re
+        cf = _coeffs(orifice, D=D, d=d, p=p, dp=dp, k=k, Ra=Ra, alpha=alpha)
+        G = cf.beta ** 2 * cf.C * cf.E * cf.epsilon * A * math.sqrt(2 * rho * dp)
+        re = 4 * G / (math.pi * D * mu)
+    return re
+
+
+def _phys_props(T_c: float, p_mpa: float, dp_kpa: float, comp: Dict[str, float]) -> Dict[str, Any]:
+    return {
+        "T": _node(T_c, "C"), "p_abs": _node(p_mpa, "MPa"), "dp": _node(dp_kpa, "kPa"),
+        "T_st": _node(20, "C"), "p_st": _node(0.101325, "MPa"), "composition": comp,
+    }
+
+
+def _error_package(rng: random.Random, p_mpa: float, dp_kpa: float) -> Dict[str, Any]:
+    return {
+        "hasToCalcErrors": True,
+        "errors": {
+            "temperatureErrorProState": {
+                "intrError": _err("AbsErr", round(rng.uniform(0.2, 1.0), 2), "C"),
+                "complError": _err("AbsErr", round(rng.uniform(0.1, 0.5), 2), "C"),
+            },
+            "absPressureErrorProState": {
+                "intrError": _err("AbsErr", round(p_mpa * rng.uniform(0.001, 0.005), 5), "MPa"),
+                "complError": _err("AbsErr", round(p_mpa * rng.uniform(0.5, 2.0), 3), "kPa"),
+            },
+            "diffPressureErrorProState": {
+                "intrError": _err("AbsErr", round(dp_kpa * rng.uniform(1.0, 10.0), 3), "Pa"),
+            },
+            "calcCorrectorProState": {
+                "intrError": _err("RelErr", round(rng.uniform(0.05, 1.0), 2), "percent"),
+                "complError": _err("RelErr", round(rng.uniform(0.05, 0.6), 2), "percent"),
+            },
+            "flowErrorProState": {
+                "intrError": _err("RelErr", round(rng.uniform(0.1, 0.5), 2), "percent"),
+                "outSignalIntrError": _err("RelErr", round(rng.uniform(0.05, 0.3), 2), "percent"),
+            },
+        },
+    }
+
+
+def _composition_error_package(rng: random.Random, comp: Dict[str, float]) -> Dict[str, Any]:
+    rel = round(rng.uniform(0.5, 2.0), 2)
+    return {
+        "composition": dict(comp),
+        "error_composition": {
+            name: {"errorInputMethod": "ByValue", "intrError": _err("RelErr", rel, "percent"), "complError": 0.5}
+            for name in comp
+        },
+        "request": None,
+    }
+
+
+def sample_point(rng: random.Random, ssu_type: str) -> Tuple[Any, Dict[str, Any]]:
+    """Корректная точка типа ssu_type: ССУ с оценённым Re и параметры, из которых она построена."""
+    for _ in range(MAX_ATTEMPTS):
+        D_mm, d_mm = _sample_geometry(rng, ssu_type)
+        T_c = round(rng.uniform(*T_RANGE_C), 1)
+        p_mpa = round(_log_uniform(rng, *P_RANGE_MPA), 4)
+        dp_kpa = round(min(_log_uniform(rng, *DP_RANGE_KPA), DP_P_SAMPLE * p_mpa * 1000), 3)
+        if dp_kpa <= 0 or dp_kpa / (p_mpa * 1000) > DP_P_MAX:
+            continue
+        Ra_um = round(rng.uniform(*RA_RANGE_UM), 1)
+        comp = sample_composition(rng)
+        values = get_backend(PHYSICS).calc(GOST_REQUESTS, _phys_props(T_c, p_mpa, dp_kpa, comp))
+        props = {req["physValueId"]: v[req["physValueId"]] for req, v in zip(GOST_REQUESTS, values)}
+
+        D, d, p, dp = D_mm / 1000, d_mm / 1000, p_mpa * 1e6, dp_kpa * 1e3
+        orifice = _orifice(ssu_type, D, d, p, dp, props["k"], Ra_um * 1e-6)
+        if orifice is None:
+            continue
+        try:
+            re = estimate_re(orifice, D=D, d=d, p=p, dp=dp, k=props["k"], Ra=Ra_um * 1e-6, rho=props["rho"],
+                             mu=props["mu"] * 1e-6, alpha=ALPHA.get(ssu_type))
+        except (ValueError, ZeroDivisionError, TypeError):
+            continue
+        if not _re_ok(orifice, re):
+            continue
+        orifice.Re = re
+        return orifice, {"D_mm": D_mm, "d_mm": d_mm, "T_c": T_c, "p_mpa": p_mpa, "dp_kpa": dp_kpa,
+                         "Ra_um": Ra_um, "comp": comp, "props": props}
+    raise RuntimeError(f"{ssu_type}: не удалось подобрать корректный запрос за {MAX_ATTEMPTS} попыток")
+
+
+def generate_one(rng: random.Random, ssu_type: str, *, composition: bool) -> Dict[str, Any]:
+    """Один запрос типа ssu_type; composition=True — свойства газа считает PyFizika по ГОСТ 30319.3."""
+    _, pt = sample_point(rng, ssu_type)
+    return _request(rng, ssu_type, composition, pt["D_mm"], pt["d_mm"], pt["T_c"], pt["p_mpa"], pt["dp_kpa"],
+                    pt["Ra_um"], pt["comp"], pt["props"])
+
+
+def _request(rng: random.Random, ssu_type: str, composition: bool, D_mm: float, d_mm: float, T_c: float,
+             p_mpa: float, dp_kpa: float, Ra_um: float, comp: Dict[str, float],
+             props: Dict[str, float]) -> Dict[str, Any]:
+    steel = rng.choice(STEELS)
+    len_props: Dict[str, Any] = {
+        "d20": _node(d_mm, "mm"), "D20": _node(D_mm, "mm"),
+        "d20_steel": steel, "D20_steel": steel, "Ra": _node(Ra_um, "um"),
+    }
+    if ssu_type in ALPHA:
+        len_props["alpha"] = ALPHA[ssu_type]
+    if ssu_type == "sharp":
+        len_props["e"] = _node(round(D_mm * rng.uniform(0.005, 0.02), 2), "mm")
+        len_props["Ed"] = _node(round(D_mm * rng.uniform(0.005, 0.02), 2), "mm")
+
+    phys = {"methodic": "", "aggregate_state": "gas", **_phys_props(T_c, p_mpa, dp_kpa, comp),
+            "phi": _node(0, "percent"), "humidityType": "RelativeHumidity",
+            "Ro": None, "Roc": None, "k": None, "mu": None}
+    request_list: List[Dict[str, str]] = [dict(r) for r in GOST_REQUESTS]
+    if not composition:
+        # свойства заданы значениями — PyFizika не вызывается
+        phys = {"methodic": "otHER", "aggregate_state": "gas",
+                **{k: v for k, v in phys.items() if k in ("T", "p_abs", "dp", "T_st", "p_st")},
+                "Ro": _node(round(props["rho"], 4)), "Roc": _node(round(props["rho_st"], 4)),
+                "k": _node(round(props["k"], 4)), "mu": _node(round(props["mu"], 3), "uPa_s")}
+        request_list = []
+
+    data: Dict[str, Any] = {"type": ssu_type, "ctrlRequest": {"steps": ["create_orifice", "calculate_flow"]}}
+    if composition:
+        data["compositionErrorPackage"] = _composition_error_package(rng, comp)
+    data["physPackage"] = {"physProperties": phys, "requestList": request_list}
+    data["lenPackage"] = {
+        "lenProperties": len_props,
+        "straightness": {
+            "ms_before": [{"type": t} for t in rng.sample(MS_BEFORE, rng.randint(1, 2))],
+            "ms_after": [{"type": t} for t in rng.sample(MS_AFTER, rng.randint(0, 1))],
+            "skip": False,
+        },
+    }
+    data["errorPackage"] = _error_package(rng, p_mpa, dp_kpa)
+    return data
+
+
+def generate(types: Sequence[str], n: int, *, seed: int = 0,
+             composition_share: float = 0.5) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(имя, запрос) — по n на тип, типы по очереди. Имя: <type>_<номер с 1>."""
+    for ssu_type in types:
+        if ssu_type not in GEOMETRY:
+            raise ValueError(f"Неизвестный тип ССУ: {ssu_type}")
+        rng = random.Random(f"{seed}:{ssu_type}")
+        for i in range(1, n + 1):
+            data = generate_one(rng, ssu_type, composition=rng.random() < composition_share)
+            yield f"{ssu_type}_{i:06d}", data
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from orifices_classes.main import OrificeType
+
+    all_types = [t.value for t in OrificeType]
+    ap = argparse.ArgumentParser(description="Генератор синтетических запросов new_ssu")
+    ap.add_argument("--n", type=int, default=100, help="запросов на каждый тип ССУ")
+    ap.add_argument("--type", action="append", choices=all_types, default=None,
+                    help="тип ССУ (можно несколько); по умолчанию все из OrificeType")
+    ap.add_argument("--seed", type=int, default=0, help="seed генератора: один seed — одни и те же запросы")
+    ap.add_argument("--composition-share", type=float, default=0.5,
+                    help="доля запросов с составом газа (PyFizika по ГОСТ 30319.3), остальные — со свойствами значениями")
+    out = ap.add_mutually_exclusive_group(required=True)
+    out.add_argument("--out", type=Path, help="каталог: по JSON-файлу на запрос в подкаталоге типа")
+    out.add_argument("--jsonl", type=str, help="файл JSONL (по запросу в строке), '-' — stdout")
+    args = ap.parse_args(argv)
+
+    logging.disable(logging.ERROR)  # отбраковка кандидатов пишет в лог ошибки валидации
+    stream = generate(args.type or all_types, args.n, seed=args.seed, composition_share=args.composition_share)
+    count = 0
+    if args.out:
+        for name, data in stream:
+            path = args.out / data["type"] / f"{name}.json"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+            count += 1
+    else:
+        from batch.jsonl import open_jsonl
+
+        with open_jsonl(args.jsonl, "w") as dst:
+            for _name, data in stream:
+                dst.write(json.dumps(data, ensure_ascii=False) + "\n")
+                count += 1
+    print(f"Сгенерировано запросов: {count}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
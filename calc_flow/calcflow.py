@@ -30,7 +30,7 @@ class CalcFlow:
         """п. 5.2.5"""
         if self.mu != 0:
             self.Re = (4 * self.G) / (math.pi * self.D * self.mu * 0.000001) #todo опрос по вязкости
-            logger.debug(f"Расчёт Re: {self.Re:.2f}")
+            logger.debug("Расчёт Re: %.2f", self.Re)
         else:
             logger.warning("Вязкость (mu) равна 0. Re не может быть рассчитан")
 
@@ -47,7 +47,7 @@ class CalcFlow:
         """п. 5.2.2"""
         A = (math.pi * self.D ** 2) / 4
         self.G = self.beta**2 * self.C * self.E * self.epsilon * A * math.sqrt(2 * self.Ro * self.dp)
-        logger.debug(f"Массовый расход G: {self.G * 3600:.5f} кг/ч")
+        logger.debug("Массовый расход G: %.5f кг/ч", self.G * 3600)
         return self.G #* 3600  # кг/ч
 
     def calc_standard_volume_flow(self):
@@ -57,7 +57,7 @@ class CalcFlow:
             logger.warning("Плотность в стандартных условиях (Roc) не задана. q_std = 0")
             return 0
         self.q_std = self.G / self.Roc
-        logger.debug(f"Стандартный объёмный расход q_std: {self.q_std:.5f} м³/с")
+        logger.debug("Стандартный объёмный расход q_std: %.5f м³/с", self.q_std)
         return self.q_std
 
     def calc_actual_volume_flow(self):
@@ -68,7 +68,7 @@ class CalcFlow:
             logger.warning("Плотность в рабочих условиях (Ro) не задана. q_actual = 0")
             return 0
         self.q_actual = self.beta**2 * self.C * self.E * self.epsilon * A * math.sqrt(2 * self.dp / self.Ro)
-        logger.debug(f"Актуальный объёмный расход q_actual: {self.q_actual:.5f} м³/с")
+        logger.debug("Актуальный объёмный расход q_actual: %.5f м³/с", self.q_actual)
         return self.q_actual
 
     def calculate_discharge_coefficient(self):
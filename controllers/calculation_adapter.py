@@ -4,6 +4,7 @@ from importlib import import_module
 from typing import Any, Mapping, Optional
 import inspect
 import math
+import time
 
 # --- Errors adapter (единый импорт) ---
 try:
@@ -28,6 +29,12 @@ except Exception:
         _log = _Dummy()
 
 from phys_prop.calc_phys_prop import PhysMinimalRunner, make_theta_list, normalize_composition_percent_map
+from phys_prop.planner import PhysPlan
+from perf import metrics, timings as _tm
+
+_CALC_SECONDS = metrics.histogram("new_ssu_calculation_seconds", "Время run_calculation по типу ССУ, с")
+_CALC_TOTAL = metrics.counter("new_ssu_calculations_total", "Расчёты run_calculation по типу ССУ и статусу")
+_CACHE_REQUESTS = metrics.counter("new_ssu_cache_requests_total", "Обращения к кэшам: cache=..., result=hit|miss")
 
 
 
@@ -452,10 +459,16 @@ import copy
 from functools import lru_cache
 from phys_prop.calc_phys_prop import PhysMinimalRunner
 
-def make_rho_phys_from_raw(base_raw: dict):
+def make_rho_phys_from_raw(base_raw: dict, plan: Optional[PhysPlan] = None):
+    """ρ(состав) для метода 10; с планом запроса — через его состояния (базовый состав уже посчитан)."""
     @lru_cache(maxsize=128)
     def _rho_cached(items_tuple):
         comp_pct = dict(items_tuple)  # {'CO2': 2.5, ...} — в процентах
+        if plan is not None:
+            ro = plan.get({"composition": comp_pct}, ("rho",)).get("ro")
+            if ro is None:
+                raise RuntimeError("PhysMinimalRunner не вернул ro")
+            return float(ro)
         raw2 = copy.deepcopy(base_raw)
         phys = raw2.setdefault("physPackage", {}).setdefault("physProperties", {})
         # НОРМАЛИЗУЕМ перед расчётом
@@ -470,6 +483,7 @@ def make_rho_phys_from_raw(base_raw: dict):
         items = tuple(sorted((str(k), float(v)) for k, v in comp_pct.items()))
         return _rho_cached(items)
 
+    rho.cache_info = _rho_cached.cache_info
     return rho
 
 def _normalize_comp_for_phys(raw_in: dict, methane_name: str = "Methane", policy: str = "METHANE_BY_DIFF"):
@@ -584,9 +598,11 @@ def _ensure_cf_coeffs_from_ssu(cf: Any, ssu: Any, dp: Optional[float], p1: Optio
 
 def run_calculation(*args: Any, **kwargs: Any):
     """
-    run_calculation(prepared, values_si, raw)
+    run_calculation(prepared, values_si, raw[, timings=True])
     Шаги: термокоррекция → погрешности (T,p,dp,corrector) → создание ССУ → ССУ.run_all → CalcFlow → Straightness.
     Возвращает общий словарь результатов.
+    timings=True (или NEW_SSU_TIMINGS=1) — добавить блок "_timings": время и число входов по этапам
+    и число/время вызовов физического бэкенда.
     """
     if len(args) < 2:
         raise ValueError("run_calculation(prepared, values_si[, raw]) — минимум 2 аргумента")
@@ -595,7 +611,30 @@ def run_calculation(*args: Any, **kwargs: Any):
     values: Mapping[str, Any] = args[1] or {}
     raw: Mapping[str, Any] = args[2] if len(args) >= 3 else {}
 
+    want_timings = kwargs.get("timings")
+    if want_timings is None:
+        want_timings = _tm.env_enabled()
+
+    ssu_type = str(raw.get("type") or "").strip().lower() or "unknown"
+    t0 = time.perf_counter()
+    status = "failed"
+    try:
+        if not want_timings or _tm.active() is not None:
+            result = _run_calculation(prepared, values, raw)
+        else:
+            with _tm.collecting() as tm:
+                result = _run_calculation(prepared, values, raw)
+            result["_timings"] = tm.to_dict()
+        status = "ok"
+        return result
+    finally:
+        _CALC_SECONDS.observe(time.perf_counter() - t0, type=ssu_type)
+        _CALC_TOTAL.inc(type=ssu_type, status=status)
+
+
+def _run_calculation(prepared: Any, values: Mapping[str, Any], raw: Mapping[str, Any]) -> dict:
     # --------------------------------- 1) Термокоррекция ---------------------------------
+    _t = _tm.start()
     v = dict(values)
 
     D20 = v.get("D20")
@@ -663,13 +702,17 @@ def run_calculation(*args: Any, **kwargs: Any):
     # фиксируем тёплые диаметры
     v["D"], v["d"] = float(D), float(d)
     v.pop("D20", None); v.pop("d20", None)
+    _tm.stop("thermal_correction", _t)
 
     # ---------- 1.5) Погрешности (один блок) ----------
+    _t = _tm.start()
     errors_res = _calc_errors_simple(raw, v)
+    _tm.stop("errors_simple", _t)
 
     # ---- ФИЗИКА (+θ) ----
     raw_phys, comp_norm = _normalize_comp_for_phys(raw)
     phys_block = {"skip": True}
+    phys_plan: Optional[PhysPlan] = None
     u_rho_rel = u_rho_std_rel = 0.0
 
     try:
@@ -696,7 +739,10 @@ def run_calculation(*args: Any, **kwargs: Any):
         except Exception as _e:
             _log.warning("Normalize composition (pre-PhysMinimalRunner) skipped: %s", _e)
 
-        phys = PhysMinimalRunner(raw_phys).to_dict()
+        _t = _tm.start()
+        phys_plan = PhysPlan(raw_phys)
+        phys = phys_plan.get()
+        _tm.stop("phys", _t)
 
         # подставляем в v, если пусто
         v.setdefault("Ro", phys.get("ro"))
@@ -709,115 +755,10 @@ def run_calculation(*args: Any, **kwargs: Any):
         u_rho_rel = (phys["err_ro"] / phys["ro"]) if phys.get("err_ro") and phys.get("ro") else 0.0
         u_rho_std_rel = (phys["err_ro_st"] / phys["ro_st"]) if phys.get("err_ro_st") and phys.get("ro_st") else 0.0
 
-        # 2) ТЕТЫ: сначала пробуем stp_errors, затем — устойчивый фоллбек
-        def _calc_thetas_safe(base_raw: dict) -> Optional[dict]:
-            thetas = {}
-
-            # --- попытка через stp_errors (с p_abs и p)
-            try:
-                stp_mod = import_module("stp_errors")
-                calc_thetas = getattr(stp_mod, "calc_thetas_from_requestList", None)
-                if callable(calc_thetas):
-                    data_for_t = dict(base_raw)  # не мутим исходник
-                    ppkg = data_for_t.setdefault("physPackage", {})
-                    # безопасный requestList — только rho и k (твой documentId сохраняем, если есть)
-                    rl_src = list((base_raw.get("physPackage") or {}).get("requestList") or [])
-                    doc = rl_src[0]["documentId"] if rl_src and isinstance(rl_src[0], dict) else None
-                    ppkg["requestList"] = [{"documentId": doc, "physValueId": "rho"},
-                                           {"documentId": doc, "physValueId": "k"}]
-
-                    def _try(reqs):
-                        out = calc_thetas(reqs, **data_for_t)
-                        if isinstance(out, dict):
-                            thetas.update(out)
-
-                    # T и p_abs
-                    _try([{"value": "rho", "variable": "T"},
-                          {"value": "k", "variable": "T"},
-                          {"value": "rho", "variable": "p_abs"},
-                          {"value": "k", "variable": "p_abs"}])
-                    # если по давлению пусто — попробуем 'p'
-                    if not any(k.startswith(("theta_rho_p", "theta_k_p")) for k in thetas):
-                        _try([{"value": "rho", "variable": "p"},
-                              {"value": "k", "variable": "p"}])
-            except Exception:
-                pass
-
-
-
-            # --- фоллбек: центральная разность на PhysMinimalRunner
-            def _fd_logtheta(var: str, h: float = 0.01):
-                """вернёт словарь с theta_rho_* и theta_k_* для одной переменной"""
-                sub = {}
-
-                def _run_with(var_value_upd: dict) -> Optional[dict]:
-                    # делаем глубокую копию только physProperties (хватает)
-                    raw2 = dict(base_raw)
-                    phys2 = raw2.setdefault("physPackage", {}).setdefault("physProperties", {}).copy()
-                    phys2.update(var_value_upd)
-                    raw2["physPackage"]["physProperties"] = phys2
-                    try:
-                        return PhysMinimalRunner(raw2).to_dict()
-                    except Exception:
-                        return None
-
-                if var == "T":
-                    T_node = (base_raw.get("physPackage") or {}).get("physProperties", {}).get("T")
-                    T_C = T_node.get("real") if isinstance(T_node, dict) else T_node
-                    if T_C is None:
-                        return sub
-                    T_K = (float(T_C) + 273.15) if float(T_C) < 200 else float(T_C)
-                    T_Kp, T_Km = T_K * (1 + h), T_K * (1 - h)
-                    Tp_C = T_Kp - 273.15;
-                    Tm_C = T_Km - 273.15
-                    up = _run_with({"T": {"real": Tp_C, "unit": "C"}})
-                    dn = _run_with({"T": {"real": Tm_C, "unit": "C"}})
-                    if up and dn and up.get("ro") and dn.get("ro") and up.get("k") and dn.get("k"):
-                        denom = math.log(1 + h) - math.log(1 - h)
-                        sub["theta_rho_T"] = (math.log(up["ro"]) - math.log(dn["ro"])) / denom
-                        sub["theta_k_T"] = (math.log(up["k"]) - math.log(dn["k"])) / denom
-
-                elif var in ("p_abs", "p"):
-                    p_node = (base_raw.get("physPackage") or {}).get("physProperties", {}).get("p_abs")
-                    # поддержим Pa/kPa/MPa; вернём в тех же единицах
-                    if not isinstance(p_node, dict) or "real" not in p_node:
-                        return sub
-                    p_real = float(p_node["real"]);
-                    unit = str(p_node.get("unit", "")).lower()
-                    # → Па
-                    factor = 1.0
-                    if "mpa" in unit:
-                        factor = 1e6
-                    elif "kpa" in unit:
-                        factor = 1e3
-                    p_Pa = p_real * factor
-                    pP, pM = p_Pa * (1 + h), p_Pa * (1 - h)
-
-                    # ← в те же единицы
-                    def _back(pa):
-                        val = pa / factor
-                        return {"real": val, "unit": p_node["unit"]}
-
-                    up = _run_with({"p_abs": _back(pP)})
-                    dn = _run_with({"p_abs": _back(pM)})
-                    if up and dn and up.get("ro") and dn.get("ro") and up.get("k") and dn.get("k"):
-                        denom = math.log(1 + h) - math.log(1 - h)
-                        sub["theta_rho_p_abs"] = (math.log(up["ro"]) - math.log(dn["ro"])) / denom
-                        sub["theta_k_p_abs"] = (math.log(up["k"]) - math.log(dn["k"])) / denom
-
-                return sub
-
-            # дополним недостающие ключи
-            missing_T = not any(k.endswith("_T") for k in thetas)
-            if missing_T:
-                thetas.update(_fd_logtheta("T"))
-            missing_p = not any(k.endswith("_p") or k.endswith("_p_abs") for k in thetas)
-            if missing_p:
-                thetas.update(_fd_logtheta("p_abs"))
-
-            return thetas or None
-
-        phys_thetas = _calc_thetas_safe(raw_phys)
+        # 2) ТЕТЫ: сначала stp_errors, затем центральные разности по возмущённым T и p (план запроса)
+        _t = _tm.start()
+        phys_thetas = phys_plan.thetas()
+        _tm.stop("thetas", _t)
         # компактный блок для выдачи
         phys_block = {
             "skip": False,
@@ -871,7 +812,9 @@ def run_calculation(*args: Any, **kwargs: Any):
 
     from orifices_classes.main import create_orifice
     _log.info("create_orifice(name=%s, kwargs=%s)", ssu_name, sorted([k for k in kwargs_ssu.keys() if k not in ("rho","mu","kappa","is_gas")]))
+    _t = _tm.start()
     ssu = create_orifice(ssu_name, **kwargs_ssu)
+    _tm.stop("create_orifice", _t)
 
     # Гарантировать наличие давления в объекте (для calculate_epsilon)
     try:
@@ -920,6 +863,7 @@ def run_calculation(*args: Any, **kwargs: Any):
             dp = v.get("dp", _get_phys(raw, "dp"))
             p_in = v.get("p1", v.get("p_abs", _get_phys(raw, "p_abs")))
             k_val = v.get("k")
+            _t = _tm.start()
             ssu_results = ssu.run_all(
                 dp=dp,
                 p=p_in,
@@ -927,6 +871,7 @@ def run_calculation(*args: Any, **kwargs: Any):
                 Ra=float(Ra_m) if Ra_m is not None else None,
                 alpha=v.get("alpha"),
             )
+            _tm.stop("ssu_run_all", _t)
     except Exception as e:
         _log.warning("run_all не выполнен: %s", e)
 
@@ -961,7 +906,9 @@ def run_calculation(*args: Any, **kwargs: Any):
 
     pos_args = (d_, D_, p1_, t1_, dp_, mu_for_cf, Roc_, Ro_, k_ if k_ is not None else 1.3, ssu)
     _log.debug("Пробую CalcFlow(*positional %d args)", len(pos_args))
+    _t = _tm.start()
     cf = CF(*pos_args)
+    _tm.stop("calc_flow_init", _t)
 
     # --- Неопределённости коэффициентов из ССУ ---
     d_Cm = None
@@ -1037,6 +984,7 @@ def run_calculation(*args: Any, **kwargs: Any):
             pass
 
     # Запуск полного расчёта расходов
+    _t = _tm.start()
     flow_res = None
     if hasattr(cf, "run_all") and callable(cf.run_all):
         _log.info("Вызов CalcFlow.run_all()")
@@ -1051,11 +999,15 @@ def run_calculation(*args: Any, **kwargs: Any):
                 break
         if flow_res is None:
             raise AttributeError("В CalcFlow не найден метод запуска расчёта")
+    _tm.stop("calc_flow_run", _t)
 
     # --------------------------------- Straightness ---------------------------------
+    _t = _tm.start()
     straight_res = _maybe_calc_straightness(ssu_name, d_, D_, Ra_m, raw)
+    _tm.stop("straightness", _t)
 
     # --------------------------------- Errors Flow (C, ε, расходы) ---------------------------------
+    _t_ef = _tm.start()
     errors_flow_block = {"skip": True}
     try:
         # гибкий импорт SimpleErrFlow
@@ -1111,11 +1063,19 @@ def run_calculation(*args: Any, **kwargs: Any):
 
             from errors.errors_handler import for_package as F
 
+            rho_fn = make_rho_phys_from_raw(raw, phys_plan)
             try:
-                F.RHO_FN_OVERRIDE = make_rho_phys_from_raw(raw)  # ← включили «настоящую» ρ
+                F.RHO_FN_OVERRIDE = rho_fn  # ← включили «настоящую» ρ
+                _t = _tm.start()
                 u_N, comp_theta = _composition_u_and_theta(raw)  # ← твой вызов, как есть
+                _tm.stop("composition_u_and_theta", _t)
             finally:
                 F.RHO_FN_OVERRIDE = None  # ← ОБЯЗАТЕЛЬНО сбросили
+                info = rho_fn.cache_info()
+                _CACHE_REQUESTS.inc(info.hits, cache="rho_composition", result="hit")
+                _CACHE_REQUESTS.inc(info.misses, cache="rho_composition", result="miss")
+                if phys_plan is not None:
+                    _log.debug("План физики запроса: %s", phys_plan.stats())
 
 
             Xa = v.get("Xa") if "Xa" in v else None  # todo тут уже обработанный состав
@@ -1165,6 +1125,7 @@ def run_calculation(*args: Any, **kwargs: Any):
     except Exception as e:
         _log.warning("Errors Flow расчёт не выполнен: %s", e)
         errors_flow_block = {"skip": False, "error": str(e)}
+    _tm.stop("errors_flow", _t_ef)  # SimpleErrFlow целиком, включая composition_u_and_theta
 
     # Итоговый словарь
     result = {
@@ -39,7 +39,7 @@ class CalculationController:
         self.Z_st = fizika.Z_st      # TODO <---- тут добавил физ-сва, переменные для расхода и погрешности
         self.z_err = fizika.z_error
         self.z_st_err = fizika.z_st_error
-        log.debug(f"Z={self.Z}, Z_st={self.Z_st}, z_err={self.z_err}, z_st_err={self.z_st_err}")
+        log.debug("Z=%s, Z_st=%s, z_err=%s, z_st_err=%s", self.Z, self.Z_st, self.z_err, self.z_st_err)
 
     def _create_orifice(self) -> None:
         log.info("Создание ССУ")
@@ -113,4 +113,4 @@ class CalculationController:
         )
 
         self.straightness_result = cs.calculate()
-        log.debug(f"Прямолинейные участки: {self.straightness_result}")
+        log.debug("Прямолинейные участки: %s", self.straightness_result)
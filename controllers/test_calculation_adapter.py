@@ -0,0 +1,36 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def virial_physics(monkeypatch):
+    from phys_prop import cache as phys_cache
+    from phys_prop.backends import ENV_BACKEND
+
+    monkeypatch.setenv(ENV_BACKEND, "virial")
+    phys_cache.clear()
+    yield
+    phys_cache.clear()
+
+
+def test_pressure_thetas_are_taken_at_base_temperature(virial_physics):
+    """Возмущение T не должно оставаться в physPackage: θ по давлению — при базовой T."""
+    from controllers.input_controller import InputController
+    from controllers.calculation_adapter import run_calculation
+
+    data = json.loads((ROOT / "inputdata" / "cone_01.json").read_text(encoding="utf-8"))
+    ic = InputController()
+    res = run_calculation(ic.prepare_params(data), ic.parse(data).values_si, copy.deepcopy(data))
+
+    thetas = res["phys"]["thetas"]
+    assert thetas["theta_rho_T"] == pytest.approx(-1.253185612944329, rel=1e-9)
+    assert thetas["theta_k_T"] == pytest.approx(-0.10820887319620184, rel=1e-9)
+    # при T·(1−h) было 1.073351755703928
+    assert thetas["theta_rho_p_abs"] == pytest.approx(1.070581488664032, rel=1e-9)
+    assert thetas["theta_k_p_abs"] == pytest.approx(0.008420322911699163, rel=1e-9)
+    assert res["errors_flow"]["u_inputs"]["u_rho"] == pytest.approx(0.006618070839709683, rel=1e-9)
@@ -0,0 +1,86 @@
+"""Старый формат входа {"flowdata": {...}} (timeless/*_input.json) → текущий формат main.py.
+
+Старый вход — плоские числа без единиц:
+- constrictor_params: d20, D20, h — мм; Ra — мм; e, Ed — м; alpha — градусы;
+- environment_parameters: T, Tst — °C; p (абсолютное), dp, pst — Па;
+- physical_properties: Ro, Roc — кг/м³; k; mu — мкПа·с;
+- straightness_params — та же схема ms_before/ms_after/skip, что и lenPackage.straightness.
+
+Старый выход (*_out.json) — ssu_results/flow_results/straightness_result; массовый расход в нём
+в кг/ч (Qm = Qv·ρ·3600 по самим эталонам), объёмные — в м³/с. to_legacy_result() приводит текущий
+результат к этой форме, чтобы эталоны сравнивались как есть.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional
+
+# единицы полей старого формата в терминах текущего входа
+_CONSTRICTOR_UNITS = {"d20": "mm", "D20": "mm", "D": "mm", "h": "mm", "Ra": "mm", "e": "m", "Ed": "m"}
+_ENVIRONMENT = {"T": ("T", "C"), "Tst": ("T_st", "C"), "p": ("p_abs", "Pa"), "pst": ("p_st", "Pa"),
+                "dp": ("dp", "Pa")}
+_PHYSICAL_UNITS = {"Ro": None, "Roc": None, "k": None, "mu": "uPa_s"}
+
+SECONDS_PER_HOUR = 3600.0
+
+
+def _quantity(value: Any, unit: Optional[str]) -> Dict[str, Any]:
+    return {"real": value} if unit is None else {"real": value, "unit": unit}
+
+
+def is_legacy_flowdata(data: Any) -> bool:
+    return isinstance(data, Mapping) and isinstance(data.get("flowdata"), Mapping) and "physPackage" not in data
+
+
+def from_legacy_flowdata(data: Mapping[str, Any]) -> Dict[str, Any]:
+    """Вход старого формата → вход текущего (type/physPackage/lenPackage); погрешности не задаются."""
+    flow = data["flowdata"]
+    cp = flow.get("constrictor_params") or {}
+    ep = flow.get("environment_parameters") or {}
+    pp = flow.get("physical_properties") or {}
+
+    phys: Dict[str, Any] = {k: pp[k] for k in ("methodic", "aggregate_state") if k in pp}
+    for old, (new, unit) in _ENVIRONMENT.items():
+        if ep.get(old) is not None:
+            phys[new] = _quantity(ep[old], unit)
+    for name, unit in _PHYSICAL_UNITS.items():
+        if pp.get(name) is not None:
+            phys[name] = _quantity(pp[name], unit)
+
+    lens: Dict[str, Any] = {}
+    for name, value in cp.items():
+        if name == "type" or value is None:
+            continue
+        unit = _CONSTRICTOR_UNITS.get(name)
+        lens[name] = _quantity(value, unit) if unit else value
+
+    return {
+        "type": cp.get("type"),
+        "physPackage": {"physProperties": phys, "requestList": []},
+        "lenPackage": {"lenProperties": lens, "straightness": dict(flow.get("straightness_params") or {"skip": True})},
+    }
+
+
+def to_legacy_result(result: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Результат run_calculation → форма старого *_out.json (только поля, у которых есть прямой аналог).
+    pressure_loss и straightness_result старого расчёта в текущем результате не имеют соответствия.
+    """
+    flow = result.get("flow") or {}
+    mass_flow = flow.get("mass_flow")
+    return {
+        "ssu_results": {
+            "beta": result.get("beta"),
+            "C": result.get("C"),
+            "E_speed": result.get("E"),
+            "Epsilon": result.get("epsilon"),
+        },
+        "flow_results": {
+            "mass_flow": None if mass_flow is None else mass_flow * SECONDS_PER_HOUR,
+            "Re": flow.get("Re"),
+            "volume_flow_actual": flow.get("volume_flow_actual"),
+            "volume_flow_std": flow.get("volume_flow_std"),
+        },
+    }
+
+
+__all__ = ["is_legacy_flowdata", "from_legacy_flowdata", "to_legacy_result"]
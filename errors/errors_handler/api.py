@@ -67,7 +67,7 @@ def _adapt_corrector(state: Dict[str, Any], standard_id: Optional[str]) -> Dict[
         # для AbsErr/FidErr корректору не место — это ручит стандарт/другие калькуляторы.
         "value": state.get("value", 1.0),
     }
-    log.debug(f"Corrector payload: {payload}")
+    log.debug("Corrector payload: %s", payload)
     return payload
 
 
@@ -101,7 +101,7 @@ def _adapt_temperature(state: Dict[str, Any], standard_id: Optional[str]) -> Dic
         "range_min": rmin,
         "range_max": rmax,
     }
-    log.debug(f"Temperature payload: {payload}")
+    log.debug("Temperature payload: %s", payload)
     return payload
 
 
@@ -133,7 +133,7 @@ def _adapt_pressure(state: Dict[str, Any], standard_id: Optional[str]) -> Dict[s
         "range_min": rmin,
         "range_max": rmax,
     }
-    log.debug(f"Pressure payload: {payload}")
+    log.debug("Pressure payload: %s", payload)
     return payload
 
 
@@ -165,7 +165,7 @@ def _adapt_density(state: Dict[str, Any], standard_id: Optional[str]) -> Dict[st
         "range_min": rmin,
         "range_max": rmax,
     }
-    log.debug(f"Density payload: {payload}")
+    log.debug("Density payload: %s", payload)
     return payload
 
 
@@ -194,7 +194,7 @@ def _adapt_composition(state: Dict[str, Any], standard_id: Optional[str]) -> Dic
         "range_min": None,
         "range_max": None,
     }
-    log.debug(f"Composition payload: {payload}")
+    log.debug("Composition payload: %s", payload)
     return payload
 
 
@@ -249,6 +249,6 @@ def compute(
     # 3) сложит геометрически
     result = calc.compute()
 
-    log.info(f"[{k}] total_rel={result.total_rel:.6g}% "
-             f"(main={result.main_rel:.6g}%, add={result.additional_rel:.6g}%)")
+    log.info("[%s] total_rel=%.6g%% (main=%.6g%%, add=%.6g%%)",
+             k, result.total_rel, result.main_rel, result.additional_rel)
     return result
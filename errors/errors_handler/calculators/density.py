@@ -44,7 +44,7 @@ class DensityStCalculator(BaseCalculator):
     def extract_context(self) -> Tuple[Optional[float], Optional[float]]:
         value = self.payload.get("value", None)
         rho = float(value) if value is not None else None
-        log.debug(f"Density context: rho={rho}")
+        log.debug("Density context: rho=%s", rho)
         return rho, None
 
     def compute(self) -> Result:
@@ -81,7 +81,7 @@ class DensityStCalculator(BaseCalculator):
         if comps:
             delta_chain = combine_chain_relative(comps)  # уже с k из табл.7
             total_rel = geometric_sum(total_rel, delta_chain)
-            log.debug(f"Converters chain: delta_chain={delta_chain}% -> total_rel={total_rel}%")
+            log.debug("Converters chain: delta_chain=%s%% -> total_rel=%s%%", delta_chain, total_rel)
 
         return Result(
             main_rel=base_res.main_rel,
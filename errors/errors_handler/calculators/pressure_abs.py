@@ -36,7 +36,7 @@ class PressureCalculator(ConvertersMixin, BaseCalculator):
                 log.debug("Запуск конвертеров для давления.")
                 value = ConverterPipeline(converters).run(value, self.payload)
             except Exception as e:
-                log.warning(f"Конвертеры отключены: {e}")
+                log.warning("Конвертеры отключены: %s", e)
 
         rmin = _first(self.payload, "range_min", "p_min", "pressure_min")
         rmax = _first(self.payload, "range_max", "p_max", "pressure_max")
@@ -46,7 +46,7 @@ class PressureCalculator(ConvertersMixin, BaseCalculator):
         self._rmax_cache = float(rmax) if rmax is not None else None
 
         self.payload["value"] = value
-        log.debug(f"Pressure context: value={value}, range_span={range_span}, rmax={self._rmax_cache}")
+        log.debug("Pressure context: value=%s, range_span=%s, rmax=%s", value, range_span, self._rmax_cache)
         return value, range_span
 
     def compute(self) -> Result:
@@ -87,16 +87,16 @@ class PressureCalculator(ConvertersMixin, BaseCalculator):
 
             # унифицируем через стандарт (для RelErr вернётся как есть)
             main_rel = std.to_rel_percent("RelErr", float(main_rel), value=value, range_span=range_span)
-            log.debug(f"[by_formula] main_rel={main_rel}% (const={const}, slope={slope}, qv={qv})")
+            log.debug("[by_formula] main_rel=%s%% (const=%s, slope=%s, qv=%s)", main_rel, const, slope, qv)
         else:
             main_raw = float(self.payload["main"])
             main_rel = std.to_rel_percent(err_type, main_raw, value=value, range_span=range_span)
-            log.debug(f"[by_values] main_raw={main_raw} ({err_type}) -> main_rel={main_rel}%")
+            log.debug("[by_values] main_raw=%s (%s) -> main_rel=%s%%", main_raw, err_type, main_rel)
 
         # --- ADDITIONAL ---
         add_raw = float(self.payload.get("additional", 0.0))
         add_rel = std.to_rel_percent(err_type, add_raw, value=value, range_span=range_span)
-        log.debug(f"additional_raw={add_raw} ({err_type}) -> add_rel={add_rel}%")
+        log.debug("additional_raw=%s (%s) -> add_rel=%s%%", add_raw, err_type, add_rel)
 
         # --- TOTAL ---
         total_rel = geometric_sum(main_rel, add_rel)
@@ -127,6 +127,6 @@ class PressureCalculator(ConvertersMixin, BaseCalculator):
         if comps:
             delta_chain = combine_chain_relative(comps)
             total_rel = geometric_sum(total_rel, delta_chain)
-            log.debug(f"Converters chain: delta_chain={delta_chain}% -> total_rel={total_rel}%")
+            log.debug("Converters chain: delta_chain=%s%% -> total_rel=%s%%", delta_chain, total_rel)
 
         return Result(main_rel=main_rel, additional_rel=add_rel, total_rel=total_rel)
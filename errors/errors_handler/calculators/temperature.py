@@ -63,7 +63,7 @@ class TemperatureCalculator(BaseCalculator):
         range_span = None
         if rmin is not None and rmax is not None:
             range_span = float(rmax) - float(rmin)
-        log.debug(f"Temperature context: value={value} K, range_span={range_span}")
+        log.debug("Temperature context: value=%s K, range_span=%s", value, range_span)
         return value, range_span
 
     # ----- расчет ΔT_abs по формуле -----
@@ -146,18 +146,18 @@ class TemperatureCalculator(BaseCalculator):
         if by_formula:
             main_abs = self._main_abs_by_formula(value)
             main_rel = std.to_rel_percent("AbsErr", main_abs, value=value, range_span=range_span)
-            log.debug(f"[by_formula] main_abs={main_abs} K -> main_rel={main_rel}%")
+            log.debug("[by_formula] main_abs=%s K -> main_rel=%s%%", main_abs, main_rel)
         else:
             err_type = self.payload["error_type"]
             main_raw = float(self.payload.get("main", 0.0) or 0.0)
             main_rel = std.to_rel_percent(err_type, main_raw, value=value, range_span=range_span)
-            log.debug(f"[by_values] main_raw={main_raw} ({err_type}) -> main_rel={main_rel}%")
+            log.debug("[by_values] main_raw=%s (%s) -> main_rel=%s%%", main_raw, err_type, main_rel)
 
         # ---- ADDITIONAL ----
         add_raw = float(self.payload.get("additional", 0.0) or 0.0)
         add_type = self.payload["error_type"]
         add_rel = std.to_rel_percent(add_type, add_raw, value=value, range_span=range_span)
-        log.debug(f"additional_raw={add_raw} ({add_type}) -> add_rel={add_rel}%")
+        log.debug("additional_raw=%s (%s) -> add_rel=%s%%", add_raw, add_type, add_rel)
 
         total_rel = geometric_sum(main_rel, add_rel)
 
@@ -185,6 +185,6 @@ class TemperatureCalculator(BaseCalculator):
         if comps:
             delta_chain = combine_chain_relative(comps)
             total_rel = geometric_sum(total_rel, delta_chain)
-            log.debug(f"Converters chain: delta_chain={delta_chain}% -> total_rel={total_rel}%")
+            log.debug("Converters chain: delta_chain=%s%% -> total_rel=%s%%", delta_chain, total_rel)
 
         return Result(main_rel=main_rel, additional_rel=add_rel, total_rel=total_rel)
@@ -107,7 +107,7 @@ def build_payload_corrector(state: Dict[str, Any], standard_id: str) -> Dict[str
         if span:
             payload["range_min"], payload["range_max"] = span
 
-    log.debug(f"Corrector payload: {payload}")
+    log.debug("Corrector payload: %s", payload)
     return payload
 
 # ————————————————— public API —————————————————
@@ -1,4 +1,3 @@
-import numpy as np
 from logger_config import get_logger
 
 log = get_logger("rules_tables")
@@ -248,6 +247,7 @@ def get_length_after_ssu(beta: float, prefer_ceiling: bool = False) -> float:
 
 
 def get_relative_roughness(beta: float) -> float:
+    import numpy as np  # отложенный импорт: numpy нужен только интерполяторам
     betas = np.array(sorted(RELATIVE_ROUGHNESS_TABLE.keys()))
     roughness = np.array([RELATIVE_ROUGHNESS_TABLE[b] for b in betas])
     return float(np.interp(beta, betas, roughness))
@@ -288,7 +288,7 @@ def get_generic_ms_length(beta: float, ms_type: str) -> float:
         selected_beta = betas[idx]
         return float(table[selected_beta])
 
-    log.warning(f"Неизвестный тип МС: {ms_type} — используем значение из таблицы 8")
+    log.warning("Неизвестный тип МС: %s — используем значение из таблицы 8", ms_type)
     return get_unknown_ms_length(beta)
 
 def get_min_between_ms_length(ms1_type: str, ms2_type: str) -> float:
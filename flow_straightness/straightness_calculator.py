@@ -26,10 +26,10 @@ class CalcStraightness(BaseStraightness):
             log.error("Недостаточно данных: ssu_type, beta, D или Ra отсутствует")
             return {"error": "Не хватает данных для расчёта (ssu_type, beta, D, Ra)"}
 
-        log.info(f"Старт расчёта прямолинейных участков для ССУ '{self.ssu_type}'")
-        log.debug(f"beta={self.beta}, D={self.D}, Ra={self.Ra}")
-        log.debug(f"ms_before: {self.ms_before}")
-        log.debug(f"ms_after: {self.ms_after}")
+        log.info("Старт расчёта прямолинейных участков для ССУ '%s'", self.ssu_type)
+        log.debug("beta=%s, D=%s, Ra=%s", self.beta, self.D, self.Ra)
+        log.debug("ms_before: %s", self.ms_before)
+        log.debug("ms_after: %s", self.ms_after)
 
         try:
             length_1_to_ssu = 0
@@ -45,13 +45,13 @@ class CalcStraightness(BaseStraightness):
                 if ms1:
                     length_1_to_ssu = get_wedge_length(ms1) or 0
                 length_after = 6
-                log.debug(f"WEDGE: {length_1_to_ssu * self.D} (1->ССУ), после = {length_after * self.D}")
+                log.debug("WEDGE: %s (1->ССУ), после = %s", length_1_to_ssu * self.D, length_after * self.D)
 
             elif self.ssu_type == "cone":
                 if ms1:
                     length_1_to_ssu = get_cone_length(self.beta, ms1) or 0
                 length_after = 2
-                log.debug(f"CONE: {length_1_to_ssu * self.D} (1->ССУ), после = {length_after * self.D}")
+                log.debug("CONE: %s (1->ССУ), после = %s", length_1_to_ssu * self.D, length_after * self.D)
 
             else:
                 if ms1:
@@ -64,7 +64,8 @@ class CalcStraightness(BaseStraightness):
                 else:
                     length_after = 0
                 log.debug(
-                    f"GENERIC: {length_1_to_ssu * self.D} (ССУ -> 1), {length_between_ms * self.D} (1 -> 2), после = {length_after  if length_after else 0}")
+                    "GENERIC: %s (ССУ -> 1), %s (1 -> 2), после = %s",
+                    length_1_to_ssu * self.D, length_between_ms * self.D, length_after if length_after else 0)
 
 
 
@@ -75,7 +76,8 @@ class CalcStraightness(BaseStraightness):
 
             roughness_limit = get_relative_roughness(self.beta) / 1000
             actual_roughness = self.Ra / self.D
-            log.debug(f"Ra = {self.Ra} м, D = {self.D} м → Ra/D = {actual_roughness}, допустимо ≤ {roughness_limit}")
+            log.debug("Ra = %s м, D = %s м → Ra/D = %s, допустимо ≤ %s",
+                      self.Ra, self.D, actual_roughness, roughness_limit)
 
             is_smooth = actual_roughness <= roughness_limit
             if is_smooth:
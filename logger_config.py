@@ -1,27 +1,186 @@
+"""Логгеры проекта.
+
+По умолчанию — как раньше: уровень DEBUG, цветной вывод в stderr прямо из вызывающего потока.
+Профиль задаётся переменными окружения (читаются при создании логгера):
+
+    NEW_SSU_LOG_PROFILE=production   # INFO + JSON lines + асинхронный вывод
+    NEW_SSU_LOG_LEVEL=WARNING        # уровень (имя или число)
+    NEW_SSU_LOG_FORMAT=json          # color | plain | json
+    NEW_SSU_LOG_ASYNC=1              # QueueHandler → QueueListener: формат и I/O в отдельном потоке
+
+Отдельные переменные важнее профиля. В асинхронном режиме сообщение форматируется в потоке
+слушателя, поэтому в аргументах логирования передавайте значения, а не объекты, которые потом
+меняются. Очередь опустошается при выходе (atexit) и пересоздаётся в дочернем процессе после fork.
+"""
+import atexit
+import json
 import logging
-from colorlog import ColoredFormatter
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+ENV_PROFILE = "NEW_SSU_LOG_PROFILE"
+ENV_LEVEL = "NEW_SSU_LOG_LEVEL"
+ENV_FORMAT = "NEW_SSU_LOG_FORMAT"
+ENV_ASYNC = "NEW_SSU_LOG_ASYNC"
+
+PROFILES: Dict[str, Dict[str, str]] = {
+    "default": {"level": "DEBUG", "format": "color", "async": "0"},
+    "production": {"level": "INFO", "format": "json", "async": "1"},
+}
+
+
+class _LazyColoredFormatter(logging.Formatter):
+    """Форматтер, который импортирует colorlog при первой записи, а не при import logger_config."""
+
+    def __init__(self) -> None:
+        super().__init__(_FORMAT, datefmt=_DATEFMT)
+        self._impl = None
+
+    def format(self, record: logging.LogRecord) -> str:
+        if self._impl is None:
+            try:
+                from colorlog import ColoredFormatter
+            except ImportError:
+                self._impl = logging.Formatter(_FORMAT, datefmt=_DATEFMT)
+            else:
+                self._impl = ColoredFormatter(
+                    "%(log_color)s" + _FORMAT,
+                    datefmt=_DATEFMT,
+                    log_colors={
+                        'DEBUG':    'cyan',
+                        'INFO':     'green',
+                        'WARNING':  'yellow',
+                        'ERROR':    'red',
+                        'CRITICAL': 'bold_red',
+                    }
+                )
+        return self._impl.format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON: ts (UTC, ISO 8601), level, logger, msg, pid[, exc]."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+def _setting(key: str, env: str) -> str:
+    profile = PROFILES.get(os.environ.get(ENV_PROFILE, "").strip().lower(), PROFILES["default"])
+    return os.environ.get(env, "").strip() or profile[key]
+
+
+def env_level() -> int:
+    raw = _setting("level", ENV_LEVEL)
+    if raw.isdigit():
+        return int(raw)
+    level = logging.getLevelName(raw.upper())
+    return level if isinstance(level, int) else logging.DEBUG
+
 
-def get_logger(name: str = "app", level=logging.DEBUG) -> logging.Logger:
+def _make_formatter(kind: str) -> logging.Formatter:
+    if kind == "json":
+        return JsonFormatter()
+    if kind == "plain":
+        return logging.Formatter(_FORMAT, datefmt=_DATEFMT)
+    return _LazyColoredFormatter()
+
+
+# -------------------- асинхронный вывод --------------------
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке: в очередь уходит сама запись, msg % args
+    считает слушатель. Traceback рендерим сразу — кадры не должны жить в очереди.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if _ensure_listener():
+            super().emit(record)
+        else:
+            _SINK.handle(record)  # слушатель уже остановлен при выходе — пишем синхронно
+
+
+_ASYNC_HANDLER: Optional[_DeferredQueueHandler] = None
+_SINK: Optional[logging.Handler] = None
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+_LISTENER_PID: Optional[int] = None
+_CLOSED = False
+_LOCK = threading.Lock()
+
+
+def _ensure_listener() -> bool:
+    """Слушатель на процесс: после fork поток родителя в потомке не существует — заводим свой."""
+    global _SINK, _LISTENER, _LISTENER_PID, _CLOSED
+    pid = os.getpid()
+    if _LISTENER_PID == pid:
+        return not _CLOSED
+    with _LOCK:
+        if _LISTENER_PID != pid:
+            from multiprocessing import util
+
+            _ASYNC_HANDLER.queue = queue.SimpleQueue()
+            _SINK = logging.StreamHandler()
+            _SINK.setFormatter(_make_formatter(_setting("format", ENV_FORMAT)))
+            _LISTENER = logging.handlers.QueueListener(_ASYNC_HANDLER.queue, _SINK)
+            _LISTENER.start()
+            _LISTENER_PID, _CLOSED = pid, False
+            # воркеры multiprocessing завершаются через os._exit, минуя atexit
+            util.Finalize(None, flush, exitpriority=0)
+    return not _CLOSED
+
+
+def flush() -> None:
+    """Дописать всё из очереди и остановить слушателя; дальнейшие записи процесса идут синхронно."""
+    global _CLOSED
+    with _LOCK:
+        if _LISTENER is not None and _LISTENER_PID == os.getpid() and not _CLOSED:
+            _LISTENER.stop()
+            _CLOSED = True
+
+
+def _async_handler() -> _DeferredQueueHandler:
+    global _ASYNC_HANDLER
+    if _ASYNC_HANDLER is None:
+        _ASYNC_HANDLER = _DeferredQueueHandler(queue.SimpleQueue())
+        atexit.register(flush)
+    return _ASYNC_HANDLER
+
+
+def get_logger(name: str = "app", level: Optional[int] = None) -> logging.Logger:
     logger = logging.getLogger(name)
 
     if not logger.handlers:
-        logger.setLevel(level)
-
-        formatter = ColoredFormatter(
-            "%(log_color)s%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-            log_colors={
-                'DEBUG':    'cyan',
-                'INFO':     'green',
-                'WARNING':  'yellow',
-                'ERROR':    'red',
-                'CRITICAL': 'bold_red',
-            }
-        )
-
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        logger.setLevel(env_level() if level is None else level)
 
-    return logger
+        if _setting("async", ENV_ASYNC).lower() in ("1", "true", "yes", "on"):
+            logger.addHandler(_async_handler())
+        else:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(_make_formatter(_setting("format", ENV_FORMAT)))
+            logger.addHandler(console_handler)
 
+    return logger
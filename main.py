@@ -1,12 +1,13 @@
 from __future__ import annotations
 import argparse
 import json
+import os
 import re
 from dataclasses import asdict, is_dataclass
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, Iterable
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
 from json import JSONDecodeError
 
 from logger_config import get_logger
@@ -64,19 +65,31 @@ def _json_default(obj: Any) -> Any:
 
 
 def _dump_json(path: Path, data: Dict[str, Any]) -> None:
+    # через временный файл: воркер, убитый по таймауту посреди записи, не оставит обрывок под именем выхода
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=_json_default)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=_json_default)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
 
 
 # --- App entry --------------------------------------------------------------
-from controllers.input_controller import InputController  # noqa: E402
-from controllers.calculation_adapter import run_calculation  # noqa: E402
+# Расчётная часть (calculation_adapter → phys_prop, ssu, orifices), режимы batch и инструменты perf
+# (cProfile/pstats, tracemalloc, трасса, метрики) импортируются в тех ветках, которые их используют:
+# --help, --merge-shards и одиночный расчёт не платят за загрузку того, что им не нужно.
+# phys_prop.backends — лёгкий реестр, он нужен argparse для choices --physics-backend.
+from phys_prop.backends import ENV_BACKEND as PHYS_BACKEND_ENV, available as phys_backends  # noqa: E402
 
+if TYPE_CHECKING:
+    from batch.pool import BatchItemResult, BatchTask
 
-def _process_one(input_path: Path, output_path: Path) -> None:
-    logger.info("Чтение входа: %s", input_path)
-    data = _load_json(input_path)
+
+def _calculate(data: Dict[str, Any]) -> Dict[str, Any]:
+    from controllers.input_controller import InputController
+    from controllers.calculation_adapter import run_calculation
 
     ic = InputController()
     parsed = ic.parse(data)
@@ -90,19 +103,171 @@ def _process_one(input_path: Path, output_path: Path) -> None:
     logger.info("Вызов CalculationController…")
     calc = run_calculation(prepared, parsed.values_si, data)
 
-    out = {
+    return {
         "result": calc
     }
 
+
+def _process_one(input_path: Path, output_path: Path) -> None:
+    logger.info("Чтение входа: %s", input_path)
+    data = _load_json(input_path)
+
+    out = _calculate(data)
+
     logger.info("Запись результата: %s", output_path)
     _dump_json(output_path, out)
 
 
+def _request_key(input_path: Path) -> str:
+    from controllers.input_controller import InputController
+    from batch.dedup import canonical_key
+
+    data = _load_json(input_path)
+    return canonical_key(data, InputController().parse(data).values_si)
+
+
 def _iter_inputs(base: Path, pattern: str) -> Iterable[Path]:
     # rglob, чтобы поддержать вложенные папки
     yield from base.rglob(pattern)
 
 
+def _collect_tasks(base_in: Path, base_out: Path, pattern: str) -> List[BatchTask]:
+    from batch.pool import SERVICE_PREFIX, BatchTask
+
+    tasks = []
+    for src in sorted(_iter_inputs(base_in, pattern)):
+        if not src.is_file() or src.name.startswith(SERVICE_PREFIX):
+            continue
+        rel = src.relative_to(base_in)
+        tasks.append(BatchTask(src=src, dst=base_out / rel, rel=rel.as_posix()))
+    return tasks
+
+
+def _count_cache(cache: str, *, hits: int, misses: int) -> None:
+    from perf import metrics
+
+    requests = metrics.counter("new_ssu_cache_requests_total")
+    requests.inc(hits, cache=cache, result="hit")
+    requests.inc(misses, cache=cache, result="miss")
+
+
+def _run_directory(args: argparse.Namespace) -> int:
+    from batch.pool import run_batch, write_report
+    from batch.manifest import BuildManifest, backend_version, code_fingerprint, output_options
+    from batch.checkpoint import CHECKPOINT_NAME, CheckpointJournal
+    from batch.dedup import plan_dedup
+    from perf import tracing
+
+    base_in: Path = args.input
+    base_out: Path = args.outdir
+    logger.info("Пакетный запуск: dir=%s, glob=%s → outdir=%s, workers=%d",
+                base_in, args.glob, base_out, args.workers)
+    if args.trace:
+        from perf.profiling import reset_dump_dir
+        from perf.tracing import TRACE_DIR, TracedCall, write_trace
+
+        reset_dump_dir(base_out / TRACE_DIR)
+        tracing.enable(base_out / TRACE_DIR)
+    with tracing.span("collect_tasks"):
+        tasks = _collect_tasks(base_in, base_out, args.glob)
+    if args.shard:
+        from batch.shard import select_shard
+
+        index, count = args.shard
+        tasks = select_shard(tasks, index, count)
+        logger.info("Шард %d/%d: файлов %d", index, count, len(tasks))
+
+    # --resume: всё, что уже записано в журнал по тому же входу, не пересчитываем и переносим в отчёт как есть
+    # версия выходов — и для манифеста, и для журнала: другой код, бэкенд или опции — пересчёт
+    version = {"code_hash": code_fingerprint(), "backend": backend_version(), "options": output_options()}
+    journal = CheckpointJournal(base_out / CHECKPOINT_NAME, every=args.checkpoint_every,
+                                seconds=args.checkpoint_seconds, version=version)
+    restored: List[BatchItemResult] = []
+    restored_digests: Dict[str, str] = {}
+    if args.resume:
+        restored, tasks, restored_digests = CheckpointJournal.resume(journal.path, tasks, version)
+        logger.info("Возобновление: уже завершено %d, осталось %d", len(restored), len(tasks))
+
+    with tracing.span("manifest", files=len(tasks)):
+        manifest = BuildManifest.load(base_out, version["code_hash"], version["backend"], options=version["options"])
+        todo, fresh, digests = manifest.partition(tasks)
+    # профиль/трасса по актуальным (пропущенным) файлам были бы пустыми — такие режимы считают всё
+    measuring = [flag for flag in ("profile", "memprofile", "trace") if getattr(args, flag)]
+    if measuring and not args.force and fresh:
+        logger.info("--%s: актуальные по манифесту выходы тоже пересчитываются (%d)", measuring[0], len(fresh))
+    if args.force or measuring:
+        todo, fresh = tasks, []
+    logger.info("К расчёту: %d, актуальны (пропуск): %d", len(todo), len(fresh))
+    _count_cache("manifest", hits=len(fresh), misses=len(todo))
+
+    def _record(item: BatchItemResult) -> None:
+        if item.ok and item.rel in digests:
+            manifest.record(item.rel, digests[item.rel], item.dst)
+        elif not item.ok:
+            manifest.forget(item.rel)
+
+    # одинаковые запросы считаем один раз, результат раздаём всем выходам
+    with tracing.span("dedup", files=len(todo)):
+        plan = plan_dedup(todo, _request_key) if not args.no_dedup else None
+    if plan:
+        _count_cache("dedup", hits=plan.hits, misses=len(plan.unique))
+    fanned: List[BatchItemResult] = []
+
+    def _on_result(item: BatchItemResult) -> None:
+        _record(item)
+        journal.append(item, digests.get(item.rel))
+        for dup in (plan.fan_out(item) if plan else ()):
+            _record(dup)
+            journal.append(dup, digests.get(dup.rel))
+            fanned.append(dup)
+
+    # в манифест — хеш входа, по которому посчитан восстановленный выход, а не свежий
+    digests.update(restored_digests)
+    for item in restored:
+        _record(item)
+
+    process_fn = _process_one
+    if args.profile:
+        from perf.profiling import PROFILE_DIR, ProfiledCall, reset_dump_dir, write_profile
+
+        reset_dump_dir(base_out / PROFILE_DIR)
+        process_fn = ProfiledCall(_process_one, base_out / PROFILE_DIR, base_out)
+    if args.memprofile:
+        from perf.memprofile import MEMPROFILE_DIR, MemProfiledCall, write_memprofile
+        from perf.profiling import reset_dump_dir
+
+        reset_dump_dir(base_out / MEMPROFILE_DIR)
+        process_fn = MemProfiledCall(process_fn, base_out / MEMPROFILE_DIR, base_out)
+    if args.trace:
+        process_fn = TracedCall(process_fn, base_out / TRACE_DIR, base_out)
+
+    try:
+        with journal.open(resume=args.resume), tracing.span("run_batch", workers=args.workers):
+            report = run_batch(plan.unique if plan else todo, process_fn, workers=args.workers, on_result=_on_result,
+                               timeout_s=args.timeout_s, max_tasks_per_worker=args.max_tasks_per_worker)
+    finally:
+        with tracing.span("manifest_save"):
+            manifest.save()
+    report.items[:0] = restored
+    report.items.extend(fanned)
+    report.dedup_hits = plan.hits if plan else 0
+    report.resumed = len(restored)
+    report.skipped = len(fresh)
+    with tracing.span("write_report"):
+        write_report(report, base_out)
+    if args.profile:
+        write_profile(base_out / PROFILE_DIR, base_out, top=args.profile_top)
+    if args.memprofile:
+        write_memprofile(base_out / MEMPROFILE_DIR, base_out)
+    if args.trace:
+        write_trace(base_out / TRACE_DIR, base_out)
+    timeouts = sum(1 for it in report.failed if it.status == "timeout")
+    logger.info("Готово. Успешно обработано файлов: %d, ошибок: %d (из них по таймауту: %d), пропущено: %d, "
+                "дубликатов: %d, время: %.3f с",
+                report.ok_count, len(report.failed), timeouts, report.skipped, report.dedup_hits, report.wall_seconds)
+    return 0
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Запуск расчёта new_ssu")
     ap.add_argument("--input", type=Path, default=Path("inputdata/phys_test_30319_3_upp.json"),
@@ -113,28 +278,163 @@ def main() -> int:
                     help="каталог результатов (для пакетного запуска по директории)")
     ap.add_argument("--glob", type=str, default="*.json",
                     help="маска поиска JSON в режиме каталога (rglob)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="число процессов-воркеров в режиме каталога (1 — последовательно)")
+    ap.add_argument("--timeout-s", type=float, default=None,
+                    help="лимит времени на один расчёт, с; зависший воркер убивается и заменяется")
+    ap.add_argument("--max-tasks-per-worker", type=int, default=0,
+                    help="перезапускать воркер после N задач (0 — не перезапускать)")
+    ap.add_argument("--force", action="store_true",
+                    help="пересчитать все входы, даже если выходы актуальны по манифесту")
+    ap.add_argument("--no-dedup", action="store_true",
+                    help="не склеивать одинаковые запросы в пакетном запуске")
+    ap.add_argument("--resume", action="store_true",
+                    help="продолжить прерванный пакетный запуск по журналу чекпоинта в outdir")
+    ap.add_argument("--checkpoint-every", type=int, default=1,
+                    help="fsync журнала чекпоинта каждые N завершённых файлов")
+    ap.add_argument("--checkpoint-seconds", type=float, default=0.0,
+                    help="дополнительно fsync журнала не реже, чем раз в N секунд (0 — выкл.)")
+    ap.add_argument("--shard", type=str, default=None,
+                    help="обработать только шард i/N входов (i от 1 до N), разбиение по хешу относительного пути")
+    ap.add_argument("--merge-shards", type=Path, nargs="+", default=None, metavar="DIR",
+                    help="слить каталоги результатов шардов в --outdir (выходы, манифест, сводка) и выйти")
+    ap.add_argument("--watch", action="store_true",
+                    help="режим наблюдения: обрабатывать новые/изменённые файлы каталога --input по мере появления")
+    ap.add_argument("--poll-s", type=float, default=1.0,
+                    help="период опроса каталога в режиме --watch, с")
+    ap.add_argument("--debounce-s", type=float, default=2.0,
+                    help="файл берётся в работу, если размер и mtime не менялись столько секунд")
+    ap.add_argument("--serve", action="store_true",
+                    help="локальный сервис расчёта: POST /calculate с тем же JSON, что и у --input")
+    ap.add_argument("--host", type=str, default="127.0.0.1", help="адрес сервиса (--serve)")
+    ap.add_argument("--port", type=int, default=8765, help="порт сервиса (--serve)")
+    ap.add_argument("--socket", type=str, default=None,
+                    help="Unix-сокет вместо TCP для --serve")
+    ap.add_argument("--input-jsonl", type=str, default=None,
+                    help="поток запросов JSONL (по одному JSON в строке), '-' — stdin")
+    ap.add_argument("--output-jsonl", type=str, default="-",
+                    help="поток результатов JSONL для --input-jsonl, '-' — stdout")
+    ap.add_argument("--timings", action="store_true",
+                    help="добавить в результат блок _timings: время и число вызовов по этапам расчёта")
+    ap.add_argument("--profile", action="store_true",
+                    help="cProfile на каждый файл (и в воркерах), сводный pstats и collapsed-stack в каталоге результатов")
+    ap.add_argument("--profile-top", type=int, default=25,
+                    help="сколько самых горячих функций вывести в конце при --profile")
+    ap.add_argument("--memprofile", action="store_true",
+                    help="tracemalloc по этапам расчёта: пик, прирост и оставшаяся после запроса память по строкам "
+                         "исходников, сводка _batch_memprofile.json в каталоге результатов (медленно)")
+    ap.add_argument("--trace", action="store_true",
+                    help="Chrome trace (_batch_trace.json в каталоге результатов): спаны запросов, этапов расчёта и "
+                         "шагов батча, дорожка на процесс; открыть в chrome://tracing или ui.perfetto.dev")
+    ap.add_argument("--phys-cache-db", type=Path, default=None,
+                    help="постоянный кэш физсвойств (sqlite, общий для воркеров и запусков); "
+                         "заполнить заранее: python -m phys_prop.disk_cache warm")
+    ap.add_argument("--physics-backend", choices=phys_backends(), default=None,
+                    help=f"бэкенд физсвойств (по умолчанию ${PHYS_BACKEND_ENV} или pyfizika); "
+                         "virial — офлайн-замена без PyFizika для прогонов и нагрузочных тестов")
+    ap.add_argument("--metrics-file", type=Path, default=None,
+                    help="выгружать метрики в файл: *.json — JSON, иначе Prometheus text format (textfile-коллектор)")
+    ap.add_argument("--metrics-interval-s", type=float, default=15.0,
+                    help="период перезаписи --metrics-file, с (0 — только при выходе)")
     args = ap.parse_args()
+    if args.shard:
+        from batch.shard import parse_shard
 
-    if args.input.is_dir():
-        base_in: Path = args.input
-        base_out: Path = args.outdir
-        logger.info("Пакетный запуск: dir=%s, glob=%s → outdir=%s", base_in, args.glob, base_out)
-        count = 0
-        for src in _iter_inputs(base_in, args.glob):
-            if not src.is_file():
-                continue
-            rel = src.relative_to(base_in)
-            dst = base_out / rel
-            try:
-                _process_one(src, dst)
-                count += 1
-            except Exception as e:
-                logger.exception("Ошибка при обработке %s: %s", src, e)
-        logger.info("Готово. Успешно обработано файлов: %d", count)
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            ap.error(str(e))
+    if args.trace and args.memprofile:
+        ap.error("--trace и --memprofile оба размечают этапы расчёта — запускайте по отдельности")
+
+    if args.timings:
+        from perf.timings import ENV_FLAG
+
+        # через окружение, чтобы флаг увидели и процессы-воркеры
+        os.environ[ENV_FLAG] = "1"
+    if args.phys_cache_db:
+        from phys_prop.cache import ENV_DB as PHYS_CACHE_DB_ENV
+
+        os.environ[PHYS_CACHE_DB_ENV] = str(args.phys_cache_db)  # воркеры откроют ту же базу
+    if args.physics_backend:
+        os.environ[PHYS_BACKEND_ENV] = args.physics_backend  # воркеры выберут тот же бэкенд
+
+    if args.metrics_file:
+        from perf import metrics
+
+        # финальная выгрузка — при выходе процесса (atexit), в том числе после Ctrl+C в --serve/--watch
+        metrics.MetricsExporter(args.metrics_file, interval_s=args.metrics_interval_s).start()
+
+    if args.serve:
+        from batch.service import serve
+
+        serve(_calculate, workers=args.workers, host=args.host, port=args.port,
+              unix_socket=args.socket, json_default=_json_default)
         return 0
 
+    if args.merge_shards:
+        from batch.shard import merge_shards
+
+        summary = merge_shards(args.merge_shards, args.outdir)
+        logger.info("Готово. Всего: %d, успешно: %d, ошибок: %d, по таймауту: %d",
+                    summary["total"], summary["ok"], summary["failed"], summary["timeout"])
+        return 0
+
+    if args.input_jsonl is not None:
+        logger.info("Потоковый запуск JSONL: %s → %s, workers=%d",
+                    args.input_jsonl, args.output_jsonl, args.workers)
+        from batch.jsonl import open_jsonl, run_jsonl
+
+        with open_jsonl(args.input_jsonl, "r") as src, open_jsonl(args.output_jsonl, "w") as dst:
+            stats = run_jsonl(src, dst, _calculate, workers=args.workers, json_default=_json_default)
+        logger.info("Готово. Запросов: %d, успешно: %d, ошибок: %d, время: %.3f с",
+                    stats.total, stats.ok, stats.failed, stats.wall_seconds)
+        return 0
+
+    if args.watch:
+        if not args.input.is_dir():
+            ap.error("--watch требует каталог в --input")
+        from batch.watch import FolderWatcher
+        from batch.manifest import BuildManifest, backend_version, code_fingerprint, output_options
+
+        manifest = None if args.force else BuildManifest.load(args.outdir, code_fingerprint(), backend_version(),
+                                                              options=output_options())
+        FolderWatcher(args.input, args.outdir, _process_one, pattern=args.glob, workers=args.workers,
+                      poll_s=args.poll_s, debounce_s=args.debounce_s, manifest=manifest).run()
+        return 0
+
+    if args.input.is_dir():
+        return _run_directory(args)
+
     # Одиночный режим
-    _process_one(args.input, args.output)
+    out_dir = args.output.parent
+    process_fn = _process_one
+    if args.profile:
+        from perf.profiling import PROFILE_DIR, ProfiledCall, reset_dump_dir, write_profile
+
+        reset_dump_dir(out_dir / PROFILE_DIR)
+        process_fn = ProfiledCall(process_fn, out_dir / PROFILE_DIR)
+    if args.memprofile:
+        from perf.memprofile import MEMPROFILE_DIR, MemProfiledCall, write_memprofile
+        from perf.profiling import reset_dump_dir
+
+        reset_dump_dir(out_dir / MEMPROFILE_DIR)
+        process_fn = MemProfiledCall(process_fn, out_dir / MEMPROFILE_DIR)
+    if args.trace:
+        from perf.profiling import reset_dump_dir
+        from perf.tracing import TRACE_DIR, TracedCall, write_trace
+
+        reset_dump_dir(out_dir / TRACE_DIR)
+        process_fn = TracedCall(process_fn, out_dir / TRACE_DIR)
+    try:
+        process_fn(args.input, args.output)
+    finally:
+        if args.profile:
+            write_profile(out_dir / PROFILE_DIR, out_dir, top=args.profile_top)
+        if args.memprofile:
+            write_memprofile(out_dir / MEMPROFILE_DIR, out_dir)
+        if args.trace:
+            write_trace(out_dir / TRACE_DIR, out_dir)
     logger.info("Готово.")
     return 0
 
@@ -144,3 +444,23 @@ if __name__ == "__main__":
 
 #python main.py --input inputdata/cone_01.json --output outputdata/result.json
 #python main.py --input inputdata --outdir outputdata --glob "*.json"
+#python main.py --input inputdata --outdir outputdata --workers 8
+#python main.py --input inputdata --outdir outputdata --force
+#python main.py --input inputdata --outdir outputdata --resume --checkpoint-every 50
+#python main.py --input inputdata --outdir outputdata --workers 8 --timeout-s 60 --max-tasks-per-worker 500
+#for i in 1 2 3 4; do ssh node$i python main.py --input inputdata --outdir shards/$i --shard $i/4; done
+#python main.py --merge-shards shards/1 shards/2 shards/3 shards/4 --outdir outputdata
+#python main.py --input scada_drop --outdir outputdata --watch --workers 4 --debounce-s 2
+#python main.py --serve --workers 4 --port 8765   # curl -d @inputdata/cone_01.json localhost:8765/calculate
+#python main.py --input-jsonl archive.jsonl --output-jsonl results.jsonl --workers 8
+#python main.py --input inputdata/cone_01.json --output outputdata/result.json --timings
+#python main.py --input inputdata --outdir outputdata --workers 4 --profile   # flamegraph.pl outputdata/_batch_profile.collapsed.txt > fg.svg
+#cat archive.jsonl | python main.py --input-jsonl - > results.jsonl
+#python main.py --serve --workers 4 --metrics-file /var/lib/node_exporter/textfile/new_ssu.prom
+#python main.py --input inputdata --outdir outputdata --workers 2 --memprofile   # outputdata/_batch_memprofile.json
+#python main.py --input inputdata --outdir outputdata --workers 4 --trace   # ui.perfetto.dev ← outputdata/_batch_trace.json
+#NEW_SSU_LOG_PROFILE=production python main.py --serve --workers 4   # INFO, JSON lines, вывод логов в отдельном потоке
+#python main.py --input inputdata --outdir outputdata --workers 8 --phys-cache-db /var/cache/new_ssu/phys.sqlite
+#NEW_SSU_PHYS_CACHE_SIZE=0 python main.py --input inputdata --outdir outputdata   # без кэша физсвойств (phys_prop/cache.py)
+#python main.py --input inputdata --outdir outputdata --workers 4 --physics-backend virial   # без PyFizika (phys_prop/backends.py)
+#NEW_SSU_PHYS_SURROGATES=surrogates python main.py --input archive --outdir outputdata   # таблицы (T, p): python -m phys_prop.surrogate build
@@ -47,7 +47,7 @@ class BaseOrifice(ABC):
         try:
             return self._validate()
         except Exception as e:
-            logger.error(f"Validation error in {self.__class__.__name__}: {e}")
+            logger.error("Validation error in %s: %s", self.__class__.__name__, e)
             return False
 
     @abstractmethod
@@ -69,7 +69,7 @@ class BaseOrifice(ABC):
                                   alpha_CCU: float, alpha_T: float, t: float):
         self.d = float(d_20) * self.calc_K_CCU(alpha_CCU, t)
         self.D = float(D_20) * self.calc_K_T(alpha_T, t)
-        logger.debug(f"{self.__class__.__name__}: Обновлена геометрия: d={self.d}, D={self.D}")
+        logger.debug("%s: Обновлена геометрия: d=%s, D=%s", self.__class__.__name__, self.d, self.D)
 
     def _get_roughness_limits(self):
         return [
@@ -84,10 +84,10 @@ class BaseOrifice(ABC):
         for max_beta, max_ratio in self._get_roughness_limits():
             if beta <= max_beta:
                 if ratio > max_ratio:
-                    logger.warning(f"[Ошибка Ra] Ra/D*1e4 = {ratio} > {max_ratio} при β = {beta}.")
+                    logger.warning("[Ошибка Ra] Ra/D*1e4 = %s > %s при β = %s.", ratio, max_ratio, beta)
                     return False
                 return True
-        logger.warning(f"[Ошибка Ra] β = {beta} вне допустимого диапазона таблицы 4.")
+        logger.warning("[Ошибка Ra] β = %s вне допустимого диапазона таблицы 4.", beta)
         return False
 
     def roughness_allowance(self) -> float:
@@ -95,14 +95,14 @@ class BaseOrifice(ABC):
         for max_beta, max_ratio in self._get_roughness_limits():
             if beta <= max_beta:
                 return self.D * max_ratio / 1e4
-        logger.warning(f"[Ra допуск] β = {beta} не найден в таблице допусков.")
+        logger.warning("[Ra допуск] β = %s не найден в таблице допусков.", beta)
         return None
 
     def calculate_E(self) -> float:
         beta = self.calculate_beta()
         denom = 1 - beta**4
         if denom <= 0:
-            logger.error(f"Ошибка при расчёте E: недопустимое значение β={beta}")
+            logger.error("Ошибка при расчёте E: недопустимое значение β=%s", beta)
             raise ValueError(f"Неверное β={beta}: подкоренное выражение ≤0")
         return 1.0 / math.sqrt(denom)
 
@@ -138,7 +138,7 @@ class BaseOrifice(ABC):
 
         result["pressure_loss"] = self.pressure_loss(dp)
 
-        logger.info(f"{self.__class__.__name__}: Успешный расчёт всех параметров")
+        logger.info("%s: Успешный расчёт всех параметров", self.__class__.__name__)
         return result
 
     # -------------- абстрактные спец-методы --------------
@@ -27,12 +27,12 @@ class ConeFlowMeter(BaseOrifice):
         valid_D = 0.05 <= self.D <= 0.50
         tests.append(valid_D)
         if not valid_D:
-            logger.warning(f"D={self.D * 1000:.1f} мм вне диапазона [50; 500] мм")
+            logger.warning("D=%.1f мм вне диапазона [50; 500] мм", self.D * 1000)
 
         valid_beta = 0.45 <= beta <= 0.75
         tests.append(valid_beta)
         if not valid_beta:
-            logger.warning(f"β={beta:.3f} вне диапазона [0.45; 0.75]")
+            logger.warning("β=%.3f вне диапазона [0.45; 0.75]", beta)
 
         # valid_alpha = self.alpha is not None and 10 <= self.alpha <= 60
         # tests.append(valid_alpha)
@@ -49,7 +49,7 @@ class ConeFlowMeter(BaseOrifice):
         Re_max = 1.2e7
         if not (Re_min <= self.Re <= Re_max):
             logger.warning(
-                f"{self.__class__.__name__}: Re={self.Re:.0f} вне диапазона [{Re_min:.0f}; {Re_max:.0f}]"
+                "%s: Re=%.0f вне диапазона [%.0f; %.0f]", self.__class__.__name__, self.Re, Re_min, Re_max
             )
             return False
         return True
@@ -73,7 +73,7 @@ class ConeFlowMeter(BaseOrifice):
         beta = self.calculate_beta()
         otn = dp / p
         if otn > 0.25:
-            logger.error(f"dp/p = {otn:.2f} > 0.25 — недопустимо")
+            logger.error("dp/p = %.2f > 0.25 — недопустимо", otn)
             raise ValueError("dp/p > 0.25")
 
         return 1 - (0.649 - 0.696 * beta**4) * otn
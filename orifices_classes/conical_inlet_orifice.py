@@ -1,6 +1,5 @@
 from .base_orifice import BaseOrifice
 import math
-import numpy as np
 from logger_config import get_logger
 from orifices_classes.orifices_geometry_helpers.conical_inlet import calc_e1_nominal, calc_e_nominal, calc_e_tol, calc_f_angle
 
@@ -11,9 +10,10 @@ class ConicalInletOrifice(BaseOrifice):
     Диафрагма с коническим входом
     """
     ##Табл 5
-    _BETAS = np.array([...])  # укорочено
-    _F_DEGREES = np.array([...])
-    _D_OVER_E1 = np.array([...])
+    # списки, а не np.array: numpy подгружается только при интерполяции (см. orifices_geometry_helpers.conical_inlet)
+    _BETAS = [...]  # укорочено
+    _F_DEGREES = [...]
+    _D_OVER_E1 = [...]
 
     def __init__(self, D: float, d: float, Re: float, p: float, k: float, dp: float, **kwargs):
         self.D = D
@@ -43,16 +43,17 @@ class ConicalInletOrifice(BaseOrifice):
     def _validate(self) -> bool:
         beta = self.calculate_beta()
         if not (0.025 <= self.D <= 0.5 and 0.006 <= self.d <= 0.05):
-            logger.error(f"[Validation error]{self.__class__.__name__}: D={self.D:.4f}m или d={self.d:.4f}m вне диапазона")
+            logger.error("[Validation error]%s: D=%.4fm или d=%.4fm вне диапазона",
+                         self.__class__.__name__, self.D, self.d)
             return False
 
         if self.D <= 0.1:
             if not (0.1 <= beta <= 0.5):
-                logger.error(f"[Validation error]{self.__class__.__name__}: β={beta:.3f} вне [0.1; 0.5]")
+                logger.error("[Validation error]%s: β=%.3f вне [0.1; 0.5]", self.__class__.__name__, beta)
                 return False
         else:
             if not (0.1 <= beta <= 0.316):
-                logger.error(f"[Validation error]{self.__class__.__name__}: β={beta:.3f} вне [0.1; 0.316]")
+                logger.error("[Validation error]%s: β=%.3f вне [0.1; 0.316]", self.__class__.__name__, beta)
                 return False
         return True
 
@@ -102,7 +103,8 @@ class ConicalInletOrifice(BaseOrifice):
             Re_min, Re_max = 80, 2e5 * beta
 
         if not (Re_min <= self.Re <= Re_max):
-            logger.error(f"[Validation error]{self.__class__.__name__}: Re={self.Re:.0f} вне [{Re_min:.0f}; {Re_max:.0f}]")
+            logger.error("[Validation error]%s: Re=%.0f вне [%.0f; %.0f]",
+                         self.__class__.__name__, self.Re, Re_min, Re_max)
             return False
         return True
 
@@ -23,7 +23,7 @@ class CylindricalNozzle(BaseOrifice):
     def _validate(self) -> bool:
         beta = self.calculate_beta()
         if not (0.025 <= self.D <= 0.1 and 0.0025 <= self.d <= 0.07 and 0.1 <= beta <= 0.7):
-            logger.error(f"[Validation error]{self.__class__.__name__}: D={self.D}, d={self.d}, β={beta}")
+            logger.error("[Validation error]%s: D=%s, d=%s, β=%s", self.__class__.__name__, self.D, self.d, beta)
             return False
         return True
 
@@ -45,8 +45,7 @@ class CylindricalNozzle(BaseOrifice):
 
         if not (Re_min <= self.Re <= Re_max):
             logger.error(
-                f"[Re check] {self.__class__.__name__}: "
-                f"Re={self.Re:.0f} вне [{Re_min:.0f}; {Re_max:.0f}]"
+                "[Re check] %s: Re=%.0f вне [%.0f; %.0f]", self.__class__.__name__, self.Re, Re_min, Re_max
             )
             return False
         return True
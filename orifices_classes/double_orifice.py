@@ -21,7 +21,7 @@ class DoubleOrifice(BaseOrifice):
     def _validate(self) -> bool:
         beta = self.calculate_beta()
         if not (0.0127 <= self.d <= 0.0705 and 0.04 <= self.D <= 0.1 and 0.32 <= beta <= 0.7):
-            logger.warning(f"[Validation error]{self.__class__.__name__}: d={self.d}, D={self.D}, β={beta:.3f}")
+            logger.warning("[Validation error]%s: d=%s, D=%s, β=%.3f", self.__class__.__name__, self.d, self.D, beta)
             return False
         return True
 
@@ -45,8 +45,7 @@ class DoubleOrifice(BaseOrifice):
         Re_max = 500000 * beta**2
         if not (Re_min <= self.Re <= Re_max):
             logger.warning(
-                f"[Re check] {self.__class__.__name__}: "
-                f"Re={self.Re:.5f} вне [{Re_min:.5f}; {Re_max:.5f}]"
+                "[Re check] %s: Re=%.5f вне [%.5f; %.5f]", self.__class__.__name__, self.Re, Re_min, Re_max
             )
             return False
         return True
@@ -68,7 +67,7 @@ class DoubleOrifice(BaseOrifice):
         beta = self.calculate_beta()
         ratio = self.dp / self.p
         if ratio > 0.25:
-            logger.error(f"[Epsilon error] Δp/p = {ratio:.3f} > 0.25 — расчёт невозможен")
+            logger.error("[Epsilon error] Δp/p = %.3f > 0.25 — расчёт невозможен", ratio)
             raise ValueError("Δp/p > 0.25")
         return 1 - (0.41 + 0.35 * beta**4) * ratio / self.k
 
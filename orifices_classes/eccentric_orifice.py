@@ -32,7 +32,7 @@ class EccentricOrifice(BaseOrifice):
     def _validate(self) -> bool:
         beta = self.calculate_beta()
         if not (0.015 <= self.d and 0.5 <= self.D and 0.245 <= beta <= 0.6):
-            logger.warning(f"[Validation error]{self.__class__.__name__}: d={self.d}, D={self.D}, β={beta:.3f}")
+            logger.warning("[Validation error]%s: d=%s, D=%s, β=%.3f", self.__class__.__name__, self.d, self.D, beta)
             return False
         # Базовые ограничения по п.10.3 (диапазоны D, d, β уже проверяются в базовом классе)
         # 10.3.1.1 Толщина Ed ≤ 0.05·D
@@ -111,8 +111,7 @@ class EccentricOrifice(BaseOrifice):
         Re_max = 1e6 * beta
         if not (Re_min <= self.Re <= Re_max):
             logger.warning(
-                f"[Re check] {self.__class__.__name__}: "
-                f"Re={self.Re:.0f} вне [{Re_min:.0f}; {Re_max:.0f}]"
+                "[Re check] %s: Re=%.0f вне [%.0f; %.0f]", self.__class__.__name__, self.Re, Re_min, Re_max
             )
             return False
         return True
@@ -126,7 +125,7 @@ class EccentricOrifice(BaseOrifice):
         try:
             FE = 1.032 + 0.0178 * math.log10(RaD) + 0.0939 * beta**2 * math.log10(RaD)
         except ValueError as e:
-            logger.error(f"Ошибка логарифма log10(Ra/D): Ra={self.Ra}, D={self.D} → {e}")
+            logger.error("Ошибка логарифма log10(Ra/D): Ra=%s, D=%s → %s", self.Ra, self.D, e)
             raise
         return C0 * FE / E
 
@@ -144,7 +143,7 @@ class EccentricOrifice(BaseOrifice):
         """Коэффициент расширения п.10.4.2"""
         ratio = self.dp / self.p
         if ratio > 0.25:
-            logger.error(f"[Epsilon error] Δp/p = {ratio:.3f} > 0.25 — расчёт невозможен")
+            logger.error("[Epsilon error] Δp/p = %.3f > 0.25 — расчёт невозможен", ratio)
             raise ValueError("Δp/p > 0.25")
         beta = self.calculate_beta()
         return 1 - (0.351 + 0.256 * beta**4 + 0.93 * beta**8) * (1 - ratio**(1/self.k))
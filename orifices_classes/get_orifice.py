@@ -51,11 +51,11 @@ def create_orifice(name: str | OrificeType, *args, **kwargs):
 
         cls = mapping.get(name)
         if cls is None:
-            logger.error(f"Класс не найден для типа: {name}")
+            logger.error("Класс не найден для типа: %s", name)
             return None
 
         return cls(*args, **kwargs)
 
     except Exception as e:
-        logger.exception(f"Ошибка при создании экземпляра '{name}': {e}")
+        logger.exception("Ошибка при создании экземпляра '%s': %s", name, e)
         return None
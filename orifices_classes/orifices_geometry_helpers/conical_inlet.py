@@ -1,9 +1,9 @@
-import numpy as np
-
 def calc_f_angle(beta, betas, f_degrees):
+    import numpy as np  # отложенный импорт: не тянем numpy в прогоны без конического входа
     return float(np.interp(beta, betas, f_degrees))
 
 def calc_e1_nominal(d, beta, betas, d_over_e1_table):
+    import numpy as np
     d_over_e1 = float(np.interp(beta, betas, d_over_e1_table))
     return d / d_over_e1
 
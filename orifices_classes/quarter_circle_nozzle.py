@@ -22,8 +22,7 @@ class QuarterCircleNozzle(BaseOrifice):
         beta = self.calculate_beta()
         # 12.3.1.1
         if not (0.025 <= self.D <= 0.1 and 0.0055 <= self.d <= 0.07 and 0.22 <= beta <= 0.7):
-            logger.error(f"[Validation error] {self.__class__.__name__}: "
-                  f"D={self.D:.3f}, d={self.d:.3f}, β={beta:.3f}")
+            logger.error("[Validation error] %s: D=%.3f, d=%.3f, β=%.3f", self.__class__.__name__, self.D, self.d, beta)
             return False
         return True
 
@@ -77,7 +76,7 @@ class QuarterCircleNozzle(BaseOrifice):
                   - 200731143 * beta**4
                   + 97892444 * beta**5)
         if not Re_min < self.Re < Re_max:
-            logger.error(f"[Re check] {self.__class__.__name__}: {Re_max} < Re={self.Re} < {Re_max}")
+            logger.error("[Re check] %s: %s < Re=%s < %s", self.__class__.__name__, Re_max, self.Re, Re_max)
             return False
         return True
 
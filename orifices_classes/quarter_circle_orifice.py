@@ -22,7 +22,7 @@ class QuarterCircleOrifice(BaseOrifice):
         beta = self.calculate_beta()
         # 11.2 базовые проверки D, d, β (делаем через диапазоны)
         if not (0.015 <= self.d and self.D <= 0.5 and 0.245 <= beta <= 0.6):
-            logger.error(f"[Validation error]{self.__class__.__name__}: D={self.D:.3f}, d={self.d:.3f}, β={beta:.3f}")
+            logger.error("[Validation error]%s: D=%.3f, d=%.3f, β=%.3f", self.__class__.__name__, self.D, self.d, beta)
             return False
         return True
 
@@ -56,7 +56,7 @@ class QuarterCircleOrifice(BaseOrifice):
         Re_min = 1000 * beta + 9.4e6 * (beta - 0.24)**8
         Re_max = 1e5 * beta
         if not (Re_min <= self.Re <= Re_max):
-            logger.error(f"[Re check] {self.__class__.__name__}: Re={self.Re:.0f} вне [{Re_min:.0f}; {Re_max:.0f}]")
+            logger.error("[Re check] %s: Re=%.0f вне [%.0f; %.0f]", self.__class__.__name__, self.Re, Re_min, Re_max)
             return False
         return True
 
@@ -27,7 +27,8 @@ class SegmentOrifice(BaseOrifice):
         Hd = self.d / self.D
         if not (0.05 <= self.D <= 1.0 and 0.00798 <= self.d <= 0.49207 and
                 0.158 <= Hd <= 0.492 and 0.32 <= beta <= 0.7):
-            logger.error(f"[Validation error]{self.__class__.__name__}: D={self.D}, H={self.d}, H/D={Hd:.3f}, β={beta:.3f}")
+            logger.error("[Validation error]%s: D=%s, H=%s, H/D=%.3f, β=%.3f",
+                         self.__class__.__name__, self.D, self.d, Hd, beta)
             return False
         # # 9.3.1.1 Толщина Ed ≤ 0.05·D
         # if self.Ed is not None and self.Ed > 0.05 * self.D:
@@ -89,8 +90,7 @@ class SegmentOrifice(BaseOrifice):
         Re_min = 41270 - 257222 * beta + 525533 * beta**2 - 232389 * beta**3
         Re_max = 1e6
         if not (Re_min <= self.Re <= Re_max):
-            logger.error(f"[Re check] {self.__class__.__name__}: "
-                  f"Re={self.Re:.0f} вне [{Re_min:.0f}; {Re_max:.0f}]")
+            logger.error("[Re check] %s: Re=%.0f вне [%.0f; %.0f]", self.__class__.__name__, self.Re, Re_min, Re_max)
             return False
         return True
 
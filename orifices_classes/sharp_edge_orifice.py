@@ -24,7 +24,8 @@ class SharpEdgeOrifice(BaseOrifice):
         """
         beta = self.calculate_beta()
         if not (0.014 <= self.D <= 0.05 and 0.007 <= self.d <= 0.04 and 0.22 <= beta <= 0.8):
-            logger.error(f"[Validation error]{self.__class__.__name__}: D={self.D} или d={self.d} или beta={beta} вне диапазона")
+            logger.error("[Validation error]%s: D=%s или d=%s или beta=%s вне диапазона",
+                         self.__class__.__name__, self.D, self.d, beta)
             return False
         return True
 
@@ -51,9 +52,8 @@ class SharpEdgeOrifice(BaseOrifice):
         Re_max = 1e7
         if not (Re_min <= self.Re <= Re_max):
             logger.error(
-                f"[Validation error]{self.__class__.__name__}: "
-                f"Re={self.Re:.0f} вне допустимого диапазона "
-                f"[{Re_min:.0f}; {Re_max:.0f}]"
+                "[Validation error]%s: Re=%.0f вне допустимого диапазона [%.0f; %.0f]",
+                self.__class__.__name__, self.Re, Re_min, Re_max
             )
             return False
         return True
@@ -29,8 +29,8 @@ class WedgeFlowMeter(BaseOrifice):
             0.377 <= beta <= 0.791
         )
         if not cond_geom:
-            logger.error(f"[Validation error] {self.__class__.__name__}: "
-                  f"D={self.D}, h={self.d}, h/D={self.d/self.D}, β={beta}")
+            logger.error("[Validation error] %s: D=%s, h=%s, h/D=%s, β=%s",
+                         self.__class__.__name__, self.D, self.d, self.d / self.D, beta)
             return False
         return True
 
@@ -41,8 +41,7 @@ class WedgeFlowMeter(BaseOrifice):
         """(п.14.2)"""
         Re_min, Re_max = 1e4, 9e6
         if not (Re_min <= self.Re <= Re_max):
-            logger.error(f"[Re check] {self.__class__.__name__}: "
-                  f"Re={self.Re:.0f} вне [{Re_min:.0f}; {Re_max:.0f}]")
+            logger.error("[Re check] %s: Re=%.0f вне [%.0f; %.0f]", self.__class__.__name__, self.Re, Re_min, Re_max)
             return False
         return True
 
@@ -0,0 +1,361 @@
+"""Поэтапный профиль памяти (--memprofile): tracemalloc на границах этапов run_calculation.
+
+Этапы — те же, что размечены для perf.timings. Для каждого этапа: пик выше уровня на входе и
+чистый прирост за этап с разбивкой по строкам исходников. Для запроса целиком — что осталось
+жить после него (после gc.collect) и какой этап это выделил. Каждый процесс (в том числе воркеры)
+дописывает по строке JSON на запрос в outdir/_batch_memprofile/<pid>.jsonl, после батча всё
+сводится в _batch_memprofile.json.
+
+Этап помечается как растущий, если несколько запросов подряд в одном процессе он оставляет память
+живой: так выглядит рост RSS воркера, в отличие от разового прогрева на первом запросе.
+Снимки tracemalloc дорогие (до сотен мс на этап) — режим для диагностики, не для боевых запусков.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from logger_config import get_logger
+from perf import timings
+from perf.timings import StageTimings
+
+log = get_logger("MemProfile")
+
+MEMPROFILE_DIR = "_batch_memprofile"
+MEMPROFILE_NAME = "_batch_memprofile.json"
+NFRAMES = 25  # глубина стека: аллокацию внутри copy.deepcopy/json нужно довести до строки репозитория
+TOP_SITES = 10
+GROWTH_STREAK = 3  # столько запросов подряд этап оставляет память живой
+GROWTH_MIN_BYTES = 4096  # суммарно за серию; меньше — шум аллокатора и интернирования строк
+OTHER = "<вне этапов>"
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# память самих снимков и сборщика этапов: отсекаем по месту аллокации (Snapshot.filter_traces на Python слишком медленный)
+_SELF_FILES = frozenset({tracemalloc.__file__})
+_SELF_SITES = ("perf/memprofile.py:", "perf/timings.py:")
+
+RawFrames = Tuple[Tuple[str, int], ...]  # стек сырого трейса, от самого свежего кадра к старому
+
+_PROFILER: Optional["MemProfiler"] = None
+
+
+@lru_cache(maxsize=None)
+def _repo_path(filename: str) -> Optional[str]:
+    if filename.startswith("<"):  # <frozen importlib._bootstrap>, <string>
+        return None
+    try:
+        return Path(filename).resolve().relative_to(ROOT).as_posix()
+    except (ValueError, OSError):
+        return None
+
+
+@lru_cache(maxsize=65536)
+def _site(frames: RawFrames) -> str:
+    """Самый глубокий кадр из кода репозитория: deepcopy внутри copy.py припишется строке, которая её вызвала."""
+    for filename, lineno in frames:
+        rel = _repo_path(filename)
+        if rel is not None:
+            return f"{rel}:{lineno}"
+    filename, lineno = frames[0]
+    return f"{Path(filename).name}:{lineno}"
+
+
+def _collect_sizes(out: Dict[str, int]) -> None:
+    # по сырым кортежам трейсов: Snapshot.compare_to создаёт объект на каждый трейс — секунды на снимок
+    by_frames: Dict[RawFrames, List[int]] = {}
+    for trace in tracemalloc.take_snapshot().traces._traces:  # (domain, size, frames, ...)
+        sizes = by_frames.get(trace[2])
+        if sizes is None:
+            by_frames[trace[2]] = [trace[1]]
+        else:
+            sizes.append(trace[1])  # без промежуточных сумм: каждая новая int — ещё одна трассируемая аллокация
+    for frames, sizes in by_frames.items():
+        if not frames or frames[0][0] in _SELF_FILES:
+            continue
+        site = _site(frames)
+        if not site.startswith(_SELF_SITES):
+            out[site] = out.get(site, 0) + sum(sizes)
+
+
+def _sizes() -> Dict[str, int]:
+    """
+    Живые аллокации по строкам: место → байты. Считается во вспомогательном потоке: на каждую
+    аллокацию tracemalloc обходит стек текущего потока, и из глубины расчёта тот же проход в разы дороже.
+    """
+    out: Dict[str, int] = {}
+    was_enabled = gc.isenabled()
+    gc.disable()  # иначе сборщик на каждом снимке обходит всё, что держат открытые этапы
+    try:
+        worker = threading.Thread(target=_collect_sizes, args=(out,), name="memprofile-snapshot")
+        worker.start()
+        worker.join()
+    finally:
+        if was_enabled:
+            gc.enable()
+    return out
+
+
+def _diff_sites(new: Dict[str, int], old: Dict[str, int]) -> Dict[str, int]:
+    out = {site: size - old.get(site, 0) for site, size in new.items()}
+    out.update((site, -size) for site, size in old.items() if site not in new)
+    return {site: d for site, d in out.items() if d}
+
+
+def _top(sites: Dict[str, int], n: int) -> List[List[Any]]:
+    return [[s, b] for s, b in sorted(sites.items(), key=lambda kv: kv[1], reverse=True)[:n] if b > 0]
+
+
+class _Frame:
+    __slots__ = ("t0", "sizes", "start", "peak")
+
+    def __init__(self, t0: float, sizes: Dict[str, int], start: int) -> None:
+        self.t0 = t0
+        self.sizes = sizes
+        self.start = start
+        self.peak = start
+
+
+class MemoryStages(StageTimings):
+    """Сборщик этапов для timings.collecting(): кроме времени — пик, прирост и строки-источники памяти."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.frames: List[_Frame] = []
+        self.mem: Dict[str, Dict[str, Any]] = {}
+        self.owner: Dict[str, str] = {}  # строка → этап, который первым её выделил (вложенные закрываются раньше)
+
+    def _raise_peaks(self, peak: int) -> None:
+        for fr in self.frames:
+            fr.peak = max(fr.peak, peak)
+
+    def begin(self) -> float:
+        self._raise_peaks(tracemalloc.get_traced_memory()[1])
+        sizes = _sizes()
+        tracemalloc.reset_peak()  # снимок — не память этапа
+        start = tracemalloc.get_traced_memory()[0]
+        t0 = super().begin()
+        self.frames.append(_Frame(t0, sizes, start))
+        return t0
+
+    def end(self, name: str, t0: float) -> None:
+        super().end(name, t0)
+        cur, peak = tracemalloc.get_traced_memory()
+        idx = next((i for i in range(len(self.frames) - 1, -1, -1) if self.frames[i].t0 == t0), None)
+        if idx is None:
+            return
+        fr = self.frames[idx]
+        del self.frames[idx:]  # выше лежат этапы, упавшие исключением, — их уже не закрыть
+        peak = max(fr.peak, peak)
+        self._raise_peaks(peak)
+        sites = _diff_sites(_sizes(), fr.sizes)
+        tracemalloc.reset_peak()
+
+        acc = self.mem.setdefault(name, {"count": 0, "peak_bytes": 0, "net_bytes": 0, "sites": {}})
+        acc["count"] += 1
+        acc["peak_bytes"] = max(acc["peak_bytes"], peak - fr.start)
+        acc["net_bytes"] += cur - fr.start
+        for site, b in sites.items():
+            if b > 0:
+                acc["sites"][site] = acc["sites"].get(site, 0) + b
+                self.owner.setdefault(site, name)
+
+    def stage_report(self, top: int = TOP_SITES) -> Dict[str, Any]:
+        out = {}
+        for name, acc in self.mem.items():
+            seconds = self.stages.get(name, [0.0])[0]
+            out[name] = {"count": acc["count"], "seconds": seconds, "peak_bytes": acc["peak_bytes"],
+                         "net_bytes": acc["net_bytes"], "top": _top(acc["sites"], top)}
+        return out
+
+
+class MemProfiler:
+    """tracemalloc процесса и границы запросов; записи — в <dump_dir>/<pid>.jsonl."""
+
+    def __init__(self, nframes: int = NFRAMES) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(nframes)
+        self.seq = 0
+
+    @contextmanager
+    def request(self, rel: str, dump_dir: Path) -> Iterator[MemoryStages]:
+        gc.collect()
+        sizes0 = _sizes()
+        stages = MemoryStages()
+        status = "failed"
+        try:
+            with timings.collecting(stages):
+                yield stages
+            status = "ok"
+        finally:
+            gc.collect()
+            retained = _diff_sites(_sizes(), sizes0)
+            by_stage: Dict[str, int] = {}
+            for site, b in retained.items():
+                stage = stages.owner.get(site, OTHER)
+                by_stage[stage] = by_stage.get(stage, 0) + b
+            self.seq += 1
+            self._write(dump_dir, {
+                "pid": os.getpid(), "seq": self.seq, "rel": rel, "status": status,
+                "retained_bytes": sum(retained.values()),
+                "retained_by_stage": by_stage,
+                "retained_top": [[s, b, stages.owner.get(s, OTHER)] for s, b in _top(retained, TOP_SITES)],
+                "stages": stages.stage_report(),
+            })
+
+    @staticmethod
+    def _write(dump_dir: Path, record: Dict[str, Any]) -> None:
+        dump_dir.mkdir(parents=True, exist_ok=True)
+        with (dump_dir / f"{record['pid']}.jsonl").open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def profiler() -> MemProfiler:
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = MemProfiler()
+    return _PROFILER
+
+
+class MemProfiledCall:
+    """process_fn(src, dst) под tracemalloc; пиклится вместе с функцией, как perf.profiling.ProfiledCall."""
+
+    def __init__(self, fn: Callable[[Path, Path], None], dump_dir: Path, out_root: Optional[Path] = None) -> None:
+        self.fn = fn
+        self.dump_dir = Path(dump_dir)
+        self.out_root = out_root
+
+    def __call__(self, src: Path, dst: Path) -> None:
+        try:
+            rel = Path(dst).relative_to(self.out_root).as_posix() if self.out_root else Path(dst).name
+        except ValueError:
+            rel = Path(dst).name
+        with profiler().request(rel, self.dump_dir):
+            self.fn(src, dst)
+
+
+# -------------------- сводка --------------------
+
+def load_records(dump_dir: Path) -> List[Dict[str, Any]]:
+    records = []
+    for path in sorted(Path(dump_dir).glob("*.jsonl")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # недописанная строка убитого воркера
+    return records
+
+
+def growing_stages(records: List[Dict[str, Any]], *, streak: int = GROWTH_STREAK,
+                   min_bytes: int = GROWTH_MIN_BYTES) -> List[Dict[str, Any]]:
+    """
+    Этапы, которые streak и более запросов подряд в одном процессе оставляли память живой.
+    Первый запрос процесса не учитывается: ленивые импорты и прогрев кэшей — не рост.
+    """
+    by_pid: Dict[int, List[Dict[str, Any]]] = {}
+    for r in records:
+        by_pid.setdefault(r["pid"], []).append(r)
+    out = []
+    for pid, recs in sorted(by_pid.items()):
+        recs = sorted(recs, key=lambda r: r["seq"])[1:]
+        names = sorted({s for r in recs for s in r["retained_by_stage"]})
+        for stage in names:
+            best: Optional[Dict[str, Any]] = None
+            run: List[Dict[str, Any]] = []
+            total = 0
+            for r in recs:
+                b = r["retained_by_stage"].get(stage, 0)
+                if b <= 0:
+                    run, total = [], 0
+                    continue
+                run.append(r)
+                total += b
+                if len(run) >= streak and total >= min_bytes and (best is None or total > best["bytes"]):
+                    best = {"stage": stage, "pid": pid, "requests": len(run), "bytes": total,
+                            "first": run[0]["rel"], "last": run[-1]["rel"]}
+            if best:
+                out.append(best)
+    out.sort(key=lambda g: g["bytes"], reverse=True)
+    return out
+
+
+def summarize(records: List[Dict[str, Any]], top: int = TOP_SITES) -> Dict[str, Any]:
+    stages: Dict[str, Dict[str, Any]] = {}
+    retained_sites: Dict[str, List[Any]] = {}
+    for r in records:
+        for name, st in r["stages"].items():
+            acc = stages.setdefault(name, {"requests": 0, "calls": 0, "peak_max_bytes": 0, "peak_sum": 0,
+                                           "net_sum": 0, "retained_bytes": 0, "sites": {}})
+            acc["requests"] += 1
+            acc["calls"] += st["count"]
+            acc["peak_max_bytes"] = max(acc["peak_max_bytes"], st["peak_bytes"])
+            acc["peak_sum"] += st["peak_bytes"]
+            acc["net_sum"] += st["net_bytes"]
+            for site, b in st["top"]:
+                acc["sites"][site] = acc["sites"].get(site, 0) + b
+        for name, b in r["retained_by_stage"].items():
+            stages.setdefault(name, {"requests": 0, "calls": 0, "peak_max_bytes": 0, "peak_sum": 0,
+                                     "net_sum": 0, "retained_bytes": 0, "sites": {}})["retained_bytes"] += b
+        for site, b, stage in r["retained_top"]:
+            acc = retained_sites.setdefault(site, [0, stage])
+            acc[0] += b
+
+    out_stages = {}
+    for name, acc in stages.items():
+        n = max(acc["requests"], 1)
+        out_stages[name] = {
+            "requests": acc["requests"], "calls": acc["calls"],
+            "peak_max_bytes": acc["peak_max_bytes"], "peak_mean_bytes": acc["peak_sum"] / n,
+            "net_mean_bytes": acc["net_sum"] / n, "retained_bytes": acc["retained_bytes"],
+            "top": _top(acc["sites"], top),
+        }
+    return {
+        "requests": len(records),
+        "failed": sum(1 for r in records if r["status"] != "ok"),
+        "retained_bytes": sum(r["retained_bytes"] for r in records),
+        "stages": out_stages,
+        "retained_top": [[s, b, stage] for s, (b, stage) in
+                         sorted(retained_sites.items(), key=lambda kv: kv[1][0], reverse=True)[:top] if b > 0],
+        "growing": growing_stages(records),
+    }
+
+
+def _kib(b: float) -> str:
+    return f"{b / 1024:.1f}"
+
+
+def write_memprofile(dump_dir: Path, outdir: Path, *, top: int = TOP_SITES) -> Optional[Dict[str, Any]]:
+    """Сводит записи из dump_dir в outdir/_batch_memprofile.json и логирует таблицу по этапам."""
+    records = load_records(dump_dir)
+    if not records:
+        log.warning("Записи профиля памяти в %s не найдены — сводка не построена", dump_dir)
+        return None
+    report = summarize(records, top)
+    outdir.mkdir(parents=True, exist_ok=True)
+    (outdir / MEMPROFILE_NAME).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    rows = sorted(report["stages"].items(), key=lambda kv: kv[1]["peak_max_bytes"], reverse=True)
+    lines = [f"{'пик max, КиБ':>13} {'пик ср., КиБ':>13} {'прирост ср., КиБ':>17} {'осталось, КиБ':>14}  этап"]
+    for name, st in rows:
+        lines.append(f"{_kib(st['peak_max_bytes']):>13} {_kib(st['peak_mean_bytes']):>13} "
+                     f"{_kib(st['net_mean_bytes']):>17} {_kib(st['retained_bytes']):>14}  {name}")
+    log.info("Профиль памяти: %s (запросов %d, осталось живым после запросов %s КиБ):\n%s",
+             outdir / MEMPROFILE_NAME, report["requests"], _kib(report["retained_bytes"]), "\n".join(lines))
+    for g in report["growing"]:
+        log.warning("Рост памяти: этап %s в процессе %d оставлял память %d запросов подряд (%s КиБ, %s … %s)",
+                    g["stage"], g["pid"], g["requests"], _kib(g["bytes"]), g["first"], g["last"])
+    return report
+
+
+__all__ = [
+    "MEMPROFILE_DIR", "MEMPROFILE_NAME", "MemoryStages", "MemProfiler", "MemProfiledCall", "profiler",
+    "load_records", "growing_stages", "summarize", "write_memprofile",
+]
@@ -0,0 +1,330 @@
+"""Лёгкий реестр метрик процесса: счётчики, gauge и гистограммы с фиксированными корзинами.
+
+Выгрузка — в файл (Prometheus text format для textfile-коллектора node_exporter или JSON),
+при выходе и с интервалом; сетевого эндпоинта в калькуляторе нет.
+
+Процессы-воркеры копят метрики в своих реестрах; batch-слой забирает их приращение после
+каждой задачи (worker_delta) и сливает в реестр родителя (merge), поэтому файл пишет только
+главный процесс. Gauge не сливаются: они описывают процесс, который их выставил.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from logger_config import get_logger
+
+log = get_logger("Metrics")
+
+# секунды: от долей миллисекунды (вызов физики) до десятков секунд (тяжёлый файл)
+LATENCY_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, lock: threading.Lock) -> None:
+        self.name = name
+        self.help = help
+        self._lock = lock
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, lock: threading.Lock) -> None:
+        super().__init__(name, help, lock)
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self.values.get(_key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, lock: threading.Lock) -> None:
+        super().__init__(name, help, lock)
+        self.values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self.values[_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self.values.get(_key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, lock: threading.Lock, buckets: Sequence[float]) -> None:
+        super().__init__(name, help, lock)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # по меткам: [счётчики корзин (не накопленные, последняя — +Inf), сумма, количество]
+        self.values: Dict[LabelKey, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _key(labels)
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            acc = self.values.get(key)
+            if acc is None:
+                acc = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            acc[0][idx] += 1
+            acc[1] += value
+            acc[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        acc = self.values.get(_key(labels))
+        return acc[2] if acc else 0
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get(self, cls, name: str, help: str, *args: Any) -> Any:
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, self._lock, *args)
+            elif not isinstance(m, cls):
+                raise ValueError(f"Метрика {name} уже зарегистрирована как {m.kind}")
+            return m
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets)
+
+    # -------------------- межпроцессное слияние --------------------
+
+    def reset(self) -> None:
+        with self._lock:
+            for m in self._metrics.values():
+                m.values = {}
+
+    def _after_fork_in_child(self) -> None:
+        # замок мог быть захвачен потоком экспорта родителя в момент fork — в ребёнке берём новый
+        self._lock = threading.Lock()
+        for m in self._metrics.values():
+            m._lock = self._lock
+            m.values = {}
+
+    def drain(self) -> Dict[str, Any]:
+        """Приращение счётчиков и гистограмм с прошлого drain (и обнуление). Gauge не входят."""
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for m in self._metrics.values():
+                if isinstance(m, Gauge) or not m.values:
+                    continue
+                out[m.name] = {
+                    "kind": m.kind, "help": m.help,
+                    "buckets": list(m.buckets) if isinstance(m, Histogram) else None,
+                    "values": [[list(map(list, k)), v] for k, v in m.values.items()],
+                }
+                m.values = {}
+        return out
+
+    def merge(self, delta: Optional[Dict[str, Any]]) -> None:
+        for name, d in (delta or {}).items():
+            if d["kind"] == "counter":
+                m = self.counter(name, d["help"])
+                with self._lock:
+                    for k, v in d["values"]:
+                        key = tuple(map(tuple, k))
+                        m.values[key] = m.values.get(key, 0.0) + v
+            elif d["kind"] == "histogram":
+                m = self.histogram(name, d["help"], d["buckets"])
+                with self._lock:
+                    for k, (counts, total, n) in d["values"]:
+                        key = tuple(map(tuple, k))
+                        acc = m.values.get(key)
+                        if acc is None:
+                            acc = m.values[key] = [[0] * len(counts), 0.0, 0]
+                        acc[0] = [a + b for a, b in zip(acc[0], counts)]
+                        acc[1] += total
+                        acc[2] += n
+
+    # -------------------- выгрузка --------------------
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                m = self._metrics[name]
+                if not m.values:
+                    continue
+                if m.help:
+                    lines.append(f"# HELP {name} {_escape_help(m.help)}")
+                lines.append(f"# TYPE {name} {m.kind}")
+                for key in sorted(m.values):
+                    if isinstance(m, Histogram):
+                        counts, total, n = m.values[key]
+                        cum = 0
+                        for bound, c in zip(list(m.buckets) + [math.inf], counts):
+                            cum += c
+                            le = "+Inf" if math.isinf(bound) else _fmt(bound)
+                            lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {cum}")
+                        lines.append(f"{name}_sum{_labels(key)} {_fmt(total)}")
+                        lines.append(f"{name}_count{_labels(key)} {n}")
+                    else:
+                        lines.append(f"{name}{_labels(key)} {_fmt(m.values[key])}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for name in sorted(self._metrics):
+                m = self._metrics[name]
+                series = []
+                for key in sorted(m.values):
+                    entry: Dict[str, Any] = {"labels": dict(key)}
+                    if isinstance(m, Histogram):
+                        counts, total, n = m.values[key]
+                        entry.update(buckets=dict(zip([_fmt(b) for b in m.buckets] + ["+Inf"], counts)),
+                                     sum=total, count=n)
+                    else:
+                        entry["value"] = m.values[key]
+                    series.append(entry)
+                out[name] = {"type": m.kind, "help": m.help, "series": series}
+        return out
+
+    def dump(self, path: Path, fmt: Optional[str] = None) -> None:
+        """Атомарная запись (tmp + rename): коллектор не увидит недописанный файл."""
+        path = Path(path)
+        fmt = fmt or ("json" if path.suffix.lower() == ".json" else "prometheus")
+        body = json.dumps(self.to_dict(), ensure_ascii=False, indent=2) if fmt == "json" else self.to_prometheus()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def _fmt(x: float) -> str:
+    if isinstance(x, float) and x.is_integer() and abs(x) < 1e15:
+        return str(int(x))
+    return repr(float(x))
+
+
+def _escape_help(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: Iterable[Tuple[str, str]]) -> str:
+    parts = [f'{k}="{_escape_label(v)}"' for k, v in key]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+# -------------------- реестр процесса --------------------
+
+REGISTRY = Registry()
+# fork копирует накопленное родителем — в воркере начинаем с нуля, иначе merge посчитает это дважды
+os.register_at_fork(after_in_child=REGISTRY._after_fork_in_child)
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return REGISTRY.counter(name, help)
+
+
+def gauge(name: str, help: str = "") -> Gauge:
+    return REGISTRY.gauge(name, help)
+
+
+def histogram(name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help, buckets)
+
+
+def worker_delta() -> Optional[Dict[str, Any]]:
+    """В процессе-воркере — накопленное приращение (для слияния в родителе); в главном — None."""
+    if multiprocessing.parent_process() is None:
+        return None
+    return REGISTRY.drain() or None
+
+
+def with_worker_delta(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """Для пулов: (fn(*args), приращение метрик воркера). Функция уровня модуля — пиклится."""
+    result = fn(*args)
+    return result, worker_delta()
+
+
+class MetricsExporter:
+    """Пишет REGISTRY в файл каждые interval_s секунд (фоновый поток) и при close()/выходе процесса."""
+
+    def __init__(self, path: Path, *, interval_s: float = 15.0, fmt: Optional[str] = None) -> None:
+        self.path = Path(path)
+        self.interval_s = float(interval_s)
+        self.fmt = fmt
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def dump(self) -> None:
+        try:
+            REGISTRY.dump(self.path, self.fmt)
+        except OSError as e:
+            log.warning("Метрики не записаны в %s: %s", self.path, e)
+
+    def start(self) -> "MetricsExporter":
+        if self.interval_s > 0:
+            self._thread = threading.Thread(target=self._loop, name="metrics-exporter", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.dump()
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.dump()
+        atexit.unregister(self.close)
+
+
+__all__ = [
+    "LATENCY_BUCKETS", "Counter", "Gauge", "Histogram", "Registry", "REGISTRY",
+    "counter", "gauge", "histogram", "worker_delta", "with_worker_delta", "MetricsExporter",
+]
@@ -0,0 +1,165 @@
+"""Профилирование пакетного запуска (--profile): cProfile на каждый _process_one, сведение по всему батчу.
+
+Каждый вызов пишет свой .prof в outdir/_batch_profile/ (в том числе из процессов-воркеров —
+обёртка пиклится вместе с функцией), после батча они сливаются в один pstats и в collapsed-stack
+текст для flamegraph.pl / speedscope / inferno.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from logger_config import get_logger
+
+log = get_logger("Profiling")
+
+PROFILE_DIR = "_batch_profile"
+PSTATS_NAME = "_batch_profile.pstats"
+COLLAPSED_NAME = "_batch_profile.collapsed.txt"
+MAX_DEPTH = 128
+MIN_SUBTREE_US = 10  # поддеревья уже 10 мкс не раскрываем: на flame graph их не видно, а число путей растёт экспоненциально
+
+ROOT = Path(__file__).resolve().parent.parent
+
+Func = Tuple[str, int, str]  # ключ pstats: (filename, lineno, funcname)
+
+
+class ProfiledCall:
+    """process_fn(src, dst) под cProfile; профиль сохраняется даже если расчёт упал."""
+
+    def __init__(self, fn: Callable[[Path, Path], None], dump_dir: Path, out_root: Optional[Path] = None) -> None:
+        self.fn = fn
+        self.dump_dir = Path(dump_dir)
+        self.out_root = out_root
+
+    def _dump_path(self, dst: Path) -> Path:
+        try:
+            rel = Path(dst).relative_to(self.out_root).as_posix() if self.out_root else Path(dst).name
+        except ValueError:
+            rel = Path(dst).name
+        return self.dump_dir / (rel.replace("/", "__") + f".{os.getpid()}.prof")
+
+    def __call__(self, src: Path, dst: Path) -> None:
+        prof = cProfile.Profile()
+        try:
+            prof.runcall(self.fn, src, dst)
+        finally:
+            self.dump_dir.mkdir(parents=True, exist_ok=True)
+            prof.dump_stats(str(self._dump_path(dst)))
+
+
+def reset_dump_dir(dump_dir: Path) -> None:
+    """Старые .prof от прошлых запусков не должны попасть в сводку."""
+    shutil.rmtree(dump_dir, ignore_errors=True)
+    dump_dir.mkdir(parents=True, exist_ok=True)
+
+
+def load_stats(dump_dir: Path) -> Optional[pstats.Stats]:
+    files = sorted(str(p) for p in Path(dump_dir).glob("*.prof"))
+    if not files:
+        return None
+    stats = pstats.Stats(files[0], stream=io.StringIO())
+    for f in files[1:]:
+        stats.add(f)
+    return stats
+
+
+# -------------------- вывод --------------------
+
+def func_label(func: Func) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # встроенные: ('~', 0, "<built-in method time.sleep>")
+        label = name
+    else:
+        try:
+            path = Path(filename).resolve().relative_to(ROOT).as_posix()
+        except ValueError:
+            path = Path(filename).name
+        label = f"{path}:{lineno}({name})"
+    return label.replace(";", ":")
+
+
+def collapsed_stacks(stats: pstats.Stats, min_us: float = MIN_SUBTREE_US) -> Dict[str, int]:
+    """
+    cProfile хранит только рёбра caller→callee, а не полные стеки. Стек восстанавливаем обходом
+    от корней, деля время функции между путями пропорционально cumtime ребра (тот же приём, что
+    у flameprof). Суммарная доля функции по всем путям ограничена единицей — иначе рекурсия
+    (импорт модулей и т.п.) раздувает ширину. Значения — микросекунды; поддеревья короче min_us
+    не раскрываются, их время остаётся в кадре родителя.
+    """
+    raw = stats.stats  # func → (cc, nc, tt, ct, callers{caller: (cc, nc, tt, ct)})
+    callees: Dict[Func, List[Tuple[Func, float]]] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [f for f, v in raw.items() if not v[4]]
+    used: Dict[Func, float] = {}
+    out: Dict[str, int] = {}
+
+    def _walk(func: Func, share: float, path: List[str], on_path: set) -> None:
+        path.append(func_label(func))
+        on_path.add(func)
+        self_s = raw[func][2] * share
+        for callee, edge_ct in callees.get(func, ()):
+            callee_ct = raw[callee][3]
+            if callee in on_path or callee_ct <= 0.0:
+                continue  # рекурсия: время уже внутри cumtime предка
+            sub = min(share * min(1.0, edge_ct / callee_ct), max(0.0, 1.0 - used.get(callee, 0.0)))
+            if sub <= 0.0:
+                continue
+            used[callee] = used.get(callee, 0.0) + sub
+            if len(path) >= MAX_DEPTH or callee_ct * sub * 1e6 < min_us:
+                self_s += callee_ct * sub
+            else:
+                _walk(callee, sub, path, on_path)
+        self_us = int(round(self_s * 1e6))
+        if self_us > 0:
+            key = ";".join(path)
+            out[key] = out.get(key, 0) + self_us
+        path.pop()
+        on_path.discard(func)
+
+    for root in roots:
+        _walk(root, 1.0, [], set())
+    return out
+
+
+def top_functions(stats: pstats.Stats, n: int = 25) -> List[Dict[str, object]]:
+    rows = []
+    for func, (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append({"func": func_label(func), "ncalls": nc, "tottime_s": tt, "cumtime_s": ct})
+    rows.sort(key=lambda r: r["tottime_s"], reverse=True)
+    return rows[:n]
+
+
+def write_profile(dump_dir: Path, outdir: Path, *, top: int = 25) -> Optional[List[Dict[str, object]]]:
+    """Сводит профили из dump_dir, пишет pstats и collapsed-stack в outdir, логирует top-N по tottime."""
+    stats = load_stats(dump_dir)
+    if stats is None:
+        log.warning("Профили в %s не найдены — сводка не построена", dump_dir)
+        return None
+    outdir.mkdir(parents=True, exist_ok=True)
+    stats.dump_stats(str(outdir / PSTATS_NAME))
+    stacks = collapsed_stacks(stats)
+    with (outdir / COLLAPSED_NAME).open("w", encoding="utf-8") as f:
+        for key in sorted(stacks):
+            f.write(f"{key} {stacks[key]}\n")
+
+    rows = top_functions(stats, top)
+    lines = [f"{'tottime, с':>11} {'cumtime, с':>11} {'ncalls':>9}  функция"]
+    lines += [f"{r['tottime_s']:>11.4f} {r['cumtime_s']:>11.4f} {r['ncalls']:>9}  {r['func']}" for r in rows]
+    log.info("Профиль: %s, %s (вызовов %d, время %.3f с). Топ-%d по собственному времени:\n%s",
+             outdir / PSTATS_NAME, outdir / COLLAPSED_NAME, stats.total_calls, stats.total_tt, len(rows),
+             "\n".join(lines))
+    return rows
+
+
+__all__ = [
+    "PROFILE_DIR", "PSTATS_NAME", "COLLAPSED_NAME",
+    "ProfiledCall", "reset_dump_dir", "load_stats", "collapsed_stacks", "top_functions", "write_profile",
+]
@@ -0,0 +1,62 @@
+import json
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from perf import memprofile, timings
+from perf.memprofile import MEMPROFILE_NAME, MemProfiledCall, growing_stages, write_memprofile
+
+_LEAK = []
+
+
+@pytest.fixture
+def traced(monkeypatch):
+    monkeypatch.setattr(memprofile, "_PROFILER", None)
+    _LEAK.clear()
+    yield
+    _LEAK.clear()
+    tracemalloc.stop()  # трассировка замедляет всё остальное в процессе pytest
+
+
+def _work(src: Path, dst: Path) -> None:
+    t = timings.start()
+    tmp = [bytearray(1024) for _ in range(200)]  # временный пик, к концу этапа освобождается
+    del tmp
+    timings.stop("temporary", t)
+    t = timings.start()
+    _LEAK.append(bytearray(64 * 1024))  # остаётся жить между запросами
+    timings.stop("leak", t)
+    dst.write_text(src.read_text())
+
+
+def test_stages_report_peak_and_retained_growth(tmp_path, traced):
+    src = tmp_path / "in.json"
+    src.write_text("{}")
+    dump_dir = tmp_path / "mem"
+    call = MemProfiledCall(_work, dump_dir, tmp_path)
+    for _ in range(4):
+        call(src, tmp_path / "out.json")
+
+    report = write_memprofile(dump_dir, tmp_path)
+    assert report == json.loads((tmp_path / MEMPROFILE_NAME).read_text(encoding="utf-8"))
+    assert report["requests"] == 4 and report["failed"] == 0
+    temporary, leak = report["stages"]["temporary"], report["stages"]["leak"]
+    assert temporary["peak_max_bytes"] >= 200 * 1024
+    assert abs(temporary["net_mean_bytes"]) < 16 * 1024
+    assert leak["retained_bytes"] >= 4 * 64 * 1024
+    assert leak["top"][0][0].startswith("perf/test_memprofile.py:")
+    assert [(g["stage"], g["requests"]) for g in report["growing"]] == [("leak", 3)]
+
+
+def _rec(seq, retained, pid=1):
+    return {"pid": pid, "seq": seq, "rel": f"{seq}.json", "retained_by_stage": {"phys": retained}}
+
+
+def test_growing_stages_skip_warmup_and_need_a_streak():
+    warmup_only = [_rec(1, 10 ** 6)] + [_rec(i, 0) for i in range(2, 6)]
+    assert growing_stages(warmup_only) == []
+    broken = [_rec(1, 0), _rec(2, 5000), _rec(3, 0), _rec(4, 5000), _rec(5, 5000)]
+    assert growing_stages(broken) == []
+    grown = growing_stages([_rec(1, 0)] + [_rec(i, 2000) for i in range(2, 6)])
+    assert grown == [{"stage": "phys", "pid": 1, "requests": 4, "bytes": 8000, "first": "2.json", "last": "5.json"}]
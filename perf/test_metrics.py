@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+from batch.pool import BatchTask, run_batch
+from perf import metrics
+from perf.metrics import Registry
+
+
+def test_prometheus_text_format():
+    reg = Registry()
+    reg.counter("jobs_total", "Задачи").inc(2, status="ok")
+    reg.counter("jobs_total").inc(status='fa"il')
+    h = reg.histogram("latency_seconds", "Время", buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 3.0):
+        h.observe(v, type="cone")
+    reg.gauge("queue_depth").set(0)  # серия с нулём всё равно выводится
+
+    text = reg.to_prometheus()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{status="ok"} 2' in text
+    assert 'jobs_total{status="fa\\"il"} 1' in text
+    assert 'latency_seconds_bucket{type="cone",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{type="cone",le="1"} 2' in text
+    assert 'latency_seconds_bucket{type="cone",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{type="cone"} 3' in text
+    assert "queue_depth 0" in text
+
+
+def test_dump_picks_format_by_suffix(tmp_path):
+    reg = Registry()
+    reg.counter("x_total", "X").inc(cache="rho", result="hit")
+    reg.dump(tmp_path / "m.json")
+    reg.dump(tmp_path / "m.prom")
+    data = json.loads((tmp_path / "m.json").read_text(encoding="utf-8"))
+    assert data["x_total"]["series"] == [{"labels": {"cache": "rho", "result": "hit"}, "value": 1.0}]
+    assert (tmp_path / "m.prom").read_text(encoding="utf-8").startswith("# HELP x_total X")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["m.json", "m.prom"]
+
+
+def test_drain_and_merge():
+    worker, parent = Registry(), Registry()
+    worker.counter("c_total").inc(3, k="a")
+    worker.histogram("h_seconds", buckets=(1.0,)).observe(0.5)
+    worker.gauge("g").set(7)
+    delta = json.loads(json.dumps(worker.drain()))  # переживает пиклинг/JSON
+    assert "g" not in delta
+    assert worker.counter("c_total").value(k="a") == 0.0
+
+    parent.merge(delta)
+    parent.merge(delta)
+    assert parent.counter("c_total").value(k="a") == 6
+    assert parent.histogram("h_seconds").count() == 2
+
+
+def _work(src: Path, dst: Path) -> None:
+    metrics.counter("test_worker_files_total").inc(src=src.name)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(src.read_text())
+
+
+def test_worker_metrics_reach_parent(tmp_path):
+    tasks = []
+    for i in range(4):
+        src = tmp_path / f"{i}.json"
+        src.write_text("{}")
+        tasks.append(BatchTask(src=src, dst=tmp_path / "out" / src.name, rel=src.name))
+    items = metrics.counter("new_ssu_batch_items_total")
+    before = items.value(status="ok")
+
+    report = run_batch(tasks, _work, workers=2, preload=())
+    assert report.ok_count == 4
+    assert all(it.metrics is None for it in report.items)
+    files = metrics.counter("test_worker_files_total")
+    assert [files.value(src=f"{i}.json") for i in range(4)] == [1.0] * 4
+    assert items.value(status="ok") - before == 4
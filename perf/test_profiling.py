@@ -0,0 +1,61 @@
+import pstats
+from pathlib import Path
+
+from batch.pool import BatchTask, run_batch
+from perf.profiling import (
+    COLLAPSED_NAME, PROFILE_DIR, PSTATS_NAME, ProfiledCall, collapsed_stacks, load_stats, reset_dump_dir,
+    write_profile,
+)
+
+
+def _fib(n):
+    return n if n < 2 else _fib(n - 1) + _fib(n - 2)
+
+
+def _leaf():
+    return sum(i * i for i in range(20000))
+
+
+def _work(src: Path, dst: Path) -> None:
+    _fib(14)
+    _leaf()
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(src.read_text())
+
+
+def _tasks(tmp_path, n):
+    src_dir, out = tmp_path / "in", tmp_path / "out"
+    src_dir.mkdir()
+    tasks = []
+    for i in range(n):
+        src = src_dir / f"{i}.json"
+        src.write_text("{}")
+        tasks.append(BatchTask(src=src, dst=out / src.name, rel=src.name))
+    return out, tasks
+
+
+def test_profiles_from_workers_are_merged(tmp_path):
+    out, tasks = _tasks(tmp_path, 4)
+    dump_dir = out / PROFILE_DIR
+    reset_dump_dir(dump_dir)
+    report = run_batch(tasks, ProfiledCall(_work, dump_dir, out), workers=2, preload=())
+    assert report.ok_count == 4
+    assert len(list(dump_dir.glob("*.prof"))) == 4
+
+    rows = write_profile(dump_dir, out, top=5)
+    assert rows and len(rows) <= 5
+    stats = pstats.Stats(str(out / PSTATS_NAME))
+    work = [f for f in stats.stats if f[2] == "_work"]
+    assert work and stats.stats[work[0]][1] == 4  # ncalls по всем воркерам
+
+    lines = (out / COLLAPSED_NAME).read_text(encoding="utf-8").splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("(_work);" in line and "(_leaf)" in line for line in lines)
+
+
+def test_collapsed_stacks_preserve_total_time(tmp_path):
+    out, tasks = _tasks(tmp_path, 1)
+    ProfiledCall(_work, tmp_path / "prof")(tasks[0].src, tasks[0].dst)
+    stats = load_stats(tmp_path / "prof")
+    total_us = sum(collapsed_stacks(stats, min_us=0).values())
+    assert abs(total_us / 1e6 - stats.total_tt) <= 0.05 * stats.total_tt + 1e-4
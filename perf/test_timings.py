@@ -0,0 +1,62 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from perf import timings
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_disabled_is_noop():
+    assert timings.active() is None
+    t0 = timings.start()
+    assert t0 == 0.0
+    timings.stop("stage", t0)
+    timings.stop_call("backend", t0)
+    assert timings.active() is None
+
+
+def test_collecting_accumulates_stages_and_calls():
+    with timings.collecting() as tm:
+        for _ in range(3):
+            timings.stop("phys", timings.start())
+        timings.stop_call("pyfizika", timings.start())
+        with timings.collecting() as inner:
+            assert inner is tm
+    assert timings.active() is None
+    out = tm.to_dict()
+    assert out["stages"]["phys"]["count"] == 3
+    assert out["stages"]["phys"]["seconds"] >= 0.0
+    assert out["calls"] == {"pyfizika": {"seconds": out["calls"]["pyfizika"]["seconds"], "count": 1}}
+
+
+@pytest.fixture
+def virial_physics(monkeypatch):
+    from phys_prop.backends import ENV_BACKEND
+
+    monkeypatch.setenv(ENV_BACKEND, "virial")
+
+
+def test_run_calculation_reports_timings_only_when_enabled(virial_physics, monkeypatch):
+    from controllers.input_controller import InputController
+    from controllers.calculation_adapter import run_calculation
+    from phys_prop import cache as phys_cache
+
+    data = json.loads((ROOT / "inputdata" / "sharp_01.json").read_text(encoding="utf-8"))
+    ic = InputController()
+    values = ic.parse(data).values_si
+
+    monkeypatch.delenv(timings.ENV_FLAG, raising=False)
+    assert "_timings" not in run_calculation(ic.prepare_params(data), values, copy.deepcopy(data))
+
+    phys_cache.clear()  # иначе повторная точка не дойдёт до бэкенда
+    res = run_calculation(ic.prepare_params(data), values, copy.deepcopy(data), timings=True)
+    stages = res["_timings"]["stages"]
+    for name in ("thermal_correction", "phys", "create_orifice", "calc_flow_run", "straightness", "errors_flow"):
+        assert stages[name]["count"] == 1
+    assert res["_timings"]["calls"]["virial"]["count"] >= 1
+
+    monkeypatch.setenv(timings.ENV_FLAG, "1")
+    assert "_timings" in run_calculation(ic.prepare_params(data), values, copy.deepcopy(data))
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from batch.pool import BatchTask, run_batch
+from perf import timings, tracing
+from perf.tracing import TRACE_NAME, TracedCall, write_trace
+
+
+@pytest.fixture
+def driver(monkeypatch):
+    monkeypatch.setattr(tracing, "_TRACER", None)
+    monkeypatch.setattr(tracing, "_DRIVER_DIR", None)
+
+
+def _work(src: Path, dst: Path) -> None:
+    t = timings.start()
+    timings.stop_call("PyFizika.Calculate", timings.start())
+    timings.stop("phys", t)
+    t = timings.start()
+    if src.read_text() == "bad":
+        raise ValueError("bad input")
+    dst.write_text(src.read_text())
+    timings.stop("flow", t)
+
+
+def test_batch_trace_has_lanes_and_nested_spans(tmp_path, driver):
+    inp, out = tmp_path / "in", tmp_path / "out"
+    inp.mkdir()
+    out.mkdir()
+    tasks = []
+    for i in range(4):
+        (inp / f"{i}.json").write_text("bad" if i == 3 else "{}")
+        tasks.append(BatchTask(inp / f"{i}.json", out / f"{i}.json", f"{i}.json"))
+    dump_dir = out / tracing.TRACE_DIR
+    tracing.enable(dump_dir)
+    with tracing.span("run_batch", workers=2):
+        report = run_batch(tasks, TracedCall(_work, dump_dir, out), workers=2, preload=())
+    assert len(report.failed) == 1
+
+    trace = write_trace(dump_dir, out)
+    assert trace == json.loads((out / TRACE_NAME).read_text(encoding="utf-8"))
+    events = [ev for ev in trace["traceEvents"] if ev["ph"] == "X"]
+    names = {ev["pid"]: ev["args"]["name"] for ev in trace["traceEvents"] if ev["name"] == "process_name"}
+    assert trace["otherData"]["processes"] == len(names) >= 2
+    assert sum(name.startswith("main") for name in names.values()) == 1
+
+    requests = [ev for ev in events if ev["cat"] == "request"]
+    assert sorted((ev["name"], ev["args"]["status"]) for ev in requests) == [
+        ("0.json", "ok"), ("1.json", "ok"), ("2.json", "ok"), ("3.json", "failed")]
+    assert all(names[ev["pid"]].startswith("worker") for ev in requests)
+    batch = next(ev for ev in events if ev["cat"] == "batch")
+    assert names[batch["pid"]].startswith("main")
+
+    def inside(inner, outer):
+        return outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1e-3
+
+    for req in requests:
+        stages = [ev for ev in events if ev["cat"] == "stage" and ev["pid"] == req["pid"] and inside(ev, req)]
+        assert {ev["name"] for ev in stages} == ({"phys"} if req["args"]["status"] == "failed" else {"phys", "flow"})
+        phys = next(ev for ev in stages if ev["name"] == "phys")
+        assert any(ev["cat"] == "call" and inside(ev, phys) for ev in events)
+        assert inside(req, batch)
+
+
+def test_span_is_noop_until_enabled(tmp_path, driver):
+    with tracing.span("collect_tasks"):
+        pass
+    assert tracing.tracer().events == []
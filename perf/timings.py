@@ -0,0 +1,103 @@
+"""Поэтапные тайминги run_calculation (opt-in).
+
+Этапы размечаются парой start()/stop(name, t0) без отступов вокруг больших блоков. Пока сбор
+не включён, start() возвращает 0.0, а stop() — пустой вызов: цена разметки — глобальный lookup
+и сравнение с None. Включается через collecting() (run_calculation(..., timings=True),
+переменная окружения NEW_SSU_TIMINGS=1 или main.py --timings).
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+ENV_FLAG = "NEW_SSU_TIMINGS"
+
+# Активный сборщик процесса. run_calculation и так не потокобезопасен (for_package.RHO_FN_OVERRIDE),
+# поэтому глобальная переменная, а не contextvar.
+_ACTIVE: Optional["StageTimings"] = None
+
+
+class StageTimings:
+    """Сумма времени (perf_counter — монотонные часы) и число входов по этапам и по вызовам бэкендов."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}  # name → [seconds, count]
+        self.calls: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def _add(bucket: Dict[str, List[float]], name: str, seconds: float) -> None:
+        acc = bucket.get(name)
+        if acc is None:
+            bucket[name] = [seconds, 1]
+        else:
+            acc[0] += seconds
+            acc[1] += 1
+
+    def begin(self) -> float:
+        return time.perf_counter()
+
+    def end(self, name: str, t0: float) -> None:
+        self.add_stage(name, time.perf_counter() - t0)
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self._add(self.stages, name, seconds)
+
+    def add_call(self, name: str, seconds: float) -> None:
+        self._add(self.calls, name, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def _dump(bucket: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+            return {k: {"seconds": s, "count": int(n)} for k, (s, n) in bucket.items()}
+
+        return {
+            "total_s": time.perf_counter() - self.started,
+            "stages": _dump(self.stages),
+            "calls": _dump(self.calls),
+        }
+
+
+def env_enabled() -> bool:
+    return os.environ.get(ENV_FLAG, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def active() -> Optional[StageTimings]:
+    return _ACTIVE
+
+
+@contextmanager
+def collecting(collector: Optional[StageTimings] = None) -> Iterator[StageTimings]:
+    """
+    Включает сбор на время блока; вложенный collecting() отдаёт уже активный сборщик.
+    collector — свой наследник StageTimings (например, perf.memprofile снимает память на границах этапов).
+    """
+    global _ACTIVE
+    if _ACTIVE is not None:
+        yield _ACTIVE
+        return
+    _ACTIVE = tm = collector if collector is not None else StageTimings()
+    try:
+        yield tm
+    finally:
+        _ACTIVE = None
+
+
+def start() -> float:
+    return _ACTIVE.begin() if _ACTIVE is not None else 0.0
+
+
+def stop(name: str, t0: float) -> None:
+    """Закрывает этап, открытый start(). Если этап упал исключением — он просто не попадёт в отчёт."""
+    if _ACTIVE is not None:
+        _ACTIVE.end(name, t0)
+
+
+def stop_call(name: str, t0: float) -> None:
+    """То же для вызовов внешних бэкендов (PyFizika и т.п.) — отдельный счётчик от этапов."""
+    if _ACTIVE is not None:
+        _ACTIVE.add_call(name, time.perf_counter() - t0)
+
+
+__all__ = ["ENV_FLAG", "StageTimings", "env_enabled", "active", "collecting", "start", "stop", "stop_call"]
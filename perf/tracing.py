@@ -0,0 +1,175 @@
+"""Трассировка пакетного запуска (--trace): спаны запросов, этапов run_calculation и драйвера батча.
+
+Каждый процесс пишет события в outdir/_batch_trace/<pid>.jsonl (воркер — после каждого запроса,
+поэтому убитый по таймауту воркер теряет только текущий запрос). После батча они сводятся в
+Chrome trace-event JSON (_batch_trace.json): chrome://tracing или ui.perfetto.dev, одна дорожка на
+процесс. Этапы берутся из той же разметки perf.timings, вызовы бэкендов (PyFizika) — отдельные
+спаны внутри этапа phys. Время — perf_counter со сдвигом к time.time(), общим для всех процессов.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from logger_config import get_logger
+from perf import timings
+from perf.timings import StageTimings
+
+log = get_logger("Tracing")
+
+TRACE_DIR = "_batch_trace"
+TRACE_NAME = "_batch_trace.json"
+
+
+class Tracer:
+    """Буфер завершённых спанов процесса (события "X" формата Chrome trace)."""
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.offset_us = (time.time() - time.perf_counter()) * 1e6
+        self.events: List[Dict[str, Any]] = []
+
+    def complete(self, name: str, cat: str, t0: float, t1: float, args: Optional[Dict[str, Any]] = None) -> None:
+        ev = {"name": name, "cat": cat, "ph": "X", "ts": t0 * 1e6 + self.offset_us, "dur": (t1 - t0) * 1e6,
+              "pid": self.pid, "tid": threading.get_native_id()}
+        if args:
+            ev["args"] = args
+        self.events.append(ev)
+
+    def write(self, dump_dir: Path) -> None:
+        if not self.events:
+            return
+        dump_dir.mkdir(parents=True, exist_ok=True)
+        with (dump_dir / f"{self.pid}.jsonl").open("a", encoding="utf-8") as f:
+            for ev in self.events:
+                f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+        self.events = []
+
+
+_TRACER: Optional[Tracer] = None
+_DRIVER_DIR: Optional[Path] = None  # включено ли трассирование драйвера в этом процессе
+
+
+def tracer() -> Tracer:
+    """Трассировщик процесса; после fork у потомка свой (буфер родителя ему не принадлежит)."""
+    global _TRACER
+    if _TRACER is None or _TRACER.pid != os.getpid():
+        _TRACER = Tracer()
+    return _TRACER
+
+
+class TraceStages(StageTimings):
+    """Сборщик perf.timings, который дополнительно пишет каждый этап и вызов бэкенда спаном."""
+
+    def __init__(self, trace: Tracer) -> None:
+        super().__init__()
+        self.trace = trace
+
+    def end(self, name: str, t0: float) -> None:
+        t1 = time.perf_counter()
+        self.add_stage(name, t1 - t0)
+        self.trace.complete(name, "stage", t0, t1)
+
+    def add_call(self, name: str, seconds: float) -> None:
+        super().add_call(name, seconds)
+        t1 = time.perf_counter()
+        self.trace.complete(name, "call", t1 - seconds, t1)
+
+
+class TracedCall:
+    """process_fn(src, dst) со спаном запроса и этапами; пиклится вместе с функцией, как ProfiledCall."""
+
+    def __init__(self, fn: Callable[[Path, Path], None], dump_dir: Path, out_root: Optional[Path] = None) -> None:
+        self.fn = fn
+        self.dump_dir = Path(dump_dir)
+        self.out_root = out_root
+
+    def __call__(self, src: Path, dst: Path) -> None:
+        try:
+            rel = Path(dst).relative_to(self.out_root).as_posix() if self.out_root else Path(dst).name
+        except ValueError:
+            rel = Path(dst).name
+        trace = tracer()
+        status = "failed"
+        t0 = time.perf_counter()
+        try:
+            with timings.collecting(TraceStages(trace)):
+                self.fn(src, dst)
+            status = "ok"
+        finally:
+            trace.complete(rel, "request", t0, time.perf_counter(), {"status": status})
+            trace.write(self.dump_dir)
+
+
+# -------------------- драйвер батча --------------------
+
+def enable(dump_dir: Path) -> None:
+    """Включает спаны драйвера (span) в этом процессе; события уходят в dump_dir при flush()."""
+    global _DRIVER_DIR
+    _DRIVER_DIR = Path(dump_dir)
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Спан шага драйвера (сбор задач, манифест, run_batch, отчёт); без enable() — пустой."""
+    if _DRIVER_DIR is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer().complete(name, "batch", t0, time.perf_counter(), args or None)
+
+
+def flush() -> None:
+    if _DRIVER_DIR is not None:
+        tracer().write(_DRIVER_DIR)
+
+
+# -------------------- сводка --------------------
+
+def write_trace(dump_dir: Path, outdir: Path) -> Dict[str, Any]:
+    """Сводит <dump_dir>/*.jsonl в Chrome trace JSON; процесс, который сводит, — дорожка main."""
+    flush()
+    events: List[Dict[str, Any]] = []
+    for path in sorted(Path(dump_dir).glob("*.jsonl")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # недописанная строка убитого воркера
+    events.sort(key=lambda ev: ev["ts"])
+
+    main_pid = os.getpid()
+    first_ts: Dict[int, float] = {}
+    for ev in events:
+        first_ts.setdefault(ev["pid"], ev["ts"])
+    order = sorted(first_ts, key=lambda pid: (pid != main_pid, first_ts[pid]))
+    meta: List[Dict[str, Any]] = []
+    for idx, pid in enumerate(order):
+        label = "main" if pid == main_pid else f"worker {idx}"
+        meta.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"{label} (pid {pid})"}})
+        meta.append({"name": "process_sort_index", "ph": "M", "pid": pid, "args": {"sort_index": idx}})
+
+    requests = [ev for ev in events if ev["cat"] == "request"]
+    trace = {
+        "traceEvents": meta + events,
+        "displayTimeUnit": "ms",
+        "otherData": {"requests": len(requests), "processes": len(order)},
+    }
+    out_path = Path(outdir) / TRACE_NAME
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(trace, ensure_ascii=False), encoding="utf-8")
+    log.info("Трасса: %s (запросов %d, процессов %d) — открыть в chrome://tracing или ui.perfetto.dev",
+             out_path, len(requests), len(order))
+    return trace
+
+
+__all__ = ["TRACE_DIR", "TRACE_NAME", "Tracer", "TraceStages", "TracedCall", "tracer", "enable", "span", "flush",
+           "write_trace"]
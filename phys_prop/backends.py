@@ -0,0 +1,279 @@
+"""Бэкенды физсвойств: протокол, реестр по конфигурации и две реализации.
+
+PhysMinimalRunner не знает, кто считает ρ/k/μ: он берёт get_backend() и зовёт calc() с тем же
+контрактом, что у PyFizika, — requestList и physProperties → один dict на запрос
+({physValueId: value, "error_<id>": абсолютная погрешность, "phase": "gas"} или {"errorString": ...}).
+
+    NEW_SSU_PHYS_BACKEND=pyfizika   # по умолчанию: PyFizika (импорт при первом вызове)
+    NEW_SSU_PHYS_BACKEND=virial     # офлайн-замена: смесь идеальных газов + второй вириальный коэффициент
+    python main.py --input inputdata --outdir outputdata --physics-backend virial
+
+virial — чистый Python/NumPy без лицензий и сети: Z = 1 + B·p/(R·T), B — корреляция Аббота по
+псевдокритическим параметрам смеси (правило Кея), k — показатель изоэнтропы того же уравнения
+(cp° смеси плюс остаточные члены от B(T)), μ — вязкости компонентов, смешанные по
+Хернингу–Циппереру. Компоненты — те, что есть в for_package.MOLAR_MASS. Годится для прогона,
+масштабирования и нагрузочных тестов конвейера, не для инженерных результатов. calc_many()
+считает пачку состояний одним векторным проходом.
+
+Новый бэкенд — класс с name/version/identity/calc/calc_many, зарегистрированный @register_backend.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Callable, Dict, List, Mapping, Optional, Protocol, Sequence
+
+from converters.units_validator import celsius_to_kelvin, convert_pressure
+
+ENV_BACKEND = "NEW_SSU_PHYS_BACKEND"
+DEFAULT_BACKEND = "pyfizika"
+
+
+class PhysicsBackend(Protocol):
+    """Что нужно PhysMinimalRunner и кэшам от бэкенда физсвойств."""
+
+    name: str
+
+    def version(self) -> str:
+        """Версия реализации: входит в ключи постоянного кэша и манифеста батча."""
+
+    def identity(self) -> Any:
+        """Объект, по которому кэши замечают подмену реализации (PHYS_CACHE.bind_backend)."""
+
+    def calc(self, request_list: Sequence[Mapping[str, Any]], props: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """Одно состояние: ответ в формате PyFizika calc_phys_properties_from_requestList."""
+
+    def calc_many(self, request_list: Sequence[Mapping[str, Any]],
+                  states: Sequence[Mapping[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Пачка состояний с одним requestList: по ответу calc() на каждое."""
+
+
+_FACTORIES: Dict[str, Callable[[], PhysicsBackend]] = {}
+_INSTANCES: Dict[str, PhysicsBackend] = {}
+
+
+def register_backend(name: str) -> Callable[[Callable[[], PhysicsBackend]], Callable[[], PhysicsBackend]]:
+    """Декоратор класса (или фабрики без аргументов) бэкенда под именем name."""
+    def deco(factory: Callable[[], PhysicsBackend]) -> Callable[[], PhysicsBackend]:
+        _FACTORIES[name] = factory
+        _INSTANCES.pop(name, None)
+        return factory
+    return deco
+
+
+def available() -> List[str]:
+    return sorted(_FACTORIES)
+
+
+def configured_name() -> str:
+    return os.environ.get(ENV_BACKEND, "").strip().lower() or DEFAULT_BACKEND
+
+
+def get_backend(name: Optional[str] = None) -> PhysicsBackend:
+    """Бэкенд по имени, иначе из NEW_SSU_PHYS_BACKEND; один экземпляр на имя в процессе."""
+    name = name or configured_name()
+    backend = _INSTANCES.get(name)
+    if backend is None:
+        factory = _FACTORIES.get(name)
+        if factory is None:
+            raise ValueError(f"Неизвестный бэкенд физсвойств '{name}' ({ENV_BACKEND}); доступны: {', '.join(available())}")
+        backend = _INSTANCES[name] = factory()
+    return backend
+
+
+# -------------------- PyFizika --------------------
+
+@register_backend("pyfizika")
+class PyFizikaBackend:
+    """Адаптер PyFizika. Модуль ищется при каждом вызове: подмена sys.modules['PyFizika'] видна сразу."""
+
+    name = "pyfizika"
+
+    @staticmethod
+    def identity() -> Any:
+        # ImportError не глотаем — отсутствие бэкенда не должно выглядеть как ошибка одного запроса
+        from PyFizika import calc_phys_properties_from_requestList
+        return calc_phys_properties_from_requestList
+
+    def version(self) -> str:
+        from batch.manifest import pyfizika_version
+        return pyfizika_version()
+
+    def calc(self, request_list: Sequence[Mapping[str, Any]], props: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        return self.identity()(request_list, props)
+
+    def calc_many(self, request_list: Sequence[Mapping[str, Any]],
+                  states: Sequence[Mapping[str, Any]]) -> List[List[Dict[str, Any]]]:
+        fn = self.identity()
+        return [fn(request_list, props) for props in states]
+
+
+# -------------------- вириальная смесь (офлайн) --------------------
+
+R = 8.314462618  # Дж/(моль·К)
+
+# Tc, К; pc, МПа; ω; cp°/R при 298.15 К и его наклон, 1/К; μ при 273.15 К, мкПа·с
+_COMPONENTS: Dict[str, tuple] = {
+    "Methane":       (190.56, 4.599, 0.011, 4.30, 0.0060, 10.3),
+    "Ethane":        (305.32, 4.872, 0.099, 6.32, 0.0157, 8.6),
+    "Propane":       (369.83, 4.248, 0.152, 8.85, 0.0245, 7.5),
+    "iButane":       (407.80, 3.640, 0.184, 11.70, 0.0320, 6.9),
+    "nButane":       (425.12, 3.796, 0.200, 11.90, 0.0320, 6.8),
+    "iPentane":      (460.40, 3.380, 0.227, 14.30, 0.0400, 6.2),
+    "nPentane":      (469.70, 3.370, 0.252, 14.40, 0.0400, 6.2),
+    "Nitrogen":      (126.20, 3.398, 0.037, 3.50, 0.0001, 16.6),
+    "Oxygen":        (154.58, 5.043, 0.022, 3.54, 0.0006, 19.2),
+    "CarbonDioxide": (304.13, 7.377, 0.225, 4.47, 0.0050, 13.8),
+    "Helium":        (5.19, 0.227, -0.390, 2.50, 0.0, 18.7),
+    "Hydrogen":      (33.19, 1.313, -0.216, 3.47, 0.0001, 8.4),
+}
+# состав по умолчанию (мол. %), если physProperties его не содержат
+DEFAULT_COMPOSITION = {"Methane": 92.0, "Ethane": 4.0, "Propane": 1.0, "Nitrogen": 2.0, "CarbonDioxide": 1.0}
+# относительные погрешности, которые отдаются в error_*
+REL_ERROR = {"rho": 3e-3, "rho_st": 3e-3, "k": 1e-2, "mu": 3e-2, "Z": 3e-3}
+
+
+def _real(node: Any) -> Optional[float]:
+    if isinstance(node, Mapping):
+        node = node.get("real")
+    try:
+        return None if node is None else float(node)
+    except (TypeError, ValueError):
+        return None
+
+
+def temperature_k(node: Any, default: float) -> float:
+    """Узел {real, unit} температуры (°C, если единица не указана) → К."""
+    val = _real(node)
+    if val is None:
+        return default
+    unit = str(node.get("unit") or "C").strip().lstrip("°").upper() if isinstance(node, Mapping) else "C"
+    return val if unit == "K" else celsius_to_kelvin(val)
+
+
+def pressure_pa(node: Any, default: Optional[float]) -> Optional[float]:
+    """Узел {real, unit} давления → Па (без единицы — уже Па)."""
+    val = _real(node)
+    if val is None:
+        return default
+    unit = node.get("unit") if isinstance(node, Mapping) else None
+    return convert_pressure(val, unit) if unit else val
+
+
+@register_backend("virial")
+class VirialMixBackend:
+    """Смесь идеальных газов со вторым вириальным коэффициентом; состояния считаются массивами NumPy."""
+
+    name = "virial"
+    VERSION = "1"
+    VALUES = ("rho", "rho_st", "k", "mu", "Z")
+
+    def __init__(self) -> None:
+        from errors.errors_handler.for_package import MOLAR_MASS
+
+        self.components = [c for c in MOLAR_MASS if c in _COMPONENTS]
+        self.molar_mass = [MOLAR_MASS[c] * 1e-3 for c in self.components]  # кг/моль
+        self._index = {c: i for i, c in enumerate(self.components)}
+
+    def version(self) -> str:
+        return self.VERSION
+
+    def identity(self) -> Any:
+        return self
+
+    def calc(self, request_list: Sequence[Mapping[str, Any]], props: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        return self.calc_many(request_list, [props])[0]
+
+    def _fractions(self, props: Mapping[str, Any]) -> List[float]:
+        comp = props.get("composition")
+        if not isinstance(comp, Mapping) or not comp:
+            comp = DEFAULT_COMPOSITION
+        row = [0.0] * len(self.components)
+        for name, x in comp.items():
+            x = _real(x) or 0.0
+            if x <= 0.0:
+                continue
+            i = self._index.get(str(name))
+            if i is None:
+                raise ValueError(f"virial: компонент '{name}' не поддерживается")
+            row[i] = x
+        total = sum(row)
+        if total <= 0.0:
+            raise ValueError("virial: пустой состав")
+        return [x / total for x in row]
+
+    def _state(self, props: Mapping[str, Any]) -> tuple:
+        T = temperature_k(props.get("T"), 293.15)
+        p = pressure_pa(props.get("p_abs"), None)
+        if p is None:
+            p = (pressure_pa(props.get("p_izb"), 0.0) or 0.0) + (pressure_pa(props.get("p_atm"), 101325.0) or 101325.0)
+        return (T, p, temperature_k(props.get("T_st"), 293.15), pressure_pa(props.get("p_st"), 101325.0),
+                self._fractions(props))
+
+    def values(self, states: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+        """Массивы rho, rho_st, k, mu, Z по состояниям (ошибочные состояния — в ключе "errors")."""
+        import numpy as np
+
+        rows, errors = [], {}
+        for i, props in enumerate(states):
+            try:
+                rows.append(self._state(props or {}))
+            except ValueError as e:
+                errors[i] = str(e)
+                rows.append((293.15, 101325.0, 293.15, 101325.0, self._fractions({})))
+        T, p, T_st, p_st = (np.array([r[j] for r in rows], dtype=float) for j in range(4))
+        X = np.array([r[4] for r in rows], dtype=float)                      # (n, компоненты)
+        data = np.array([_COMPONENTS[c] for c in self.components], dtype=float)
+        Tc, pc, omega, cp0, cp1, mu0 = (data[:, j] for j in range(6))
+        M = X @ np.array(self.molar_mass)
+
+        # правило Кея: псевдокритические параметры смеси
+        Tpc, ppc, w = X @ Tc, X @ (pc * 1e6), X @ omega
+
+        def virial(T_):
+            """B, dB/dT, d²B/dT² по Абботу, м³/моль."""
+            Tr = T_ / Tpc
+            B = R * Tpc / ppc * ((0.083 - 0.422 * Tr ** -1.6) + w * (0.139 - 0.172 * Tr ** -4.2))
+            dB = R / ppc * (0.6752 * Tr ** -2.6 + w * 0.7224 * Tr ** -5.2)
+            d2B = R / (ppc * Tpc) * (-1.75552 * Tr ** -3.6 - w * 3.75648 * Tr ** -6.2)
+            return B, dB, d2B
+
+        B, dB, d2B = virial(T)
+        Z = 1.0 + B * p / (R * T)
+        Z_st = 1.0 + virial(T_st)[0] * p_st / (R * T_st)
+        # k = cp/cv · (−v/p)(∂p/∂v)_T; для v = RT/p + B: второй множитель равен Z,
+        # cp = cp° − p·T·B'', cp − cv = (R + p·B')²/R
+        cp = R * (X * (cp0[None, :] + cp1[None, :] * (T[:, None] - 298.15))).sum(axis=1) - p * T * d2B
+        cv = cp - (R + p * dB) ** 2 / R
+        sqrt_m = np.sqrt(np.array(self.molar_mass))
+        mu_i = mu0[None, :] * (T[:, None] / 273.15) ** 0.8
+        return {
+            "rho": p * M / (Z * R * T),
+            "rho_st": p_st * M / (Z_st * R * T_st),
+            "k": cp / cv * Z,
+            "mu": (X * mu_i * sqrt_m).sum(axis=1) / (X @ sqrt_m),  # мкПа·с, как у PyFizika
+            "Z": Z,
+            "errors": errors,
+        }
+
+    def calc_many(self, request_list: Sequence[Mapping[str, Any]],
+                  states: Sequence[Mapping[str, Any]]) -> List[List[Dict[str, Any]]]:
+        vals = self.values(states)
+        out: List[List[Dict[str, Any]]] = []
+        for i in range(len(states)):
+            if i in vals["errors"]:
+                out.append([{"errorString": vals["errors"][i]} for _ in request_list])
+                continue
+            resp = []
+            for req in request_list:
+                key = str(req.get("physValueId"))
+                if key not in self.VALUES:
+                    resp.append({"errorString": f"virial: physValueId '{key}' не поддерживается"})
+                    continue
+                v = float(vals[key][i])
+                resp.append({key: v, f"error_{key}": abs(v) * REL_ERROR[key], "phase": "gas"})
+            out.append(resp)
+        return out
+
+
+__all__ = ["PhysicsBackend", "PyFizikaBackend", "VirialMixBackend", "register_backend", "available",
+           "configured_name", "get_backend", "temperature_k", "pressure_pa", "ENV_BACKEND", "DEFAULT_BACKEND"]
@@ -0,0 +1,201 @@
+"""Кэш физсвойств процесса: один LRU на все запросы, ключ — квантованное состояние.
+
+PhysMinimalRunner спрашивает кэш перед каждым вызовом PyFizika: базовое состояние, возмущения
+T/p для θ (_fd_logtheta) и составы метода 10 (make_rho_phys_from_raw) — одна и та же точка
+архива больше не доходит до бэкенда. Ключ — documentId/physValueId запроса и physProperties,
+в которых величины с единицами приведены к SI (давление — Па, температура — К), состав — в
+процентах после нормировки, а все числа округлены до DIGITS значащих цифр.
+
+    NEW_SSU_PHYS_CACHE_SIZE=0        # выключить (по умолчанию 4096 записей)
+    NEW_SSU_PHYS_CACHE_DIGITS=8      # квантование, значащих цифр (по умолчанию 10)
+
+    NEW_SSU_PHYS_CACHE_DB=phys.sqlite  # второй уровень: sqlite, общий для процессов и запусков
+
+Квантование входит в версию выходов (batch.manifest.backend_version) и записей на диске: при другом
+DIGITS старые выходы пересчитываются, а записи sqlite не используются.
+В кэш попадают только ответы без errorString. Смена функции бэкенда (подмена модуля PyFizika)
+сбрасывает кэш сама; явный сброс — clear(). Воркеры пула получают копию кэша родителя при fork
+и дальше ведут свой.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence
+
+from converters.units_validator import convert_pressure
+from perf import metrics
+
+ENV_SIZE = "NEW_SSU_PHYS_CACHE_SIZE"
+ENV_DIGITS = "NEW_SSU_PHYS_CACHE_DIGITS"
+ENV_DB = "NEW_SSU_PHYS_CACHE_DB"  # второй уровень на диске, см. phys_prop.disk_cache
+DEFAULT_SIZE = 4096
+DEFAULT_DIGITS = 10
+
+_CACHE_REQUESTS = metrics.counter("new_ssu_cache_requests_total", "Обращения к кэшам: cache=..., result=hit|miss")
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    try:
+        return int(raw) if raw else default
+    except ValueError:
+        return default
+
+
+def _quantize(x: float, digits: int) -> float:
+    return float(f"{x:.{digits}g}")
+
+
+def _canon(value: Any, digits: int) -> Hashable:
+    """Хешируемое представление значения physProperties с квантованными числами."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return _quantize(float(value), digits)
+    if isinstance(value, Mapping):
+        if "real" in value and isinstance(value.get("real"), (int, float)) and not isinstance(value["real"], bool):
+            return _canon_quantity(float(value["real"]), value.get("unit"), digits)
+        return tuple(sorted((str(k), _canon(v, digits)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canon(v, digits) for v in value)
+    return repr(value)
+
+
+def _canon_quantity(real: float, unit: Any, digits: int) -> Hashable:
+    u = str(unit or "").strip().lstrip("°").lower()
+    if u == "c":
+        return ("K", _quantize(real + 273.15, digits))
+    if u == "k":
+        return ("K", _quantize(real, digits))
+    try:
+        return ("Pa", _quantize(convert_pressure(real, unit), digits))
+    except ValueError:
+        return (u, _quantize(real, digits))
+
+
+def state_key(props: Mapping[str, Any], digits: int = DEFAULT_DIGITS) -> Hashable:
+    """Квантованное состояние physProperties: одно и то же для T в °C/K, давления в МПа/кПа и т.п."""
+    return _canon(props, digits)
+
+
+class PhysCache:
+    """LRU ответов PyFizika: ключ — (запросы, квантованное состояние), значение — список словарей."""
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE, digits: int = DEFAULT_DIGITS, name: str = "phys_props") -> None:
+        self.maxsize = maxsize
+        self.digits = digits
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, List[Dict[str, Any]]]" = OrderedDict()
+        self._backend: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def key(self, request_list: Sequence[Mapping[str, Any]], props: Mapping[str, Any]) -> Hashable:
+        reqs = tuple((r.get("documentId"), r.get("physValueId")) for r in request_list)
+        return reqs, state_key(props, self.digits)
+
+    def bind_backend(self, backend: Any) -> None:
+        """Запоминает функцию бэкенда; ответы другой функции кэшу не принадлежат — сброс."""
+        if backend is not self._backend:
+            self.clear()
+            self._backend = backend
+
+    @staticmethod
+    def _disk() -> Any:
+        if not os.environ.get(ENV_DB):
+            return None
+        from phys_prop.disk_cache import persistent
+        return persistent()
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        value = None
+        if self.enabled:
+            with self._lock:
+                value = self._data.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+            _CACHE_REQUESTS.inc(cache=self.name, result="miss" if value is None else "hit")
+        if value is None:
+            disk = self._disk()
+            if disk is not None:
+                from phys_prop.disk_cache import backend_tag
+                value = disk.get(key, backend_tag(self._backend, self.digits))
+                if value is not None:
+                    self._remember(key, value)
+        return None if value is None else [dict(d) for d in value]
+
+    def put(self, key: Hashable, value: List[Dict[str, Any]]) -> None:
+        self._remember(key, value)
+        disk = self._disk()
+        if disk is not None:
+            from phys_prop.disk_cache import backend_tag
+            disk.put(key, backend_tag(self._backend, self.digits), value)
+
+    def _remember(self, key: Hashable, value: List[Dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = [dict(d) for d in value]
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def configure(self, *, maxsize: Optional[int] = None, digits: Optional[int] = None) -> None:
+        """Новый размер (0 — выключить) и/или квантование; смена квантования сбрасывает записи."""
+        with self._lock:
+            if digits is not None and digits != self.digits:
+                self.digits = digits
+                self._data.clear()
+            if maxsize is not None:
+                self.maxsize = maxsize
+                while len(self._data) > max(maxsize, 0):
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data), "maxsize": self.maxsize, "evictions": self.evictions,
+                "digits": self.digits}
+
+
+PHYS_CACHE = PhysCache(_env_int(ENV_SIZE, DEFAULT_SIZE), _env_int(ENV_DIGITS, DEFAULT_DIGITS))
+
+
+def quantization_tag(digits: Optional[int] = None) -> str:
+    """
+    Квантование ключа для версий: ответ из кэша верен для состояния лишь с точностью до digits
+    значащих цифр, поэтому оно входит в ключ записей на диске и в версию выходов (batch.manifest).
+    """
+    return f"digits={PHYS_CACHE.digits if digits is None else digits}"
+
+
+def configure(*, maxsize: Optional[int] = None, digits: Optional[int] = None) -> None:
+    PHYS_CACHE.configure(maxsize=maxsize, digits=digits)
+
+
+def clear() -> None:
+    PHYS_CACHE.clear()
+
+
+def stats() -> Dict[str, Any]:
+    return PHYS_CACHE.stats()
+
+
+__all__ = ["PhysCache", "PHYS_CACHE", "state_key", "quantization_tag", "configure", "clear", "stats", "ENV_SIZE", "ENV_DIGITS", "ENV_DB"]
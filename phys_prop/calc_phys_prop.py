@@ -3,13 +3,42 @@ from typing import Any, Dict, List, Mapping, Optional, Tuple, Sequence, Callable
 from importlib import import_module
 import json
 import math
-from PyFizika import calc_phys_properties_from_requestList
-from phys_prop_exceptions import ValidationError
+import time
+try:
+    from phys_prop_exceptions import ValidationError
+except ImportError:  # поставляется вместе с PyFizika; без неё работают офлайн-бэкенды
+    class ValidationError(ValueError):
+        pass
 from logger_config import get_logger
+from perf import metrics, timings as _tm
+from phys_prop.backends import get_backend
+from phys_prop.cache import PHYS_CACHE
+from phys_prop.surrogate import lookup as surrogate_lookup
 
+_BACKEND_CALLS = metrics.counter("new_ssu_phys_backend_calls_total",
+                                 "Вызовы бэкенда физсвойств: backend=..., mode=batch (весь requestList) или single")
+_BACKEND_SECONDS = metrics.histogram("new_ssu_phys_backend_call_seconds", "Время одного вызова бэкенда физсвойств, с")
+_BACKEND_ERRORS = metrics.counter("new_ssu_phys_backend_errors_total", "Вызовы бэкенда физсвойств, вернувшие ошибку")
+_PHYS_FALLBACK = metrics.counter("new_ssu_phys_fallback_total",
+                                 "Переходы PhysMinimalRunner на поэлементные вызовы после ошибки батча")
 
 
 
+
+# Нормализация имён в ответе бэкенда (варианты из твоего лога: Ro/Ro_st/error_Ro/…)
+PHYS_KEY_ALIASES: Dict[str, List[str]] = {
+    "rho":         ["rho", "Ro"],
+    "rho_st":      ["rho_st", "Ro_st"],
+    "k":           ["k", "K"],
+    "mu":          ["mu", "Mu"],
+
+    "error_rho":    ["error_rho", "error_Ro"],
+    "error_rho_st": ["error_rho_st", "error_Ro_st"],
+    "error_k":      ["error_k", "k_error"],
+    "error_mu":     ["error_mu", "mu_error"],
+}
+
+
 # -------------------- утилиты --------------------
 
 def _coalesce(d: Mapping[str, Any], keys: List[str]) -> Any:
@@ -83,6 +112,17 @@ def normalize_composition_percent_map(comp_in: Mapping[str, Any],
 
 
 
+def _normalized_props(props: Mapping[str, Any]) -> Mapping[str, Any]:
+    """physProperties с составом в процентах — как их видит PhysMinimalRunner (и ключ PHYS_CACHE)."""
+    comp = props.get("composition")
+    if not isinstance(comp, Mapping):
+        return props
+    try:
+        return {**props, "composition": normalize_composition_percent_map(comp)}
+    except Exception:
+        return props
+
+
 # -------------------- минимальный раннер --------------------
 
 class PhysMinimalRunner:
@@ -95,6 +135,7 @@ class PhysMinimalRunner:
         *,
         theta_request_list: Optional[List[Mapping[str, Any]]] = None,
         require_gas_phase: bool = True,
+        prefetched: Optional[Tuple[List[Dict[str, Any]], Optional[str]]] = None,
     ) -> None:
         self.log = get_logger(self.__class__.__name__)
         self.data = dict(data)
@@ -136,9 +177,29 @@ class PhysMinimalRunner:
         self._phys_norm: Dict[str, Any] = {}
         self._thetas: Dict[str, float] = {}
 
-        self._run_pyfizika_with_fallback()
+        self._run_pyfizika_with_fallback(prefetched)
         self._maybe_run_thetas()
 
+    @classmethod
+    def many(cls, datas: Sequence[Mapping[str, Any]], request_list: List[Mapping[str, Any]],
+             **kwargs: Any) -> List[Any]:
+        """
+        Раннеры нескольких состояний с одним request_list: таблицы и кэш спрашиваются по каждому,
+        промахи уходят в бэкенд одним calc_many. Ошибка в ответе отдельного состояния разбирается
+        как у обычного раннера — поэлементными вызовами. Вместо раннера состояния, конструктор
+        которого бросил бы исключение (фаза не газ и т.п.), в списке само исключение: оно не
+        отнимает ответ у остальных состояний пачки.
+        """
+        states = [_normalized_props((d.get("physPackage") or {}).get("physProperties") or {}) for d in datas]
+        answers = cls._call_backend(request_list, states)
+        out: List[Any] = []
+        for d, answer in zip(datas, answers):
+            try:
+                out.append(cls(d, request_list, prefetched=answer, **kwargs))
+            except Exception as e:
+                out.append(e)
+        return out
+
     # -------------------- публичный API --------------------
 
     def to_dict(self) -> Dict[str, Any]:
@@ -174,30 +235,92 @@ class PhysMinimalRunner:
     # -------------------- внутренности --------------------
 
     def _call_pyfizika(self, rlist: List[Mapping[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
-        """Вызывает PyFizika и возвращает (list_of_dicts, error_str_if_any)."""
+        """Вызывает бэкенд физсвойств (PyFizika по умолчанию) и возвращает (list_of_dicts, error_str_if_any)."""
+        return self._call_backend(rlist, [self.input_props])[0]
+
+    @staticmethod
+    def _call_backend(rlist: List[Mapping[str, Any]],
+                      states: Sequence[Mapping[str, Any]]) -> List[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """(list_of_dicts, error_str_if_any) на каждое состояние: таблицы, кэш, остальное — одним вызовом бэкенда."""
+        # бэкенд из phys_prop.backends (NEW_SSU_PHYS_BACKEND); PyFizika импортируется при первом расчёте,
+        # а не при import main; ImportError не глотаем — отсутствие бэкенда не ошибка одного запроса
+        out: List[Any] = [None] * len(states)
+        pending = []
+        for i, props in enumerate(states):
+            tabulated = surrogate_lookup(rlist, props)  # таблицы (T, p) фиксированного состава
+            if tabulated is not None:
+                out[i] = (tabulated, None)
+            else:
+                pending.append(i)
+        if not pending:
+            return out
+        backend = get_backend()
+        PHYS_CACHE.bind_backend(backend.identity())
+        keys = {}
+        misses = []
+        for i in pending:
+            keys[i] = PHYS_CACHE.key(rlist, states[i])
+            cached = PHYS_CACHE.get(keys[i])
+            if cached is not None:
+                out[i] = (cached, None)
+            else:
+                misses.append(i)
+        if not misses:
+            return out
+
+        _t = _tm.start()
+        t0 = time.perf_counter()
         try:
-            res = calc_phys_properties_from_requestList(rlist, self.input_props)
+            if len(misses) == 1:
+                answers = [backend.calc(rlist, states[misses[0]])]
+            else:
+                answers = backend.calc_many(rlist, [states[i] for i in misses])
+        except Exception as e:
+            answers = None
+            error = e
+        finally:
+            _tm.stop_call(backend.name, _t)
+            mode = "batch" if len(rlist) > 1 else "single"
+            _BACKEND_CALLS.inc(backend=backend.name, mode=mode)
+            _BACKEND_SECONDS.observe(time.perf_counter() - t0, backend=backend.name, mode=mode)
+        if answers is None:
+            if len(misses) == 1:
+                out[misses[0]] = ([{"errorString": f"{error}"}], str(error))
+                return out
+            # пачка упала целиком — состояния по одному, чтобы ошибка одного не отняла ответ у остальных
+            for i in misses:
+                out[i] = PhysMinimalRunner._call_backend(rlist, [states[i]])[0]
+            return out
+
+        for i, res in zip(misses, answers):
             # PyFizika иногда возвращает errorString в dict/внутри списка dict'ов
             if isinstance(res, dict) and "errorString" in res:
-                return [res], res.get("errorString")
-            if isinstance(res, list) and any(isinstance(x, dict) and "errorString" in x for x in res):
-                return list(res), "batch-error"
-            return list(res), None
-        except Exception as e:
-            return [{"errorString": f"{e}"}], str(e)
+                out[i] = ([res], res.get("errorString"))
+            elif isinstance(res, list) and any(isinstance(x, dict) and "errorString" in x for x in res):
+                out[i] = (list(res), "batch-error")
+            else:
+                PHYS_CACHE.put(keys[i], list(res))
+                out[i] = (list(res), None)
+        return out
 
-    def _run_pyfizika_with_fallback(self) -> None:
-        # 1) батч
-        raw, err = self._call_pyfizika(self.request_list)
+    def _run_pyfizika_with_fallback(
+        self, prefetched: Optional[Tuple[List[Dict[str, Any]], Optional[str]]] = None,
+    ) -> None:
+        # 1) батч (или ответ, уже полученный пачкой состояний в many())
+        raw, err = prefetched if prefetched is not None else self._call_pyfizika(self.request_list)
 
         # 2) если ошибка — по одному
         if err:
             self.log.warning("PyFizika batch вернула ошибку (%s). Перехожу на поэлементные вызовы.", err)
+            backend = get_backend().name
+            _BACKEND_ERRORS.inc(backend=backend, mode="batch")
+            _PHYS_FALLBACK.inc()
             merged: List[Dict[str, Any]] = []
             for req in self.request_list:
                 single_raw, single_err = self._call_pyfizika([req])
                 merged.extend(single_raw)
                 if single_err:
+                    _BACKEND_ERRORS.inc(backend=backend, mode="single")
                     self.log.warning("Пропускаю physValueId=%s: %s", req.get("physValueId"), single_err)
             raw = merged
 
@@ -216,18 +339,7 @@ class PhysMinimalRunner:
                     continue
                 combined[k] = v
 
-        # Нормализация имён (варианты из твоего лога: Ro/Ro_st/error_Ro/…)
-        self._phys_norm = {
-            "rho":         _coalesce(combined, ["rho", "Ro"]),
-            "rho_st":      _coalesce(combined, ["rho_st", "Ro_st"]),
-            "k":           _coalesce(combined, ["k", "K"]),
-            "mu":          _coalesce(combined, ["mu", "Mu"]),
-
-            "error_rho":    _coalesce(combined, ["error_rho", "error_Ro"]),
-            "error_rho_st": _coalesce(combined, ["error_rho_st", "error_Ro_st"]),
-            "error_k":      _coalesce(combined, ["error_k", "k_error"]),
-            "error_mu":     _coalesce(combined, ["error_mu", "mu_error"]),
-        }
+        self._phys_norm = {name: _coalesce(combined, keys) for name, keys in PHYS_KEY_ALIASES.items()}
 
     def _maybe_run_thetas(self) -> None:
         self._thetas = {}
@@ -0,0 +1,286 @@
+"""Постоянный кэш физсвойств на диске (sqlite, WAL): второй уровень под PHYS_CACHE.
+
+Включается путём к файлу базы — в окружении, чтобы его увидели и процессы-воркеры:
+
+    NEW_SSU_PHYS_CACHE_DB=/var/cache/new_ssu/phys.sqlite   # или main.py --phys-cache-db
+    NEW_SSU_PHYS_CACHE_DB_SIZE=200000                      # предел записей, старые по last_used вытесняются
+
+    python -m phys_prop.disk_cache warm --db phys.sqlite --input inputdata --workers 4
+    python -m phys_prop.disk_cache stats --db phys.sqlite
+    python -m phys_prop.disk_cache purge --db phys.sqlite --stale
+
+Ключ записи — sha256 от версии схемы, версии бэкенда (функция + версия пакета PyFizika или имя@версия
+бэкенда из phys_prop.backends) и ключа PHYS_CACHE (documentId/physValueId + квантованное состояние).
+Версия бэкенда в записи включает и квантование (NEW_SSU_PHYS_CACHE_DIGITS), и набор суррогатных таблиц
+(NEW_SSU_PHYS_SURROGATES), поэтому обновление PyFizika, смена квантования или таблиц просто перестают
+попадать в старые записи; purge --stale их удаляет.
+Бэкенд для warm и purge --stale — --physics или NEW_SSU_PHYS_BACKEND, как у main.py.
+Каждый процесс открывает своё соединение (после fork — новое), запись — короткими автокоммит-
+транзакциями с busy_timeout. Ошибка базы не роняет расчёт: запрос уходит в PyFizika как промах.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from logger_config import get_logger
+from perf import metrics
+from phys_prop.backends import ENV_BACKEND, available
+from phys_prop.cache import ENV_DB, quantization_tag
+from phys_prop.surrogate import tables_version
+
+log = get_logger("PhysDiskCache")
+
+ENV_DB_SIZE = "NEW_SSU_PHYS_CACHE_DB_SIZE"
+DEFAULT_DB_SIZE = 200_000
+SCHEMA_VERSION = 1
+EVICT_EVERY = 256      # проверка размера раз в столько вставок процесса
+BUSY_TIMEOUT_S = 30.0
+
+_CACHE_REQUESTS = metrics.counter("new_ssu_cache_requests_total", "Обращения к кэшам: cache=..., result=hit|miss")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS props (
+    key       TEXT PRIMARY KEY,
+    backend   TEXT NOT NULL,
+    documents TEXT NOT NULL,
+    value     TEXT NOT NULL,
+    created   REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS props_last_used ON props(last_used);
+CREATE INDEX IF NOT EXISTS props_backend ON props(backend);
+"""
+
+_TAGS: Dict[int, str] = {}
+
+
+def backend_tag(backend: Any, digits: Optional[int] = None) -> str:
+    """
+    Версия записей кэша: версия бэкенда (backend_identity), квантование ключа — ответ, сохранённый
+    при одном NEW_SSU_PHYS_CACHE_DIGITS, при другом уже не ответ для того же состояния, — и набор
+    суррогатных таблиц (phys_prop.surrogate.tables_version), если они подключены.
+    """
+    tag = f"{backend_identity(backend)}|{quantization_tag(digits)}"
+    tables = tables_version()
+    return f"{tag}|{tables}" if tables else tag
+
+
+def backend_identity(backend: Any) -> str:
+    """
+    Версия бэкенда: для бэкенда из phys_prop.backends — имя@версия, для функции
+    (PyFizika или её подмена) — функция + версия пакета PyFizika.
+    """
+    tag = _TAGS.get(id(backend))
+    if tag is None:
+        if callable(getattr(backend, "version", None)) and isinstance(getattr(backend, "name", None), str):
+            tag = f"{backend.name}@{backend.version()}"
+        else:
+            from batch.manifest import pyfizika_version
+
+            name = f"{getattr(backend, '__module__', '?')}.{getattr(backend, '__qualname__', '?')}"
+            tag = f"{name}@{pyfizika_version()}"
+        _TAGS[id(backend)] = tag
+    return tag
+
+
+class DiskPhysCache:
+    """Таблица props в sqlite: ответ PyFizika (JSON) по ключу запроса и версии бэкенда."""
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_DB_SIZE) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_S, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def row_key(key: Hashable, tag: str) -> str:
+        payload = json.dumps([SCHEMA_VERSION, tag, key], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: Hashable, tag: str) -> Optional[List[Dict[str, Any]]]:
+        rk = self.row_key(key, tag)
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT value FROM props WHERE key = ?", (rk,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE props SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), rk))
+        except sqlite3.Error as e:
+            log.warning("Кэш физсвойств %s недоступен на чтение: %s", self.path, e)
+            row = None
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        _CACHE_REQUESTS.inc(cache="phys_props_disk", result="miss" if row is None else "hit")
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key: Hashable, tag: str, value: List[Dict[str, Any]]) -> None:
+        documents = ",".join(sorted({str(d) for d, _ in key[0]})) if isinstance(key, tuple) and key else ""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("INSERT OR REPLACE INTO props(key, backend, documents, value, created, last_used) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             (self.row_key(key, tag), tag, documents, json.dumps(value, ensure_ascii=False), now, now))
+                self._puts += 1
+                if self._puts % EVICT_EVERY == 0:
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            log.warning("Кэш физсвойств %s недоступен на запись: %s", self.path, e)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        extra = conn.execute("SELECT COUNT(*) FROM props").fetchone()[0] - self.max_entries
+        if extra <= 0:
+            return 0
+        conn.execute("DELETE FROM props WHERE key IN (SELECT key FROM props ORDER BY last_used LIMIT ?)", (extra,))
+        log.info("Кэш физсвойств %s: вытеснено %d записей (предел %d)", self.path, extra, self.max_entries)
+        return extra
+
+    def evict(self) -> int:
+        with self._lock:
+            return self._evict(self._connect())
+
+    def purge(self, *, keep_backend: Optional[str] = None, document: Optional[str] = None) -> int:
+        """Удаляет записи других версий бэкенда (keep_backend) и/или с documentId = document."""
+        where, params = [], []
+        if keep_backend is not None:
+            where.append("backend != ?")
+            params.append(keep_backend)
+        if document is not None:
+            where.append("(',' || documents || ',') LIKE ?")
+            params.append(f"%,{document},%")
+        if not where:
+            return 0
+        with self._lock:
+            cur = self._connect().execute(f"DELETE FROM props WHERE {' AND '.join(where)}", params)
+            return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            entries, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM props").fetchone()
+            by_backend = dict(conn.execute("SELECT backend, COUNT(*) FROM props GROUP BY backend").fetchall())
+        size = sum(p.stat().st_size for p in self.path.parent.glob(self.path.name + "*") if p.is_file())
+        return {"path": str(self.path), "entries": entries, "max_entries": self.max_entries,
+                "stored_hits": hits, "by_backend": by_backend, "bytes": size,
+                "process_hits": self.hits, "process_misses": self.misses}
+
+
+_STORE: Optional[DiskPhysCache] = None
+
+
+def persistent() -> Optional[DiskPhysCache]:
+    """Кэш из NEW_SSU_PHYS_CACHE_DB или None, если переменная не задана."""
+    global _STORE
+    path = os.environ.get(ENV_DB, "").strip()
+    if not path:
+        return None
+    if _STORE is None or _STORE.path != Path(path):
+        raw_size = os.environ.get(ENV_DB_SIZE, "").strip()
+        _STORE = DiskPhysCache(Path(path), int(raw_size) if raw_size.isdigit() else DEFAULT_DB_SIZE)
+    return _STORE
+
+
+# -------------------- CLI --------------------
+
+def _warm_one(src: Path, dst: Path) -> None:
+    from main import _calculate, _load_json
+
+    _calculate(_load_json(src))
+
+
+def _print_stats(st: Dict[str, Any]) -> None:
+    print(f"{st['path']}: записей {st['entries']} из {st['max_entries']}, {st['bytes'] / 1e6:.1f} МБ, "
+          f"попаданий за всё время {st['stored_hits']}")
+    for backend, n in sorted(st["by_backend"].items()):
+        print(f"  {backend}: {n}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Постоянный кэш физсвойств new_ssu (sqlite)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    warm = sub.add_parser("warm", help="прогнать входы каталога и заполнить кэш")
+    warm.add_argument("--input", type=Path, default=Path("inputdata"), help="каталог входов (рекурсивно)")
+    warm.add_argument("--glob", default="*.json", help="маска входов")
+    warm.add_argument("--workers", type=int, default=1, help="процессов расчёта")
+    warm.add_argument("--physics", choices=available(), default=None,
+                      help=f"бэкенд физсвойств (phys_prop.backends); по умолчанию ${ENV_BACKEND} или pyfizika")
+    stats = sub.add_parser("stats", help="размер и состав кэша")
+    purge = sub.add_parser("purge", help="удалить записи")
+    purge.add_argument("--stale", action="store_true", help="записи других версий бэкенда")
+    purge.add_argument("--document", default=None, help="записи с этим documentId")
+    purge.add_argument("--physics", choices=available(), default=None,
+                       help="чей бэкенд считать текущим для --stale (по умолчанию — как для warm)")
+    for p in (warm, stats, purge):
+        p.add_argument("--db", type=Path, default=None, help=f"файл базы (по умолчанию ${ENV_DB})")
+    args = ap.parse_args(argv)
+
+    db = args.db or (Path(os.environ[ENV_DB]) if os.environ.get(ENV_DB) else None)
+    if db is None:
+        ap.error(f"укажите --db или {ENV_DB}")
+    os.environ[ENV_DB] = str(db)  # воркеры run_batch открывают ту же базу
+    store = persistent()
+
+    if args.cmd == "stats":
+        _print_stats(store.stats())
+        return 0
+
+    if args.physics:
+        os.environ[ENV_BACKEND] = args.physics  # и для воркеров run_batch
+
+    if args.cmd == "purge":
+        if not args.stale and args.document is None:
+            ap.error("purge: укажите --stale и/или --document")
+        keep = None
+        if args.stale:
+            from phys_prop.backends import get_backend
+            keep = backend_tag(get_backend().identity())
+        print(f"удалено записей: {store.purge(keep_backend=keep, document=args.document)}")
+        return 0
+
+    from batch.pool import BatchTask, run_batch
+
+    tasks = [BatchTask(src=p, dst=p, rel=p.relative_to(args.input).as_posix())
+             for p in sorted(args.input.rglob(args.glob)) if p.is_file() and not p.name.startswith("_")]
+    requests = metrics.counter("new_ssu_cache_requests_total")
+    before = {r: requests.value(cache="phys_props_disk", result=r) for r in ("hit", "miss")}
+    report = run_batch(tasks, _warm_one, workers=args.workers)
+    hits, misses = (requests.value(cache="phys_props_disk", result=r) - before[r] for r in ("hit", "miss"))
+    total = hits + misses
+    print(f"входов: {len(tasks)}, с ошибкой: {len(report.failed)}")
+    print(f"обращений к кэшу: {total:.0f}, попаданий: {hits:.0f}, доля попаданий: "
+          f"{(hits / total if total else 0.0) * 100:.1f}%")
+    _print_stats(store.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    raise SystemExit(main())
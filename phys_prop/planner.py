@@ -0,0 +1,256 @@
+"""План физзапросов одного расчёта: одно обращение к бэкенду на состояние.
+
+run_calculation спрашивает физику из нескольких мест: базовое состояние (ρ, ρ_ст, k, μ и их
+погрешности), θ по T и p (stp_errors, иначе центральные разности — четыре возмущённых состояния,
+нужны только ρ и k) и ρ по составам метода 10. PhysPlan собирает эти потребности по состояниям:
+
+    plan = PhysPlan(raw_phys)
+    base = plan.get()                                    # весь requestList базы
+    plan.need({"T": ...}, ("rho", "k"))                  # заранее объявить состояния…
+    up = plan.get({"T": ...}, ("rho", "k"))              # …и получить их по одному вызову
+    rho = plan.get({"composition": comp}, ("rho",))      # то же состояние, что база → без вызова
+
+Состояние — physProperties базы с подменёнными полями; ключ — квантованное представление из
+phys_prop.cache (единицы приведены к SI), поэтому T в °C и в K или состав в долях и процентах
+совпадают. get() состояния забирает и все объявленные через need() состояния с тем же набором
+недостающих величин — одним PhysMinimalRunner.many (один calc_many бэкенда): четыре возмущённых
+состояния θ стоят один вызов. Следующий get() с подмножеством уже полученного отвечает из памяти
+плана; недостающие величины дозапрашиваются отдельным вызовом только из них.
+
+Счётчики: requests — сколько раз расчёт спросил физику (раньше каждый раз был отдельный
+PhysMinimalRunner), backend_calls — сколько запусков бэкенда реально ушло, saved — разница
+(метрика new_ssu_phys_calls_saved_total). Кэш PHYS_CACHE под планом продолжает работать: план
+убирает повторы внутри запроса даже при выключенном кэше и не просит лишних величин.
+"""
+from __future__ import annotations
+
+import math
+from importlib import import_module
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence
+
+from logger_config import get_logger
+from perf import metrics
+from phys_prop.cache import state_key
+from phys_prop.calc_phys_prop import PhysMinimalRunner, normalize_composition_percent_map
+
+log = get_logger("PhysPlan")
+
+_PLAN_REQUESTS = metrics.counter("new_ssu_phys_plan_requests_total",
+                                 "Запросы физики из run_calculation: kind=state|thetas")
+_PLAN_CALLS = metrics.counter("new_ssu_phys_plan_backend_calls_total",
+                              "Запуски бэкенда физики по плану: kind=state|thetas")
+_PLAN_SAVED = metrics.counter("new_ssu_phys_calls_saved_total",
+                              "Обращения к бэкенду физики, которых не понадобилось благодаря плану запроса")
+
+# runner.to_dict() → physValueId
+_OUT_KEYS = {"rho": ("ro", "err_ro"), "rho_st": ("ro_st", "err_ro_st"), "k": ("k", "err_k"), "mu": ("mu", "err_mu")}
+DEFAULT_DOCUMENT = "GOST_30319_3_2015"
+_MISSING = object()
+
+
+class _State:
+    __slots__ = ("props", "wanted", "fetched", "result", "error")
+
+    def __init__(self, props: Dict[str, Any]) -> None:
+        self.props = props
+        self.wanted: List[str] = []
+        self.fetched: set = set()
+        self.result: Dict[str, Any] = {k: None for pair in _OUT_KEYS.values() for k in pair}
+        self.error: Optional[Exception] = None  # исключение раннера (фаза не газ и т.п.) — отдаётся в get()
+
+    def missing(self) -> List[str]:
+        return [v for v in self.wanted if v not in self.fetched]
+
+
+class PhysPlan:
+    """Потребности одного запроса в физике по состояниям и их ответы (память живёт с запросом)."""
+
+    def __init__(self, base_raw: Mapping[str, Any], runner: Any = PhysMinimalRunner) -> None:
+        self.base_raw = base_raw
+        self._runner = runner
+        pkg = base_raw.get("physPackage") or {}
+        self.base_props: Dict[str, Any] = dict(pkg.get("physProperties") or {})
+        self.base_requests: List[Mapping[str, Any]] = list(pkg.get("requestList") or [])
+        first = self.base_requests[0] if self.base_requests else None
+        self.document = (first.get("documentId") if isinstance(first, Mapping) else None) or DEFAULT_DOCUMENT
+        self._states: Dict[Hashable, _State] = {}
+        self._stp: Any = _MISSING
+        self.requests = 0
+        self.backend_calls = 0
+
+    # -------------------- состояния --------------------
+
+    def _state(self, overrides: Optional[Mapping[str, Any]]) -> _State:
+        props = dict(self.base_props)
+        for name, value in (overrides or {}).items():
+            if name == "composition" and isinstance(value, Mapping):
+                value = normalize_composition_percent_map(value)
+            props[name] = value
+        key = state_key(props)
+        st = self._states.get(key)
+        if st is None:
+            st = self._states[key] = _State(props)
+        return st
+
+    def _values(self, values: Optional[Iterable[str]]) -> List[str]:
+        if values is not None:
+            return list(values)
+        ids = [r.get("physValueId") for r in self.base_requests if isinstance(r, Mapping)]
+        return [v for v in ids if v] or list(PhysMinimalRunner.NEED_VALUES)
+
+    def need(self, overrides: Optional[Mapping[str, Any]] = None, values: Optional[Iterable[str]] = None) -> None:
+        """Объявить величины состояния заранее: get() запросит их одним вызовом."""
+        st = self._state(overrides)
+        for v in self._values(values):
+            if v not in st.wanted:
+                st.wanted.append(v)
+
+    def get(self, overrides: Optional[Mapping[str, Any]] = None,
+            values: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Ответ в формате PhysMinimalRunner.to_dict() (без thetas) для базы с подменой overrides.
+        values=None — весь requestList базы. Исключения бэкенда (фаза не газ и т.п.) пробрасываются.
+        """
+        self.requests += 1
+        _PLAN_REQUESTS.inc(kind="state")
+        st = self._state(overrides)
+        want = self._values(values)
+        if st.error is None and all(v in st.fetched for v in want):
+            _PLAN_SAVED.inc()
+        else:
+            for v in want:
+                if v not in st.wanted:
+                    st.wanted.append(v)
+            if st.error is None:
+                self._fetch(st)
+        if st.error is not None:
+            raise st.error
+        return dict(st.result)
+
+    def _fetch(self, st: _State) -> None:
+        """Состояние st и все объявленные с тем же набором недостающих величин — одним вызовом бэкенда."""
+        values = st.missing()
+        group = [st] + [o for o in self._states.values()
+                        if o is not st and o.error is None and set(o.missing()) == set(values)]
+        if self.base_requests and set(values) == set(self._values(None)):
+            requests = self.base_requests  # база целиком — исходный requestList (тот же ключ PHYS_CACHE)
+        else:
+            requests = [{"documentId": self.document, "physValueId": v} for v in values]
+        datas = []
+        for o in group:
+            data = dict(self.base_raw)
+            pkg = dict(self.base_raw.get("physPackage") or {})
+            pkg["physProperties"] = dict(o.props)
+            pkg["requestList"] = requests
+            data["physPackage"] = pkg
+            datas.append(data)
+        self.backend_calls += 1
+        _PLAN_CALLS.inc(kind="state")
+        for o, runner in zip(group, self._runner.many(datas, requests)):
+            if isinstance(runner, Exception):
+                o.error = runner
+                continue
+            out = runner.to_dict()
+            for v in values:
+                o.fetched.add(v)
+                for k in _OUT_KEYS.get(v, ()):
+                    o.result[k] = out.get(k)
+
+    # -------------------- θ --------------------
+
+    def _stp_thetas(self) -> Optional[Callable[..., Any]]:
+        if self._stp is _MISSING:
+            try:
+                self._stp = getattr(import_module("stp_errors"), "calc_thetas_from_requestList", None)
+            except Exception:
+                self._stp = None
+            if not callable(self._stp):
+                self._stp = None
+        return self._stp
+
+    def thetas(self, h: float = 0.01) -> Optional[Dict[str, float]]:
+        """
+        θ_ρ и θ_k по T и p_abs: stp_errors (одним вызовом T+p_abs, 'p' — только если p_abs не дал),
+        недостающие — логарифмической центральной разностью по четырём состояниям T·(1±h), p·(1±h),
+        которые объявляются вместе и запрашиваются только по ρ и k.
+        """
+        thetas: Dict[str, float] = {}
+        calc_thetas = self._stp_thetas()
+        if calc_thetas is not None:
+            data = dict(self.base_raw)
+            pkg = dict(self.base_raw.get("physPackage") or {})
+            pkg["requestList"] = [{"documentId": self.document, "physValueId": "rho"},
+                                  {"documentId": self.document, "physValueId": "k"}]
+            data["physPackage"] = pkg
+            for reqs in ([{"value": "rho", "variable": "T"}, {"value": "k", "variable": "T"},
+                          {"value": "rho", "variable": "p_abs"}, {"value": "k", "variable": "p_abs"}],
+                         [{"value": "rho", "variable": "p"}, {"value": "k", "variable": "p"}]):
+                if reqs[0]["variable"] == "p" and any(k.startswith(("theta_rho_p", "theta_k_p")) for k in thetas):
+                    break
+                self.requests += 1
+                self.backend_calls += 1
+                _PLAN_REQUESTS.inc(kind="thetas")
+                _PLAN_CALLS.inc(kind="thetas")
+                try:
+                    out = calc_thetas(reqs, **data)
+                except Exception as e:
+                    log.debug("stp_errors.calc_thetas_from_requestList: %s", e)
+                    continue
+                if isinstance(out, dict):
+                    thetas.update(out)
+
+        pairs = {}
+        if not any(k.endswith("_T") for k in thetas):
+            pairs["T"] = self._perturb_T(h)
+        if not any(k.endswith("_p") or k.endswith("_p_abs") for k in thetas):
+            pairs["p_abs"] = self._perturb_p(h)
+        for pair in pairs.values():
+            for overrides in pair or ():
+                self.need(overrides, ("rho", "k"))
+
+        denom = math.log(1 + h) - math.log(1 - h)
+        for var, pair in pairs.items():
+            if not pair:
+                continue
+            up, dn = (self._get_quiet(o) for o in pair)
+            if up and dn and up.get("ro") and dn.get("ro") and up.get("k") and dn.get("k"):
+                thetas[f"theta_rho_{var}"] = (math.log(up["ro"]) - math.log(dn["ro"])) / denom
+                thetas[f"theta_k_{var}"] = (math.log(up["k"]) - math.log(dn["k"])) / denom
+        return thetas or None
+
+    def _get_quiet(self, overrides: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return self.get(overrides, ("rho", "k"))
+        except Exception:
+            return None
+
+    def _perturb_T(self, h: float) -> Optional[Sequence[Dict[str, Any]]]:
+        T_node = self.base_props.get("T")
+        T_C = T_node.get("real") if isinstance(T_node, dict) else T_node
+        if T_C is None:
+            return None
+        T_K = (float(T_C) + 273.15) if float(T_C) < 200 else float(T_C)
+        return [{"T": {"real": T_K * (1 + s * h) - 273.15, "unit": "C"}} for s in (1, -1)]
+
+    def _perturb_p(self, h: float) -> Optional[Sequence[Dict[str, Any]]]:
+        p_node = self.base_props.get("p_abs")
+        # поддержим Pa/kPa/MPa; возмущённое давление — в тех же единицах
+        if not isinstance(p_node, dict) or "real" not in p_node:
+            return None
+        unit = str(p_node.get("unit", "")).lower()
+        factor = 1e6 if "mpa" in unit else 1e3 if "kpa" in unit else 1.0
+        p_Pa = float(p_node["real"]) * factor
+        return [{"p_abs": {"real": p_Pa * (1 + s * h) / factor, "unit": p_node["unit"]}} for s in (1, -1)]
+
+    # -------------------- итог --------------------
+
+    @property
+    def saved(self) -> int:
+        return self.requests - self.backend_calls
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "backend_calls": self.backend_calls, "saved": self.saved,
+                "states": len(self._states)}
+
+
+__all__ = ["PhysPlan"]
@@ -0,0 +1,521 @@
+"""Суррогатные таблицы (T, p) для узла учёта с редко меняющимся составом.
+
+Для фиксированного состава и документа (и прочих physProperties: T_st, p_st, влажность) ρ, ρ_ст, k
+и μ табулируются на прямоугольной сетке (T, p) и дальше берутся бикубической интерполяцией
+(эрмитовы кубики, производные в узлах — конечные разности второго порядка), без уравнения состояния:
+
+    python -m phys_prop.surrogate build --input inputdata/sharp_01.json --T=-40:80 --p=0.1:12 \\
+        --tol 1e-4 --workers 4 --out surrogates/sharp_01.json
+    python -m phys_prop.surrogate check surrogates/sharp_01.json --points 2000
+    NEW_SSU_PHYS_SURROGATES=surrogates python main.py --input archive --outdir out
+
+Сетка адаптивная: начинается с 5×5 и делит пополам интервалы T или p, на серединах которых
+интерполяция расходится с бэкендом больше tol (относительно), пока не сойдётся. Затем таблица
+проверяется на отложенных точках — центрах всех ячеек итоговой сетки (ни один не узел) и
+случайных точках: найденная max относительная ошибка записывается в таблицу и не превышает tol,
+иначе сетка уточняется дальше (или build падает на max_nodes). Расчёты узлов идут пачками через
+calc_many бэкенда, при workers > 1 — в процессах.
+
+Погрешности error_* у PyFizika ступенчатые по диапазонам, гарантии на них нет: они
+интерполируются билинейно как доля от значения. Вне сетки, для другого состава/документа, величин
+не из таблицы и узлов, где бэкенд вернул ошибку, ответ даёт настоящий бэкенд: PhysMinimalRunner
+спрашивает загруженные таблицы (NEW_SSU_PHYS_SURROGATES или register()) перед кэшем и бэкендом.
+Ряды по времени — SurrogateTable.series(T, p): вектор значений одним вызовом.
+
+Таблица помнит бэкенд (имя@версия); таблица чужого бэкенда при загрузке пропускается.
+Ответы таблиц отличаются от бэкенда в пределах tol, поэтому набор таблиц (tables_version: каталог и
+хеши файлов, плюс таблицы из register()) входит в версию выходов batch.manifest и записей кэша на диске.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+from logger_config import get_logger
+from perf import metrics
+from phys_prop.backends import get_backend, pressure_pa, temperature_k
+from phys_prop.cache import state_key
+
+log = get_logger("PhysSurrogate")
+
+ENV_DIR = "NEW_SSU_PHYS_SURROGATES"
+VALUES = ("rho", "rho_st", "k", "mu")
+AXES = ("T", "p_abs")  # по ним сетка; остальные physProperties входят в ключ таблицы, кроме:
+# измерений узла, которые меняются от точки к точке, но не входят в уравнение состояния
+# (p_atm/p_izb при заданном p_abs не нужны)
+MEASUREMENTS = ("dp", "Ro", "Roc", "k", "mu", "p_atm", "p_izb")
+DEFAULT_DOCUMENT = "GOST_30319_3_2015"
+FORMAT_VERSION = 1
+
+_CACHE_REQUESTS = metrics.counter("new_ssu_cache_requests_total", "Обращения к кэшам: cache=..., result=hit|miss")
+
+
+def _np():
+    import numpy as np
+    return np
+
+
+def table_key(documents: Sequence[str], props: Mapping[str, Any]) -> Hashable:
+    """Ключ таблицы: documentId запросов и physProperties без осей и измерений (квантованные, в SI)."""
+    rest = {k: v for k, v in props.items() if k not in AXES and k not in MEASUREMENTS}
+    return tuple(sorted(set(documents))), state_key(rest)
+
+
+# -------------------- интерполяция --------------------
+
+def _hermite(t):
+    t2 = t * t
+    t3 = t2 * t
+    return 2 * t3 - 3 * t2 + 1, t3 - 2 * t2 + t, -2 * t3 + 3 * t2, t3 - t2
+
+
+class _Bicubic:
+    """Бикубический эрмитов сплайн на прямоугольной неравномерной сетке x × y."""
+
+    def __init__(self, x, y, f) -> None:
+        np = _np()
+        self.x, self.y, self.f = x, y, f
+        self.fx = np.gradient(f, x, axis=0, edge_order=2)
+        self.fy = np.gradient(f, y, axis=1, edge_order=2)
+        self.fxy = np.gradient(self.fx, y, axis=1, edge_order=2)
+
+    def cells(self, xq, yq):
+        np = _np()
+        i = np.clip(np.searchsorted(self.x, xq, side="right") - 1, 0, len(self.x) - 2)
+        j = np.clip(np.searchsorted(self.y, yq, side="right") - 1, 0, len(self.y) - 2)
+        hx = self.x[i + 1] - self.x[i]
+        hy = self.y[j + 1] - self.y[j]
+        return i, j, hx, hy, (xq - self.x[i]) / hx, (yq - self.y[j]) / hy
+
+    def __call__(self, xq, yq):
+        i, j, hx, hy, u, v = self.cells(xq, yq)
+        hu, hv = _hermite(u), _hermite(v)
+        out = 0.0
+        for di, (u0, u1) in ((0, (hu[0], hu[1])), (1, (hu[2], hu[3]))):
+            for dj, (v0, v1) in ((0, (hv[0], hv[1])), (1, (hv[2], hv[3]))):
+                ii, jj = i + di, j + dj
+                out = out + (u0 * v0 * self.f[ii, jj] + hx * u1 * v0 * self.fx[ii, jj]
+                             + hy * u0 * v1 * self.fy[ii, jj] + hx * hy * u1 * v1 * self.fxy[ii, jj])
+        return out
+
+    def bilinear(self, g, xq, yq):
+        i, j, _, _, u, v = self.cells(xq, yq)
+        return ((1 - u) * (1 - v) * g[i, j] + u * (1 - v) * g[i + 1, j]
+                + (1 - u) * v * g[i, j + 1] + u * v * g[i + 1, j + 1])
+
+
+# -------------------- расчёт узлов --------------------
+
+def _eval_chunk(args: Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+    backend_name, request_list, states = args
+    return get_backend(backend_name).calc_many(request_list, states)
+
+
+class _Evaluator:
+    """Точные значения бэкенда в точках (T, p) для фиксированных остальных physProperties."""
+
+    CHUNK = 64
+
+    def __init__(self, props: Mapping[str, Any], document: str, backend_name: str, workers: int) -> None:
+        self.props = dict(props)
+        self.request_list = [{"documentId": document, "physValueId": v} for v in VALUES]
+        self.backend_name = backend_name
+        self.workers = max(1, workers)
+        self.calls = 0
+        self._memo: Dict[Tuple[float, float], Dict[str, float]] = {}
+
+    def _state(self, T: float, p: float) -> Dict[str, Any]:
+        return dict(self.props, T={"real": T, "unit": "K"}, p_abs={"real": p, "unit": "Pa"})
+
+    @staticmethod
+    def _parse(resp: List[Dict[str, Any]]) -> Dict[str, float]:
+        from phys_prop.calc_phys_prop import PHYS_KEY_ALIASES
+
+        combined: Dict[str, Any] = {}
+        for d in resp or []:
+            if not isinstance(d, Mapping) or "errorString" in d:
+                continue
+            if d.get("phase") and d.get("phase") != "gas":
+                return {}
+            combined.update(d)
+        out = {}
+        for name, keys in PHYS_KEY_ALIASES.items():
+            val = next((combined[k] for k in keys if combined.get(k) is not None), None)
+            out[name] = float(val) if val is not None else math.nan
+        return out
+
+    def __call__(self, points: Sequence[Tuple[float, float]]) -> List[Dict[str, float]]:
+        todo = [pt for pt in dict.fromkeys(points) if pt not in self._memo]
+        if todo:
+            states = [self._state(T, p) for T, p in todo]
+            chunks = [states[k:k + self.CHUNK] for k in range(0, len(states), self.CHUNK)]
+            if self.workers > 1 and len(chunks) > 1:
+                with ProcessPoolExecutor(self.workers, mp_context=get_context("fork")) as ex:
+                    parts = list(ex.map(_eval_chunk, [(self.backend_name, self.request_list, c) for c in chunks]))
+            else:
+                parts = [_eval_chunk((self.backend_name, self.request_list, c)) for c in chunks]
+            self.calls += len(states)
+            responses = [r for part in parts for r in part]
+            for pt, resp in zip(todo, responses):
+                self._memo[pt] = self._parse(resp)
+        return [self._memo[pt] for pt in points]
+
+
+def _rel_errors(approx: Dict[str, Any], exact: List[Dict[str, float]]):
+    """max по величинам |интерп − точн| / |точн| в каждой точке; точки с ошибкой бэкенда — 0."""
+    np = _np()
+    err = np.zeros(len(exact))
+    for name in VALUES:
+        ex = np.array([e.get(name, math.nan) for e in exact])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.abs(approx[name] - ex) / np.abs(ex)
+        err = np.maximum(err, np.nan_to_num(rel, nan=0.0, posinf=0.0))
+    return err
+
+
+# -------------------- таблица --------------------
+
+class SurrogateTable:
+    """Таблица одного состава: узлы T (К) × p (Па), значения VALUES и доли погрешностей в узлах."""
+
+    def __init__(self, props: Mapping[str, Any], documents: Sequence[str], backend_name: str, backend: str,
+                 T, p, values: Mapping[str, Any], rel_errors: Mapping[str, Any],
+                 tol: float, max_rel_error: float, checked: int) -> None:
+        self.props = dict(props)
+        self.documents = tuple(sorted(set(documents)))
+        self.backend_name = backend_name  # имя в phys_prop.backends
+        self.backend = backend            # backend_identity: имя/функция и версия
+        self.T, self.p = T, p
+        self.values = dict(values)
+        self.rel_errors = dict(rel_errors)
+        self.tol = tol
+        self.max_rel_error = max_rel_error
+        self.checked = checked
+        self.key = table_key(self.documents, self.props)
+        self._splines = {name: _Bicubic(T, p, f) for name, f in self.values.items()}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.T), len(self.p)
+
+    def interpolate(self, T_K, p_Pa) -> Dict[str, Any]:
+        """Векторно: значения и погрешности в точках; вне сетки и в ячейках с ошибкой бэкенда — NaN."""
+        np = _np()
+        T_K, p_Pa = np.atleast_1d(np.asarray(T_K, dtype=float)), np.atleast_1d(np.asarray(p_Pa, dtype=float))
+        inside = (T_K >= self.T[0]) & (T_K <= self.T[-1]) & (p_Pa >= self.p[0]) & (p_Pa <= self.p[-1])
+        out: Dict[str, Any] = {}
+        for name, spline in self._splines.items():
+            val = np.where(inside, spline(T_K, p_Pa), np.nan)
+            out[name] = val
+            rel = spline.bilinear(self.rel_errors[name], T_K, p_Pa)
+            out[f"error_{name}"] = np.abs(val) * rel
+        return out
+
+    def series(self, T_K, p_Pa, workers: int = 1) -> Dict[str, Any]:
+        """Ряд (T, p) целиком: таблица, а точки вне сетки — настоящим бэкендом (calc_many)."""
+        np = _np()
+        out = self.interpolate(T_K, p_Pa)
+        miss = np.flatnonzero(np.isnan(out["rho"]))
+        if len(miss):
+            exact = _Evaluator(self.props, self.documents[0], self.backend_name, workers)(
+                [(float(np.atleast_1d(T_K)[k]), float(np.atleast_1d(p_Pa)[k])) for k in miss])
+            for name in out:
+                out[name][miss] = [e.get(name, math.nan) for e in exact]
+        return out
+
+    def response(self, request_list: Sequence[Mapping[str, Any]], props: Mapping[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Ответ в формате PyFizika для одного состояния или None (не табличная точка)."""
+        wanted = [str(r.get("physValueId")) for r in request_list]
+        if not wanted or any(v not in self.values for v in wanted):
+            return None
+        T = temperature_k(props.get("T"), math.nan)
+        p = pressure_pa(props.get("p_abs"), None)
+        if p is None:
+            return None
+        got = self.interpolate(T, p)
+        resp = []
+        for v in wanted:
+            val = float(got[v][0])
+            if math.isnan(val):
+                return None
+            resp.append({v: val, f"error_{v}": float(got[f"error_{v}"][0]), "phase": "gas"})
+        return resp
+
+    # -------------------- файл --------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        def _list(a):
+            return [[None if math.isnan(x) else x for x in row] for row in a.tolist()]
+
+        return {
+            "format": FORMAT_VERSION, "backend_name": self.backend_name, "backend": self.backend,
+            "documents": list(self.documents),
+            "props": self.props, "tol": self.tol, "max_rel_error": self.max_rel_error, "checked": self.checked,
+            "T_K": self.T.tolist(), "p_Pa": self.p.tolist(),
+            "values": {k: _list(v) for k, v in self.values.items()},
+            "rel_errors": {k: _list(v) for k, v in self.rel_errors.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> "SurrogateTable":
+        np = _np()
+        if d.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемый формат суррогатной таблицы: {d.get('format')}")
+
+        def _arr(rows):
+            return np.array([[math.nan if x is None else x for x in row] for row in rows], dtype=float)
+
+        return cls(d["props"], d["documents"], d["backend_name"], d["backend"], np.array(d["T_K"]), np.array(d["p_Pa"]),
+                   {k: _arr(v) for k, v in d["values"].items()}, {k: _arr(v) for k, v in d["rel_errors"].items()},
+                   d["tol"], d["max_rel_error"], d["checked"])
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SurrogateTable":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+# -------------------- построение --------------------
+
+def _midpoints(a):
+    return (a[:-1] + a[1:]) / 2
+
+
+def build(props: Mapping[str, Any], *, document: str = DEFAULT_DOCUMENT,
+          T_range: Tuple[float, float] = (233.15, 353.15), p_range: Tuple[float, float] = (1e5, 12e6),
+          tol: float = 1e-4, workers: int = 1, initial: int = 5, max_nodes: int = 257,
+          holdout: int = 200, seed: int = 0, backend: Optional[str] = None) -> SurrogateTable:
+    """
+    Таблица для physProperties props (состав нормализуется; T и p_abs игнорируются) на
+    T_range (К) × p_range (Па). Бросает RuntimeError, если tol не достигнута при max_nodes узлах по оси.
+    """
+    np = _np()
+    from phys_prop.calc_phys_prop import normalize_composition_percent_map
+    from phys_prop.disk_cache import backend_identity
+
+    base = {k: v for k, v in props.items() if k not in AXES and k not in MEASUREMENTS}
+    if isinstance(base.get("composition"), Mapping):
+        base["composition"] = normalize_composition_percent_map(base["composition"])
+    backend_obj = get_backend(backend)
+    evaluate = _Evaluator(base, document, backend_obj.name, workers)
+    T = np.linspace(T_range[0], T_range[1], initial)
+    p = np.linspace(p_range[0], p_range[1], initial)
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+
+    def grid(Ts, ps):
+        exact = evaluate([(float(a), float(b)) for a in Ts for b in ps])
+        return {name: np.array([e.get(name, math.nan) for e in exact]).reshape(len(Ts), len(ps))
+                for name in list(VALUES) + [f"error_{v}" for v in VALUES]}
+
+    def table(max_err: float = math.inf, checked: int = 0) -> SurrogateTable:
+        g = grid(T, p)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = {v: np.nan_to_num(np.abs(g[f"error_{v}"] / g[v]), nan=0.0) for v in VALUES}
+        return SurrogateTable(base, [document], backend_obj.name, backend_identity(backend_obj.identity()), T, p,
+                              {v: g[v] for v in VALUES}, rel, tol, max_err, checked)
+
+    def bad_intervals(tab: SurrogateTable, pts: List[Tuple[float, float]]):
+        err = _rel_errors(tab.interpolate([a for a, _ in pts], [b for _, b in pts]), evaluate(pts))
+        return [pt for pt, e in zip(pts, err) if e > tol], float(err.max()) if len(err) else 0.0
+
+    while True:
+        tab = table()
+        Tm, pm = _midpoints(T), _midpoints(p)
+        probes = ([(float(a), float(b)) for a in Tm for b in p] + [(float(a), float(b)) for a in T for b in pm]
+                  + [(float(a), float(b)) for a in Tm for b in pm])
+        bad, _ = bad_intervals(tab, probes)
+        if not bad:
+            # отложенные точки: центры ячеек итоговой сетки не узлы и не пробы — их пробы стали узлами
+            centers = [(float(a), float(b)) for a in _midpoints(T) for b in _midpoints(p)]
+            randoms = [(rng.uniform(*T_range), rng.uniform(*p_range)) for _ in range(holdout)]
+            bad, max_err = bad_intervals(tab, centers + randoms)
+            if not bad:
+                tab = table(max_err, len(centers) + len(randoms))
+                log.info("Суррогат %dx%d: max отн. ошибка %.3g (tol %.3g) на %d отложенных точках, "
+                         "вызовов бэкенда %d, %.1f с", len(T), len(p), max_err, tol, tab.checked,
+                         evaluate.calls, time.perf_counter() - t0)
+                return tab
+        # делим интервалы, в которых нашлась плохая точка (по оси, где точка не на узле)
+        newT = {float(T[i] + T[i + 1]) / 2 for a, b in bad for i in [int(np.searchsorted(T, a) - 1)]
+                if 0 <= i < len(T) - 1 and a not in T}
+        newp = {float(p[j] + p[j + 1]) / 2 for a, b in bad for j in [int(np.searchsorted(p, b) - 1)]
+                if 0 <= j < len(p) - 1 and b not in p}
+        if len(T) + len(newT) > max_nodes or len(p) + len(newp) > max_nodes:
+            raise RuntimeError(f"Суррогат: tol={tol:g} не достигнута при {max_nodes} узлах по оси "
+                               f"(сетка {len(T)}x{len(p)})")
+        T = np.union1d(T, sorted(newT))
+        p = np.union1d(p, sorted(newp))
+
+
+# -------------------- загруженные таблицы --------------------
+
+_TABLES: Dict[Hashable, SurrogateTable] = {}
+_LOADED_DIR: Optional[str] = None
+_REGISTERED: Dict[Hashable, str] = {}   # ключ таблицы из register() → sha256 её содержимого
+_DIR_DIGESTS: Dict[str, str] = {}       # каталог NEW_SSU_PHYS_SURROGATES → sha256 его таблиц
+
+
+def register(table: SurrogateTable) -> None:
+    _TABLES[table.key] = table
+    payload = json.dumps(table.to_dict(), ensure_ascii=False, sort_keys=True)
+    _REGISTERED[table.key] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def clear() -> None:
+    global _LOADED_DIR
+    _TABLES.clear()
+    _REGISTERED.clear()
+    _LOADED_DIR = None
+
+
+def _dir_digest(path: str) -> str:
+    """Имена и содержимое *.json каталога; как и таблицы (_load_env), читается один раз на процесс."""
+    digest = _DIR_DIGESTS.get(path)
+    if digest is None:
+        h = hashlib.sha256(path.encode("utf-8"))
+        for f in sorted(Path(path).glob("*.json")):
+            h.update(b"\0" + f.name.encode("utf-8") + b"\0")
+            try:
+                h.update(f.read_bytes())
+            except OSError:
+                pass
+        digest = _DIR_DIGESTS[path] = h.hexdigest()
+    return digest
+
+
+def tables_version() -> str:
+    """'' без таблиц, иначе 'surrogates=<хеш>' — от каталога NEW_SSU_PHYS_SURROGATES и таблиц register()."""
+    path = os.environ.get(ENV_DIR, "").strip()
+    if not path and not _REGISTERED:
+        return ""
+    h = hashlib.sha256()
+    if path:
+        h.update(_dir_digest(path).encode("ascii"))
+    for digest in sorted(_REGISTERED.values()):
+        h.update(digest.encode("ascii"))
+    return f"surrogates={h.hexdigest()[:16]}"
+
+
+def _load_env() -> None:
+    global _LOADED_DIR
+    path = os.environ.get(ENV_DIR, "").strip()
+    if not path or path == _LOADED_DIR:
+        return
+    _LOADED_DIR = path
+    from phys_prop.disk_cache import backend_identity
+
+    current = backend_identity(get_backend().identity())
+    for f in sorted(Path(path).glob("*.json")):
+        try:
+            table = SurrogateTable.load(f)
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("Суррогатная таблица %s не загружена: %s", f, e)
+            continue
+        if table.backend != current:
+            log.warning("Суррогатная таблица %s построена бэкендом %s, текущий %s — пропускаю",
+                        f, table.backend, current)
+            continue
+        _TABLES[table.key] = table
+    log.info("Суррогатных таблиц загружено: %d (%s)", len(_TABLES), path)
+
+
+def lookup(request_list: Sequence[Mapping[str, Any]], props: Mapping[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Ответ из таблицы для состояния или None — тогда считает бэкенд."""
+    _load_env()
+    if not _TABLES:
+        return None
+    docs = [str(r.get("documentId") or DEFAULT_DOCUMENT) for r in request_list]
+    table = _TABLES.get(table_key(docs, props))
+    resp = table.response(request_list, props) if table is not None else None
+    _CACHE_REQUESTS.inc(cache="phys_surrogate", result="miss" if resp is None else "hit")
+    return resp
+
+
+# -------------------- CLI --------------------
+
+def _range(text: str) -> Tuple[float, float]:
+    lo, hi = (float(x) for x in text.split(":"))
+    return lo, hi
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Суррогатные таблицы (T, p) физсвойств new_ssu")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="построить таблицу для состава из входного JSON")
+    b.add_argument("--input", type=Path, required=True, help="вход расчёта: physPackage даёт состав и документ")
+    b.add_argument("--T", type=_range, default=(-40.0, 80.0), help="диапазон T, °C (lo:hi)")
+    b.add_argument("--p", type=_range, default=(0.1, 12.0), help="диапазон p_abs, МПа (lo:hi)")
+    b.add_argument("--tol", type=float, default=1e-4, help="max относительная ошибка интерполяции")
+    b.add_argument("--workers", type=int, default=1, help="процессов для расчёта узлов")
+    b.add_argument("--holdout", type=int, default=200, help="случайных отложенных точек проверки")
+    b.add_argument("--out", type=Path, required=True, help="файл таблицы (*.json)")
+    c = sub.add_parser("check", help="сверить таблицу с бэкендом и сравнить скорость")
+    c.add_argument("table", type=Path)
+    c.add_argument("--points", type=int, default=1000, help="случайных точек внутри сетки")
+    c.add_argument("--seed", type=int, default=1)
+    for p in (b, c):
+        p.add_argument("--physics-backend", default=None, help="бэкенд (phys_prop.backends), по умолчанию из окружения")
+    args = ap.parse_args(argv)
+    if args.physics_backend:
+        from phys_prop.backends import ENV_BACKEND
+        os.environ[ENV_BACKEND] = args.physics_backend
+
+    if args.cmd == "build":
+        data = json.loads(args.input.read_text(encoding="utf-8"))
+        pkg = data.get("physPackage") or {}
+        props = dict(pkg.get("physProperties") or {})  # как их получит PhysMinimalRunner
+        rl = pkg.get("requestList") or []
+        document = (rl[0].get("documentId") if rl and isinstance(rl[0], Mapping) else None) or DEFAULT_DOCUMENT
+        table = build(props, document=document, T_range=(args.T[0] + 273.15, args.T[1] + 273.15),
+                      p_range=(args.p[0] * 1e6, args.p[1] * 1e6), tol=args.tol, workers=args.workers,
+                      holdout=args.holdout)
+        table.save(args.out)
+        print(f"{args.out}: сетка {table.shape[0]}x{table.shape[1]}, max отн. ошибка {table.max_rel_error:.3g} "
+              f"(tol {table.tol:g}) на {table.checked} отложенных точках")
+        return 0
+
+    np = _np()
+    table = SurrogateTable.load(args.table)
+    rng = random.Random(args.seed)
+    pts = [(rng.uniform(table.T[0], table.T[-1]), rng.uniform(table.p[0], table.p[-1])) for _ in range(args.points)]
+    Ts, ps = np.array([a for a, _ in pts]), np.array([b for _, b in pts])
+    evaluate = _Evaluator(table.props, table.documents[0], table.backend_name, 1)
+    t0 = time.perf_counter()
+    exact = [evaluate([pt])[0] for pt in pts]  # как расчёт по часовым точкам: состояние за состоянием
+    t_backend = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    approx = table.interpolate(Ts, ps)
+    t_table = time.perf_counter() - t0
+    err = _rel_errors(approx, exact)
+    print(f"{args.table}: сетка {table.shape[0]}x{table.shape[1]}, точек {len(pts)}, max отн. ошибка "
+          f"{err.max():.3g} (tol {table.tol:g})")
+    print(f"бэкенд {t_backend / len(pts) * 1e6:.1f} мкс/точка, таблица {t_table / len(pts) * 1e6:.2f} мкс/точка, "
+          f"ускорение x{t_backend / max(t_table, 1e-12):.0f}")
+    return 0 if err.max() <= table.tol else 1
+
+
+__all__ = ["SurrogateTable", "build", "register", "clear", "lookup", "table_key", "tables_version", "ENV_DIR",
+           "VALUES"]
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    raise SystemExit(main())
+
@@ -0,0 +1,56 @@
+import sys
+
+import pytest
+
+from phys_prop import backends
+
+REQUESTS = [{"documentId": "GOST_30319_3_2015", "physValueId": v} for v in ("rho", "rho_st", "k", "mu")]
+
+
+def _props(T_C, p_MPa, comp=None):
+    props = {"T": {"real": T_C, "unit": "C"}, "p_abs": {"real": p_MPa, "unit": "MPa"},
+             "T_st": {"real": 20, "unit": "C"}, "p_st": {"real": 0.101325, "unit": "MPa"}}
+    if comp is not None:
+        props["composition"] = comp
+    return props
+
+
+def test_registry_selects_backend_from_config(monkeypatch):
+    monkeypatch.delenv(backends.ENV_BACKEND, raising=False)
+    assert isinstance(backends.get_backend(), backends.PyFizikaBackend)
+    monkeypatch.setenv(backends.ENV_BACKEND, "virial")
+    assert backends.get_backend() is backends.get_backend("virial")
+    with pytest.raises(ValueError, match="pyfizika, virial"):
+        backends.get_backend("nope")
+
+    from batch.manifest import backend_version
+    from phys_prop.cache import PHYS_CACHE
+    assert backend_version() == f"virial:1+digits={PHYS_CACHE.digits}"
+
+
+def test_virial_values_and_vector_batch():
+    b = backends.get_backend("virial")
+    rho, rho_st, k, mu = b.calc(REQUESTS, _props(20, 0.101325, {"Methane": 100}))
+    assert rho["rho"] == pytest.approx(0.668, rel=2e-3) == rho_st["rho_st"]  # метан при стандартных условиях
+    assert rho["phase"] == "gas" and rho["error_rho"] == pytest.approx(rho["rho"] * backends.REL_ERROR["rho"])
+    assert k["k"] == pytest.approx(1.31, abs=0.01) and mu["mu"] == pytest.approx(11.0, abs=0.5)
+
+    states = [_props(t, p) for t in (-10, 20, 50) for p in (0.5, 2.0, 6.0)]
+    batch = b.calc_many(REQUESTS, states)
+    assert batch == [b.calc(REQUESTS, s) for s in states]
+    dense = [resp[0]["rho"] for resp in batch]
+    assert dense[2] > dense[1] > dense[0]  # ρ растёт с давлением
+
+    bad = b.calc_many(REQUESTS + [{"physValueId": "cp"}], [_props(20, 1.0, {"Water": 1.0}), states[0]])
+    assert all("errorString" in d for d in bad[0])
+    assert "errorString" in bad[1][-1] and "errorString" not in bad[1][0]
+
+
+def test_runner_runs_without_pyfizika(monkeypatch):
+    monkeypatch.setenv(backends.ENV_BACKEND, "virial")
+    monkeypatch.setitem(sys.modules, "PyFizika", None)  # импорт PyFizika упал бы
+    from phys_prop.calc_phys_prop import PhysMinimalRunner
+
+    data = {"physPackage": {"requestList": REQUESTS, "physProperties": _props(15, 3.0, {"Methane": 96, "Nitrogen": 4})}}
+    out = PhysMinimalRunner(data).to_dict()
+    assert out["ro"] > 20 and out["ro_st"] == pytest.approx(0.69, rel=0.02) and out["err_ro"] > 0
@@ -0,0 +1,85 @@
+
+import pytest
+
+from phys_prop.cache import PhysCache
+
+REQUESTS = [{"documentId": "GOST_30319_3_2015", "physValueId": v} for v in ("rho", "rho_st", "k", "mu")]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """virial, который запоминает каждый вызов: список состояний, ушедших в бэкенд одним вызовом."""
+    from phys_prop import backends
+
+    monkeypatch.setenv(backends.ENV_BACKEND, "virial")
+    calls = []
+    real = backends.VirialMixBackend.calc_many
+
+    def calc_many(self, request_list, states):
+        calls.append(list(states))
+        return real(self, request_list, states)
+
+    monkeypatch.setattr(backends.VirialMixBackend, "calc_many", calc_many)
+    return calls
+
+
+def _data(T, p, comp):
+    return {"physPackage": {"requestList": REQUESTS, "physProperties": {
+        "T": T, "p_abs": p, "T_st": {"real": 20, "unit": "C"}, "p_st": {"real": 0.101325, "unit": "MPa"},
+        "phi": {"real": 0, "unit": "percent"}, "humidityType": "RelativeHumidity", "composition": comp}}}
+
+
+def test_runner_reuses_same_state_across_units_and_scaling(backend):
+    from phys_prop.calc_phys_prop import PhysMinimalRunner
+    from phys_prop.cache import PHYS_CACHE
+
+    comp = {"Methane": 95.0, "Ethane": 3.0, "Nitrogen": 2.0}
+    before = PHYS_CACHE.stats()
+    first = PhysMinimalRunner(_data({"real": 20, "unit": "C"}, {"real": 2, "unit": "MPa"}, comp)).to_dict()
+    same = _data({"real": 293.15, "unit": "K"}, {"real": 2000, "unit": "kPa"}, {k: v / 100 for k, v in comp.items()})
+    assert PhysMinimalRunner(same).to_dict() == first
+    assert len(backend) == 1
+    assert PHYS_CACHE.stats()["hits"] == before["hits"] + 1
+
+    PhysMinimalRunner(_data({"real": 21, "unit": "C"}, {"real": 2, "unit": "MPa"}, comp))
+    assert len(backend) == 2
+
+    PHYS_CACHE.clear()
+    PhysMinimalRunner(same)
+    assert len(backend) == 3
+
+
+def test_many_sends_all_cache_misses_in_one_backend_call(backend):
+    from phys_prop.calc_phys_prop import PhysMinimalRunner
+    from phys_prop.cache import PHYS_CACHE
+
+    from perf import metrics
+
+    calls = metrics.counter("new_ssu_phys_backend_calls_total")
+    before = calls.value(backend="virial", mode="batch")
+    comp = {"Methane": 95.0, "Ethane": 3.0, "Nitrogen": 2.0}
+    datas = [_data({"real": t, "unit": "C"}, {"real": 2, "unit": "MPa"}, comp) for t in (10, 11, 12)]
+    PHYS_CACHE.clear()
+    first = PhysMinimalRunner(datas[0]).to_dict()
+    runners = PhysMinimalRunner.many(datas, REQUESTS)
+    assert [len(states) for states in backend] == [1, 2]  # первое состояние уже в кэше
+    assert calls.value(backend="virial", mode="batch") == before + 2
+    assert runners[0].to_dict() == first
+    assert [r.to_dict() for r in runners[1:]] == [PhysMinimalRunner(d).to_dict() for d in datas[1:]]
+    assert len(backend) == 2  # одиночные раннеры ответили из кэша, который заполнил many()
+
+
+def test_lru_eviction_quantization_and_disable():
+    cache = PhysCache(maxsize=2, digits=6)
+    keys = [cache.key(REQUESTS, {"T": {"real": t, "unit": "K"}}) for t in (290.0, 291.0, 292.0)]
+    for i, key in enumerate(keys):
+        cache.put(key, [{"rho": float(i)}])
+    assert cache.get(keys[0]) is None and cache.get(keys[2]) == [{"rho": 2.0}]
+    assert cache.key(REQUESTS, {"T": {"real": 292.0000001, "unit": "K"}}) == keys[2]
+    assert cache.stats()["evictions"] == 1
+
+    cache.configure(digits=10)
+    assert cache.stats()["size"] == 0
+    cache.configure(maxsize=0)
+    cache.put(keys[0], [{"rho": 0.0}])
+    assert cache.get(keys[0]) is None
@@ -0,0 +1,100 @@
+from multiprocessing import get_context
+
+from phys_prop.cache import ENV_DB, PhysCache
+from phys_prop.disk_cache import DiskPhysCache
+
+REQUESTS = [{"documentId": "GOST_30319_3_2015", "physValueId": "rho"}]
+
+
+def _backend_a(request_list, props):
+    return [{"rho": 1.0}]
+
+
+def _backend_b(request_list, props):
+    return [{"rho": 2.0}]
+
+
+def _key(cache, T):
+    return cache.key(REQUESTS, {"T": {"real": T, "unit": "K"}})
+
+
+def test_second_level_survives_restart_and_is_versioned_by_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_DB, str(tmp_path / "phys.sqlite"))
+    first = PhysCache(maxsize=16)
+    first.bind_backend(_backend_a)
+    first.put(_key(first, 290.0), [{"rho": 1.0}])
+
+    restarted = PhysCache(maxsize=16)  # новый процесс: память пуста, база та же
+    restarted.bind_backend(_backend_a)
+    assert restarted.get(_key(restarted, 290.0)) == [{"rho": 1.0}]
+    assert restarted.stats()["size"] == 1  # поднято в память
+
+    restarted.bind_backend(_backend_b)  # другой бэкенд — старые записи не его
+    assert restarted.get(_key(restarted, 290.0)) is None
+
+    from phys_prop.disk_cache import backend_tag, persistent
+    store = persistent()
+    assert store.stats()["by_backend"] == {backend_tag(_backend_a): 1}
+    assert store.purge(keep_backend=backend_tag(_backend_b)) == 1
+
+
+def test_entries_are_versioned_by_quantization(tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_DB, str(tmp_path / "phys.sqlite"))
+    coarse = PhysCache(maxsize=0, digits=6)
+    coarse.bind_backend(_backend_a)
+    coarse.put(_key(coarse, 290.0), [{"rho": 1.0}])
+
+    fine = PhysCache(maxsize=0, digits=10)  # тот же ключ состояния, но ответ снят при другом квантовании
+    fine.bind_backend(_backend_a)
+    assert _key(fine, 290.0) == _key(coarse, 290.0)
+    assert fine.get(_key(fine, 290.0)) is None
+
+    from batch.manifest import backend_version
+    from phys_prop import cache
+    before = backend_version()
+    digits = cache.PHYS_CACHE.digits
+    cache.configure(digits=digits - 2)
+    try:
+        assert backend_version() != before
+    finally:
+        cache.configure(digits=digits)
+
+
+def _hammer(args):
+    path, worker, n = args
+    store = DiskPhysCache(path)
+    cache = PhysCache(maxsize=0)
+    for i in range(n):
+        store.put(_key(cache, 300.0 + worker * n + i), "tag", [{"rho": float(i)}])
+    return sum(store.get(_key(cache, 300.0 + w * n + i), "tag") is not None for w in range(worker + 1)
+               for i in range(n))
+
+
+def test_concurrent_workers_and_eviction(tmp_path):
+    path = tmp_path / "phys.sqlite"
+    workers, n = 4, 50
+    with get_context("fork").Pool(workers) as pool:
+        found = pool.map(_hammer, [(path, w, n) for w in range(workers)])
+    assert found[0] == n  # своё записанное видно всегда
+    store = DiskPhysCache(path, max_entries=120)
+    assert store.stats()["entries"] == workers * n
+    assert store.evict() == workers * n - 120
+    assert store.stats()["entries"] == 120
+
+
+def test_warm_uses_the_backend_it_was_given(tmp_path, monkeypatch, capsys):
+    import shutil
+    from pathlib import Path
+
+    from phys_prop.backends import ENV_BACKEND
+    from phys_prop.disk_cache import main
+
+    monkeypatch.setenv(ENV_BACKEND, "pyfizika")  # окружение не должно перебить --physics
+    monkeypatch.setenv(ENV_DB, str(tmp_path / "phys.sqlite"))
+    (tmp_path / "in").mkdir()
+    shutil.copy(Path(__file__).resolve().parents[1] / "inputdata" / "sharp_01.json", tmp_path / "in")
+    assert main(["warm", "--db", str(tmp_path / "phys.sqlite"), "--input", str(tmp_path / "in"),
+                 "--physics", "virial"]) == 0
+    assert "с ошибкой: 0" in capsys.readouterr().out
+    assert main(["stats"]) == 0
+    assert "virial@" in capsys.readouterr().out
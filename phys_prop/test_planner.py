@@ -0,0 +1,105 @@
+import sys
+import types
+
+import pytest
+
+REQUESTS = [{"documentId": "GOST_30319_3_2015", "physValueId": v} for v in ("rho", "rho_st", "k", "mu")]
+
+
+@pytest.fixture
+def plan_cls(monkeypatch):
+    try:
+        import phys_prop_exceptions  # noqa: F401
+    except ImportError:
+        exc = types.ModuleType("phys_prop_exceptions")
+        exc.ValidationError = type("ValidationError", (Exception,), {})
+        monkeypatch.setitem(sys.modules, "phys_prop_exceptions", exc)
+    monkeypatch.setitem(sys.modules, "stp_errors", None)  # θ — только центральными разностями
+    from phys_prop.planner import PhysPlan
+    return PhysPlan
+
+
+class _Runner:
+    """
+    Замена PhysMinimalRunner: ρ = p/T, k = 1 + T/1000, при T > 100 °C — не газ; запоминает вызовы many()
+    как (запрошенные величины, число состояний).
+    """
+
+    calls = []
+
+    def __init__(self, data, request_list):
+        props = data["physPackage"]["physProperties"]
+        T = props["T"]["real"] + 273.15
+        if T > 373.15:
+            raise ValueError("Фаза не газ")
+        p = props["p_abs"]["real"]
+        self.out = {"ro": p / T, "ro_st": 0.7, "k": 1 + T / 1000, "mu": 11.0,
+                    "err_ro": 0.1, "err_ro_st": 0.1, "err_k": 0.1, "err_mu": 0.1, "thetas": None}
+
+    @classmethod
+    def many(cls, datas, request_list):
+        cls.calls.append(([r["physValueId"] for r in request_list], len(datas)))
+        out = []
+        for data in datas:
+            try:
+                out.append(cls(data, request_list))
+            except Exception as e:
+                out.append(e)
+        return out
+
+    def to_dict(self):
+        return dict(self.out)
+
+
+def _raw():
+    return {"physPackage": {"requestList": REQUESTS, "physProperties": {
+        "T": {"real": 20.0, "unit": "C"}, "p_abs": {"real": 2.0, "unit": "MPa"},
+        "composition": {"Methane": 95.0, "Nitrogen": 5.0}}}}
+
+
+def test_one_backend_call_per_state_and_memo(plan_cls):
+    _Runner.calls = []
+    plan = plan_cls(_raw(), runner=_Runner)
+    base = plan.get()
+    assert base["ro"] == pytest.approx(2.0 / 293.15) and base["mu"] == 11.0
+    assert _Runner.calls == [(["rho", "rho_st", "k", "mu"], 1)]
+
+    # тот же состав в долях — то же состояние, вызова нет
+    assert plan.get({"composition": {"Methane": 0.95, "Nitrogen": 0.05}}, ("rho",))["ro"] == base["ro"]
+    assert len(_Runner.calls) == 1
+
+    # объявленные заранее величины одного состояния уходят одним вызовом
+    warm = {"T": {"real": 30.0, "unit": "C"}}
+    plan.need(warm, ("rho",))
+    plan.need(warm, ("k",))
+    plan.get(warm, ("rho",))
+    plan.get({"T": {"real": 303.15, "unit": "K"}}, ("k",))
+    assert _Runner.calls[1:] == [(["rho", "k"], 1)]
+    assert plan.stats() == {"requests": 4, "backend_calls": 2, "saved": 2, "states": 2}
+
+
+def test_declared_states_share_one_backend_call_and_keep_their_errors(plan_cls):
+    _Runner.calls = []
+    plan = plan_cls(_raw(), runner=_Runner)
+    states = [{"T": {"real": t, "unit": "C"}} for t in (30.0, 40.0, 150.0)]
+    for s in states:
+        plan.need(s, ("rho",))
+    plan.need({"T": {"real": 50.0, "unit": "C"}}, ("rho", "k"))  # другой набор величин — своим вызовом
+    assert plan.get(states[0], ("rho",))["ro"] == pytest.approx(2.0 / 303.15)
+    assert _Runner.calls == [(["rho"], 3)]
+    assert plan.get(states[1], ("rho",))["ro"] == pytest.approx(2.0 / 313.15)
+    with pytest.raises(ValueError, match="не газ"):
+        plan.get(states[2], ("rho",))
+    assert len(_Runner.calls) == 1
+
+
+def test_thetas_from_four_states_without_leaking_perturbations(plan_cls):
+    _Runner.calls = []
+    plan = plan_cls(_raw(), runner=_Runner)
+    thetas = plan.thetas()
+    assert _Runner.calls == [(["rho", "k"], 4)]  # четыре возмущённых состояния — один вызов
+    assert thetas["theta_rho_p_abs"] == pytest.approx(1.0)  # ρ ∝ p, давление возмущается при базовой T
+    assert thetas["theta_rho_T"] == pytest.approx(-1.0, rel=1e-3)
+
+    assert plan.thetas() == thetas  # повтор в том же запросе — из памяти
+    assert plan.stats()["backend_calls"] == 1 and plan.stats()["saved"] == 7
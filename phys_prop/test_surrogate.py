@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from phys_prop import surrogate
+from phys_prop.backends import ENV_BACKEND, VirialMixBackend, get_backend
+
+COMP = {"Methane": 94.0, "Ethane": 3.0, "Nitrogen": 2.0, "CarbonDioxide": 1.0}
+PROPS = {"T_st": {"real": 20, "unit": "C"}, "p_st": {"real": 0.101325, "unit": "MPa"}, "composition": COMP}
+REQUESTS = [{"documentId": "GOST_30319_3_2015", "physValueId": v} for v in ("rho", "rho_st", "k", "mu")]
+
+
+@pytest.fixture(scope="module")
+def table():
+    return surrogate.build(PROPS, T_range=(253.15, 323.15), p_range=(0.5e6, 6e6), tol=1e-4, backend="virial")
+
+
+def test_build_meets_tolerance_on_fresh_points_and_roundtrips(table, tmp_path):
+    assert table.max_rel_error <= 1e-4 and table.checked > 100
+    rng = random.Random(7)
+    pts = [(rng.uniform(253.15, 323.15), rng.uniform(0.5e6, 6e6)) for _ in range(300)]
+    got = table.interpolate([t for t, _ in pts], [p for _, p in pts])
+    exact = get_backend("virial").calc_many(
+        REQUESTS, [dict(PROPS, T={"real": t, "unit": "K"}, p_abs={"real": p, "unit": "Pa"}) for t, p in pts])
+    for n, resp in enumerate(exact):
+        for d, name in zip(resp, ("rho", "rho_st", "k", "mu")):
+            assert got[name][n] == pytest.approx(d[name], rel=1e-4)
+
+    # ряд с точкой вне сетки: её досчитывает бэкенд
+    series = table.series([293.15, 400.0], [2e6, 2e6])
+    outside = get_backend("virial").calc(REQUESTS, dict(PROPS, T={"real": 400.0, "unit": "K"},
+                                                        p_abs={"real": 2e6, "unit": "Pa"}))
+    assert series["rho"][1] == outside[0]["rho"]
+
+    table.save(tmp_path / "t.json")
+    again = surrogate.SurrogateTable.load(tmp_path / "t.json")
+    assert again.key == table.key and again.interpolate(293.15, 2e6)["k"][0] == table.interpolate(293.15, 2e6)["k"][0]
+
+
+def test_runner_serves_tabulated_states_and_falls_back(table, monkeypatch):
+    from phys_prop.cache import PHYS_CACHE
+    from phys_prop.calc_phys_prop import PhysMinimalRunner
+
+    monkeypatch.setenv(ENV_BACKEND, "virial")
+    monkeypatch.delenv(surrogate.ENV_DIR, raising=False)
+    calls = []
+    real = VirialMixBackend.calc_many
+    monkeypatch.setattr(VirialMixBackend, "calc_many", lambda self, rl, st: calls.append(len(st)) or real(self, rl, st))
+    PHYS_CACHE.clear()
+    surrogate.register(table)
+    try:
+        # те же состав и документ, другие единицы и перепад — табличная точка
+        props = dict(PROPS, T={"real": 15, "unit": "C"}, p_abs={"real": 2000, "unit": "kPa"},
+                     dp={"real": 28, "unit": "kPa"}, composition={k: v / 100 for k, v in COMP.items()})
+        out = PhysMinimalRunner({"physPackage": {"requestList": REQUESTS, "physProperties": props}}).to_dict()
+        assert calls == []
+        assert out["ro"] == pytest.approx(table.interpolate(288.15, 2e6)["rho"][0]) and out["err_ro"] > 0
+
+        hot = dict(props, T={"real": 90, "unit": "C"})  # вне сетки
+        PhysMinimalRunner({"physPackage": {"requestList": REQUESTS, "physProperties": hot}})
+        assert calls == [1]
+    finally:
+        surrogate.clear()
+
+
+def test_table_set_is_part_of_output_and_disk_cache_versions(table, tmp_path, monkeypatch):
+    from batch.manifest import backend_version
+    from phys_prop.disk_cache import backend_tag
+
+    monkeypatch.setenv(ENV_BACKEND, "virial")
+    monkeypatch.delenv(surrogate.ENV_DIR, raising=False)
+    surrogate.clear()
+    identity = get_backend("virial").identity()
+    plain = (backend_version(), backend_tag(identity))
+
+    (tmp_path / "one").mkdir()
+    table.save(tmp_path / "one" / "sharp.json")
+    monkeypatch.setenv(surrogate.ENV_DIR, str(tmp_path / "one"))
+    one = (backend_version(), backend_tag(identity))
+    assert one[0] != plain[0] and one[1] != plain[1]
+
+    (tmp_path / "two").mkdir()
+    table.save(tmp_path / "two" / "sharp.json")
+    (tmp_path / "two" / "cone.json").write_text("{}", encoding="utf-8")  # другой набор таблиц
+    monkeypatch.setenv(surrogate.ENV_DIR, str(tmp_path / "two"))
+    assert backend_version() not in (plain[0], one[0])
+
+    monkeypatch.delenv(surrogate.ENV_DIR)
+    surrogate.register(table)
+    try:
+        assert backend_version() != plain[0]
+    finally:
+        surrogate.clear()
+    assert (backend_version(), backend_tag(identity)) == plain
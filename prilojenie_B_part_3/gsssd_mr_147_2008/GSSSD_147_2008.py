@@ -1,5 +1,4 @@
 import math
-from prettytable import PrettyTable
 from calc_A import get_A0, get_A1
 from calc_output_value import get_H, get_Hdf, get_K, get_Kdf, get_Mu
 from tables import R, Bj, Bj_, Cj_, Mj_, Nj, Nj_, Pkr, Tkr, Rokr, Zkr, Aj, Mj
@@ -114,6 +113,8 @@ def main(T = None, p = None, x = None):
 
 
 if __name__ == '__main__':
+    from prettytable import PrettyTable  # только для печати таблицы, расчёту не нужен
+
     with open('result.txt', 'w') as file:
         Tlist = [273.15] * 2 + [647] * 2  + [373.15] * 2 + [873.15] * 2 + [1073.15]
         plist = [0.001, 100, 22.5, 100, 0.05, 0.1, 0.05, 30, 100]
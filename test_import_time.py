@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+
+# Бюджет с запасом: на момент введения `import main` занимал ~0.08 с, а с PyFizika/numpy/colorlog
+# на верхнем уровне — в разы больше. Регресс ловим по списку модулей, время — грубая страховка.
+IMPORT_BUDGET_S = 0.5
+HEAVY = ("numpy", "colorlog", "PyFizika", "phys_prop.calc_phys_prop", "controllers.calculation_adapter")
+# режимы batch и инструменты perf грузятся в своих ветках main, а не при import main
+LAZY = ("tracemalloc", "cProfile", "pstats", "batch", "perf", "phys_prop.cache")
+
+
+def _probe(stmt: str, modules=HEAVY) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"{stmt}\n"
+        "dt = time.perf_counter() - t0\n"
+        f"print(json.dumps({{'seconds': dt, 'loaded': [m for m in {modules!r} if m in sys.modules]}}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_import_main_is_light():
+    probe = _probe("import main")
+    assert probe["loaded"] == []
+    assert probe["seconds"] < IMPORT_BUDGET_S
+
+
+def test_import_main_skips_batch_and_perf():
+    assert _probe("import main", LAZY)["loaded"] == []
+
+
+@pytest.mark.parametrize("stmt", [
+    "import flow_straightness.rules_tables",
+    "import orifices_classes.main",
+])
+def test_geometry_only_imports_skip_numpy_and_colorlog(stmt):
+    loaded = _probe(stmt)["loaded"]
+    assert "numpy" not in loaded
+    assert "colorlog" not in loaded
+
+
+def test_help_does_not_load_calculation():
+    out = subprocess.run(
+        [sys.executable, "-c", "import sys, runpy; sys.argv = ['main.py', '--help']\n"
+                               "try:\n    runpy.run_path('main.py', run_name='__main__')\n"
+                               "except SystemExit:\n    pass\n"
+                               f"print([m for m in {HEAVY!r} if m in sys.modules])"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip().splitlines()[-1] == "[]"
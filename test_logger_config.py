@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+_SCRIPT = """
+from concurrent.futures import ProcessPoolExecutor
+from logger_config import get_logger
+
+def work(i):
+    get_logger("worker").info("воркер %d", i)
+    return i
+
+if __name__ == "__main__":
+    log = get_logger("main")
+    log.debug("не видно %s", 1)
+    log.info("привет %s", "мир")
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        log.exception("ошибка")
+    with ProcessPoolExecutor(2) as ex:
+        list(ex.map(work, range(3)))
+    log.warning("конец")
+"""
+
+
+def _run(**env_vars) -> subprocess.CompletedProcess:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("NEW_SSU_LOG_")}
+    env.update(env_vars)
+    return subprocess.run([sys.executable, "-c", _SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True,
+                          check=True)
+
+
+def test_production_profile_writes_json_lines_from_all_processes():
+    lines = [json.loads(line) for line in _run(NEW_SSU_LOG_PROFILE="production").stderr.splitlines()]
+    assert {r["level"] for r in lines} == {"INFO", "ERROR", "WARNING"}
+    main = [r["msg"] for r in lines if r["logger"] == "main"]
+    assert main == ["привет мир", "ошибка", "конец"]
+    assert "ZeroDivisionError" in next(r["exc"] for r in lines if r["msg"] == "ошибка")
+    assert sorted(r["msg"] for r in lines if r["logger"] == "worker") == ["воркер 0", "воркер 1", "воркер 2"]
+
+
+def test_level_and_format_override_profile():
+    err = _run(NEW_SSU_LOG_PROFILE="production", NEW_SSU_LOG_LEVEL="WARNING", NEW_SSU_LOG_FORMAT="plain").stderr
+    assert "| WARNING  | main | конец" in err
+    assert "привет" not in err and "воркер" not in err